@@ -3,8 +3,14 @@ let ventasPorDiaTiendaChart = null;
 let ventasPorHoraTiendaChart = null;
 let ventasPorEmpleadoChart = null;
 
+// Antigüedad máxima del resumen precalculado (se regenera cada 30 minutos con cron): las ventas
+// borradas o modificadas después de generarlo (devoluciones, deshacer) siguen contadas en él,
+// así que uno más viejo se descarta y se agrupan todas las ventas del mes
+const ANTIGUEDAD_MAXIMA_RESUMEN_MS = 60 * 60 * 1000;
+
 // Función para obtener ventas del mes con información de tiendas y empleados
-async function obtenerVentasDelMesCompleto() {
+// (con desdeId, solo las ventas con id mayor: las que no están en el resumen precalculado)
+async function obtenerVentasDelMesCompleto(desdeId = null) {
     try {
         const user = JSON.parse(sessionStorage.getItem('user'));
         const ahora = new Date();
@@ -12,13 +18,16 @@ async function obtenerVentasDelMesCompleto() {
         const ultimoDiaMes = new Date(ahora.getFullYear(), ahora.getMonth() + 1, 0, 23, 59, 59);
         
         // Cargar ventas sin relaciones automáticas (usar juguete_codigo)
-        const { data: ventasSimples, error: errorSimple } = await window.supabaseClient
+        let consulta = window.supabaseClient
             .from('ventas')
             .select('created_at, precio_venta, cantidad, juguete_codigo, empleado_id')
             .eq('empresa_id', user.empresa_id)
             .gte('created_at', primerDiaMes.toISOString())
-            .lte('created_at', ultimoDiaMes.toISOString())
-            .order('created_at', { ascending: true });
+            .lte('created_at', ultimoDiaMes.toISOString());
+        if (desdeId !== null) {
+            consulta = consulta.gt('id', desdeId);
+        }
+        const { data: ventasSimples, error: errorSimple } = await consulta.order('created_at', { ascending: true });
         
         if (errorSimple) throw errorSimple;
         
@@ -58,22 +67,97 @@ async function obtenerVentasDelMesCompleto() {
     }
 }
 
+// Resumen precalculado del mes actual (scripts/analisis_ventas.py, tabla resumen_ventas_mes)
+// o null si no hay o es más viejo que ANTIGUEDAD_MAXIMA_RESUMEN_MS: en ese caso se agrupan
+// todas las ventas del mes como antes
+async function obtenerResumenVentasDelMes() {
+    try {
+        const user = JSON.parse(sessionStorage.getItem('user'));
+        const ahora = new Date();
+        const mes = `${ahora.getFullYear()}-${String(ahora.getMonth() + 1).padStart(2, '0')}-01`;
+        const { data, error } = await window.supabaseClient
+            .from('resumen_ventas_mes')
+            .select('ultimo_venta_id, datos, generado_at')
+            .eq('empresa_id', user.empresa_id)
+            .eq('mes', mes)
+            .maybeSingle();
+        
+        if (error || !data || !data.datos || data.datos.version !== 1) return null;
+        const antiguedad = Date.now() - new Date(data.generado_at).getTime();
+        if (!(antiguedad <= ANTIGUEDAD_MAXIMA_RESUMEN_MS)) {
+            console.warn(`Resumen de ventas del mes desactualizado (${data.generado_at}): se usan todas las ventas del mes`);
+            return null;
+        }
+        return data;
+    } catch (error) {
+        console.error('Error al obtener el resumen de ventas del mes:', error);
+        return null;
+    }
+}
+
+// Estructuras de procesarVentasPorDiaTienda / procesarVentasPorHoraTienda desde el resumen
+// (campo: 'dias' o 'horas'; los días empiezan en 1 y las horas en 0)
+function ventasPorTiendaDesdeResumen(resumen, campo) {
+    const ventasPorTienda = {};
+    const inicio = campo === 'dias' ? 1 : 0;
+    resumen.tiendas.forEach(tienda => {
+        const valores = {};
+        tienda[campo].cantidad.forEach((cantidad, i) => {
+            valores[i + inicio] = { cantidad: cantidad, total: tienda[campo].total[i] };
+        });
+        ventasPorTienda[tienda.id] = { nombre: tienda.nombre, [campo]: valores };
+    });
+    return ventasPorTienda;
+}
+
+// Suma a ventasPorTienda (del resumen) las de las ventas nuevas, con la misma estructura
+function sumarVentasPorTienda(ventasPorTienda, nuevas, campo) {
+    Object.keys(nuevas).forEach(tiendaId => {
+        if (!ventasPorTienda[tiendaId]) {
+            ventasPorTienda[tiendaId] = nuevas[tiendaId];
+            return;
+        }
+        Object.keys(nuevas[tiendaId][campo]).forEach(clave => {
+            const destino = ventasPorTienda[tiendaId][campo][clave];
+            if (destino) {
+                destino.cantidad += nuevas[tiendaId][campo][clave].cantidad;
+                destino.total += nuevas[tiendaId][campo][clave].total;
+            }
+        });
+    });
+    return ventasPorTienda;
+}
+
+// Ventas del mes agrupadas: desde el resumen más las ventas nuevas, o todas las del mes
+// Devuelve { resumen, ventas } (resumen null si no hay)
+async function obtenerVentasParaAnalisis() {
+    const resumen = await obtenerResumenVentasDelMes();
+    const ventas = await obtenerVentasDelMesCompleto(resumen ? resumen.ultimo_venta_id : null);
+    return { resumen: resumen ? resumen.datos : null, ventas };
+}
+
 // Función para cargar gráficos por tienda
 async function cargarGraficosPorTienda() {
-    const ventas = await obtenerVentasDelMesCompleto();
+    const { resumen, ventas } = await obtenerVentasParaAnalisis();
     
-    if (ventas.length === 0) {
+    if (ventas.length === 0 && (!resumen || resumen.ventas === 0)) {
         const diaInfo = document.getElementById('ventasPorDiaTiendaInfo');
         if (diaInfo) diaInfo.innerHTML = '<p style="color: #64748b;">No hay ventas en el mes actual</p>';
         return;
     }
     
     // Procesar ventas por día por tienda
-    const ventasPorDiaTienda = procesarVentasPorDiaTienda(ventas);
+    let ventasPorDiaTienda = procesarVentasPorDiaTienda(ventas);
+    if (resumen) {
+        ventasPorDiaTienda = sumarVentasPorTienda(ventasPorTiendaDesdeResumen(resumen, 'dias'), ventasPorDiaTienda, 'dias');
+    }
     crearGraficoVentasPorDiaTienda(ventasPorDiaTienda);
     
     // Procesar ventas por hora por tienda
-    const ventasPorHoraTienda = procesarVentasPorHoraTienda(ventas);
+    let ventasPorHoraTienda = procesarVentasPorHoraTienda(ventas);
+    if (resumen) {
+        ventasPorHoraTienda = sumarVentasPorTienda(ventasPorTiendaDesdeResumen(resumen, 'horas'), ventasPorHoraTienda, 'horas');
+    }
     crearGraficoVentasPorHoraTienda(ventasPorHoraTienda);
     
     // Actualizar información
@@ -353,15 +437,26 @@ function actualizarInfoVentasPorTienda(ventasPorTienda) {
 
 // Función para cargar gráfico de ventas por empleado
 async function cargarGraficoVentasPorEmpleado() {
-    const ventas = await obtenerVentasDelMesCompleto();
+    const { resumen, ventas } = await obtenerVentasParaAnalisis();
     
-    if (ventas.length === 0) {
+    if (ventas.length === 0 && (!resumen || resumen.ventas === 0)) {
         const infoDiv = document.getElementById('ventasPorEmpleadoInfo');
         if (infoDiv) infoDiv.innerHTML = '<p style="color: #64748b;">No hay ventas en el mes actual</p>';
         return;
     }
     
     const ventasPorEmpleado = procesarVentasPorEmpleado(ventas);
+    if (resumen) {
+        // Las del resumen más las de las ventas nuevas
+        resumen.empleados.forEach(empleado => {
+            const nuevas = ventasPorEmpleado[empleado.id];
+            ventasPorEmpleado[empleado.id] = {
+                nombre: empleado.nombre,
+                cantidad: empleado.cantidad + (nuevas ? nuevas.cantidad : 0),
+                total: empleado.total + (nuevas ? nuevas.total : 0)
+            };
+        });
+    }
     crearGraficoVentasPorEmpleado(ventasPorEmpleado);
     actualizarInfoVentasPorEmpleado(ventasPorEmpleado);
 }
@@ -19,6 +19,60 @@ function capitalizarPrimeraLetra(texto) {
 // DASHBOARD - RESUMEN
 // ============================================
 
+// Totales del resumen: tiendas, bodegas, usuarios y ganancias (para empleados, sin ventas al por mayor).
+// Con las tablas de resumen (migrations/crear_tablas_resumen_kpi.sql, scripts/actualizar_resumenes.py)
+// es una sola llamada que no descarga las ventas; si la función no existe, las consultas de siempre
+async function obtenerTotalesDashboard(empresaId, isEmpleado) {
+    const { data: resumen, error: errorResumen } = await window.supabaseClient
+        .rpc('resumen_dashboard', { p_empresa_id: empresaId, p_solo_detal: isEmpleado });
+    if (!errorResumen && resumen) {
+        return {
+            tiendas: resumen.tiendas || 0,
+            bodegas: resumen.bodegas || 0,
+            usuarios: resumen.usuarios || 0,
+            ganancias: parseFloat(resumen.ganancias || 0)
+        };
+    }
+    
+    // Cargar totales (optimizado: solo counts)
+    // Para empleados, las ventas solo cuentan las NO mayoristas (es_por_mayor = false)
+    let ventasTotalesQuery = window.supabaseClient
+        .from('ventas')
+        .select('precio_venta')
+        .eq('empresa_id', empresaId);
+    if (isEmpleado) {
+        ventasTotalesQuery = ventasTotalesQuery.eq('es_por_mayor', false);
+    }
+
+    const [tiendas, bodegas, usuarios, ventas] = await Promise.all([
+        window.supabaseClient.from('tiendas').select('id', { count: 'exact' }).eq('empresa_id', empresaId),
+        window.supabaseClient.from('bodegas').select('id', { count: 'exact' }).eq('empresa_id', empresaId),
+        window.supabaseClient.from('usuarios').select('id', { count: 'exact' }).eq('empresa_id', empresaId),
+        ventasTotalesQuery
+    ]);
+
+    // Verificar errores
+    if (tiendas.error) {
+        console.error('Error al cargar tiendas:', tiendas.error);
+    }
+    if (bodegas.error) {
+        console.error('Error al cargar bodegas:', bodegas.error);
+    }
+    if (usuarios.error) {
+        console.error('Error al cargar usuarios:', usuarios.error);
+    }
+    if (ventas.error) {
+        console.error('Error al cargar ventas:', ventas.error);
+    }
+
+    return {
+        tiendas: tiendas.count || 0,
+        bodegas: bodegas.count || 0,
+        usuarios: usuarios.count || 0,
+        ganancias: (ventas.data || []).reduce((sum, v) => sum + parseFloat(v.precio_venta || 0), 0)
+    };
+}
+
 async function loadDashboardSummary() {
     try {
         const user = JSON.parse(sessionStorage.getItem('user'));
@@ -28,36 +82,7 @@ async function loadDashboardSummary() {
         }
         const isEmpleado = user.tipo_usuario_id === 3;
         
-        // Cargar totales (optimizado: solo counts)
-        // Para empleados, las ventas solo cuentan las NO mayoristas (es_por_mayor = false)
-        let ventasTotalesQuery = window.supabaseClient
-            .from('ventas')
-            .select('precio_venta')
-            .eq('empresa_id', user.empresa_id);
-        if (isEmpleado) {
-            ventasTotalesQuery = ventasTotalesQuery.eq('es_por_mayor', false);
-        }
-
-        const [tiendas, bodegas, usuarios, ventas] = await Promise.all([
-            window.supabaseClient.from('tiendas').select('id', { count: 'exact' }).eq('empresa_id', user.empresa_id),
-            window.supabaseClient.from('bodegas').select('id', { count: 'exact' }).eq('empresa_id', user.empresa_id),
-            window.supabaseClient.from('usuarios').select('id', { count: 'exact' }).eq('empresa_id', user.empresa_id),
-            ventasTotalesQuery
-        ]);
-
-        // Verificar errores
-        if (tiendas.error) {
-            console.error('Error al cargar tiendas:', tiendas.error);
-        }
-        if (bodegas.error) {
-            console.error('Error al cargar bodegas:', bodegas.error);
-        }
-        if (usuarios.error) {
-            console.error('Error al cargar usuarios:', usuarios.error);
-        }
-        if (ventas.error) {
-            console.error('Error al cargar ventas:', ventas.error);
-        }
+        const totales = await obtenerTotalesDashboard(user.empresa_id, isEmpleado);
 
         const totalTiendasEl = document.getElementById('totalTiendas');
         const totalBodegasEl = document.getElementById('totalBodegas');
@@ -65,19 +90,18 @@ async function loadDashboardSummary() {
         const totalGananciasEl = document.getElementById('totalGanancias');
 
         if (totalTiendasEl) {
-            totalTiendasEl.textContent = tiendas.count || 0;
+            totalTiendasEl.textContent = totales.tiendas;
         }
         if (totalBodegasEl) {
-            totalBodegasEl.textContent = bodegas.count || 0;
+            totalBodegasEl.textContent = totales.bodegas;
         }
         if (totalUsuariosEl) {
-            totalUsuariosEl.textContent = usuarios.count || 0;
+            totalUsuariosEl.textContent = totales.usuarios;
         }
         
-        // Calcular ganancias
-        const totalGanancias = (ventas.data || []).reduce((sum, v) => sum + parseFloat(v.precio_venta || 0), 0);
+        // Ganancias
         if (totalGananciasEl) {
-            totalGananciasEl.textContent = '$' + totalGanancias.toLocaleString('es-CO', { minimumFractionDigits: 2 });
+            totalGananciasEl.textContent = '$' + totales.ganancias.toLocaleString('es-CO', { minimumFractionDigits: 2 });
         }
 
         // Cargar ventas recientes (cargar sin relaciones automáticas, usar juguete_codigo)
@@ -883,6 +907,41 @@ function actualizarBotonDeshacerVenta(mostrar) {
     }
 }
 
+// Devuelve unidades de un juguete a su bodega o tienda al deshacer una venta o un movimiento.
+// El índice único (empresa, código, ubicación) no admite otro registro del mismo código ahí:
+// si ya existe uno (por ejemplo, se abasteció después) se le suman las unidades; si no, se crea
+// con datosJuguete. Lanza el error de Supabase para que no se borre la venta o el movimiento.
+async function restaurarJugueteEnUbicacion(datosJuguete, cantidad) {
+    const campoUbicacion = datosJuguete.bodega_id ? 'bodega_id' : 'tienda_id';
+    const valorUbicacion = datosJuguete.bodega_id || datosJuguete.tienda_id;
+
+    if (valorUbicacion) {
+        const { data: jugueteExistenteData, error: busquedaError } = await window.supabaseClient
+            .from('juguetes')
+            .select('id, cantidad')
+            .eq('codigo', datosJuguete.codigo)
+            .eq('empresa_id', datosJuguete.empresa_id)
+            .eq(campoUbicacion, valorUbicacion)
+            .limit(1);
+        if (busquedaError) throw busquedaError;
+
+        if (jugueteExistenteData && jugueteExistenteData.length > 0) {
+            const jugueteExistente = jugueteExistenteData[0];
+            const { error: updateError } = await window.supabaseClient
+                .from('juguetes')
+                .update({ cantidad: (jugueteExistente.cantidad || 0) + cantidad })
+                .eq('id', jugueteExistente.id);
+            if (updateError) throw updateError;
+            return;
+        }
+    }
+
+    const { error: insertError } = await window.supabaseClient
+        .from('juguetes')
+        .insert({ ...datosJuguete, cantidad: cantidad });
+    if (insertError) throw insertError;
+}
+
 // Función para deshacer la última venta
 async function deshacerUltimaVenta() {
     if (!ultimaVenta) {
@@ -965,22 +1024,23 @@ async function deshacerUltimaVenta() {
                     nuevoJuguete.bodega_id = null;
                 }
                 
-                await window.supabaseClient
-                    .from('juguetes')
-                    .insert(nuevoJuguete);
+                // Si el código ya volvió a la ubicación, se suman las unidades a ese registro
+                await restaurarJugueteEnUbicacion(nuevoJuguete, ventaInfo.juguete_info.cantidad_original);
             } else {
                 // Si solo se redujo la cantidad, restaurarla
-                await window.supabaseClient
+                const { error: restaurarError } = await window.supabaseClient
                     .from('juguetes')
                     .update({ cantidad: ventaInfo.juguete_info.cantidad_original })
                     .eq('id', ventaInfo.juguete_info.juguete_id);
+                if (restaurarError) throw restaurarError;
             }
             
             // 3. Eliminar registro de venta
-            await window.supabaseClient
+            const { error: deleteError } = await window.supabaseClient
                 .from('ventas')
                 .delete()
                 .eq('id', ventaInfo.venta_id);
+            if (deleteError) throw deleteError;
         }
         
         // Limpiar última venta
@@ -3313,13 +3373,12 @@ async function ejecutarPlanMovimientoInterno(planId) {
                     continue;
                 }
 
-                // Verificar si existe en destino
+                // Verificar si existe en destino (mismo código: el índice único no admite otro)
                 const campoDestino = plan.tipo_destino === 'bodega' ? 'bodega_id' : 'tienda_id';
                 const { data: jugueteExistenteData } = await window.supabaseClient
                     .from('juguetes')
                     .select('*')
                     .eq('codigo', jugueteActual.codigo)
-                    .eq('nombre', jugueteActual.nombre)
                     .eq('empresa_id', user.empresa_id)
                     .eq(campoDestino, plan.destino_id)
                     .limit(1);
@@ -4740,13 +4799,12 @@ function initAbastecer() {
                     continue;
                 }
 
-                // Verificar si ya existe un juguete con el mismo código Y nombre en el destino
+                // Verificar si ya existe un juguete con el mismo código en el destino (el índice único no admite otro)
                 const campoDestino = destinoTipoVal === 'bodega' ? 'bodega_id' : 'tienda_id';
                 const { data: jugueteExistenteData } = await window.supabaseClient
                     .from('juguetes')
                     .select('*')
                     .eq('codigo', jugueteActual.codigo)
-                    .eq('nombre', jugueteActual.nombre)
                     .eq('empresa_id', user.empresa_id)
                     .eq(campoDestino, destinoId)
                     .limit(1);
@@ -5036,28 +5094,31 @@ async function deshacerUltimoMovimientoAbastecer() {
             
             // 1. Eliminar registros creados en origen (si existe)
             if (movimiento.juguete_id_origen_creado) {
-                await window.supabaseClient
+                const { error: origenError } = await window.supabaseClient
                     .from('juguetes')
                     .delete()
                     .eq('id', movimiento.juguete_id_origen_creado);
+                if (origenError) throw origenError;
             }
             
             // 2. Revertir destino
             if (movimiento.juguete_creado_destino) {
                 // Si se creó un nuevo registro, eliminarlo
                 if (movimiento.juguete_id_destino) {
-                    await window.supabaseClient
+                    const { error: destinoError } = await window.supabaseClient
                         .from('juguetes')
                         .delete()
                         .eq('id', movimiento.juguete_id_destino);
+                    if (destinoError) throw destinoError;
                 }
             } else if (movimiento.juguete_existia_en_destino) {
                 // Si existía, restaurar la cantidad original
                 if (movimiento.juguete_id_destino) {
-                    await window.supabaseClient
+                    const { error: destinoError } = await window.supabaseClient
                         .from('juguetes')
                         .update({ cantidad: movimiento.cantidad_destino_original })
                         .eq('id', movimiento.juguete_id_destino);
+                    if (destinoError) throw destinoError;
                 }
             }
             
@@ -5095,16 +5156,16 @@ async function deshacerUltimoMovimientoAbastecer() {
                 jugueteOriginal.bodega_id = null;
             }
             
-            await window.supabaseClient
-                .from('juguetes')
-                .insert(jugueteOriginal);
+            // Si el código ya volvió al origen, se suman las unidades a ese registro
+            await restaurarJugueteEnUbicacion(jugueteOriginal, movimiento.cantidad_origen_original);
             
             // 4. Eliminar registro de movimiento de auditoría
             if (movimiento.movimiento_id) {
-                await window.supabaseClient
+                const { error: deleteError } = await window.supabaseClient
                     .from('movimientos')
                     .delete()
                     .eq('id', movimiento.movimiento_id);
+                if (deleteError) throw deleteError;
             }
         }
         
@@ -5732,12 +5793,11 @@ window.procesarDevolucion = async function(codigoVenta, itemsSeleccionados = nul
             const valorUbicacion = juguete.bodega_id || juguete.tienda_id;
 
             if (valorUbicacion) {
-                // Buscar juguete con mismo código, nombre Y ubicación
+                // Buscar juguete con mismo código Y ubicación (el índice único no admite otro)
                 const { data: jugueteExistenteData, error: jugueteError } = await window.supabaseClient
                     .from('juguetes')
                     .select('*')
                     .eq('codigo', juguete.codigo)
-                    .eq('nombre', juguete.nombre)
                     .eq('empresa_id', user.empresa_id)
                     .eq(campoUbicacion, valorUbicacion)
                     .limit(1);
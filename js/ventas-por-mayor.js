@@ -869,10 +869,11 @@ async function deshacerUltimaVentaPorMayor() {
             
             // 1. Eliminar pago si existe
             if (ventaInfo.pago_id) {
-                await window.supabaseClient
+                const { error: pagoError } = await window.supabaseClient
                     .from('pagos')
                     .delete()
                     .eq('id', ventaInfo.pago_id);
+                if (pagoError) throw pagoError;
             }
             
             // 2. Restaurar cantidad del juguete
@@ -893,22 +894,23 @@ async function deshacerUltimaVentaPorMayor() {
                     nuevoJuguete.bodega_id = null;
                 }
                 
-                await window.supabaseClient
-                    .from('juguetes')
-                    .insert(nuevoJuguete);
+                // Si el código ya volvió a la ubicación, se suman las unidades a ese registro
+                await restaurarJugueteEnUbicacion(nuevoJuguete, ventaInfo.juguete_info.cantidad_original);
             } else {
                 // Si solo se redujo la cantidad, restaurarla
-                await window.supabaseClient
+                const { error: restaurarError } = await window.supabaseClient
                     .from('juguetes')
                     .update({ cantidad: ventaInfo.juguete_info.cantidad_original })
                     .eq('id', ventaInfo.juguete_info.juguete_id);
+                if (restaurarError) throw restaurarError;
             }
             
             // 3. Eliminar registro de venta
-            await window.supabaseClient
+            const { error: deleteError } = await window.supabaseClient
                 .from('ventas')
                 .delete()
                 .eq('id', ventaInfo.venta_id);
+            if (deleteError) throw deleteError;
         }
         
         // Limpiar última venta
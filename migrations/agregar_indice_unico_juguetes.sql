@@ -0,0 +1,125 @@
+-- ============================================
+-- MIGRACIÓN: Índice único de juguetes por ubicación
+-- Toys Walls - Sistema de Inventario
+-- ============================================
+-- Crea un índice único sobre (empresa_id, codigo, bodega_id, tienda_id):
+-- un mismo código solo puede estar una vez en cada bodega o tienda.
+--
+-- Con este índice los scripts de importación pueden usar --upsert
+-- (INSERT ... ON CONFLICT DO UPDATE): volver a importar el mismo Excel
+-- actualiza los juguetes en lugar de duplicarlos, y ya no hace falta
+-- buscar duplicados con verificar_registros_duplicados.sql.
+--
+-- Requiere PostgreSQL 15 o superior (NULLS NOT DISTINCT), como Supabase:
+-- cada juguete tiene bodega_id o tienda_id en NULL y sin esa opción
+-- PostgreSQL no consideraría repetidas dos filas con un NULL.
+--
+-- COMPATIBILIDAD CON EL DASHBOARD: el índice no incluye el nombre, así que
+-- todo lo que busca un juguete antes de insertarlo en una ubicación debe
+-- buscarlo solo por empresa, código y ubicación. Si lo buscara también por
+-- nombre, un código ya presente con otro nombre no se encontraría y el
+-- INSERT fallaría con 23505 (unique_violation); al ejecutar un plan de
+-- movimiento el origen ya se borró en ese punto y las unidades se perderían.
+-- Mover, abastecer y devolver (js/dashboard-funcionalidades.js) buscan así
+-- desde esta versión, y deshacer una venta (también por mayor) o un
+-- movimiento suma las unidades al juguete que ya esté en la ubicación en vez
+-- de volver a crearlo: el dashboard debe actualizarse antes de ejecutar esta
+-- migración. Editar el código de un juguete a uno que ya existe en la misma
+-- ubicación también falla con 23505 (y no cambia nada).
+-- ============================================
+
+BEGIN;
+
+-- ============================================
+-- PASO 1: Consolidar los duplicados existentes
+-- ============================================
+-- Igual que la limpieza de setup_completo.sql: se conserva el registro más
+-- antiguo (menor id) con la suma de las cantidades; los campos opcionales
+-- vacíos se completan con el duplicado más reciente que los tenga.
+
+CREATE TEMP TABLE juguetes_duplicados ON COMMIT DROP AS
+SELECT
+    id,
+    MIN(id) OVER clave AS id_principal
+FROM juguetes
+WINDOW clave AS (PARTITION BY empresa_id, codigo, bodega_id, tienda_id);
+
+DELETE FROM juguetes_duplicados WHERE id = id_principal;
+
+UPDATE juguetes j
+SET
+    cantidad = c.cantidad_total,
+    item = COALESCE(j.item, c.item),
+    foto_url = COALESCE(j.foto_url, c.foto_url),
+    precio_min = COALESCE(j.precio_min, c.precio_min),
+    precio_por_mayor = COALESCE(j.precio_por_mayor, c.precio_por_mayor),
+    numero_bultos = COALESCE(j.numero_bultos, c.numero_bultos),
+    cantidad_por_bulto = COALESCE(j.cantidad_por_bulto, c.cantidad_por_bulto),
+    updated_at = NOW()
+FROM (
+    SELECT
+        d.id_principal,
+        p.cantidad + SUM(o.cantidad) AS cantidad_total,
+        (ARRAY_AGG(o.item ORDER BY o.updated_at DESC, o.id DESC) FILTER (WHERE o.item IS NOT NULL))[1] AS item,
+        (ARRAY_AGG(o.foto_url ORDER BY o.updated_at DESC, o.id DESC) FILTER (WHERE o.foto_url IS NOT NULL))[1] AS foto_url,
+        (ARRAY_AGG(o.precio_min ORDER BY o.updated_at DESC, o.id DESC) FILTER (WHERE o.precio_min IS NOT NULL))[1] AS precio_min,
+        (ARRAY_AGG(o.precio_por_mayor ORDER BY o.updated_at DESC, o.id DESC) FILTER (WHERE o.precio_por_mayor IS NOT NULL))[1] AS precio_por_mayor,
+        (ARRAY_AGG(o.numero_bultos ORDER BY o.updated_at DESC, o.id DESC) FILTER (WHERE o.numero_bultos IS NOT NULL))[1] AS numero_bultos,
+        (ARRAY_AGG(o.cantidad_por_bulto ORDER BY o.updated_at DESC, o.id DESC) FILTER (WHERE o.cantidad_por_bulto IS NOT NULL))[1] AS cantidad_por_bulto
+    FROM juguetes_duplicados d
+    JOIN juguetes o ON o.id = d.id
+    JOIN juguetes p ON p.id = d.id_principal
+    GROUP BY d.id_principal, p.cantidad
+) c
+WHERE j.id = c.id_principal;
+
+-- Las instalaciones antiguas todavía tienen juguete_id en ventas y movimientos
+-- con ON DELETE CASCADE (fix_foreign_keys_delete.sql): se pasan al registro
+-- que se conserva para no borrar ventas ni movimientos al eliminar duplicados
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'ventas' AND column_name = 'juguete_id'
+    ) THEN
+        UPDATE ventas v
+        SET juguete_id = d.id_principal
+        FROM juguetes_duplicados d
+        WHERE v.juguete_id = d.id;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'movimientos' AND column_name = 'juguete_id'
+    ) THEN
+        UPDATE movimientos m
+        SET juguete_id = d.id_principal
+        FROM juguetes_duplicados d
+        WHERE m.juguete_id = d.id;
+    END IF;
+END $$;
+
+DELETE FROM juguetes j
+USING juguetes_duplicados d
+WHERE j.id = d.id;
+
+-- ============================================
+-- PASO 2: Crear el índice único
+-- ============================================
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_juguetes_empresa_codigo_ubicacion
+    ON juguetes (empresa_id, codigo, bodega_id, tienda_id) NULLS NOT DISTINCT;
+
+COMMENT ON INDEX idx_juguetes_empresa_codigo_ubicacion IS
+    'Un código por bodega/tienda; lo usa INSERT ... ON CONFLICT de los scripts de importación (--upsert)';
+
+COMMIT;
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+
+SELECT
+    COUNT(*) AS juguetes,
+    COUNT(DISTINCT (empresa_id, codigo, bodega_id, tienda_id)) AS claves_distintas
+FROM juguetes;
@@ -0,0 +1,30 @@
+-- ============================================
+-- MIGRACIÓN: Índices para las consultas frecuentes del dashboard
+-- Toys Walls - Sistema de Inventario
+-- ============================================
+-- Índices propuestos con scripts/benchmarks/bench_consultas.py, que repite
+-- las consultas del JavaScript sobre datos sintéticos con y sin estos índices
+-- (los resultados están en scripts/README.md, "Consultas frecuentes e índices").
+--
+-- El benchmark lee este archivo: cada CREATE INDEX es un índice propuesto.
+-- ============================================
+
+-- Búsquedas sin distinguir mayúsculas (ilike) por nombre y código al
+-- autocompletar en js/dashboard.js: ningún índice B-tree sirve para ILIKE
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_juguetes_nombre_trgm ON juguetes USING gin (nombre gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_juguetes_codigo_trgm ON juguetes USING gin (codigo gin_trgm_ops);
+
+-- Juguetes por empresa e item (ventas al por mayor). Por empresa y código ya
+-- sirve idx_juguetes_empresa_codigo_ubicacion (empresa_id, codigo, ...)
+CREATE INDEX IF NOT EXISTS idx_juguetes_empresa_item ON juguetes(empresa_id, item) WHERE item IS NOT NULL;
+
+-- Ventas por facturar: las últimas 50 sin facturar (índice parcial, solo las pendientes)
+CREATE INDEX IF NOT EXISTS idx_ventas_por_facturar ON ventas(empresa_id, created_at DESC) WHERE facturada = FALSE;
+
+-- Ventas recientes y del mes (también en crear_tablas_resumen_kpi.sql)
+CREATE INDEX IF NOT EXISTS idx_ventas_empresa_created_at ON ventas(empresa_id, created_at);
+
+-- ============================================
+-- FIN DE LA MIGRACIÓN
+-- ============================================
@@ -3,6 +3,17 @@
 -- ============================================
 -- Este script crea la función RPC generar_codigo_venta
 -- que es necesaria para generar códigos únicos de venta
+--
+-- El número de cada código sale de la secuencia codigos_venta_seq menos el
+-- valor que tenía al empezar el día (tabla codigos_venta_dia). nextval() no
+-- espera a otras transacciones y nunca entrega dos veces el mismo valor: el
+-- costo no crece con las ventas del día y dos cajas que cobran al mismo
+-- tiempo nunca reciben el mismo código. La tabla solo se escribe con la
+-- primera venta de cada día. Si una venta no se guarda, su número se pierde:
+-- puede haber saltos, pero no repetidos.
+--
+-- Se puede ejecutar de nuevo sobre una base que ya tenga la función anterior:
+-- la numeración de hoy continúa desde el último código ya emitido.
 -- ============================================
 -- INSTRUCCIONES:
 -- 1. Copia TODO este archivo
@@ -10,44 +21,65 @@
 -- 3. Ejecuta el script (Run o Ctrl+Enter)
 -- ============================================
 
+-- Secuencia de todos los códigos de venta
+CREATE SEQUENCE IF NOT EXISTS codigos_venta_seq;
+
+-- Valor de la secuencia antes de la primera venta de cada día
+CREATE TABLE IF NOT EXISTS codigos_venta_dia (
+    fecha DATE PRIMARY KEY,
+    base BIGINT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Continuar la numeración de los códigos ya emitidos hoy para no repetirlos
+INSERT INTO codigos_venta_dia (fecha, base)
+SELECT CURRENT_DATE, nextval('codigos_venta_seq') - MAX(SPLIT_PART(codigo_venta, '-', 3)::BIGINT)
+FROM ventas
+WHERE codigo_venta ~ ('^VENT-' || TO_CHAR(CURRENT_DATE, 'YYYYMMDD') || '-[0-9]{1,9}$')
+HAVING COUNT(*) > 0
+ON CONFLICT (fecha) DO UPDATE
+    SET base = LEAST(codigos_venta_dia.base, EXCLUDED.base);
+
+-- Habilitar RLS (la función corre con el rol de quien la llama)
+ALTER TABLE codigos_venta_dia ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "codigos_venta_dia_select" ON codigos_venta_dia;
+CREATE POLICY "codigos_venta_dia_select"
+    ON codigos_venta_dia FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "codigos_venta_dia_insert" ON codigos_venta_dia;
+CREATE POLICY "codigos_venta_dia_insert"
+    ON codigos_venta_dia FOR INSERT
+    WITH CHECK (true);
+
 -- Función para generar código de venta único
 CREATE OR REPLACE FUNCTION generar_codigo_venta()
 RETURNS TEXT AS $$
 DECLARE
-    nuevo_codigo TEXT;
-    fecha_actual TEXT;
-    contador INTEGER;
-    ultimo_codigo TEXT;
-    partes TEXT[];
+    numero BIGINT;
+    base_dia BIGINT;
+    contador BIGINT;
 BEGIN
-    -- Obtener fecha actual en formato YYYYMMDD
-    fecha_actual := TO_CHAR(CURRENT_DATE, 'YYYYMMDD');
-    
-    -- Buscar el último código de venta del día
-    SELECT codigo_venta
-    INTO ultimo_codigo
-    FROM ventas
-    WHERE codigo_venta LIKE 'VENT-' || fecha_actual || '-%'
-    ORDER BY codigo_venta DESC
-    LIMIT 1;
-    
-    -- Si existe un código del día, extraer el contador
-    IF ultimo_codigo IS NOT NULL THEN
-        -- Dividir por guiones: VENT-YYYYMMDD-XXX
-        partes := string_to_array(ultimo_codigo, '-');
-        IF array_length(partes, 1) >= 3 THEN
-            contador := CAST(partes[3] AS INTEGER) + 1;
-        ELSE
-            contador := 1;
-        END IF;
-    ELSE
-        contador := 1;
+    numero := nextval('codigos_venta_seq');
+
+    SELECT base INTO base_dia FROM codigos_venta_dia WHERE fecha = CURRENT_DATE;
+    IF base_dia IS NULL THEN
+        -- Primera venta del día: los números de hoy cuentan desde aquí
+        INSERT INTO codigos_venta_dia (fecha, base) VALUES (CURRENT_DATE, numero - 1)
+        ON CONFLICT (fecha) DO NOTHING;
+        SELECT base INTO base_dia FROM codigos_venta_dia WHERE fecha = CURRENT_DATE;
     END IF;
-    
-    -- Generar código: VENT-YYYYMMDD-XXX
-    nuevo_codigo := 'VENT-' || fecha_actual || '-' || LPAD(contador::TEXT, 3, '0');
-    
-    RETURN nuevo_codigo;
+
+    -- Si otra caja empezó el día con un valor posterior, tomar otro
+    WHILE numero <= base_dia LOOP
+        numero := nextval('codigos_venta_seq');
+    END LOOP;
+    contador := numero - base_dia;
+
+    -- Generar código: VENT-YYYYMMDD-XXX (desde la venta 1000 del día, con más cifras)
+    RETURN 'VENT-' || TO_CHAR(CURRENT_DATE, 'YYYYMMDD') || '-'
+        || LPAD(contador::TEXT, GREATEST(3, LENGTH(contador::TEXT)), '0');
 END;
 $$ LANGUAGE plpgsql;
 
@@ -58,4 +90,3 @@ $$ LANGUAGE plpgsql;
 -- y generará códigos únicos de venta en formato:
 -- VENT-YYYYMMDD-XXX (ej: VENT-20251204-001)
 -- ============================================
-
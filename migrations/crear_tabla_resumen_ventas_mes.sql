@@ -0,0 +1,38 @@
+-- ============================================
+-- MIGRACIÓN: Crear tabla resumen_ventas_mes
+-- Toys Walls - Sistema de Inventario
+-- ============================================
+-- Resumen precalculado de las ventas de cada mes por día, hora, tienda y
+-- empleado, que genera scripts/analisis_ventas.py (con --cargar o --sql).
+--
+-- El dashboard (js/analisis-tiendas-empleados.js) lee el resumen del mes
+-- actual en una sola consulta y pide solo las ventas con id mayor que
+-- ultimo_venta_id, en lugar de descargar todas las ventas del mes. Si no hay
+-- resumen del mes o se generó hace más de una hora (generado_at), el
+-- dashboard funciona como antes: el resumen no ve las ventas borradas o
+-- modificadas después de generarlo.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS resumen_ventas_mes (
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    mes DATE NOT NULL, -- Primer día del mes
+    zona VARCHAR(50) NOT NULL, -- Zona horaria de los días y las horas
+    ultimo_venta_id INTEGER NOT NULL DEFAULT 0, -- Última venta incluida
+    ventas INTEGER NOT NULL DEFAULT 0,
+    datos JSONB NOT NULL, -- {tiendas: [{id, nombre, dias, horas}], empleados: [{id, nombre, cantidad, total}], ...}
+    generado_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(), -- Cuándo se calculó (el dashboard descarta los viejos)
+    PRIMARY KEY (empresa_id, mes)
+);
+
+-- Habilitar RLS
+ALTER TABLE resumen_ventas_mes ENABLE ROW LEVEL SECURITY;
+
+-- Políticas RLS: el dashboard solo lee; el script escribe con la conexión de la base de datos
+DROP POLICY IF EXISTS "resumen_ventas_mes_select_policy" ON resumen_ventas_mes;
+CREATE POLICY "resumen_ventas_mes_select_policy"
+    ON resumen_ventas_mes FOR SELECT
+    USING (true);
+
+-- ============================================
+-- FIN DE LA MIGRACIÓN
+-- ============================================
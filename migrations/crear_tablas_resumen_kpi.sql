@@ -0,0 +1,231 @@
+-- ============================================
+-- MIGRACIÓN: Crear tablas de resumen para los indicadores del dashboard
+-- Toys Walls - Sistema de Inventario
+-- ============================================
+-- Tablas acumuladas que mantiene scripts/actualizar_resumenes.py:
+--
+--   resumen_ventas_dia      ventas por día, tienda, empleado, método de pago y
+--                           si son al por mayor
+--   resumen_pagos_dia       pagos (abonos) por día y método de pago
+--   resumen_stock_ubicacion unidades y valor del inventario por bodega/tienda
+--   resumen_marcas          hasta qué id de ventas y pagos se procesó cada
+--                           empresa
+--   resumen_dias_pendientes días con ventas o pagos borrados o modificados
+--                           desde la última actualización
+--
+-- Cada actualización procesa solo las filas con id mayor que la marca, así
+-- cuesta lo que la actividad nueva y no lo que toda la historia. Una fila
+-- borrada o modificada no tiene id nuevo: los triggers de ventas y pagos
+-- anotan su día en resumen_dias_pendientes (deshacer una venta, devoluciones,
+-- deshacer una venta al por mayor o cualquier otro DELETE/UPDATE) y la
+-- actualización rehace esos días completos.
+--
+-- La función resumen_dashboard() devuelve en una sola llamada los totales del
+-- resumen del dashboard (js/dashboard-funcionalidades.js): cuenta tiendas,
+-- bodegas y usuarios y suma las ganancias desde resumen_ventas_dia más las
+-- ventas posteriores a la marca, en lugar de descargar el precio de todas las
+-- ventas al navegador. Los días pendientes los suma desde ventas, para que una
+-- venta deshecha deje de contar antes de la siguiente actualización.
+-- ============================================
+
+-- Ventas por día (en la zona horaria de resumen_marcas)
+CREATE TABLE IF NOT EXISTS resumen_ventas_dia (
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    tienda_id INTEGER NOT NULL DEFAULT 0, -- Tienda del empleado (0: sin tienda)
+    empleado_id INTEGER NOT NULL DEFAULT 0, -- 0: sin empleado
+    metodo_pago VARCHAR(50) NOT NULL,
+    es_por_mayor BOOLEAN NOT NULL DEFAULT FALSE,
+    ventas INTEGER NOT NULL DEFAULT 0, -- Filas de ventas
+    cantidad BIGINT NOT NULL DEFAULT 0, -- Unidades (cantidad vacía o 0 cuenta como 1)
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0, -- Suma de precio_venta
+    abono DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (empresa_id, fecha, tienda_id, empleado_id, metodo_pago, es_por_mayor)
+);
+
+-- Pagos (abonos de ventas a crédito) por día
+CREATE TABLE IF NOT EXISTS resumen_pagos_dia (
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    metodo_pago VARCHAR(50) NOT NULL,
+    pagos INTEGER NOT NULL DEFAULT 0,
+    monto DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (empresa_id, fecha, metodo_pago)
+);
+
+-- Inventario por ubicación (se recalcula completo en cada actualización)
+CREATE TABLE IF NOT EXISTS resumen_stock_ubicacion (
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    tipo_ubicacion VARCHAR(20) NOT NULL CHECK (tipo_ubicacion IN ('bodega', 'tienda', 'ninguna')),
+    ubicacion_id INTEGER NOT NULL DEFAULT 0, -- 0: juguetes sin bodega ni tienda
+    juguetes INTEGER NOT NULL DEFAULT 0,
+    unidades BIGINT NOT NULL DEFAULT 0,
+    valor_min DECIMAL(16, 2) NOT NULL DEFAULT 0, -- Suma de cantidad * precio_min
+    valor_por_mayor DECIMAL(16, 2) NOT NULL DEFAULT 0, -- Suma de cantidad * precio_por_mayor
+    actualizado_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (empresa_id, tipo_ubicacion, ubicacion_id)
+);
+
+-- Marcas de agua: última fila procesada de cada tabla por empresa
+CREATE TABLE IF NOT EXISTS resumen_marcas (
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    tabla VARCHAR(50) NOT NULL CHECK (tabla IN ('ventas', 'pagos')),
+    ultimo_id BIGINT NOT NULL DEFAULT 0,
+    ultimo_created_at TIMESTAMP WITH TIME ZONE,
+    zona VARCHAR(50) NOT NULL, -- Zona horaria de las fechas de los resúmenes
+    actualizado_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (empresa_id, tabla)
+);
+
+-- Las instalaciones con la primera versión de esta migración tienen la
+-- restricción con 'logs_deshacer_ventas', que ya no se usa
+DELETE FROM resumen_marcas WHERE tabla NOT IN ('ventas', 'pagos');
+ALTER TABLE resumen_marcas DROP CONSTRAINT IF EXISTS resumen_marcas_tabla_check;
+ALTER TABLE resumen_marcas ADD CONSTRAINT resumen_marcas_tabla_check CHECK (tabla IN ('ventas', 'pagos'));
+
+-- Días por rehacer de cada empresa (en la zona horaria de resumen_marcas).
+-- Sin REFERENCES empresas: al borrar una empresa sus ventas se borran en
+-- cascada y el trigger anotaría días de una empresa que ya no existe
+CREATE TABLE IF NOT EXISTS resumen_dias_pendientes (
+    empresa_id INTEGER NOT NULL,
+    fecha DATE NOT NULL,
+    PRIMARY KEY (empresa_id, fecha)
+);
+
+-- Anota los días de las filas borradas o modificadas (una vez por sentencia,
+-- con las tablas de transición: borrar 1.000 ventas es un solo INSERT)
+CREATE OR REPLACE FUNCTION marcar_dias_pendientes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO resumen_dias_pendientes (empresa_id, fecha)
+        SELECT DISTINCT b.empresa_id, (b.created_at AT TIME ZONE COALESCE(m.zona, 'America/Bogota'))::date
+        FROM borradas b
+        LEFT JOIN resumen_marcas m ON m.empresa_id = b.empresa_id AND m.tabla = 'ventas'
+        WHERE b.created_at IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    ELSE
+        -- Los días anterior y nuevo de las filas en que cambió algo que se resume
+        INSERT INTO resumen_dias_pendientes (empresa_id, fecha)
+        SELECT DISTINCT f.empresa_id, (f.created_at AT TIME ZONE COALESCE(m.zona, 'America/Bogota'))::date
+        FROM anteriores a
+        JOIN nuevas n ON n.id = a.id
+        CROSS JOIN LATERAL (VALUES (a.empresa_id, a.created_at), (n.empresa_id, n.created_at)) AS f (empresa_id, created_at)
+        LEFT JOIN resumen_marcas m ON m.empresa_id = f.empresa_id AND m.tabla = 'ventas'
+        WHERE f.created_at IS NOT NULL
+          AND to_jsonb(a) - TG_ARGV::text[] IS DISTINCT FROM to_jsonb(n) - TG_ARGV::text[]
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los argumentos del trigger de UPDATE son las columnas que no se resumen:
+-- marcar una venta como facturada no obliga a rehacer su día
+DROP TRIGGER IF EXISTS trigger_ventas_borradas_resumen ON ventas;
+CREATE TRIGGER trigger_ventas_borradas_resumen
+    AFTER DELETE ON ventas
+    REFERENCING OLD TABLE AS borradas
+    FOR EACH STATEMENT EXECUTE FUNCTION marcar_dias_pendientes();
+
+DROP TRIGGER IF EXISTS trigger_ventas_modificadas_resumen ON ventas;
+CREATE TRIGGER trigger_ventas_modificadas_resumen
+    AFTER UPDATE ON ventas
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION marcar_dias_pendientes('codigo_venta', 'juguete_codigo', 'facturada', 'cliente_id');
+
+DROP TRIGGER IF EXISTS trigger_pagos_borrados_resumen ON pagos;
+CREATE TRIGGER trigger_pagos_borrados_resumen
+    AFTER DELETE ON pagos
+    REFERENCING OLD TABLE AS borradas
+    FOR EACH STATEMENT EXECUTE FUNCTION marcar_dias_pendientes();
+
+DROP TRIGGER IF EXISTS trigger_pagos_modificados_resumen ON pagos;
+CREATE TRIGGER trigger_pagos_modificados_resumen
+    AFTER UPDATE ON pagos
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION marcar_dias_pendientes('venta_id', 'cliente_id');
+
+-- Índices para rehacer los días pendientes
+CREATE INDEX IF NOT EXISTS idx_ventas_empresa_created_at ON ventas(empresa_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_pagos_empresa_created_at ON pagos(empresa_id, created_at);
+
+-- Totales del resumen del dashboard (p_solo_detal: sin ventas al por mayor, para empleados).
+-- Las ganancias son los días resumidos más las ventas posteriores a la marca; los días
+-- pendientes (con ventas borradas o modificadas desde la última actualización) se suman
+-- desde ventas y no desde su resumen, que todavía incluye lo que se deshizo
+CREATE OR REPLACE FUNCTION resumen_dashboard(p_empresa_id INTEGER, p_solo_detal BOOLEAN DEFAULT FALSE)
+RETURNS JSON AS $$
+    WITH marca AS (
+        SELECT
+            COALESCE(m.ultimo_id, 0) AS ultimo_id,
+            COALESCE(m.zona, 'America/Bogota') AS zona
+        FROM (SELECT 1) AS uno
+        LEFT JOIN resumen_marcas m ON m.empresa_id = p_empresa_id AND m.tabla = 'ventas'
+    ),
+    pendientes AS (
+        SELECT fecha FROM resumen_dias_pendientes WHERE empresa_id = p_empresa_id
+    )
+    SELECT json_build_object(
+        'tiendas', (SELECT COUNT(*) FROM tiendas WHERE empresa_id = p_empresa_id),
+        'bodegas', (SELECT COUNT(*) FROM bodegas WHERE empresa_id = p_empresa_id),
+        'usuarios', (SELECT COUNT(*) FROM usuarios WHERE empresa_id = p_empresa_id),
+        'ganancias',
+            COALESCE((SELECT SUM(r.total) FROM resumen_ventas_dia r
+                      WHERE r.empresa_id = p_empresa_id AND (NOT p_solo_detal OR NOT r.es_por_mayor)
+                        AND r.fecha NOT IN (SELECT fecha FROM pendientes)), 0)
+            + COALESCE((SELECT SUM(v.precio_venta) FROM ventas v
+                        WHERE v.empresa_id = p_empresa_id AND v.id <= marca.ultimo_id
+                          AND (v.created_at AT TIME ZONE marca.zona)::date IN (SELECT fecha FROM pendientes)
+                          AND (NOT p_solo_detal OR NOT COALESCE(v.es_por_mayor, FALSE))), 0)
+            + COALESCE((SELECT SUM(v.precio_venta) FROM ventas v
+                        WHERE v.empresa_id = p_empresa_id AND v.id > marca.ultimo_id
+                          AND (NOT p_solo_detal OR NOT COALESCE(v.es_por_mayor, FALSE))), 0),
+        'valor_inventario', COALESCE((SELECT SUM(valor_min) FROM resumen_stock_ubicacion WHERE empresa_id = p_empresa_id), 0),
+        'ultimo_venta_id', marca.ultimo_id
+    )
+    FROM marca;
+$$ LANGUAGE sql STABLE;
+
+-- Habilitar RLS
+ALTER TABLE resumen_ventas_dia ENABLE ROW LEVEL SECURITY;
+ALTER TABLE resumen_pagos_dia ENABLE ROW LEVEL SECURITY;
+ALTER TABLE resumen_stock_ubicacion ENABLE ROW LEVEL SECURITY;
+ALTER TABLE resumen_marcas ENABLE ROW LEVEL SECURITY;
+ALTER TABLE resumen_dias_pendientes ENABLE ROW LEVEL SECURITY;
+
+-- Políticas RLS: el dashboard solo lee (y anota días pendientes desde los
+-- triggers, que corren con su rol); el script escribe con la conexión de la base de datos
+DROP POLICY IF EXISTS "resumen_ventas_dia_select_policy" ON resumen_ventas_dia;
+CREATE POLICY "resumen_ventas_dia_select_policy"
+    ON resumen_ventas_dia FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "resumen_pagos_dia_select_policy" ON resumen_pagos_dia;
+CREATE POLICY "resumen_pagos_dia_select_policy"
+    ON resumen_pagos_dia FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "resumen_stock_ubicacion_select_policy" ON resumen_stock_ubicacion;
+CREATE POLICY "resumen_stock_ubicacion_select_policy"
+    ON resumen_stock_ubicacion FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "resumen_marcas_select_policy" ON resumen_marcas;
+CREATE POLICY "resumen_marcas_select_policy"
+    ON resumen_marcas FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "resumen_dias_pendientes_select_policy" ON resumen_dias_pendientes;
+CREATE POLICY "resumen_dias_pendientes_select_policy"
+    ON resumen_dias_pendientes FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "resumen_dias_pendientes_insert_policy" ON resumen_dias_pendientes;
+CREATE POLICY "resumen_dias_pendientes_insert_policy"
+    ON resumen_dias_pendientes FOR INSERT
+    WITH CHECK (true);
+
+-- ============================================
+-- FIN DE LA MIGRACIÓN
+-- ============================================
@@ -4,6 +4,9 @@
 -- ============================================
 -- Este script procesa movimientos específicos que solo están registrados
 -- en la tabla movimientos pero no se reflejaron en el inventario
+--
+-- Con muchos movimientos es más rápido scripts/reproducir_movimientos.py:
+-- calcula el resultado desde las exportaciones y genera UPDATE/INSERT por lotes
 -- ============================================
 
 -- Primero, asegúrate de que estos movimientos existan en la tabla movimientos
@@ -5,6 +5,14 @@
 -- Este script identifica si hay registros duplicados del mismo juguete
 -- (mismo código y nombre) en la misma ubicación, lo cual no debería ocurrir
 -- con la nueva lógica de movimientos.
+--
+-- Después de agregar_indice_unico_juguetes.sql no hace falta: el índice único
+-- (empresa_id, codigo, bodega_id, tienda_id) impide los duplicados y estas
+-- consultas ya no devuelven filas.
+--
+-- Para no llegar a insertar duplicados, scripts/excel_to_sql.py --duplicados
+-- revisa el Excel (y con --juguetes-csv la tabla exportada) antes de generar
+-- el SQL.
 -- ============================================
 
 -- Buscar registros duplicados en la misma ubicación
@@ -3,21 +3,60 @@ Script para actualizar los campos de bultos (numero_bultos y cantidad_por_bulto)
 de los juguetes existentes desde un archivo Excel.
 
 Uso:
-    python actualizar_bultos_desde_excel.py archivo.xlsx empresa_id [archivo_salida.sql]
+    python actualizar_bultos_desde_excel.py archivo.xlsx empresa_id [archivo_salida.sql] [--formato updates|lotes] [--tamano-lote N] [--no-cache]
+        [--incremental snapshot.pkl [--eliminados eliminados.csv]] [--commit-cada N] [--cargar [--db URL]]
+        [--metricas metricas.json] [--perfil recorrido.prof]
 
 El archivo Excel debe tener las siguientes columnas:
     - Codigo: Código del juguete (para identificar el juguete)
     - Numero de bultos: Número de bultos (opcional)
     - Cantidad por bultos: Cantidad por bulto (opcional)
+
+Con --formato lotes se genera un UPDATE ... FROM (VALUES ...) por cada
+--tamano-lote códigos en lugar de un UPDATE por fila.
+
+El Excel leído se guarda en una caché en disco (ver cache_excel.py); --no-cache
+vuelve a leerlo siempre.
+
+Con --incremental solo se generan UPDATE para los códigos cuyos bultos
+cambiaron desde la última ejecución (ver incremental.py).
+
+Con --cargar (o --load) no se escribe SQL: los bultos se copian a una tabla
+temporal y se actualizan con un solo UPDATE ... FROM (ver carga_db.py).
+
+Sin --cargar, --commit-cada N divide el SQL en transacciones numeradas de N
+códigos ("-- BLOQUE n") para ejecutarlo con ejecutar_sql.py, que continúa desde
+el primer bloque incompleto si algo falla.
+
+Con --metricas se guardan en un JSON el tiempo, las filas por segundo y las
+filas rechazadas de cada etapa; con --perfil el recorrido de las filas se
+ejecuta bajo cProfile (ver metricas.py).
 """
 
 import pandas as pd
+import argparse
+import io
 import sys
 import os
-import re
+import time
 from datetime import datetime
 
-def actualizar_bultos_desde_excel(excel_file, empresa_id, output_file=None):
+from excel_to_sql import normalizar_columnas
+from columnas import COLUMNAS_BULTOS
+from lectura import leer_archivo
+from precios import procesar_enteros
+from incremental import leer_snapshot, guardar_snapshot, cambios, eliminados, escribir_eliminados, resumen_cambios
+from salida_sql import escribir_updates_por_lotes, SalidaPorBloques, TAMANO_LOTE
+import carga_db
+from metricas import Metricas, metricas_de_argumentos, guardar_metricas
+import opciones
+
+# Mapeo de nombres de columnas posibles (ver columnas.py)
+COLUMN_MAPPING = COLUMNAS_BULTOS
+
+def actualizar_bultos_desde_excel(excel_file, empresa_id, output_file=None, formato='updates', tamano_lote=TAMANO_LOTE,
+                                  usar_cache=True, incremental=None, eliminados_csv=None, df=None,
+                                  pool=None, commit_cada=None, metricas=None):
     """
     Genera SQL UPDATE statements para actualizar numero_bultos y cantidad_por_bulto
     desde un archivo Excel
@@ -26,31 +65,35 @@ def actualizar_bultos_desde_excel(excel_file, empresa_id, output_file=None):
         excel_file: Ruta al archivo Excel
         empresa_id: ID de la empresa
         output_file: Archivo de salida (opcional)
+        formato: 'updates' (un UPDATE por fila) o 'lotes' (UPDATE ... FROM (VALUES ...))
+        tamano_lote: Códigos por UPDATE en el formato lotes
+        usar_cache: Usar la caché de archivos leídos (ver cache_excel.py)
+        incremental: Snapshot de la última ejecución; solo se actualizan los códigos con cambios
+        eliminados_csv: En modo incremental, CSV con los códigos que ya no están en el archivo
+        df: DataFrame ya leído (lo usa importar_inventario.py); si se indica no se vuelve a leer excel_file
+        pool: Pool de conexiones (carga_db.crear_pool); si se indica se actualiza directamente
+            la base de datos en lugar de escribir el SQL
+        commit_cada: Códigos por transacción: con pool, de la carga; sin pool, el SQL se divide en bloques
+            numerados para ejecutar_sql.py (None: una sola transacción / sin bloques)
+        metricas: Métricas por etapa (metricas.Metricas) donde se registra la ejecución
+    
+    Devuelve un diccionario con el resumen o False si hubo un error.
     """
+    inicio = time.perf_counter()
+    metricas = metricas or Metricas('actualizar_bultos')
+    if pool is not None:
+        # La carga directa usa los mismos lotes que el formato lotes
+        formato = 'lotes'
     try:
         # Leer el archivo Excel
-        df = pd.read_excel(excel_file)
+        if df is None:
+            with metricas.etapa('lectura') as etapa:
+                df = leer_archivo(excel_file, usar_cache)
+                etapa.salida = len(df)
         
         # Normalizar nombres de columnas
-        df.columns = df.columns.str.strip()
-        
-        # Mapeo de nombres de columnas posibles
-        column_mapping = {
-            'codigo': ['codigo', 'código', 'code'],
-            'numero_bultos': ['numero de bultos', 'número de bultos', 'numero_bultos', 'bultos', 'numero bultos', 'nro de bultos', 'nro bultos', 'cantidad de bultos'],
-            'cantidad_por_bulto': ['cantidad por bultos', 'cantidad por bulto', 'cantidad_por_bulto', 'cantidad por bultos', 'cantidad/bulto', 'unidades por bulto', 'unidades/bulto', 'cantidad x bulto']
-        }
-        
-        # Buscar y renombrar columnas
-        normalized_columns = {}
-        for standard_name, possible_names in column_mapping.items():
-            for col in df.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    normalized_columns[col] = standard_name
-                    break
-        
-        # Renombrar columnas
-        df = df.rename(columns=normalized_columns)
+        with metricas.etapa('normalizar', len(df)):
+            df = normalizar_columnas(df, COLUMN_MAPPING)
         
         # Validar que exista la columna codigo
         if 'codigo' not in df.columns:
@@ -59,53 +102,75 @@ def actualizar_bultos_desde_excel(excel_file, empresa_id, output_file=None):
             return False
         
         # Generar nombre de archivo de salida si no se proporciona
-        if not output_file:
+        if not output_file and pool is None:
             base_name = os.path.splitext(os.path.basename(excel_file))[0]
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_file = f'update_bultos_{base_name}_{timestamp}.sql'
         
-        # Escribir SQL
-        with open(output_file, 'w', encoding='utf-8') as f:
+        # Escribir SQL (con carga directa no se escribe ningún archivo)
+        carga = None
+        with open(output_file, 'w', encoding='utf-8') if pool is None else io.StringIO() as f:
             f.write("-- ============================================\n")
             f.write("-- ACTUALIZACIÓN DE BULTOS DESDE EXCEL\n")
             f.write(f"-- Archivo: {os.path.basename(excel_file)}\n")
             f.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"-- Empresa ID: {empresa_id}\n")
             f.write("-- ============================================\n\n")
+            # Con commit_cada el SQL se divide en transacciones numeradas (ver ejecutar_sql.py)
+            por_bloques = SalidaPorBloques(f.write, commit_cada) if commit_cada and pool is None else None
             
             registros_procesados = 0
             registros_actualizados = 0
+            # Formato lotes: bultos por código (si un código se repite gana la última fila)
+            bultos_lote = {}
             
-            for index, row in df.iterrows():
-                try:
-                    codigo = str(row['codigo']).strip().replace("'", "''")
-                    
-                    if not codigo or codigo.lower() == 'nan':
-                        print(f"Advertencia: Fila {index + 2}: Código vacío. Se omite.")
-                        continue
-                    
-                    # Procesar numero_bultos
-                    numero_bultos_sql = 'NULL'
-                    if 'numero_bultos' in df.columns and pd.notna(row.get('numero_bultos')):
-                        numero_bultos_str = str(row['numero_bultos']).strip()
-                        numero_bultos_str = re.sub(r'[^\d]', '', numero_bultos_str)
-                        if numero_bultos_str and numero_bultos_str.lower() != 'nan':
-                            numero_bultos = int(numero_bultos_str)
-                            numero_bultos_sql = str(numero_bultos)
-                    
-                    # Procesar cantidad_por_bulto
-                    cantidad_por_bulto_sql = 'NULL'
-                    if 'cantidad_por_bulto' in df.columns and pd.notna(row.get('cantidad_por_bulto')):
-                        cantidad_por_bulto_str = str(row['cantidad_por_bulto']).strip()
-                        cantidad_por_bulto_str = re.sub(r'[^\d]', '', cantidad_por_bulto_str)
-                        if cantidad_por_bulto_str and cantidad_por_bulto_str.lower() != 'nan':
-                            cantidad_por_bulto = int(cantidad_por_bulto_str)
-                            cantidad_por_bulto_sql = str(cantidad_por_bulto)
-                    
-                    # Solo generar UPDATE si hay al menos un valor para actualizar
-                    if numero_bultos_sql != 'NULL' or cantidad_por_bulto_sql != 'NULL':
-                        # Generar UPDATE statement
-                        sql = f"""UPDATE juguetes 
+            # Procesar las columnas de bultos de una vez
+            with metricas.etapa('parsear', len(df), perfilar=True):
+                sin_valor = pd.Series(None, index=df.index, dtype=object)
+                numeros_bultos, numeros_bultos_ok = procesar_enteros(df['numero_bultos'] if 'numero_bultos' in df.columns else sin_valor)
+                cantidades_por_bulto, cantidades_por_bulto_ok = procesar_enteros(df['cantidad_por_bulto'] if 'cantidad_por_bulto' in df.columns else sin_valor)
+            
+            # Modo incremental: códigos cuyos últimos bultos son nuevos o distintos a los del snapshot
+            cambiados = None
+            if incremental:
+                with metricas.etapa('incremental', len(df)) as etapa:
+                    anterior = leer_snapshot(incremental, 'bultos', empresa_id)
+                    actuales = {}
+                    for codigo_val, numero_bultos, numero_bultos_ok, cantidad_por_bulto, cantidad_por_bulto_ok in zip(
+                            df['codigo'].tolist(), numeros_bultos.tolist(), numeros_bultos_ok,
+                            cantidades_por_bulto.tolist(), cantidades_por_bulto_ok):
+                        codigo = str(codigo_val).strip()
+                        if codigo and codigo.lower() != 'nan' and (numero_bultos_ok or cantidad_por_bulto_ok):
+                            actuales[codigo] = (numero_bultos if numero_bultos_ok else None,
+                                                cantidad_por_bulto if cantidad_por_bulto_ok else None)
+                    cambiados = cambios(actuales, anterior)
+                    etapa.salida = len(cambiados)
+            
+            with metricas.etapa('emitir', len(df), perfilar=True) as etapa:
+                for index, codigo_val, numero_bultos, numero_bultos_ok, cantidad_por_bulto, cantidad_por_bulto_ok in zip(
+                        df.index, df['codigo'].tolist(), numeros_bultos.tolist(), numeros_bultos_ok,
+                        cantidades_por_bulto.tolist(), cantidades_por_bulto_ok):
+                    try:
+                        codigo = str(codigo_val).strip().replace("'", "''")
+                        
+                        if not codigo or codigo.lower() == 'nan':
+                            print(f"Advertencia: Fila {index + 2}: Código vacío. Se omite.")
+                            metricas.rechazar('codigo_vacio')
+                            continue
+                        
+                        numero_bultos_sql = str(numero_bultos) if numero_bultos_ok else 'NULL'
+                        cantidad_por_bulto_sql = str(cantidad_por_bulto) if cantidad_por_bulto_ok else 'NULL'
+                        
+                        # Solo generar UPDATE si hay al menos un valor para actualizar
+                        if cambiados is not None and str(codigo_val).strip() not in cambiados:
+                            pass  # Modo incremental: sin cambios desde la última ejecución
+                        elif formato == 'lotes' and (numero_bultos_ok or cantidad_por_bulto_ok):
+                            bultos_lote[str(codigo_val).strip()] = (numero_bultos if numero_bultos_ok else None,
+                                                                    cantidad_por_bulto if cantidad_por_bulto_ok else None)
+                            registros_actualizados += 1
+                        elif numero_bultos_sql != 'NULL' or cantidad_por_bulto_sql != 'NULL':
+                            # Generar UPDATE statement
+                            sql = f"""UPDATE juguetes 
 SET 
     numero_bultos = {numero_bultos_sql},
     cantidad_por_bulto = {cantidad_por_bulto_sql},
@@ -114,23 +179,59 @@ WHERE codigo = '{codigo}'
     AND empresa_id = {empresa_id};
 
 """
-                        f.write(sql)
-                        registros_actualizados += 1
-                    
-                    registros_procesados += 1
-                    
-                except Exception as e:
-                    print(f"Error procesando fila {index + 2}: {str(e)}")
-                    continue
+                            (por_bloques or f).write(sql)
+                            registros_actualizados += 1
+                        else:
+                            metricas.rechazar('sin_bultos')
+                        
+                        registros_procesados += 1
+                        
+                    except Exception as e:
+                        print(f"Error procesando fila {index + 2}: {str(e)}")
+                        metricas.rechazar('error')
+                        continue
+                
+                if bultos_lote:
+                    # Igual que en los UPDATE por fila, un valor vacío se guarda como NULL
+                    columnas = {'numero_bultos': 'INTEGER', 'cantidad_por_bulto': 'INTEGER'}
+                    filas = [(codigo, *valores) for codigo, valores in bultos_lote.items()]
+                    if pool is not None:
+                        carga = carga_db.cargar_updates(pool, empresa_id, 'codigo', columnas, filas, commit_cada=commit_cada)
+                    else:
+                        escribir = f.write if por_bloques is None else por_bloques.escritor(tamano_lote)
+                        escribir_updates_por_lotes(escribir, empresa_id, 'codigo', columnas, filas, tamano_lote)
+                etapa.salida = registros_actualizados
             
+            total_bloques = por_bloques.cerrar() if por_bloques is not None else None
             f.write("\n-- ============================================\n")
             f.write("-- FIN DE LOS UPDATES\n")
             f.write("-- ============================================\n")
         
-        print(f"✓ SQL generado exitosamente: {output_file}")
+        if pool is None:
+            print(f"✓ SQL generado exitosamente: {output_file}")
+        if total_bloques is not None:
+            print(f"✓ SQL dividido en {total_bloques} bloques de hasta {commit_cada} códigos: "
+                  f"python ejecutar_sql.py {output_file}")
         print(f"✓ Total de registros procesados: {registros_procesados}")
         print(f"✓ Total de registros con datos de bultos: {registros_actualizados}")
-        return True
+        if pool is not None:
+            carga_db.imprimir_carga(carga, time.perf_counter() - inicio)
+        if incremental:
+            codigos_eliminados = eliminados(actuales, anterior)
+            guardar_snapshot(incremental, 'bultos', empresa_id, actuales)
+            print(resumen_cambios(len(cambiados), len(actuales), codigos_eliminados))
+            if eliminados_csv:
+                escribir_eliminados(eliminados_csv, ['codigo', 'numero_bultos', 'cantidad_por_bulto'],
+                                    [(codigo, *anterior[codigo]) for codigo in codigos_eliminados])
+                print(f"✓ Códigos eliminados guardados en: {eliminados_csv}")
+            print(f"✓ Snapshot actualizado: {incremental}")
+        return {
+            'output_file': output_file,
+            'registros': registros_procesados,
+            'actualizados': registros_actualizados,
+            'carga': carga,
+            'bloques': total_bloques,
+        }
         
     except Exception as e:
         print(f"Error al procesar el archivo: {str(e)}")
@@ -139,22 +240,36 @@ WHERE codigo = '{codigo}'
         return False
 
 def main():
-    if len(sys.argv) < 3:
-        print("Uso: python actualizar_bultos_desde_excel.py <archivo_excel.xlsx> <empresa_id> [archivo_salida.sql]")
-        print("\nEjemplo:")
-        print("  python actualizar_bultos_desde_excel.py inventario.xlsx 1")
-        print("  python actualizar_bultos_desde_excel.py inventario.xlsx 1 update_bultos.sql")
-        sys.exit(1)
-    
-    excel_file = sys.argv[1]
-    empresa_id = int(sys.argv[2])
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
-    
-    if not os.path.exists(excel_file):
-        print(f"Error: El archivo {excel_file} no existe")
+    parser = argparse.ArgumentParser(
+        description="Genera SQL UPDATE para numero_bultos y cantidad_por_bulto desde un archivo Excel",
+        epilog="Ejemplo:\n"
+               "  python actualizar_bultos_desde_excel.py inventario.xlsx 1\n"
+               "  python actualizar_bultos_desde_excel.py inventario.xlsx 1 update_bultos.sql\n"
+               "  python actualizar_bultos_desde_excel.py inventario.xlsx 1 --formato lotes\n"
+               "  python actualizar_bultos_desde_excel.py inventario.xlsx 1 --cargar --db postgresql://postgres@localhost/toyswalls",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    opciones.opciones_bultos(parser)
+    args = parser.parse_args()
+    opciones.validar(parser, args)
+    ejecutar(parser, args)
+
+def ejecutar(parser, args):
+    """Ejecuta el script con los argumentos ya validados (también desde toyswall_import.py)"""
+    pool = carga_db.pool_de_argumentos(parser, args)
+    metricas = metricas_de_argumentos('actualizar_bultos', args)
+    try:
+        resultado = actualizar_bultos_desde_excel(args.excel_file, args.empresa_id, args.output_file,
+                                                  formato=args.formato, tamano_lote=args.tamano_lote,
+                                                  usar_cache=not args.no_cache, incremental=args.incremental,
+                                                  eliminados_csv=args.eliminados, pool=pool, commit_cada=args.commit_cada,
+                                                  metricas=metricas)
+    finally:
+        if pool is not None:
+            pool.closeall()
+    guardar_metricas(metricas, args, archivos=[args.excel_file], ok=bool(resultado))
+    if pool is not None and not resultado:
         sys.exit(1)
-    
-    actualizar_bultos_desde_excel(excel_file, empresa_id, output_file)
 
 if __name__ == "__main__":
     main()
@@ -4,62 +4,78 @@ de los juguetes existentes desde archivos Excel.
 
 Uso:
     python actualizar_precios_desde_excel.py <archivo_precio_final.xlsx> <archivo_precios_mayorista.xlsx> <empresa_id> [archivo_salida.sql]
+                                             [--formato updates|lotes] [--tamano-lote N] [--no-cache]
+                                             [--incremental snapshot.pkl [--eliminados eliminados.csv]]
+                                             [--commit-cada N] [--cargar [--db URL]]
+                                             [--metricas metricas.json] [--perfil recorrido.prof]
 
 Ejemplo:
     python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1
+
+Con --formato lotes se genera un UPDATE ... FROM (VALUES ...) por cada
+--tamano-lote items en lugar de un UPDATE por item.
+
+El Excel leído se guarda en una caché en disco (ver cache_excel.py); --no-cache
+vuelve a leerlo siempre.
+
+Con --incremental solo se actualizan los precios que cambiaron desde la última
+ejecución (ver incremental.py); si de un item solo cambió un precio, el UPDATE
+solo cambia ese precio.
+
+Con --cargar (o --load) no se escribe SQL: los precios se copian a una tabla
+temporal y se actualizan con un solo UPDATE ... FROM (ver carga_db.py).
+
+Sin --cargar, --commit-cada N divide el SQL en transacciones numeradas de N
+items ("-- BLOQUE n") para ejecutarlo con ejecutar_sql.py, que continúa desde
+el primer bloque incompleto si algo falla.
+
+Con --metricas se guardan en un JSON el tiempo, las filas por segundo y las
+filas rechazadas de cada etapa; con --perfil el parseo y el recorrido de los
+items se ejecutan bajo cProfile (ver metricas.py).
 """
 
 import pandas as pd
+import argparse
+import io
 import sys
 import os
-import re
+import time
 from datetime import datetime
 
-def procesar_precio(precio_str):
-    """
-    Procesa un precio en formato string y lo convierte a float.
-    Maneja diferentes formatos: $1.000, 1,000.50, 1000.50, etc.
+from lectura import leer_archivo
+from columnas import COLUMNAS_PRECIO_FINAL, COLUMNAS_MAYORISTA, mapear_columnas
+from precios import procesar_precios
+from incremental import leer_snapshot, guardar_snapshot, cambios, eliminados, escribir_eliminados, resumen_cambios
+from salida_sql import escribir_updates_por_lotes, SalidaPorBloques, TAMANO_LOTE
+import carga_db
+from metricas import Metricas, metricas_de_argumentos, guardar_metricas
+import opciones
+
+def precios_por_item(df, columna_precio, metricas=None):
     """
-    if pd.isna(precio_str):
-        return None
-    
-    precio_str = str(precio_str).strip()
+    Construye {item: precio} con los precios válidos (mayores que 0) de una columna.
+    Si un item se repite, se usa la última fila.
     
-    # Remover símbolo de dólar y espacios
-    precio_str = precio_str.replace('$', '').replace(' ', '')
-    
-    # Manejar diferentes formatos de números
-    if ',' in precio_str and '.' not in precio_str:
-        # Formato: 1,000 (coma como separador de miles)
-        precio_str = precio_str.replace(',', '')
-    elif ',' in precio_str and '.' in precio_str:
-        # Formato: 1.000,50 (punto como miles, coma como decimal)
-        precio_str = precio_str.replace('.', '').replace(',', '.')
-    elif '.' in precio_str and ',' not in precio_str:
-        # Formato: 1000.50 o 1.000 (punto como decimal o separador de miles)
-        if precio_str.count('.') > 1:
-            # Múltiples puntos = separador de miles
-            precio_str = precio_str.replace('.', '')
-        else:
-            # Un solo punto, verificar si es decimal o separador de miles
-            partes = precio_str.split('.')
-            if len(partes) == 2 and len(partes[1]) > 2:
-                # Probablemente es separador de miles, no decimal
-                precio_str = precio_str.replace('.', '')
-    
-    # Remover cualquier carácter que no sea dígito o punto
-    precio_str = re.sub(r'[^\d.]', '', precio_str)
-    
-    if not precio_str or precio_str.lower() == 'nan' or precio_str == '':
-        return None
-    
-    try:
-        precio = float(precio_str)
-        return precio if precio > 0 else None
-    except ValueError:
-        return None
+    Con metricas se cuentan las filas que no quedan en el diccionario (item
+    vacío, precio vacío o inválido, item repetido).
+    """
+    presente = df['item'].notna().to_numpy()
+    items = pd.Series([str(v).strip() for v in df['item'].tolist()], dtype=object)
+    item_valido = presente & (items != '').to_numpy() & (items.str.lower() != 'nan').to_numpy()
+
+    precios, precios_validos = procesar_precios(df[columna_precio])
+    validos = item_valido & precios_validos
+    resultado = dict(zip(items[validos].tolist(), precios[validos].tolist()))
+    if metricas is not None:
+        metricas.rechazar('item_vacio', int((~item_valido).sum()))
+        metricas.rechazar('precio_invalido', int((item_valido & ~precios_validos).sum()))
+        metricas.rechazar('item_repetido', int(validos.sum()) - len(resultado))
+    return resultado
 
-def actualizar_precios_desde_excel(precio_final_file, precios_mayorista_file, empresa_id, output_file=None):
+def actualizar_precios_desde_excel(precio_final_file, precios_mayorista_file, empresa_id, output_file=None,
+                                   formato='updates', tamano_lote=TAMANO_LOTE, usar_cache=True,
+                                   incremental=None, eliminados_csv=None, pool=None, commit_cada=None,
+                                   metricas=None):
     """
     Genera SQL UPDATE statements para actualizar precio_min y precio_por_mayor
     desde archivos Excel
@@ -69,49 +85,45 @@ def actualizar_precios_desde_excel(precio_final_file, precios_mayorista_file, em
         precios_mayorista_file: Ruta al archivo Excel con precios mayoristas
         empresa_id: ID de la empresa
         output_file: Archivo de salida (opcional)
+        formato: 'updates' (un UPDATE por item) o 'lotes' (UPDATE ... FROM (VALUES ...))
+        tamano_lote: Items por UPDATE en el formato lotes
+        usar_cache: Usar la caché de archivos leídos (ver cache_excel.py)
+        incremental: Snapshot de la última ejecución; solo se actualizan los precios con cambios
+        eliminados_csv: En modo incremental, CSV con los items que ya no están en los archivos
+        pool: Pool de conexiones (carga_db.crear_pool); si se indica se actualiza directamente
+            la base de datos en lugar de escribir el SQL
+        commit_cada: Items por transacción: con pool, de la carga; sin pool, el SQL se divide en bloques
+            numerados para ejecutar_sql.py (None: una sola transacción / sin bloques)
+        metricas: Métricas por etapa (metricas.Metricas) donde se registra la ejecución
     """
+    inicio = time.perf_counter()
+    metricas = metricas or Metricas('actualizar_precios')
+    if pool is not None:
+        # La carga directa usa los mismos lotes que el formato lotes
+        formato = 'lotes'
     try:
         # Leer archivo de precios finales (precio mínimo)
         print(f"Leyendo archivo de precios finales: {precio_final_file}")
-        df_precio_final = pd.read_excel(precio_final_file)
+        with metricas.etapa('lectura') as etapa:
+            df_precio_final = leer_archivo(precio_final_file, usar_cache)
+            etapa.salida = len(df_precio_final)
         df_precio_final.columns = df_precio_final.columns.str.strip()
         
         # Leer archivo de precios mayoristas
         print(f"Leyendo archivo de precios mayoristas: {precios_mayorista_file}")
-        df_mayorista = pd.read_excel(precios_mayorista_file)
+        with metricas.etapa('lectura') as etapa:
+            df_mayorista = leer_archivo(precios_mayorista_file, usar_cache)
+            etapa.salida = len(df_mayorista)
         df_mayorista.columns = df_mayorista.columns.str.strip()
         
-        # Normalizar columnas del archivo de precios finales
-        column_mapping_final = {
-            'item': ['item no.:', 'item', 'item no', 'item_no', 'codigo', 'código'],
-            'precio_minimo': ['precio minimo', 'precio_minimo', 'precio mínimo', 'precio minimo', 'minimo']
-        }
-        
-        normalized_columns_final = {}
-        for standard_name, possible_names in column_mapping_final.items():
-            for col in df_precio_final.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    normalized_columns_final[col] = standard_name
-                    break
-        
-        df_precio_final = df_precio_final.rename(columns=normalized_columns_final)
+        # Normalizar columnas del archivo de precios finales (ver columnas.py)
+        with metricas.etapa('normalizar', len(df_precio_final)):
+            df_precio_final = df_precio_final.rename(columns=mapear_columnas(df_precio_final.columns, COLUMNAS_PRECIO_FINAL))
         print(f"Columnas detectadas en PRECIO FINAL: {', '.join(df_precio_final.columns.tolist())}")
         
         # Normalizar columnas del archivo de precios mayoristas
-        column_mapping_mayorista = {
-            'item': ['item', 'item ', 'item no.:', 'item no', 'item_no', 'codigo', 'código'],
-            'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor', 
-                                'precio mayorista', 'precio mayor', 'precio x mayor']
-        }
-        
-        normalized_columns_mayorista = {}
-        for standard_name, possible_names in column_mapping_mayorista.items():
-            for col in df_mayorista.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    normalized_columns_mayorista[col] = standard_name
-                    break
-        
-        df_mayorista = df_mayorista.rename(columns=normalized_columns_mayorista)
+        with metricas.etapa('normalizar', len(df_mayorista)):
+            df_mayorista = df_mayorista.rename(columns=mapear_columnas(df_mayorista.columns, COLUMNAS_MAYORISTA))
         print(f"Columnas detectadas en PRECIOS MAYORISTA: {', '.join(df_mayorista.columns.tolist())}")
         
         # Validar columnas requeridas
@@ -136,29 +148,29 @@ def actualizar_precios_desde_excel(precio_final_file, precios_mayorista_file, em
             return False
         
         # Generar nombre de archivo de salida si no se proporciona
-        if not output_file:
+        if not output_file and pool is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_file = f'update_precios_{timestamp}.sql'
         
         # Crear diccionarios para búsqueda rápida
-        precios_minimos = {}
-        for index, row in df_precio_final.iterrows():
-            item = str(row['item']).strip() if pd.notna(row.get('item')) else None
-            if item and item.lower() != 'nan':
-                precio_min = procesar_precio(row.get('precio_minimo'))
-                if precio_min:
-                    precios_minimos[item] = precio_min
-        
-        precios_mayoristas = {}
-        for index, row in df_mayorista.iterrows():
-            item = str(row['item']).strip() if pd.notna(row.get('item')) else None
-            if item and item.lower() != 'nan':
-                precio_mayor = procesar_precio(row.get('precio_por_mayor'))
-                if precio_mayor:
-                    precios_mayoristas[item] = precio_mayor
+        with metricas.etapa('parsear', len(df_precio_final) + len(df_mayorista), perfilar=True) as etapa:
+            precios_minimos = precios_por_item(df_precio_final, 'precio_minimo', metricas)
+            precios_mayoristas = precios_por_item(df_mayorista, 'precio_por_mayor', metricas)
+            etapa.salida = len(precios_minimos) + len(precios_mayoristas)
         
-        # Escribir SQL
-        with open(output_file, 'w', encoding='utf-8') as f:
+        # Modo incremental: solo los precios nuevos o distintos a los del snapshot
+        if incremental:
+            with metricas.etapa('incremental', len(set(precios_minimos) | set(precios_mayoristas))) as etapa:
+                anterior = leer_snapshot(incremental, 'precios', empresa_id) or {}
+                actuales = {'precio_min': precios_minimos, 'precio_por_mayor': precios_mayoristas}
+                items_actuales = set(precios_minimos) | set(precios_mayoristas)
+                precios_minimos = cambios(precios_minimos, anterior.get('precio_min'))
+                precios_mayoristas = cambios(precios_mayoristas, anterior.get('precio_por_mayor'))
+                etapa.salida = len(set(precios_minimos) | set(precios_mayoristas))
+            
+        # Escribir SQL (con carga directa no se escribe ningún archivo)
+        carga = None
+        with open(output_file, 'w', encoding='utf-8') if pool is None else io.StringIO() as f:
             f.write("-- ============================================\n")
             f.write("-- ACTUALIZACIÓN DE PRECIOS MÍNIMOS Y AL POR MAYOR DESDE EXCEL\n")
             f.write(f"-- Archivo Precio Final: {os.path.basename(precio_final_file)}\n")
@@ -167,67 +179,111 @@ def actualizar_precios_desde_excel(precio_final_file, precios_mayorista_file, em
             f.write(f"-- Empresa ID: {empresa_id}\n")
             f.write("-- ============================================\n\n")
             f.write("-- IMPORTANTE: Revisa los UPDATE statements antes de ejecutarlos\n\n")
+            # Con commit_cada el SQL se divide en transacciones numeradas (ver ejecutar_sql.py)
+            por_bloques = SalidaPorBloques(f.write, commit_cada) if commit_cada and pool is None else None
             
             registros_procesados = 0
             registros_actualizados_min = 0
             registros_actualizados_mayor = 0
             registros_actualizados_ambos = 0
             errores = []
+            filas_lote = []
             
             # Obtener todos los items únicos de ambos archivos
             todos_items = set(precios_minimos.keys()) | set(precios_mayoristas.keys())
+            if formato == 'lotes':
+                todos_items = sorted(todos_items)
             
-            for item in todos_items:
-                try:
-                    item_escaped = item.replace("'", "''").replace('\n', '').replace('\\n', '')
-                    
-                    precio_min = precios_minimos.get(item)
-                    precio_mayor = precios_mayoristas.get(item)
-                    
-                    # Solo generar UPDATE si hay al menos un precio para actualizar
-                    if precio_min is not None or precio_mayor is not None:
-                        # Construir la parte SET del UPDATE
-                        set_parts = []
-                        
-                        if precio_min is not None:
-                            set_parts.append(f"    precio_min = {precio_min}")
-                            registros_actualizados_min += 1
+            with metricas.etapa('emitir', len(todos_items), perfilar=True) as etapa:
+                for item in todos_items:
+                    try:
+                        item_escaped = item.replace("'", "''").replace('\n', '').replace('\\n', '')
                         
-                        if precio_mayor is not None:
-                            set_parts.append(f"    precio_por_mayor = {precio_mayor}")
-                            registros_actualizados_mayor += 1
+                        precio_min = precios_minimos.get(item)
+                        precio_mayor = precios_mayoristas.get(item)
                         
-                        if precio_min is not None and precio_mayor is not None:
-                            registros_actualizados_ambos += 1
-                        
-                        set_parts.append("    updated_at = NOW()")
-                        
-                        # Generar UPDATE statement
-                        sql = f"""UPDATE juguetes 
+                        # Solo generar UPDATE si hay al menos un precio para actualizar
+                        if precio_min is not None or precio_mayor is not None:
+                            # Construir la parte SET del UPDATE
+                            set_parts = []
+                            
+                            if precio_min is not None:
+                                set_parts.append(f"    precio_min = {precio_min}")
+                                registros_actualizados_min += 1
+                            
+                            if precio_mayor is not None:
+                                set_parts.append(f"    precio_por_mayor = {precio_mayor}")
+                                registros_actualizados_mayor += 1
+                            
+                            if precio_min is not None and precio_mayor is not None:
+                                registros_actualizados_ambos += 1
+                            
+                            if formato == 'lotes':
+                                filas_lote.append((item.replace('\n', '').replace('\\n', ''), precio_min, precio_mayor))
+                                registros_procesados += 1
+                                continue
+                            
+                            set_parts.append("    updated_at = NOW()")
+                            set_sql = ',\n'.join(set_parts)
+                            
+                            # Generar UPDATE statement
+                            sql = f"""UPDATE juguetes 
 SET 
-{',\n'.join(set_parts)}
+{set_sql}
 WHERE item = '{item_escaped}' 
     AND empresa_id = {empresa_id};
 
 """
-                        f.write(sql)
-                        registros_procesados += 1
+                            (por_bloques or f).write(sql)
+                            registros_procesados += 1
+                        else:
+                            errores.append(f"Item '{item}': No se encontró ningún precio válido")
+                            metricas.rechazar('sin_precio')
+                        
+                    except Exception as e:
+                        errores.append(f"Item '{item}': Error procesando - {str(e)}")
+                        metricas.rechazar('error')
+                        continue
+                
+                if filas_lote:
+                    # Un solo UPDATE por lote; un precio vacío deja el valor actual
+                    columnas = {'precio_min': 'NUMERIC', 'precio_por_mayor': 'NUMERIC'}
+                    if pool is not None:
+                        carga = carga_db.cargar_updates(pool, empresa_id, 'item', columnas, filas_lote,
+                                                        omitir_nulos=True, commit_cada=commit_cada)
                     else:
-                        errores.append(f"Item '{item}': No se encontró ningún precio válido")
-                    
-                except Exception as e:
-                    errores.append(f"Item '{item}': Error procesando - {str(e)}")
-                    continue
-            
+                        escribir = f.write if por_bloques is None else por_bloques.escritor(tamano_lote)
+                        escribir_updates_por_lotes(escribir, empresa_id, 'item', columnas, filas_lote, tamano_lote,
+                                                   omitir_nulos=True)
+                etapa.salida = registros_procesados
+                
+            total_bloques = por_bloques.cerrar() if por_bloques is not None else None
             f.write("\n-- ============================================\n")
             f.write("-- FIN DE LOS UPDATES\n")
             f.write("-- ============================================\n")
         
-        print(f"\n✓ SQL generado exitosamente: {output_file}")
+        if pool is None:
+            print(f"\n✓ SQL generado exitosamente: {output_file}")
+        if total_bloques is not None:
+            print(f"✓ SQL dividido en {total_bloques} bloques de hasta {commit_cada} items: "
+                  f"python ejecutar_sql.py {output_file}")
         print(f"✓ Total de items procesados: {registros_procesados}")
         print(f"✓ Items con precio mínimo actualizado: {registros_actualizados_min}")
         print(f"✓ Items con precio al por mayor actualizado: {registros_actualizados_mayor}")
         print(f"✓ Items con ambos precios actualizados: {registros_actualizados_ambos}")
+        if pool is not None:
+            carga_db.imprimir_carga(carga, time.perf_counter() - inicio)
+        if incremental:
+            items_anteriores = {**anterior.get('precio_min', {}), **anterior.get('precio_por_mayor', {})}
+            items_eliminados = eliminados(items_actuales, items_anteriores)
+            guardar_snapshot(incremental, 'precios', empresa_id, actuales)
+            print(resumen_cambios(registros_procesados, len(items_actuales), items_eliminados))
+            if eliminados_csv:
+                escribir_eliminados(eliminados_csv, ['item', 'precio_min', 'precio_por_mayor'],
+                                    [(item, anterior.get('precio_min', {}).get(item), anterior.get('precio_por_mayor', {}).get(item))
+                                     for item in items_eliminados])
+                print(f"✓ Items eliminados guardados en: {eliminados_csv}")
+            print(f"✓ Snapshot actualizado: {incremental}")
         
         if errores:
             print(f"\n⚠ Advertencias/Errores ({len(errores)}):")
@@ -245,27 +301,36 @@ WHERE item = '{item_escaped}'
         return False
 
 def main():
-    if len(sys.argv) < 4:
-        print("Uso: python actualizar_precios_desde_excel.py <archivo_precio_final.xlsx> <archivo_precios_mayorista.xlsx> <empresa_id> [archivo_salida.sql]")
-        print("\nEjemplo:")
-        print('  python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1')
-        print('  python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1 update_precios.sql')
-        sys.exit(1)
-    
-    precio_final_file = sys.argv[1]
-    precios_mayorista_file = sys.argv[2]
-    empresa_id = int(sys.argv[3])
-    output_file = sys.argv[4] if len(sys.argv) > 4 else None
-    
-    if not os.path.exists(precio_final_file):
-        print(f"Error: El archivo {precio_final_file} no existe")
-        sys.exit(1)
-    
-    if not os.path.exists(precios_mayorista_file):
-        print(f"Error: El archivo {precios_mayorista_file} no existe")
+    parser = argparse.ArgumentParser(
+        description="Genera SQL UPDATE para precio_min y precio_por_mayor desde los Excel de precios",
+        epilog="Ejemplo:\n"
+               '  python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1\n'
+               '  python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1 update_precios.sql\n'
+               '  python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1 --formato lotes\n'
+               '  python actualizar_precios_desde_excel.py "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1 --cargar',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    opciones.opciones_precios(parser)
+    args = parser.parse_args()
+    opciones.validar(parser, args)
+    ejecutar(parser, args)
+
+def ejecutar(parser, args):
+    """Ejecuta el script con los argumentos ya validados (también desde toyswall_import.py)"""
+    pool = carga_db.pool_de_argumentos(parser, args)
+    metricas = metricas_de_argumentos('actualizar_precios', args)
+    try:
+        resultado = actualizar_precios_desde_excel(args.precio_final_file, args.precios_mayorista_file, args.empresa_id,
+                                                   args.output_file, formato=args.formato, tamano_lote=args.tamano_lote,
+                                                   usar_cache=not args.no_cache, incremental=args.incremental,
+                                                   eliminados_csv=args.eliminados, pool=pool, commit_cada=args.commit_cada,
+                                                   metricas=metricas)
+    finally:
+        if pool is not None:
+            pool.closeall()
+    guardar_metricas(metricas, args, archivos=[args.precio_final_file, args.precios_mayorista_file], ok=bool(resultado))
+    if pool is not None and not resultado:
         sys.exit(1)
-    
-    actualizar_precios_desde_excel(precio_final_file, precios_mayorista_file, empresa_id, output_file)
 
 if __name__ == "__main__":
     main()
@@ -3,20 +3,60 @@ Script para actualizar los precios al por mayor (precio_por_mayor)
 de los juguetes existentes desde un archivo Excel.
 
 Uso:
-    python actualizar_precios_por_mayor_desde_excel.py archivo.xlsx empresa_id [archivo_salida.sql]
+    python actualizar_precios_por_mayor_desde_excel.py archivo.xlsx empresa_id [archivo_salida.sql] [--formato updates|lotes] [--tamano-lote N] [--no-cache]
+        [--incremental snapshot.pkl [--eliminados eliminados.csv]] [--commit-cada N] [--cargar [--db URL]]
+        [--metricas metricas.json] [--perfil recorrido.prof]
 
 El archivo Excel debe tener las siguientes columnas:
     - Codigo: Código del juguete (para identificar el juguete)
     - Precio al por mayor: Precio al por mayor (opcional, pero necesario para actualizar)
+
+Con --formato lotes se genera un UPDATE ... FROM (VALUES ...) por cada
+--tamano-lote códigos en lugar de un UPDATE por fila.
+
+El Excel leído se guarda en una caché en disco (ver cache_excel.py); --no-cache
+vuelve a leerlo siempre.
+
+Con --incremental solo se generan UPDATE para los códigos cuyo precio cambió
+desde la última ejecución (ver incremental.py).
+
+Con --cargar (o --load) no se escribe SQL: los precios se copian a una tabla
+temporal y se actualizan con un solo UPDATE ... FROM (ver carga_db.py).
+
+Sin --cargar, --commit-cada N divide el SQL en transacciones numeradas de N
+códigos ("-- BLOQUE n") para ejecutarlo con ejecutar_sql.py, que continúa desde
+el primer bloque incompleto si algo falla.
+
+Con --metricas se guardan en un JSON el tiempo, las filas por segundo y las
+filas rechazadas de cada etapa; con --perfil el recorrido de las filas se
+ejecuta bajo cProfile (ver metricas.py).
 """
 
 import pandas as pd
+import argparse
+import io
 import sys
 import os
-import re
+import time
 from datetime import datetime
 
-def actualizar_precios_por_mayor_desde_excel(excel_file, empresa_id, output_file=None):
+from excel_to_sql import normalizar_columnas
+from columnas import COLUMNAS_PRECIOS_MAYOR
+from lectura import leer_archivo
+from precios import procesar_precios
+from incremental import leer_snapshot, guardar_snapshot, cambios, eliminados, escribir_eliminados, resumen_cambios
+from salida_sql import escribir_updates_por_lotes, SalidaPorBloques, TAMANO_LOTE
+import carga_db
+from metricas import Metricas, metricas_de_argumentos, guardar_metricas
+import opciones
+
+# Mapeo de nombres de columnas posibles (ver columnas.py)
+COLUMN_MAPPING = COLUMNAS_PRECIOS_MAYOR
+
+def actualizar_precios_por_mayor_desde_excel(excel_file, empresa_id, output_file=None, formato='updates',
+                                             tamano_lote=TAMANO_LOTE, usar_cache=True,
+                                             incremental=None, eliminados_csv=None, df=None,
+                                             pool=None, commit_cada=None, metricas=None):
     """
     Genera SQL UPDATE statements para actualizar precio_por_mayor
     desde un archivo Excel
@@ -25,33 +65,36 @@ def actualizar_precios_por_mayor_desde_excel(excel_file, empresa_id, output_file
         excel_file: Ruta al archivo Excel
         empresa_id: ID de la empresa
         output_file: Archivo de salida (opcional)
+        formato: 'updates' (un UPDATE por fila) o 'lotes' (UPDATE ... FROM (VALUES ...))
+        tamano_lote: Códigos por UPDATE en el formato lotes
+        usar_cache: Usar la caché de archivos leídos (ver cache_excel.py)
+        incremental: Snapshot de la última ejecución; solo se actualizan los códigos con cambios
+        eliminados_csv: En modo incremental, CSV con los códigos que ya no están en el archivo
+        df: DataFrame ya leído (lo usa importar_inventario.py); si se indica no se vuelve a leer excel_file
+        pool: Pool de conexiones (carga_db.crear_pool); si se indica se actualiza directamente
+            la base de datos en lugar de escribir el SQL
+        commit_cada: Códigos por transacción: con pool, de la carga; sin pool, el SQL se divide en bloques
+            numerados para ejecutar_sql.py (None: una sola transacción / sin bloques)
+        metricas: Métricas por etapa (metricas.Metricas) donde se registra la ejecución
+    
+    Devuelve un diccionario con el resumen o False si hubo un error.
     """
+    inicio = time.perf_counter()
+    metricas = metricas or Metricas('actualizar_precios_por_mayor')
+    if pool is not None:
+        # La carga directa usa los mismos lotes que el formato lotes
+        formato = 'lotes'
     try:
         # Leer el archivo Excel
-        print(f"Leyendo archivo: {excel_file}")
-        df = pd.read_excel(excel_file)
+        if df is None:
+            print(f"Leyendo archivo: {excel_file}")
+            with metricas.etapa('lectura') as etapa:
+                df = leer_archivo(excel_file, usar_cache)
+                etapa.salida = len(df)
         
         # Normalizar nombres de columnas
-        df.columns = df.columns.str.strip()
-        
-        # Mapeo de nombres de columnas posibles
-        column_mapping = {
-            'codigo': ['codigo', 'código', 'code'],
-            'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor', 
-                                'precio al por mayor', 'precio por mayor', 'precio mayor',
-                                'precio mayorista', 'precio mayor', 'precio x mayor']
-        }
-        
-        # Buscar y renombrar columnas
-        normalized_columns = {}
-        for standard_name, possible_names in column_mapping.items():
-            for col in df.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    normalized_columns[col] = standard_name
-                    break
-        
-        # Renombrar columnas
-        df = df.rename(columns=normalized_columns)
+        with metricas.etapa('normalizar', len(df)):
+            df = normalizar_columnas(df, COLUMN_MAPPING)
         
         print(f"Columnas detectadas: {', '.join(df.columns.tolist())}")
         
@@ -68,13 +111,14 @@ def actualizar_precios_por_mayor_desde_excel(excel_file, empresa_id, output_file
             return False
         
         # Generar nombre de archivo de salida si no se proporciona
-        if not output_file:
+        if not output_file and pool is None:
             base_name = os.path.splitext(os.path.basename(excel_file))[0]
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_file = f'update_precios_por_mayor_{base_name}_{timestamp}.sql'
         
-        # Escribir SQL
-        with open(output_file, 'w', encoding='utf-8') as f:
+        # Escribir SQL (con carga directa no se escribe ningún archivo)
+        carga = None
+        with open(output_file, 'w', encoding='utf-8') if pool is None else io.StringIO() as f:
             f.write("-- ============================================\n")
             f.write("-- ACTUALIZACIÓN DE PRECIOS AL POR MAYOR DESDE EXCEL\n")
             f.write(f"-- Archivo: {os.path.basename(excel_file)}\n")
@@ -82,88 +126,109 @@ def actualizar_precios_por_mayor_desde_excel(excel_file, empresa_id, output_file
             f.write(f"-- Empresa ID: {empresa_id}\n")
             f.write("-- ============================================\n\n")
             f.write("-- IMPORTANTE: Revisa los UPDATE statements antes de ejecutarlos\n\n")
+            # Con commit_cada el SQL se divide en transacciones numeradas (ver ejecutar_sql.py)
+            por_bloques = SalidaPorBloques(f.write, commit_cada) if commit_cada and pool is None else None
             
             registros_procesados = 0
             registros_actualizados = 0
             errores = []
+            # Formato lotes: precio por código (si un código se repite gana la última fila)
+            precios_lote = {}
             
-            for index, row in df.iterrows():
-                try:
-                    codigo = str(row['codigo']).strip().replace("'", "''")
-                    
-                    if not codigo or codigo.lower() == 'nan':
-                        errores.append(f"Fila {index + 2}: Código vacío. Se omite.")
-                        continue
-                    
-                    # Procesar precio_por_mayor
-                    precio_por_mayor_sql = 'NULL'
-                    if 'precio_por_mayor' in df.columns and pd.notna(row.get('precio_por_mayor')):
-                        precio_por_mayor_str = str(row['precio_por_mayor']).strip()
-                        
-                        # Remover símbolo de dólar y espacios
-                        precio_por_mayor_str = precio_por_mayor_str.replace('$', '').replace(' ', '')
-                        
-                        # Manejar diferentes formatos de números
-                        # Si tiene comas, asumir que son separadores de miles (formato colombiano)
-                        if ',' in precio_por_mayor_str and '.' not in precio_por_mayor_str:
-                            # Formato: 1.000,00 o 1,000
-                            precio_por_mayor_str = precio_por_mayor_str.replace(',', '')
-                        elif ',' in precio_por_mayor_str and '.' in precio_por_mayor_str:
-                            # Formato: 1.000,50 (coma como decimal)
-                            precio_por_mayor_str = precio_por_mayor_str.replace('.', '').replace(',', '.')
-                        elif '.' in precio_por_mayor_str and ',' not in precio_por_mayor_str:
-                            # Formato: 1000.50 o 1.000 (punto como decimal o separador de miles)
-                            # Si tiene más de un punto, asumir separador de miles
-                            if precio_por_mayor_str.count('.') > 1:
-                                precio_por_mayor_str = precio_por_mayor_str.replace('.', '')
-                            # Si tiene un solo punto, verificar si es decimal o separador de miles
-                            # Asumimos que si tiene más de 2 dígitos después del punto, es separador de miles
-                            partes = precio_por_mayor_str.split('.')
-                            if len(partes) == 2 and len(partes[1]) > 2:
-                                # Probablemente es separador de miles, no decimal
-                                precio_por_mayor_str = precio_por_mayor_str.replace('.', '')
+            # Procesar todos los precios de la columna de una vez
+            with metricas.etapa('parsear', len(df), perfilar=True):
+                precios, validos = procesar_precios(df['precio_por_mayor'])
+            
+            # Modo incremental: códigos cuyo último precio es nuevo o distinto al del snapshot
+            cambiados = None
+            if incremental:
+                with metricas.etapa('incremental', len(df)) as etapa:
+                    anterior = leer_snapshot(incremental, 'precios_por_mayor', empresa_id)
+                    actuales = {}
+                    for codigo_val, precio_por_mayor, valido in zip(df['codigo'].tolist(), precios.tolist(), validos):
+                        codigo = str(codigo_val).strip()
+                        if valido and codigo and codigo.lower() != 'nan':
+                            actuales[codigo] = precio_por_mayor
+                    cambiados = cambios(actuales, anterior)
+                    etapa.salida = len(cambiados)
+                
+            with metricas.etapa('emitir', len(df), perfilar=True) as etapa:
+                for index, codigo_val, precio_val, precio_por_mayor, valido in zip(
+                        df.index, df['codigo'].tolist(), df['precio_por_mayor'].tolist(), precios.tolist(), validos):
+                    try:
+                        codigo = str(codigo_val).strip().replace("'", "''")
                         
-                        # Remover cualquier carácter que no sea dígito o punto
-                        precio_por_mayor_str = re.sub(r'[^\d.]', '', precio_por_mayor_str)
+                        if not codigo or codigo.lower() == 'nan':
+                            errores.append(f"Fila {index + 2}: Código vacío. Se omite.")
+                            metricas.rechazar('codigo_vacio')
+                            continue
                         
-                        if precio_por_mayor_str and precio_por_mayor_str.lower() != 'nan' and precio_por_mayor_str != '':
-                            try:
-                                precio_por_mayor = float(precio_por_mayor_str)
-                                if precio_por_mayor > 0:
-                                    precio_por_mayor_sql = str(precio_por_mayor)
-                            except ValueError:
-                                errores.append(f"Fila {index + 2}: Precio inválido '{row.get('precio_por_mayor')}' para código '{codigo}'")
-                                continue
-                    
-                    # Solo generar UPDATE si hay un valor para actualizar
-                    if precio_por_mayor_sql != 'NULL':
-                        # Generar UPDATE statement
-                        sql = f"""UPDATE juguetes 
+                        # Solo generar UPDATE si hay un valor para actualizar
+                        if valido and cambiados is not None and str(codigo_val).strip() not in cambiados:
+                            pass  # Modo incremental: sin cambios desde la última ejecución
+                        elif valido and formato == 'lotes':
+                            precios_lote[str(codigo_val).strip()] = precio_por_mayor
+                            registros_actualizados += 1
+                        elif valido:
+                            # Generar UPDATE statement
+                            sql = f"""UPDATE juguetes 
 SET 
-    precio_por_mayor = {precio_por_mayor_sql},
+    precio_por_mayor = {precio_por_mayor},
     updated_at = NOW()
 WHERE codigo = '{codigo}' 
     AND empresa_id = {empresa_id};
 
 """
-                        f.write(sql)
-                        registros_actualizados += 1
+                            (por_bloques or f).write(sql)
+                            registros_actualizados += 1
+                        elif pd.notna(precio_val) and str(precio_val).strip():
+                            errores.append(f"Fila {index + 2}: Precio inválido '{precio_val}' para código '{codigo}'")
+                            metricas.rechazar('precio_invalido')
+                            continue
+                        else:
+                            errores.append(f"Fila {index + 2}: No se encontró precio al por mayor para código '{codigo}'")
+                            metricas.rechazar('sin_precio')
+                        
+                        registros_procesados += 1
+                        
+                    except Exception as e:
+                        errores.append(f"Fila {index + 2}: Error procesando - {str(e)}")
+                        metricas.rechazar('error')
+                        continue
+                
+                if precios_lote:
+                    if pool is not None:
+                        carga = carga_db.cargar_updates(pool, empresa_id, 'codigo', {'precio_por_mayor': 'NUMERIC'},
+                                                        list(precios_lote.items()), commit_cada=commit_cada)
                     else:
-                        errores.append(f"Fila {index + 2}: No se encontró precio al por mayor para código '{codigo}'")
-                    
-                    registros_procesados += 1
-                    
-                except Exception as e:
-                    errores.append(f"Fila {index + 2}: Error procesando - {str(e)}")
-                    continue
-            
+                        escribir = f.write if por_bloques is None else por_bloques.escritor(tamano_lote)
+                        escribir_updates_por_lotes(escribir, empresa_id, 'codigo', {'precio_por_mayor': 'NUMERIC'},
+                                                   list(precios_lote.items()), tamano_lote)
+                etapa.salida = registros_actualizados
+                
+            total_bloques = por_bloques.cerrar() if por_bloques is not None else None
             f.write("\n-- ============================================\n")
             f.write("-- FIN DE LOS UPDATES\n")
             f.write("-- ============================================\n")
         
-        print(f"\n✓ SQL generado exitosamente: {output_file}")
+        if pool is None:
+            print(f"\n✓ SQL generado exitosamente: {output_file}")
+        if total_bloques is not None:
+            print(f"✓ SQL dividido en {total_bloques} bloques de hasta {commit_cada} códigos: "
+                  f"python ejecutar_sql.py {output_file}")
         print(f"✓ Total de registros procesados: {registros_procesados}")
         print(f"✓ Total de registros actualizados: {registros_actualizados}")
+        if pool is not None:
+            carga_db.imprimir_carga(carga, time.perf_counter() - inicio)
+        if incremental:
+            codigos_eliminados = eliminados(actuales, anterior)
+            guardar_snapshot(incremental, 'precios_por_mayor', empresa_id, actuales)
+            print(resumen_cambios(len(cambiados), len(actuales), codigos_eliminados))
+            if eliminados_csv:
+                escribir_eliminados(eliminados_csv, ['codigo', 'precio_por_mayor'],
+                                    [(codigo, anterior[codigo]) for codigo in codigos_eliminados])
+                print(f"✓ Códigos eliminados guardados en: {eliminados_csv}")
+            print(f"✓ Snapshot actualizado: {incremental}")
         
         if errores:
             print(f"\n⚠ Advertencias/Errores ({len(errores)}):")
@@ -172,7 +237,14 @@ WHERE codigo = '{codigo}'
             if len(errores) > 20:
                 print(f"  ... y {len(errores) - 20} más")
         
-        return True
+        return {
+            'output_file': output_file,
+            'registros': registros_procesados,
+            'actualizados': registros_actualizados,
+            'avisos': len(errores),
+            'carga': carga,
+            'bloques': total_bloques,
+        }
         
     except Exception as e:
         print(f"Error al procesar el archivo: {str(e)}")
@@ -181,22 +253,36 @@ WHERE codigo = '{codigo}'
         return False
 
 def main():
-    if len(sys.argv) < 3:
-        print("Uso: python actualizar_precios_por_mayor_desde_excel.py <archivo_excel.xlsx> <empresa_id> [archivo_salida.sql]")
-        print("\nEjemplo:")
-        print("  python actualizar_precios_por_mayor_desde_excel.py \"Inventario 2025 1.xlsx\" 1")
-        print("  python actualizar_precios_por_mayor_desde_excel.py \"Inventario 2025 1.xlsx\" 1 update_precios.sql")
-        sys.exit(1)
-    
-    excel_file = sys.argv[1]
-    empresa_id = int(sys.argv[2])
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
-    
-    if not os.path.exists(excel_file):
-        print(f"Error: El archivo {excel_file} no existe")
+    parser = argparse.ArgumentParser(
+        description="Genera SQL UPDATE para precio_por_mayor desde un archivo Excel",
+        epilog="Ejemplo:\n"
+               '  python actualizar_precios_por_mayor_desde_excel.py "Inventario 2025 1.xlsx" 1\n'
+               '  python actualizar_precios_por_mayor_desde_excel.py "Inventario 2025 1.xlsx" 1 update_precios.sql\n'
+               '  python actualizar_precios_por_mayor_desde_excel.py "Inventario 2025 1.xlsx" 1 --formato lotes\n'
+               '  python actualizar_precios_por_mayor_desde_excel.py "Inventario 2025 1.xlsx" 1 --cargar',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    opciones.opciones_precios_mayor(parser)
+    args = parser.parse_args()
+    opciones.validar(parser, args)
+    ejecutar(parser, args)
+
+def ejecutar(parser, args):
+    """Ejecuta el script con los argumentos ya validados (también desde toyswall_import.py)"""
+    pool = carga_db.pool_de_argumentos(parser, args)
+    metricas = metricas_de_argumentos('actualizar_precios_por_mayor', args)
+    try:
+        resultado = actualizar_precios_por_mayor_desde_excel(args.excel_file, args.empresa_id, args.output_file,
+                                                             formato=args.formato, tamano_lote=args.tamano_lote,
+                                                             usar_cache=not args.no_cache, incremental=args.incremental,
+                                                             eliminados_csv=args.eliminados, pool=pool,
+                                                             commit_cada=args.commit_cada, metricas=metricas)
+    finally:
+        if pool is not None:
+            pool.closeall()
+    guardar_metricas(metricas, args, archivos=[args.excel_file], ok=bool(resultado))
+    if pool is not None and not resultado:
         sys.exit(1)
-    
-    actualizar_precios_por_mayor_desde_excel(excel_file, empresa_id, output_file)
 
 if __name__ == "__main__":
     main()
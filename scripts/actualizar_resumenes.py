@@ -0,0 +1,292 @@
+"""
+Actualización incremental de las tablas de resumen de los indicadores del dashboard
+
+El resumen del dashboard (js/dashboard-funcionalidades.js) descargaba en cada
+carga el precio de todas las ventas de la empresa para sumar las ganancias y
+contaba tiendas, bodegas y usuarios con una consulta cada una. Este script
+mantiene las tablas de migrations/crear_tablas_resumen_kpi.sql, que el
+dashboard lee con una sola llamada a la función resumen_dashboard():
+
+    - resumen_ventas_dia: ventas, unidades, total y abonos por día, tienda,
+      empleado, método de pago y al por mayor
+    - resumen_pagos_dia: pagos por día y método de pago
+    - resumen_stock_ubicacion: unidades y valor del inventario por ubicación
+
+Cada actualización procesa solo lo nuevo. resumen_marcas guarda por empresa
+el último id de ventas y pagos ya procesado (y su created_at); las filas con id mayor se agrupan en PostgreSQL y se suman a los
+resúmenes con INSERT ... ON CONFLICT DO UPDATE, en la misma transacción que
+mueve la marca: si algo falla no cambia nada. El costo es proporcional a la
+actividad desde la última vez, no a la historia.
+
+    - Una venta o un pago borrado o modificado (deshacer una venta, una
+      devolución, deshacer una venta al por mayor) no tiene id nuevo. Los
+      triggers de la migración anotan su día en resumen_dias_pendientes, en la
+      misma transacción que el cambio; cada actualización saca esos días de la
+      tabla y los rehace completos desde las ventas y los pagos que quedan
+    - Solo se procesan filas creadas hace más de --margen segundos: un id
+      menor que aún no se había confirmado al leer (otra transacción en curso)
+      se alcanza a ver en la siguiente actualización
+    - El inventario no tiene historia con ids (los juguetes se actualizan en
+      su lugar): resumen_stock_ubicacion se recalcula completo con un solo
+      GROUP BY, que con índice por empresa es barato
+    - La tienda de una venta es la de su empleado (como en kardex.py); las
+      fechas son días en la zona horaria --zona, guardada en las marcas. Para
+      cambiarla hay que rehacer todo con --completo
+
+Uso:
+    python actualizar_resumenes.py [empresa_id] [--db URL] [--zona ZONA] [--margen SEGUNDOS]
+                                   [--completo] [--metricas metricas.json]
+
+Sin empresa_id se actualizan todas las empresas. La URL se toma de --db o de
+DATABASE_URL. Pensado para correr cada pocos minutos (cron).
+
+Ejemplo:
+    python actualizar_resumenes.py 1 --db postgresql://postgres@localhost/toyswalls
+    python actualizar_resumenes.py --completo
+"""
+
+import argparse
+import sys
+import time
+from datetime import timedelta
+
+import carga_db
+from metricas import Metricas, agregar_opciones_metricas, metricas_de_argumentos, guardar_metricas
+
+# La zona horaria del dashboard (la misma de analisis_ventas.py)
+ZONA = 'America/Bogota'
+
+# Segundos que debe tener una fila para procesarla
+MARGEN = 60
+
+# Clave de pg_advisory_xact_lock (con la empresa): dos actualizaciones de la
+# misma empresa no corren a la vez
+BLOQUEO = 2201
+
+TABLAS_MARCA = ('ventas', 'pagos')
+
+# Filtros de las filas a agrupar: las nuevas (por id) o las de los días que se rehacen
+_NUEVAS = "{a}.id > %(desde)s AND {a}.id <= %(hasta)s"
+_DIAS = ("{a}.id <= %(hasta)s AND {a}.created_at >= %(inicio)s::timestamp AT TIME ZONE %(zona)s "
+         "AND {a}.created_at < %(fin)s::timestamp AT TIME ZONE %(zona)s")
+
+_SUMAR_VENTAS = """
+INSERT INTO resumen_ventas_dia AS r (empresa_id, fecha, tienda_id, empleado_id, metodo_pago, es_por_mayor,
+                                     ventas, cantidad, total, abono)
+SELECT v.empresa_id, (v.created_at AT TIME ZONE %(zona)s)::date, COALESCE(e.tienda_id, 0),
+       COALESCE(v.empleado_id, 0), v.metodo_pago, COALESCE(v.es_por_mayor, FALSE),
+       COUNT(*), SUM(COALESCE(NULLIF(v.cantidad, 0), 1)), SUM(v.precio_venta), SUM(COALESCE(v.abono, 0))
+FROM ventas v
+LEFT JOIN empleados e ON e.id = v.empleado_id
+WHERE v.empresa_id = %(empresa_id)s AND {filtro}
+GROUP BY 1, 2, 3, 4, 5, 6
+ON CONFLICT (empresa_id, fecha, tienda_id, empleado_id, metodo_pago, es_por_mayor) DO UPDATE SET
+    ventas = r.ventas + EXCLUDED.ventas,
+    cantidad = r.cantidad + EXCLUDED.cantidad,
+    total = r.total + EXCLUDED.total,
+    abono = r.abono + EXCLUDED.abono
+"""
+
+_SUMAR_PAGOS = """
+INSERT INTO resumen_pagos_dia AS r (empresa_id, fecha, metodo_pago, pagos, monto)
+SELECT p.empresa_id, (p.created_at AT TIME ZONE %(zona)s)::date, p.metodo_pago, COUNT(*), SUM(p.monto)
+FROM pagos p
+WHERE p.empresa_id = %(empresa_id)s AND {filtro}
+GROUP BY 1, 2, 3
+ON CONFLICT (empresa_id, fecha, metodo_pago) DO UPDATE SET
+    pagos = r.pagos + EXCLUDED.pagos,
+    monto = r.monto + EXCLUDED.monto
+"""
+
+_STOCK = """
+INSERT INTO resumen_stock_ubicacion (empresa_id, tipo_ubicacion, ubicacion_id, juguetes, unidades,
+                                     valor_min, valor_por_mayor, actualizado_at)
+SELECT empresa_id,
+       CASE WHEN bodega_id IS NOT NULL THEN 'bodega' WHEN tienda_id IS NOT NULL THEN 'tienda' ELSE 'ninguna' END,
+       COALESCE(bodega_id, tienda_id, 0), COUNT(*), SUM(cantidad),
+       SUM(cantidad * COALESCE(precio_min, 0)), SUM(cantidad * COALESCE(precio_por_mayor, 0)), NOW()
+FROM juguetes
+WHERE empresa_id = %(empresa_id)s
+GROUP BY 1, 2, 3
+"""
+
+# Última fila que se puede procesar de cada tabla (creada antes del margen)
+_HASTA = """
+SELECT id, {fecha} FROM {tabla}
+WHERE empresa_id = %(empresa_id)s AND id > %(desde)s AND {fecha} < NOW() - make_interval(secs => %(margen)s)
+ORDER BY id DESC LIMIT 1
+"""
+
+_MARCA = """
+INSERT INTO resumen_marcas (empresa_id, tabla, ultimo_id, ultimo_created_at, zona, actualizado_at)
+VALUES (%(empresa_id)s, %(tabla)s, %(ultimo_id)s, %(ultimo_created_at)s, %(zona)s, NOW())
+ON CONFLICT (empresa_id, tabla) DO UPDATE SET
+    ultimo_id = EXCLUDED.ultimo_id,
+    ultimo_created_at = EXCLUDED.ultimo_created_at,
+    zona = EXCLUDED.zona,
+    actualizado_at = EXCLUDED.actualizado_at
+"""
+
+
+def leer_marcas(cursor, empresa_id):
+    """{tabla: (ultimo_id, ultimo_created_at, zona)} de la empresa"""
+    cursor.execute("SELECT tabla, ultimo_id, ultimo_created_at, zona FROM resumen_marcas WHERE empresa_id = %s",
+                   (empresa_id,))
+    return {tabla: (ultimo_id, fecha, zona) for tabla, ultimo_id, fecha, zona in cursor.fetchall()}
+
+
+def _hasta(cursor, tabla, empresa_id, desde, margen):
+    """(id, created_at) de la última fila nueva de la tabla, o None si no hay"""
+    cursor.execute(_HASTA.format(tabla=tabla, fecha='created_at'),
+                   {'empresa_id': empresa_id, 'desde': desde, 'margen': margen})
+    return cursor.fetchone()
+
+
+def _dias_pendientes(cursor, empresa_id):
+    """
+    Días con ventas o pagos borrados o modificados desde la actualización
+    anterior (los anota el trigger de la migración); se sacan de la tabla
+    """
+    cursor.execute("DELETE FROM resumen_dias_pendientes WHERE empresa_id = %s RETURNING fecha", (empresa_id,))
+    return sorted(fecha for (fecha,) in cursor.fetchall())
+
+
+def _rangos(dias):
+    """
+    Días ordenados agrupados en rangos [inicio, fin) de días consecutivos: cada
+    rango se rehace con un recorrido del índice (empresa_id, created_at), sin
+    leer los días de en medio cuando las devoluciones tocan días lejanos
+    """
+    rangos = []
+    for dia in dias:
+        if rangos and rangos[-1][1] == dia:
+            rangos[-1][1] = dia + timedelta(days=1)
+        else:
+            rangos.append([dia, dia + timedelta(days=1)])
+    return rangos
+
+
+def actualizar_empresa(con, empresa_id, zona=ZONA, margen=MARGEN, completo=False, metricas=None):
+    """
+    Actualiza los resúmenes de la empresa en una transacción. Devuelve un
+    diccionario con las ventas y pagos procesados, los días rehechos y las
+    ubicaciones del inventario.
+    """
+    metricas = metricas or Metricas('actualizar_resumenes')
+    resultado = {'empresa_id': empresa_id, 'ventas': 0, 'pagos': 0, 'dias_rehechos': 0, 'ubicaciones': 0}
+    with con.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (BLOQUEO, empresa_id))
+        marcas = leer_marcas(cursor, empresa_id)
+        zonas = {marca[2] for marca in marcas.values()}
+        if not completo and zonas and zonas != {zona}:
+            raise ValueError(f"los resúmenes de la empresa {empresa_id} están en la zona {', '.join(sorted(zonas))}: "
+                             f"usa --completo para rehacerlos en {zona}")
+        if completo:
+            for tabla in ('resumen_ventas_dia', 'resumen_pagos_dia', 'resumen_marcas'):
+                cursor.execute(f"DELETE FROM {tabla} WHERE empresa_id = %s", (empresa_id,))
+            marcas = {}
+
+        # Ventas y pagos nuevos: se suman a los días que ya había
+        nuevas_marcas = {}
+        for tabla, sentencia, alias in (('ventas', _SUMAR_VENTAS, 'v'), ('pagos', _SUMAR_PAGOS, 'p')):
+            desde, fecha, _ = marcas.get(tabla, (0, None, zona))
+            hasta = _hasta(cursor, tabla, empresa_id, desde, margen)
+            nuevas_marcas[tabla] = hasta or (desde, fecha)
+            if hasta is None:
+                continue
+            with metricas.etapa(tabla) as etapa:
+                cursor.execute(f"SELECT COUNT(*) FROM {tabla} WHERE empresa_id = %s AND id > %s AND id <= %s",
+                               (empresa_id, desde, hasta[0]))
+                resultado[tabla] = etapa.entrada = cursor.fetchone()[0]
+                cursor.execute(sentencia.format(filtro=_NUEVAS.format(a=alias)),
+                               {'empresa_id': empresa_id, 'desde': desde, 'hasta': hasta[0], 'zona': zona})
+                etapa.salida = cursor.rowcount
+
+        # Ventas y pagos borrados o modificados: sus días se rehacen desde lo que queda
+        # (con --completo ya está todo)
+        dias = _dias_pendientes(cursor, empresa_id)
+        if dias and not completo:
+            resultado['dias_rehechos'] = len(dias)
+            with metricas.etapa('pendientes', len(dias)):
+                for tabla, sentencia, alias in (('ventas', _SUMAR_VENTAS, 'v'), ('pagos', _SUMAR_PAGOS, 'p')):
+                    cursor.execute(f"DELETE FROM resumen_{tabla}_dia WHERE empresa_id = %s AND fecha = ANY(%s)",
+                                   (empresa_id, dias))
+                    for inicio, fin in _rangos(dias):
+                        cursor.execute(sentencia.format(filtro=_DIAS.format(a=alias)), {
+                            'empresa_id': empresa_id, 'hasta': nuevas_marcas[tabla][0], 'zona': zona,
+                            'inicio': inicio, 'fin': fin,
+                        })
+
+        # Inventario por ubicación: completo
+        with metricas.etapa('stock') as etapa:
+            cursor.execute("DELETE FROM resumen_stock_ubicacion WHERE empresa_id = %s", (empresa_id,))
+            cursor.execute(_STOCK, {'empresa_id': empresa_id})
+            etapa.salida = resultado['ubicaciones'] = cursor.rowcount
+
+        for tabla in TABLAS_MARCA:
+            ultimo_id, ultimo_created_at = nuevas_marcas[tabla]
+            cursor.execute(_MARCA, {'empresa_id': empresa_id, 'tabla': tabla, 'ultimo_id': ultimo_id,
+                                    'ultimo_created_at': ultimo_created_at, 'zona': zona})
+    con.commit()
+    return resultado
+
+
+def actualizar_resumenes(pool, empresa_id=None, zona=ZONA, margen=MARGEN, completo=False, metricas=None):
+    """Actualiza una empresa o todas (empresa_id None); devuelve la lista de resultados de actualizar_empresa"""
+    with carga_db.conexion(pool) as con:
+        if empresa_id is None:
+            with con.cursor() as cursor:
+                cursor.execute("SELECT id FROM empresas ORDER BY id")
+                empresas = [fila[0] for fila in cursor.fetchall()]
+            con.commit()
+        else:
+            empresas = [empresa_id]
+        return [actualizar_empresa(con, empresa, zona, margen, completo, metricas) for empresa in empresas]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Actualiza las tablas de resumen de los indicadores del dashboard con las ventas y pagos "
+                    "nuevos, borrados o modificados",
+        epilog="Ejemplo:\n"
+               "  python actualizar_resumenes.py 1 --db postgresql://postgres@localhost/toyswalls\n"
+               "  python actualizar_resumenes.py --completo",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('empresa_id', type=int, nargs='?', help="ID de la empresa (por defecto todas)")
+    parser.add_argument('--db', metavar='URL', help="URL de PostgreSQL (por defecto la variable DATABASE_URL)")
+    parser.add_argument('--zona', default=ZONA, help=f"Zona horaria de los días (por defecto {ZONA})")
+    parser.add_argument('--margen', type=int, default=MARGEN,
+                        help=f"Procesar solo las filas creadas hace más de estos segundos (por defecto {MARGEN})")
+    parser.add_argument('--completo', action='store_true',
+                        help="Rehacer los resúmenes desde cero (la primera vez no hace falta: las marcas empiezan en 0)")
+    agregar_opciones_metricas(parser)
+    args = parser.parse_args()
+    if args.margen < 0:
+        parser.error("--margen no puede ser negativo")
+
+    try:
+        pool = carga_db.crear_pool(args.db, 1)
+    except Exception as e:
+        parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+
+    metricas = metricas_de_argumentos('actualizar_resumenes', args)
+    inicio = time.perf_counter()
+    try:
+        resultados = actualizar_resumenes(pool, args.empresa_id, args.zona, args.margen, args.completo, metricas)
+    except ValueError as e:
+        print(f"✗ ERROR: {e}")
+        sys.exit(1)
+    finally:
+        pool.closeall()
+
+    for resultado in resultados:
+        print(f"✓ Empresa {resultado['empresa_id']}: {resultado['ventas']:,} ventas y {resultado['pagos']:,} pagos "
+              f"nuevos, {resultado['dias_rehechos']} días rehechos por ventas o pagos borrados o modificados, "
+              f"{resultado['ubicaciones']} ubicaciones de inventario")
+    print(f"✓ Resúmenes actualizados en {time.perf_counter() - inicio:.2f} s")
+    guardar_metricas(metricas, args, empresas=resultados, ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Resumen precalculado de las ventas del mes por tienda y por empleado
+
+js/analisis-tiendas-empleados.js descarga todas las ventas del mes al navegador
+(obtenerVentasDelMesCompleto) y en cada carga del dashboard las agrupa en
+JavaScript, venta por venta: por día y tienda (procesarVentasPorDiaTienda), por
+hora y tienda (procesarVentasPorHoraTienda) y por empleado
+(procesarVentasPorEmpleado). A medida que avanza el mes la página tarda más.
+
+Este script calcula los mismos agregados fuera del navegador y escribe un
+resumen JSON compacto (unos pocos KB, sin importar cuántas ventas tenga el mes):
+
+    - Lee las exportaciones CSV de ventas, juguetes, tiendas y empleados, o las
+      consulta en PostgreSQL (--db) con COPY: de ventas solo las del mes
+    - Cada venta recibe un índice de día, de hora (en la zona horaria del
+      dashboard, --zona), de tienda y de empleado; cada agregado es una suma con
+      np.bincount sobre el índice combinado, sin recorrer las ventas en Python
+    - El resumen se guarda como archivo JSON o en la tabla resumen_ventas_mes
+      (migrations/crear_tabla_resumen_ventas_mes.sql), con un INSERT ... ON
+      CONFLICT en un archivo SQL (--sql) o directamente (--cargar)
+
+Las reglas son las del JavaScript:
+    - La tienda de una venta es la del juguete con su código (el de mayor id si
+      el código está en varias ubicaciones); las ventas de juguetes en bodega o
+      sin juguete no cuentan por tienda
+    - La cantidad vacía o 0 cuenta como 1 y el total suma precio_venta (el
+      total de la línea)
+    - El empleado se muestra con su nombre, su código o 'Sin nombre'
+
+El resumen guarda el id de la última venta incluida (ultimo_venta_id). El
+dashboard lee el resumen del mes y pide solo las ventas con id mayor, que suma
+con las mismas funciones de antes: la página hace dos consultas pequeñas en lugar
+de descargar el mes. Si no hay resumen del mes actual, todo sigue como antes.
+El resumen no ve las ventas que se borran o modifican después de generarlo
+(devoluciones, deshacer una venta): el dashboard descarta un resumen generado
+hace más de una hora (ANTIGUEDAD_MAXIMA_RESUMEN_MS en el JavaScript) y agrupa
+todas las ventas del mes. Por eso se vuelve a generar cada 30 minutos con cron
+(y después de deshacer ventas), lo que además mantiene pocas las ventas nuevas.
+
+Exportaciones (por ejemplo con psql):
+    \\copy (SELECT * FROM ventas WHERE empresa_id = 1) TO 'ventas.csv' CSV HEADER
+    \\copy (SELECT id, codigo, tienda_id, empresa_id FROM juguetes WHERE empresa_id = 1) TO 'juguetes.csv' CSV HEADER
+    \\copy (SELECT id, nombre, empresa_id FROM tiendas) TO 'tiendas.csv' CSV HEADER
+    \\copy (SELECT id, nombre, codigo, empresa_id FROM empleados) TO 'empleados.csv' CSV HEADER
+
+Uso:
+    python analisis_ventas.py empresa_id [--mes AAAA-MM] [--zona ZONA]
+                              (--ventas ventas.csv --juguetes juguetes.csv --tiendas tiendas.csv
+                               --empleados empleados.csv | --db URL)
+                              [--salida resumen.json] [--sql resumen.sql | --cargar]
+                              [--metricas metricas.json]
+
+Ejemplo:
+    python analisis_ventas.py 1 --ventas ventas.csv --juguetes juguetes.csv --tiendas tiendas.csv --empleados empleados.csv
+    python analisis_ventas.py 1 --mes 2025-01 --db postgresql://postgres@localhost/toyswalls --cargar
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from lectura import leer_exportacion, leer_exportacion_por_bloques
+from metricas import Metricas, agregar_opciones_metricas, metricas_de_argumentos, guardar_metricas
+from salida_sql import sql_texto
+
+# Cambiar si cambia el contenido del resumen (el dashboard lo revisa)
+VERSION_RESUMEN = 1
+
+# Zona horaria del dashboard: los días y las horas son los del navegador
+ZONA = 'America/Bogota'
+
+HORAS = 24
+
+TABLA_RESUMEN = 'resumen_ventas_mes'
+
+
+def rango_del_mes(mes, zona=ZONA):
+    """(inicio, fin) del mes 'AAAA-MM' en la zona, como Timestamps; el mes actual si mes es None"""
+    if mes is None:
+        inicio = pd.Timestamp.now(tz=zona).normalize().replace(day=1)
+    else:
+        inicio = pd.Timestamp(f"{mes}-01").tz_localize(zona)
+    return inicio, inicio + pd.DateOffset(months=1)
+
+
+def leer_ventas(ventas_csv, empresa_id, inicio, fin):
+    """Ventas de la empresa en [inicio, fin): id, juguete_codigo, empleado_id, cantidad, precio_venta y fecha (UTC)"""
+    partes = []
+    numericas = ['id', 'cantidad', 'empleado_id', 'precio_venta']
+    for bloque in leer_exportacion_por_bloques(ventas_csv, empresa_id, numericas + ['juguete_codigo', 'created_at'],
+                                               numericas=numericas, limpiar=['juguete_codigo']):
+        fecha = pd.to_datetime(bloque['created_at'], utc=True, format='ISO8601', errors='coerce')
+        en_mes = ((fecha >= inicio) & (fecha < fin)).to_numpy()
+        bloque = bloque[en_mes].drop(columns=['created_at', 'empresa_id'], errors='ignore')
+        bloque['fecha'] = fecha[en_mes]
+        partes.append(bloque)
+    if not partes:
+        return pd.DataFrame({'id': [], 'juguete_codigo': [], 'empleado_id': [], 'cantidad': [], 'precio_venta': [],
+                             'fecha': pd.to_datetime([], utc=True)})
+    return pd.concat(partes, ignore_index=True)
+
+
+def leer_tienda_de_codigo(juguetes_csv, empresa_id):
+    """Series codigo → tienda_id (NaN si el juguete no está en una tienda) del juguete de mayor id de cada código"""
+    juguetes = leer_exportacion(juguetes_csv, empresa_id, ['id', 'tienda_id', 'codigo'], numericas=['id', 'tienda_id'],
+                                limpiar=['codigo'])
+    juguetes = juguetes.sort_values('id', kind='stable').drop_duplicates('codigo', keep='last')
+    return juguetes.set_index('codigo')['tienda_id']
+
+
+def leer_nombres(archivo_csv, opcionales=()):
+    """
+    DataFrame indexado por id con el nombre (y las columnas opcionales que estén)
+    de una exportación de tiendas o empleados; vacío = NaN
+    """
+    df = leer_exportacion(archivo_csv, None, ['id', 'nombre'], numericas=['id'], opcionales=opcionales)
+    df = df[df['id'].notna()].drop_duplicates('id')
+    return df.set_index(df['id'].astype(np.int64))[['nombre'] + [col for col in opcionales if col in df.columns]]
+
+
+def exportar_db(pool, empresa_id, inicio, fin, carpeta):
+    """
+    Exporta de PostgreSQL a carpeta (COPY ... TO STDOUT) las ventas del mes y las
+    columnas de juguetes, tiendas y empleados que se usan; devuelve las rutas
+    """
+    import carga_db
+
+    consultas = {
+        'ventas': "SELECT id, juguete_codigo, empleado_id, cantidad, precio_venta, created_at FROM ventas "
+                  f"WHERE empresa_id = {int(empresa_id)} AND created_at >= %s AND created_at < %s",
+        'juguetes': f"SELECT id, codigo, tienda_id FROM juguetes WHERE empresa_id = {int(empresa_id)}",
+        'tiendas': "SELECT id, nombre FROM tiendas",
+        'empleados': "SELECT id, nombre, codigo FROM empleados",
+    }
+    rutas = {}
+    with carga_db.conexion(pool) as con, con.cursor() as cursor:
+        for tabla, consulta in consultas.items():
+            if '%s' in consulta:
+                consulta = cursor.mogrify(consulta, (inicio.isoformat(), fin.isoformat())).decode()
+            rutas[tabla] = os.path.join(carpeta, f'{tabla}.csv')
+            with open(rutas[tabla], 'w', encoding='utf-8') as f:
+                cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        con.rollback()
+    return rutas
+
+
+def _numeros(valores):
+    """Lista de números para el JSON: enteros si todos lo son, si no redondeados a 2 decimales"""
+    redondeados = np.round(valores, 2)
+    if np.all(redondeados == np.round(redondeados)):
+        return redondeados.astype(np.int64).tolist()
+    return redondeados.tolist()
+
+
+def calcular_resumen(ventas, tienda_de_codigo, tiendas, empleados, inicio, zona=ZONA):
+    """
+    Resumen del mes (diccionario listo para JSON) con los agregados de
+    procesarVentasPorDiaTienda, procesarVentasPorHoraTienda y procesarVentasPorEmpleado.
+    tiendas y empleados son los DataFrames de leer_nombres (indexados por id)
+    """
+    dias_mes = (inicio + pd.DateOffset(months=1) - pd.Timedelta(days=1)).day
+    local = pd.DatetimeIndex(ventas['fecha']).tz_convert(zona)
+    dia = local.day.to_numpy(dtype=np.int64) - 1
+    hora = local.hour.to_numpy(dtype=np.int64)
+    # parseFloat(venta.cantidad || 1): vacía o 0 cuenta como 1
+    cantidad = ventas['cantidad'].fillna(0).to_numpy(dtype=float)
+    cantidad = np.where(cantidad == 0, 1.0, cantidad)
+    total = ventas['precio_venta'].fillna(0).to_numpy(dtype=float)
+
+    # Por tienda: la del juguete del código, si esa tienda existe
+    tienda = tienda_de_codigo.reindex(ventas['juguete_codigo']).to_numpy(dtype=float)
+    con_tienda = ~np.isnan(tienda)
+    con_tienda[con_tienda] = np.isin(tienda[con_tienda].astype(np.int64), tiendas.index)
+    # Como las claves numéricas de un objeto de JavaScript: en orden de id
+    indice_tienda, ids_tiendas = pd.factorize(tienda[con_tienda].astype(np.int64), sort=True)
+
+    def por_tienda(columna, tamano):
+        posiciones = indice_tienda * tamano + columna[con_tienda]
+        largo = len(ids_tiendas) * tamano
+        return [np.bincount(posiciones, weights=pesos[con_tienda], minlength=largo).reshape(-1, tamano)
+                for pesos in (cantidad, total)]
+
+    dias_cantidad, dias_total = por_tienda(dia, dias_mes)
+    horas_cantidad, horas_total = por_tienda(hora, HORAS)
+    resumen_tiendas = [
+        {
+            'id': int(id_tienda),
+            'nombre': tiendas.at[id_tienda, 'nombre'],
+            'dias': {'cantidad': _numeros(dias_cantidad[i]), 'total': _numeros(dias_total[i])},
+            'horas': {'cantidad': _numeros(horas_cantidad[i]), 'total': _numeros(horas_total[i])},
+        }
+        for i, id_tienda in enumerate(ids_tiendas)
+    ]
+
+    # Por empleado: los que están en la exportación de empleados
+    empleado = ventas['empleado_id'].to_numpy(dtype=float)
+    con_empleado = ~np.isnan(empleado)
+    con_empleado[con_empleado] = np.isin(empleado[con_empleado].astype(np.int64), empleados.index)
+    indice_empleado, ids_empleados = pd.factorize(empleado[con_empleado].astype(np.int64), sort=True)
+    cantidad_empleado = np.bincount(indice_empleado, weights=cantidad[con_empleado], minlength=len(ids_empleados))
+    total_empleado = np.bincount(indice_empleado, weights=total[con_empleado], minlength=len(ids_empleados))
+    nombres = empleados.reindex(ids_empleados)
+    nombre = nombres['nombre']
+    if 'codigo' in nombres:
+        nombre = nombre.fillna(nombres['codigo'])
+    nombre = nombre.fillna('Sin nombre')
+    resumen_empleados = [
+        {'id': int(id_empleado), 'nombre': n, 'cantidad': c, 'total': t}
+        for id_empleado, n, c, t in zip(ids_empleados, nombre, _numeros(cantidad_empleado), _numeros(total_empleado))
+    ]
+
+    return {
+        'version': VERSION_RESUMEN,
+        'mes': inicio.strftime('%Y-%m'),
+        'zona': zona,
+        'dias_mes': int(dias_mes),
+        'ventas': len(ventas),
+        'ultimo_venta_id': int(ventas['id'].max()) if len(ventas) else 0,
+        'generado': pd.Timestamp.now(tz=zona).isoformat(timespec='seconds'),
+        'tiendas': resumen_tiendas,
+        'empleados': resumen_empleados,
+    }
+
+
+def resumen_json(resumen):
+    """JSON compacto del resumen"""
+    return json.dumps(resumen, ensure_ascii=False, separators=(',', ':'))
+
+
+def sql_resumen(empresa_id, resumen):
+    """INSERT ... ON CONFLICT que guarda el resumen en la tabla resumen_ventas_mes"""
+    return (f"INSERT INTO {TABLA_RESUMEN} (empresa_id, mes, zona, ultimo_venta_id, ventas, datos, generado_at)\n"
+            f"VALUES ({int(empresa_id)}, {sql_texto(resumen['mes'] + '-01')}, {sql_texto(resumen['zona'])}, "
+            f"{resumen['ultimo_venta_id']}, {resumen['ventas']}, {sql_texto(resumen_json(resumen))}::jsonb, "
+            f"{sql_texto(resumen['generado'])}::timestamptz)\n"
+            "ON CONFLICT (empresa_id, mes) DO UPDATE SET\n"
+            "    zona = EXCLUDED.zona,\n"
+            "    ultimo_venta_id = EXCLUDED.ultimo_venta_id,\n"
+            "    ventas = EXCLUDED.ventas,\n"
+            "    datos = EXCLUDED.datos,\n"
+            "    generado_at = EXCLUDED.generado_at;\n")
+
+
+def analizar_ventas(empresa_id, mes=None, zona=ZONA, ventas_csv=None, juguetes_csv=None, tiendas_csv=None,
+                    empleados_csv=None, pool=None, metricas=None):
+    """
+    Resumen del mes desde las exportaciones CSV o, sin ellas, desde la base de
+    datos del pool (carga_db.crear_pool)
+    """
+    metricas = metricas or Metricas('analisis_ventas')
+    inicio, fin = rango_del_mes(mes, zona)
+    with tempfile.TemporaryDirectory() as carpeta:
+        if ventas_csv is None:
+            with metricas.etapa('exportar'):
+                rutas = exportar_db(pool, empresa_id, inicio, fin, carpeta)
+            ventas_csv, juguetes_csv = rutas['ventas'], rutas['juguetes']
+            tiendas_csv, empleados_csv = rutas['tiendas'], rutas['empleados']
+        with metricas.etapa('lectura') as etapa:
+            ventas = leer_ventas(ventas_csv, empresa_id, inicio, fin)
+            tienda_de_codigo = leer_tienda_de_codigo(juguetes_csv, empresa_id)
+            tiendas = leer_nombres(tiendas_csv)
+            empleados = leer_nombres(empleados_csv, ['codigo'])
+            etapa.salida = len(ventas)
+    with metricas.etapa('agrupar', len(ventas), perfilar=True):
+        resumen = calcular_resumen(ventas, tienda_de_codigo, tiendas, empleados, inicio, zona)
+    return resumen
+
+
+def ejecutar(parser, args):
+    metricas = metricas_de_argumentos('analisis_ventas', args)
+    pool = None
+    if args.db:
+        import carga_db
+        try:
+            pool = carga_db.crear_pool(args.db, 1)
+        except Exception as e:
+            parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+    try:
+        resumen = analizar_ventas(args.empresa_id, args.mes, args.zona, args.ventas, args.juguetes, args.tiendas,
+                                  args.empleados, pool, metricas)
+        texto = resumen_json(resumen)
+        salida = args.salida
+        if not salida and not args.sql and not args.cargar:
+            salida = f"resumen_ventas_{args.empresa_id}_{resumen['mes']}.json"
+        if salida:
+            with open(salida, 'w', encoding='utf-8') as f:
+                f.write(texto)
+            print(f"✓ Resumen guardado en: {salida}")
+        if args.sql:
+            with open(args.sql, 'w', encoding='utf-8') as f:
+                f.write("-- ============================================\n")
+                f.write("-- RESUMEN DE VENTAS DEL MES (analisis_ventas.py)\n")
+                f.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"-- Empresa ID: {args.empresa_id}\n")
+                f.write("-- ============================================\n\n")
+                f.write(sql_resumen(args.empresa_id, resumen))
+            print(f"✓ SQL generado exitosamente: {args.sql}")
+        if args.cargar:
+            import carga_db
+            with carga_db.conexion(pool) as con, con.cursor() as cursor:
+                cursor.execute(sql_resumen(args.empresa_id, resumen))
+                con.commit()
+            print(f"✓ Resumen cargado en {TABLA_RESUMEN} (empresa {args.empresa_id}, mes {resumen['mes']})")
+    finally:
+        if pool is not None:
+            pool.closeall()
+
+    print(f"✓ Ventas del mes {resumen['mes']}: {resumen['ventas']} (última venta id {resumen['ultimo_venta_id']})")
+    print(f"✓ Tiendas: {len(resumen['tiendas'])}, empleados: {len(resumen['empleados'])}; "
+          f"resumen de {len(texto.encode('utf-8')) / 1024:.1f} KB")
+    guardar_metricas(metricas, args, archivos=[a for a in (args.ventas, args.juguetes, args.tiendas, args.empleados) if a],
+                     ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resumen precalculado de las ventas del mes por día, hora, tienda y empleado para el dashboard",
+        epilog="Ejemplo:\n"
+               "  python analisis_ventas.py 1 --ventas ventas.csv --juguetes juguetes.csv --tiendas tiendas.csv --empleados empleados.csv\n"
+               "  python analisis_ventas.py 1 --mes 2025-01 --db postgresql://postgres@localhost/toyswalls --cargar",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('--mes', help="Mes AAAA-MM (por defecto el actual en --zona)")
+    parser.add_argument('--zona', default=ZONA, help=f"Zona horaria de los días y las horas (por defecto {ZONA})")
+    parser.add_argument('--ventas', metavar='ARCHIVO_CSV', help="Exportación CSV de la tabla ventas")
+    parser.add_argument('--juguetes', metavar='ARCHIVO_CSV', help="Exportación CSV de juguetes (id, codigo, tienda_id)")
+    parser.add_argument('--tiendas', metavar='ARCHIVO_CSV', help="Exportación CSV de tiendas (id, nombre)")
+    parser.add_argument('--empleados', metavar='ARCHIVO_CSV', help="Exportación CSV de empleados (id, nombre, codigo)")
+    parser.add_argument('--db', metavar='URL',
+                        help="PostgreSQL de donde leer si no se indican las exportaciones y donde guardar con --cargar "
+                             "(con --cargar, por defecto la variable DATABASE_URL)")
+    parser.add_argument('--salida', metavar='ARCHIVO_JSON', help="Archivo JSON del resumen (por defecto resumen_ventas_<empresa>_<mes>.json)")
+    parser.add_argument('--sql', metavar='ARCHIVO_SQL', help=f"Escribir el INSERT ... ON CONFLICT del resumen en {TABLA_RESUMEN}")
+    parser.add_argument('--cargar', '--load', action='store_true', help=f"Guardar el resumen directamente en {TABLA_RESUMEN}")
+    agregar_opciones_metricas(parser)
+    args = parser.parse_args()
+
+    exportaciones = [args.ventas, args.juguetes, args.tiendas, args.empleados]
+    if args.cargar and not args.db:
+        args.db = os.environ.get('DATABASE_URL')
+        if not args.db:
+            parser.error("--cargar requiere --db o la variable DATABASE_URL")
+    if not args.db and not all(exportaciones):
+        parser.error("indica --ventas, --juguetes, --tiendas y --empleados, o --db")
+    if any(exportaciones) and not all(exportaciones):
+        parser.error("indica las cuatro exportaciones: --ventas, --juguetes, --tiendas y --empleados")
+    if args.mes:
+        try:
+            datetime.strptime(args.mes, '%Y-%m')
+        except ValueError:
+            parser.error("--mes debe tener el formato AAAA-MM")
+    for archivo in exportaciones:
+        if archivo and not os.path.exists(archivo):
+            parser.error(f"El archivo {archivo} no existe")
+    ejecutar(parser, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark de analisis_ventas.py contra el agrupamiento venta por venta del dashboard
+
+Genera exportaciones sintéticas de juguetes (bench_movimientos), ventas y
+empleados (bench_kardex) y tiendas, y compara para un mes:
+
+    - por ventas: el mismo recorrido que hacen procesarVentasPorDiaTienda,
+      procesarVentasPorHoraTienda y procesarVentasPorEmpleado en
+      js/analisis-tiendas-empleados.js, en Python con diccionarios
+    - vectorizado: analisis_ventas.calcular_resumen con np.bincount
+
+Verifica que los dos den los mismos agregados y compara el tamaño de lo que
+descarga el navegador: las ventas del mes en JSON (lo que devuelve Supabase)
+contra el resumen.
+
+Uso:
+    python benchmarks/bench_analisis_ventas.py [ventas] [--juguetes N] [--mes AAAA-MM] [--semilla N]
+
+Ejemplo:
+    python benchmarks/bench_analisis_ventas.py 1000000
+    python benchmarks/bench_analisis_ventas.py 5000000 --juguetes 200000 --mes 2024-12
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analisis_ventas import (leer_ventas, leer_tienda_de_codigo, leer_nombres, calcular_resumen, rango_del_mes,
+                             resumen_json, ZONA)
+from generar_libros import CARPETA
+from bench_movimientos import generar_exportaciones, EMPRESA_ID, TIENDAS
+from bench_kardex import generar_ventas
+
+
+def generar_tiendas(carpeta):
+    """Escribe tiendas.csv con las tiendas de bench_movimientos; devuelve la ruta"""
+    archivo = os.path.join(carpeta, 'tiendas.csv')
+    pd.DataFrame({'id': TIENDAS, 'nombre': [f'Tienda {t}' for t in TIENDAS], 'empresa_id': EMPRESA_ID}).to_csv(
+        archivo, index=False)
+    return archivo
+
+
+def resumen_por_ventas(ventas, tienda_de_codigo, tiendas, empleados, inicio, zona=ZONA):
+    """Los mismos agregados recorriendo las ventas una por una, como el JavaScript del dashboard"""
+    dias_mes = (inicio + pd.DateOffset(months=1) - pd.Timedelta(days=1)).day
+    tienda_de = {codigo: int(t) for codigo, t in tienda_de_codigo.items() if not pd.isna(t)}
+    nombre_tienda = tiendas['nombre'].to_dict()
+    nombre_empleado = empleados['nombre'].to_dict()
+    por_dia = {}
+    por_hora = {}
+    por_empleado = {}
+    fechas = pd.DatetimeIndex(ventas['fecha']).tz_convert(zona)
+    for codigo, empleado_id, cantidad, precio, fecha in zip(ventas['juguete_codigo'], ventas['empleado_id'],
+                                                            ventas['cantidad'], ventas['precio_venta'], fechas):
+        cantidad = float(cantidad) if not pd.isna(cantidad) and cantidad else 1.0
+        precio = float(precio) if not pd.isna(precio) else 0.0
+        tienda_id = tienda_de.get(codigo)
+        if tienda_id in nombre_tienda:
+            if tienda_id not in por_dia:
+                por_dia[tienda_id] = {d: [0.0, 0.0] for d in range(1, dias_mes + 1)}
+                por_hora[tienda_id] = {h: [0.0, 0.0] for h in range(24)}
+            por_dia[tienda_id][fecha.day][0] += cantidad
+            por_dia[tienda_id][fecha.day][1] += precio
+            por_hora[tienda_id][fecha.hour][0] += cantidad
+            por_hora[tienda_id][fecha.hour][1] += precio
+        if not pd.isna(empleado_id) and int(empleado_id) in nombre_empleado:
+            acumulado = por_empleado.setdefault(int(empleado_id), [0.0, 0.0])
+            acumulado[0] += cantidad
+            acumulado[1] += precio
+    return por_dia, por_hora, por_empleado
+
+
+def coinciden(resumen, por_dia, por_hora, por_empleado):
+    """True si el resumen vectorizado tiene los mismos agregados que el recorrido venta por venta"""
+    if sorted(por_dia) != [t['id'] for t in resumen['tiendas']]:
+        return False
+    for tienda in resumen['tiendas']:
+        dias = por_dia[tienda['id']]
+        horas = por_hora[tienda['id']]
+        if not (np.allclose(tienda['dias']['cantidad'], [dias[d][0] for d in sorted(dias)])
+                and np.allclose(tienda['dias']['total'], [dias[d][1] for d in sorted(dias)])
+                and np.allclose(tienda['horas']['cantidad'], [horas[h][0] for h in range(24)])
+                and np.allclose(tienda['horas']['total'], [horas[h][1] for h in range(24)])):
+            return False
+    esperados = {e: tuple(v) for e, v in por_empleado.items()}
+    obtenidos = {e['id']: (e['cantidad'], e['total']) for e in resumen['empleados']}
+    return esperados.keys() == obtenidos.keys() and all(np.allclose(esperados[e], obtenidos[e]) for e in esperados)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resumen de ventas del mes: venta por venta (como el dashboard) contra vectorizado",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_analisis_ventas.py 1000000\n"
+               "  python benchmarks/bench_analisis_ventas.py 5000000 --juguetes 200000 --mes 2024-12",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('ventas', type=int, nargs='?', default=1000000,
+                        help="Ventas sintéticas de todo el año 2024 (por defecto 1000000)")
+    parser.add_argument('--juguetes', type=int, default=50000, help="Filas de juguetes (por defecto 50000)")
+    parser.add_argument('--mes', default='2024-05', help="Mes que se resume (por defecto 2024-05)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos (por defecto 0)")
+    parser.add_argument('--carpeta', default=CARPETA, help=f"Carpeta de las exportaciones generadas (por defecto {CARPETA})")
+    args = parser.parse_args()
+    if args.ventas < 1 or args.juguetes < 1:
+        parser.error("ventas y --juguetes deben ser mayores que 0")
+
+    print(f"Generando {args.ventas} ventas sobre {args.juguetes} juguetes")
+    juguetes_csv, _ = generar_exportaciones(1, args.juguetes, args.carpeta, args.semilla)
+    ventas_csv, empleados_csv = generar_ventas(args.ventas, juguetes_csv, args.carpeta, args.semilla)
+    tiendas_csv = generar_tiendas(args.carpeta)
+
+    inicio, fin = rango_del_mes(args.mes)
+    tiempo = time.perf_counter()
+    ventas = leer_ventas(ventas_csv, EMPRESA_ID, inicio, fin)
+    tienda_de_codigo = leer_tienda_de_codigo(juguetes_csv, EMPRESA_ID)
+    tiendas = leer_nombres(tiendas_csv)
+    empleados = leer_nombres(empleados_csv, ['codigo'])
+    tiempo_lectura = time.perf_counter() - tiempo
+
+    tiempo = time.perf_counter()
+    por_dia, por_hora, por_empleado = resumen_por_ventas(ventas, tienda_de_codigo, tiendas, empleados, inicio)
+    tiempo_ventas = time.perf_counter() - tiempo
+
+    tiempo = time.perf_counter()
+    resumen = calcular_resumen(ventas, tienda_de_codigo, tiendas, empleados, inicio)
+    tiempo_vectorizado = time.perf_counter() - tiempo
+
+    # Lo que devuelve Supabase: las columnas que pide obtenerVentasDelMesCompleto, en JSON
+    descarga = ventas.assign(created_at=ventas['fecha'].dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')).drop(columns=['fecha', 'id'])
+    tamano_ventas = len(descarga.to_json(orient='records').encode('utf-8'))
+    tamano_resumen = len(resumen_json(resumen).encode('utf-8'))
+
+    total = len(ventas)
+    print(f"\nVentas del mes {args.mes}: {total} (lectura de las exportaciones: {tiempo_lectura:.2f} s)")
+    print(f"Venta por venta: {tiempo_ventas:8.3f} s  ({total / tiempo_ventas:12,.0f} ventas/s)")
+    print(f"Vectorizado:     {tiempo_vectorizado:8.3f} s  ({total / tiempo_vectorizado:12,.0f} ventas/s)")
+    print(f"Aceleración: {tiempo_ventas / tiempo_vectorizado:.0f}x")
+    print(f"Descarga del navegador: ventas del mes {tamano_ventas / 2**20:.1f} MB, resumen {tamano_resumen / 1024:.1f} KB "
+          f"({tamano_ventas / tamano_resumen:.0f}x menos)")
+
+    if not coinciden(resumen, por_dia, por_hora, por_empleado):
+        print("\n✗ ERROR: los agregados no coinciden")
+        sys.exit(1)
+    print("\n✓ Los agregados vectorizados coinciden con los del recorrido venta por venta")
+    json.loads(resumen_json(resumen))
+
+
+if __name__ == "__main__":
+    main()
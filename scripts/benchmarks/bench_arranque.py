@@ -0,0 +1,160 @@
+"""
+Benchmark del tiempo de arranque: cada script por separado contra toyswall-import
+
+Mide, en procesos nuevos como desde un shell o un cron, lo que tarda cada
+comando en terminar cuando no hay un archivo que procesar:
+
+    - ayuda: --help
+    - argumento: un argumento inválido (empresa_id que no es un número)
+    - archivo: un archivo de entrada que no existe
+    - encabezados: --encabezados con un libro sintético (solo toyswall-import;
+      no depende del tamaño del libro)
+
+Para cada caso se muestra la mediana de --repeticiones ejecuciones de
+`python script.py ...` y de `python toyswall_import.py subcomando ...`, la
+aceleración y si el proceso llegó a importar pandas (con python -X importtime).
+
+Uso:
+    python benchmarks/bench_arranque.py [--subcomandos insert,bultos] [--repeticiones N] [--filas N]
+                                        [--guardar resultados.json]
+
+Ejemplo:
+    python benchmarks/bench_arranque.py
+    python benchmarks/bench_arranque.py --subcomandos bultos --repeticiones 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+CARPETA_SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CARPETA_SCRIPTS)
+
+from generar_libros import generar_libros, CARPETA
+
+VERSION_RESULTADOS = 1
+
+# Subcomando: (script, tipos de libro que recibe)
+SUBCOMANDOS = {
+    'insert': ('excel_to_sql.py', ['inventario']),
+    'procesar': ('procesar_inventario.py', ['inventario']),
+    'precios': ('actualizar_precios_desde_excel.py', ['precio_final', 'mayorista']),
+    'precios-mayor': ('actualizar_precios_por_mayor_desde_excel.py', ['inventario']),
+    'bultos': ('actualizar_bultos_desde_excel.py', ['inventario']),
+}
+
+
+def argumentos_casos(libros):
+    """{caso: argumentos después del script o del subcomando} (None: no aplica a los scripts)"""
+    return {
+        'ayuda': ['--help'],
+        'argumento': libros + ['uno'],
+        'archivo': ['no_existe.xlsx'] * len(libros) + ['1'],
+        'encabezados': libros + ['1', '--encabezados'],
+    }
+
+
+def cronometrar(comando, repeticiones):
+    """Mediana en segundos de ejecutar el comando repeticiones veces (sin mirar el código de salida)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=CARPETA_SCRIPTS)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def importa_pandas(comando):
+    """True si el proceso importó pandas (según python -X importtime)"""
+    salida = subprocess.run([comando[0], '-X', 'importtime'] + comando[1:], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, cwd=CARPETA_SCRIPTS).stderr
+    # pandas puede aparecer anidado (importado desde otro módulo)
+    return any(linea.split('|')[-1].strip() == 'pandas' for linea in salida.splitlines())
+
+
+def medir(subcomandos, repeticiones, filas, carpeta):
+    """[{subcomando, caso, script, cli, pandas_script, pandas_cli}] con los tiempos en segundos"""
+    rutas = generar_libros(filas, carpeta)
+    resultados = []
+    for subcomando in subcomandos:
+        script, tipos = SUBCOMANDOS[subcomando]
+        for caso, argumentos in argumentos_casos([rutas[tipo] for tipo in tipos]).items():
+            cli = [sys.executable, 'toyswall_import.py', subcomando] + argumentos
+            # Los scripts no tienen --encabezados
+            directo = None if caso == 'encabezados' else [sys.executable, script] + argumentos
+            resultado = {
+                'subcomando': subcomando,
+                'caso': caso,
+                'script': cronometrar(directo, repeticiones) if directo else None,
+                'cli': cronometrar(cli, repeticiones),
+                'pandas_script': importa_pandas(directo) if directo else None,
+                'pandas_cli': importa_pandas(cli),
+            }
+            resultados.append(resultado)
+            imprimir(resultado)
+    return resultados
+
+
+def imprimir(resultado):
+    """Una línea por medición"""
+    def pandas(valor):
+        return '' if valor is None else ('pandas' if valor else 'sin pandas')
+
+    script = f"{resultado['script']:7.3f} s" if resultado['script'] is not None else '      - '
+    aceleracion = f"{resultado['script'] / resultado['cli']:5.1f}x" if resultado['script'] else '     '
+    print(f"{resultado['subcomando']:<14} {resultado['caso']:<12} script {script} ({pandas(resultado['pandas_script']):<10})  "
+          f"toyswall-import {resultado['cli']:6.3f} s ({pandas(resultado['pandas_cli'])})  {aceleracion}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tiempo de arranque de los scripts de importación contra toyswall-import",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_arranque.py\n"
+               "  python benchmarks/bench_arranque.py --subcomandos bultos --repeticiones 20",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--subcomandos', help=f"Subcomandos a medir, separados por comas (por defecto todos: {', '.join(SUBCOMANDOS)})")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Ejecuciones de cada comando; se usa la mediana (por defecto 5)")
+    parser.add_argument('--filas', type=int, default=10000, help="Filas del libro sintético de --encabezados (por defecto 10000)")
+    parser.add_argument('--carpeta', default=CARPETA, help=f"Carpeta de los libros generados (por defecto {CARPETA})")
+    parser.add_argument('--guardar', metavar='ARCHIVO', help="Guardar los resultados en un JSON")
+    args = parser.parse_args()
+
+    subcomandos = args.subcomandos.split(',') if args.subcomandos else list(SUBCOMANDOS)
+    desconocidos = [subcomando for subcomando in subcomandos if subcomando not in SUBCOMANDOS]
+    if desconocidos:
+        parser.error(f"Subcomandos desconocidos: {', '.join(desconocidos)} (opciones: {', '.join(SUBCOMANDOS)})")
+    if args.repeticiones < 1:
+        parser.error("--repeticiones debe ser mayor que 0")
+    if args.filas < 1:
+        parser.error("--filas debe ser mayor que 0")
+
+    resultados = medir(subcomandos, args.repeticiones, args.filas, args.carpeta)
+
+    comparables = [r for r in resultados if r['script'] is not None]
+    script = statistics.median(r['script'] for r in comparables)
+    cli = statistics.median(r['cli'] for r in comparables)
+    print(f"\nMediana sin archivo que procesar: scripts {script:.3f} s, toyswall-import {cli:.3f} s "
+          f"({script / cli:.1f}x más rápido)")
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': VERSION_RESULTADOS,
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'repeticiones': args.repeticiones,
+                'resultados': resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"✓ Resultados guardados en: {args.guardar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Prueba de carga de generar_codigo_venta() con varias cajas cobrando a la vez,
+en una base de datos creada con setup_completo.sql (o con
+migrations/crear_funcion_generar_codigo_venta.sql aplicada)
+
+Cada caja es un hilo con su propia conexión que repite lo que hace el
+dashboard al registrar una venta (js/dashboard-funcionalidades.js), con una
+petición por paso como la API de Supabase:
+
+    1. pide el código con generar_codigo_venta()
+    2. por cada item: busca el juguete, inserta la fila en ventas y descuenta
+       la cantidad
+
+Compara la función actual (secuencia codigos_venta_seq y tabla
+codigos_venta_dia) con la anterior, que buscaba el último código del día en
+ventas (se crea aparte como generar_codigo_venta_anterior() y se borra al
+terminar). Para cada una informa ventas por segundo, la latencia (p50, p95 y
+p99) de pedir el código y de la venta completa, y los códigos repetidos:
+códigos que recibió más de una venta, es decir, filas de ventas distintas
+mezcladas bajo el mismo código.
+
+Crea una empresa con juguetes y --historia ventas de días anteriores (generadas
+en el servidor con generate_series) y la borra al terminar. Los códigos del
+día son globales, así que la prueba avanza el contador de hoy: úsalo solo
+contra una base de datos local de pruebas.
+
+Uso:
+    python benchmarks/bench_codigos_venta.py [cajas] [--db URL] [--ventas-por-caja N]
+                                             [--items N] [--historia N] [--pausa-ms MS]
+                                             [--funcion nueva|anterior|ambas]
+
+Ejemplo:
+    python benchmarks/bench_codigos_venta.py 16 --ventas-por-caja 50 --db postgresql://postgres@localhost/toyswalls
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carga_db
+
+JUGUETES = 2000
+
+# La versión anterior de generar_codigo_venta(), con otro nombre para compararlas
+_FUNCION_ANTERIOR = """
+CREATE OR REPLACE FUNCTION generar_codigo_venta_anterior()
+RETURNS TEXT AS $$
+DECLARE
+    fecha_actual TEXT;
+    contador INTEGER;
+    ultimo_codigo TEXT;
+    partes TEXT[];
+BEGIN
+    fecha_actual := TO_CHAR(CURRENT_DATE, 'YYYYMMDD');
+    SELECT codigo_venta INTO ultimo_codigo
+    FROM ventas
+    WHERE codigo_venta LIKE 'VENT-' || fecha_actual || '-%'
+    ORDER BY codigo_venta DESC
+    LIMIT 1;
+    IF ultimo_codigo IS NOT NULL THEN
+        partes := string_to_array(ultimo_codigo, '-');
+        IF array_length(partes, 1) >= 3 THEN
+            contador := CAST(partes[3] AS INTEGER) + 1;
+        ELSE
+            contador := 1;
+        END IF;
+    ELSE
+        contador := 1;
+    END IF;
+    RETURN 'VENT-' || fecha_actual || '-' || LPAD(contador::TEXT, 3, '0');
+END;
+$$ LANGUAGE plpgsql
+"""
+
+FUNCIONES = {
+    'anterior': 'generar_codigo_venta_anterior',
+    'nueva': 'generar_codigo_venta',
+}
+
+# Ventas de días anteriores con códigos del mismo formato (hasta 999 por día)
+_HISTORIA = """
+INSERT INTO ventas (codigo_venta, juguete_codigo, precio_venta, cantidad, metodo_pago, empresa_id, created_at)
+SELECT 'VENT-' || TO_CHAR(CURRENT_DATE - d, 'YYYYMMDD') || '-' || LPAD((1 + g / 365 %% 999)::TEXT, 3, '0'),
+       'BENCH-' || (g %% %(juguetes)s), 1000 + g %% 9000, 1, 'efectivo', %(empresa_id)s,
+       CURRENT_DATE - d + interval '9 hours'
+FROM generate_series(0, %(historia)s - 1) g, LATERAL (SELECT 1 + g %% 365 AS d) dias
+"""
+
+
+def crear_empresa(cursor, historia):
+    """Empresa sintética con juguetes (sin límite práctico de cantidad) y ventas anteriores; devuelve su id"""
+    cursor.execute("INSERT INTO empresas (nombre) VALUES ('Benchmark códigos de venta') RETURNING id")
+    empresa_id = cursor.fetchone()[0]
+    cursor.execute("INSERT INTO juguetes (nombre, codigo, cantidad, precio_min, empresa_id) "
+                   "SELECT 'Juguete ' || g, 'BENCH-' || g, 1000000000, 1000 + g %% 500, %s "
+                   "FROM generate_series(0, %s - 1) g", (empresa_id, JUGUETES))
+    if historia:
+        cursor.execute(_HISTORIA, {'empresa_id': empresa_id, 'historia': historia, 'juguetes': JUGUETES})
+    return empresa_id
+
+
+def registrar_venta(cursor, funcion, empresa_id, items, rng):
+    """Una venta como registrarVenta del dashboard; devuelve (código, segundos del código)"""
+    inicio = time.perf_counter()
+    cursor.execute(f"SELECT {funcion}()")
+    codigo = cursor.fetchone()[0]
+    segundos_codigo = time.perf_counter() - inicio
+    for _ in range(items):
+        cantidad = rng.randint(1, 3)
+        juguete_codigo = f"BENCH-{rng.randrange(JUGUETES)}"
+        cursor.execute("SELECT id, cantidad, precio_min FROM juguetes WHERE codigo = %s AND empresa_id = %s LIMIT 1",
+                       (juguete_codigo, empresa_id))
+        juguete_id, disponible, precio = cursor.fetchone()
+        cursor.execute("INSERT INTO ventas (codigo_venta, juguete_codigo, precio_venta, cantidad, metodo_pago, empresa_id) "
+                       "VALUES (%s, %s, %s, %s, 'efectivo', %s) RETURNING id",
+                       (codigo, juguete_codigo, precio * cantidad, cantidad, empresa_id))
+        cursor.fetchone()
+        cursor.execute("UPDATE juguetes SET cantidad = %s WHERE id = %s", (disponible - cantidad, juguete_id))
+    return codigo, segundos_codigo
+
+
+def caja(pool, funcion, empresa_id, ventas, items, pausa, semilla, inicio, resultados, errores):
+    """Hilo de una caja: registra sus ventas y guarda (código, segundos del código, segundos de la venta)"""
+    rng = random.Random(semilla)
+    propios = []
+    try:
+        with carga_db.conexion(pool) as con:
+            con.autocommit = True  # Una transacción por petición, como la API de Supabase
+            try:
+                with con.cursor() as cursor:
+                    inicio.wait()
+                    for _ in range(ventas):
+                        antes = time.perf_counter()
+                        codigo, segundos_codigo = registrar_venta(cursor, funcion, empresa_id, items, rng)
+                        propios.append((codigo, segundos_codigo, time.perf_counter() - antes))
+                        if pausa:
+                            time.sleep(pausa)
+            finally:
+                con.autocommit = False
+    except Exception as e:
+        errores.append(e)
+        inicio.abort()
+    resultados.extend(propios)
+
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) de una lista ordenada"""
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def probar(pool, funcion, empresa_id, cajas, ventas, items, pausa):
+    """Cajas concurrentes con una función de códigos; devuelve las medidas de la prueba"""
+    resultados = []
+    errores = []
+    inicio = threading.Barrier(cajas + 1)
+    hilos = [threading.Thread(target=caja, args=(pool, funcion, empresa_id, ventas, items, pausa, numero,
+                                                 inicio, resultados, errores))
+             for numero in range(cajas)]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        inicio.wait()
+    except threading.BrokenBarrierError:
+        pass
+    reloj = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - reloj
+    if errores:
+        raise errores[0]
+
+    repetidos = {codigo: veces for codigo, veces in Counter(r[0] for r in resultados).items() if veces > 1}
+    codigos = sorted(r[1] for r in resultados)
+    completas = sorted(r[2] for r in resultados)
+    return {
+        'ventas': len(resultados),
+        'segundos': segundos,
+        'por_segundo': len(resultados) / segundos,
+        'codigo_ms': [percentil(codigos, p) * 1000 for p in (50, 95, 99)],
+        'venta_ms': [percentil(completas, p) * 1000 for p in (50, 95, 99)],
+        'codigos_repetidos': len(repetidos),
+        'ventas_con_codigo_repetido': sum(repetidos.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga de generar_codigo_venta() con varias cajas registrando ventas a la vez",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_codigos_venta.py 16 --ventas-por-caja 50 "
+               "--db postgresql://postgres@localhost/toyswalls",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('cajas', type=int, nargs='?', default=8, help="Cajas (conexiones) cobrando a la vez (por defecto 8)")
+    parser.add_argument('--db', metavar='URL', help="URL de PostgreSQL (por defecto la variable DATABASE_URL)")
+    parser.add_argument('--ventas-por-caja', type=int, default=100, help="Ventas que registra cada caja (por defecto 100)")
+    parser.add_argument('--items', type=int, default=2, help="Items por venta (por defecto 2)")
+    parser.add_argument('--historia', type=int, default=100000,
+                        help="Ventas de días anteriores en la empresa de prueba (por defecto 100000)")
+    parser.add_argument('--pausa-ms', type=float, default=0,
+                        help="Pausa de cada caja entre una venta y la siguiente, en ms (por defecto 0)")
+    parser.add_argument('--funcion', choices=['nueva', 'anterior', 'ambas'], default='ambas',
+                        help="Función a probar (por defecto ambas)")
+    args = parser.parse_args()
+    if args.cajas < 1 or args.ventas_por_caja < 1 or args.items < 1 or args.historia < 0 or args.pausa_ms < 0:
+        parser.error("cajas, --ventas-por-caja e --items deben ser mayores que 0; --historia y --pausa-ms no pueden ser negativos")
+    funciones = ['anterior', 'nueva'] if args.funcion == 'ambas' else [args.funcion]
+    if 'anterior' in funciones and args.cajas * args.ventas_por_caja > 999:
+        print("⚠ La función anterior solo numera 999 ventas por día: por encima repite códigos aun sin concurrencia")
+
+    try:
+        pool = carga_db.crear_pool(args.db, args.cajas + 1)
+    except Exception as e:
+        parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+
+    with carga_db.conexion(pool) as con, con.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('codigos_venta_dia') IS NOT NULL")
+        if 'nueva' in funciones and not cursor.fetchone()[0]:
+            parser.exit(1, "✗ ERROR: falta la tabla codigos_venta_dia: aplica "
+                           "migrations/crear_funcion_generar_codigo_venta.sql\n")
+        print(f"Generando {JUGUETES:,} juguetes y {args.historia:,} ventas anteriores en una empresa nueva")
+        empresa_id = crear_empresa(cursor, args.historia)
+        cursor.execute(_FUNCION_ANTERIOR)
+        con.commit()
+        try:
+            cursor.execute("ANALYZE ventas; ANALYZE juguetes")
+            con.commit()
+            print(f"{args.cajas} cajas × {args.ventas_por_caja} ventas de {args.items} items\n")
+            print(f"{'Función':<10} {'Ventas/s':>9} {'Código p50/p95/p99 (ms)':>26} "
+                  f"{'Venta p50/p95/p99 (ms)':>26} {'Repetidos':>10}")
+            repetidos = {}
+            for nombre in funciones:
+                medidas = probar(pool, FUNCIONES[nombre], empresa_id, args.cajas, args.ventas_por_caja,
+                                 args.items, args.pausa_ms / 1000)
+                repetidos[nombre] = medidas['codigos_repetidos']
+                print(f"{nombre:<10} {medidas['por_segundo']:>9.1f} "
+                      f"{' / '.join(f'{ms:.2f}' for ms in medidas['codigo_ms']):>26} "
+                      f"{' / '.join(f'{ms:.2f}' for ms in medidas['venta_ms']):>26} "
+                      f"{medidas['codigos_repetidos']:>10,}"
+                      + (f"  ({medidas['ventas_con_codigo_repetido']:,} ventas)" if medidas['codigos_repetidos'] else ""))
+                # Las ventas de hoy de la prueba no deben afectar a la siguiente función
+                cursor.execute("DELETE FROM ventas WHERE empresa_id = %s AND created_at >= CURRENT_DATE", (empresa_id,))
+                con.commit()
+
+            print()
+            if repetidos.get('anterior'):
+                print(f"⚠ La función anterior entregó {repetidos['anterior']:,} códigos a más de una venta")
+            if repetidos.get('nueva'):
+                print(f"✗ ERROR: generar_codigo_venta() entregó {repetidos['nueva']:,} códigos repetidos")
+                sys.exit(1)
+            if 'nueva' in repetidos:
+                print("✓ generar_codigo_venta() no repitió ningún código")
+        finally:
+            con.rollback()
+            cursor.execute("DROP FUNCTION IF EXISTS generar_codigo_venta_anterior()")
+            cursor.execute("DELETE FROM empresas WHERE id = %s", (empresa_id,))
+            con.commit()
+    pool.closeall()
+
+
+if __name__ == "__main__":
+    main()
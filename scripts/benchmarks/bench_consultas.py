@@ -0,0 +1,356 @@
+"""
+Benchmark de las consultas frecuentes del dashboard con y sin los índices propuestos
+
+Carga datos sintéticos de varias escalas (ventas y juguetes) en una base de
+datos local creada con setup_completo.sql y repite las consultas que hace el
+JavaScript, con los mismos filtros:
+
+    - juguetes por empresa_id y codigo, item o ilike de codigo/nombre
+      (autocompletar, ventas, ventas al por mayor)
+    - ventas por codigo_venta y facturada, las últimas sin facturar, las
+      recientes y las de un cliente
+    - pagos de un cliente y de una venta
+
+Cada consulta se ejecuta --repeticiones veces con parámetros al azar tomados
+de los datos (los mismos en las dos fases) y se guardan los percentiles 50, 95
+y 99 de la latencia y el plan de EXPLAIN (ANALYZE, BUFFERS) de una ejecución:
+
+    - antes: solo los índices de setup_completo.sql (se quitan los propuestos)
+    - después: con los índices de migrations/agregar_indices_consultas.sql
+
+Los índices con gin_trgm_ops necesitan la extensión pg_trgm (Supabase la
+tiene); si el servidor no la tiene, se omiten y se avisa.
+
+Los datos se crean en una empresa propia que se borra al terminar, y los
+índices propuestos se quitan y se vuelven a crear: úsalo solo contra una base
+de datos local de pruebas.
+
+Uso:
+    python benchmarks/bench_consultas.py [--db URL] [--escalas VENTAS:JUGUETES,...] [--repeticiones N]
+                                         [--planes CARPETA] [--guardar resultados.json]
+
+Ejemplo:
+    python benchmarks/bench_consultas.py --db postgresql://postgres@localhost/toyswalls
+    python benchmarks/bench_consultas.py --escalas 1000000:100000 --planes /tmp/planes --guardar consultas.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carga_db
+
+ESCALAS = '100000:10000,1000000:100000'
+REPETICIONES = 200
+CALENTAMIENTO = 10
+
+INDICES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                       'migrations', 'agregar_indices_consultas.sql')
+
+TIENDAS = 8
+BODEGAS = 3
+EMPLEADOS = 40
+TIPOS = ['Carro', 'Muñeca', 'Pelota', 'Rompecabezas', 'Peluche', 'Robot', 'Tren', 'Bloques', 'Dinosaurio', 'Avión',
+         'Camión', 'Cocina', 'Guitarra', 'Patineta', 'Bicicleta', 'Casa', 'Moto', 'Lego', 'Barco', 'Pistola de agua']
+COLORES = ['Rojo', 'Azul', 'Verde', 'Amarillo', 'Rosado', 'Negro', 'Blanco', 'Morado', 'Naranja', 'Gris']
+
+# (nombre, de dónde sale en el JavaScript, SQL); los parámetros salen de parametros()
+CONSULTAS = [
+    ('juguetes_codigo', "dashboard.js / ventas-por-mayor.js: juguete por código",
+     "SELECT * FROM juguetes WHERE empresa_id = %(empresa_id)s AND codigo = %(codigo)s"),
+    ('juguetes_codigo_stock', "ventas-por-mayor.js: ubicaciones del código con stock",
+     "SELECT id, cantidad, codigo, nombre, bodega_id, tienda_id FROM juguetes "
+     "WHERE codigo = %(codigo)s AND empresa_id = %(empresa_id)s AND cantidad > 0"),
+    ('juguetes_item', "ventas-por-mayor.js: código de un item",
+     "SELECT codigo, item FROM juguetes WHERE empresa_id = %(empresa_id)s AND item = %(item)s LIMIT 1"),
+    ('juguetes_ilike_codigo', "dashboard.js: autocompletar por código (ilike)",
+     "SELECT codigo, nombre, precio_min, precio_por_mayor, item, foto_url FROM juguetes "
+     "WHERE empresa_id = %(empresa_id)s AND codigo ILIKE %(codigo_ilike)s LIMIT 1"),
+    ('juguetes_ilike_nombre', "dashboard.js: autocompletar por nombre mientras se escribe (ilike)",
+     "SELECT codigo, nombre, precio_min, precio_por_mayor, item, foto_url FROM juguetes "
+     "WHERE empresa_id = %(empresa_id)s AND nombre ILIKE %(nombre_ilike)s LIMIT 1"),
+    ('ventas_codigo_venta', "dashboard-funcionalidades.js: líneas sin facturar de una venta",
+     "SELECT * FROM ventas WHERE codigo_venta = %(codigo_venta)s AND empresa_id = %(empresa_id)s AND facturada = FALSE"),
+    ('ventas_por_facturar', "dashboard-funcionalidades.js: últimas 50 ventas sin facturar",
+     "SELECT * FROM ventas WHERE empresa_id = %(empresa_id)s AND facturada = FALSE ORDER BY created_at DESC LIMIT 50"),
+    ('ventas_recientes', "dashboard-funcionalidades.js: ventas recientes del resumen",
+     "SELECT * FROM ventas WHERE empresa_id = %(empresa_id)s ORDER BY created_at DESC LIMIT 5"),
+    ('ventas_cliente', "clientes.js: ventas al por mayor de un cliente",
+     "SELECT id, precio_venta, metodo_pago, abono, created_at FROM ventas "
+     "WHERE cliente_id = %(cliente_id)s AND empresa_id = %(empresa_id)s AND es_por_mayor = TRUE"),
+    ('pagos_cliente', "clientes.js: pagos de un cliente",
+     "SELECT * FROM pagos WHERE cliente_id = %(cliente_id)s AND empresa_id = %(empresa_id)s ORDER BY created_at DESC"),
+    ('pagos_venta', "clientes.js: pagos de una venta",
+     "SELECT monto FROM pagos WHERE venta_id = %(venta_id)s AND empresa_id = %(empresa_id)s"),
+]
+
+# Juguetes: cada código en dos ubicaciones (una bodega y una tienda), la mitad con item
+_JUGUETES = """
+INSERT INTO juguetes (nombre, codigo, item, cantidad, precio_min, precio_por_mayor, empresa_id, bodega_id, tienda_id)
+SELECT (%(tipos)s::text[])[1 + (g / 2) %% 20] || ' ' || (%(colores)s::text[])[1 + (g / 40) %% 10] || ' ' || (g + 1) / 2,
+       'JUG-' || lpad(((g + 1) / 2)::text, 7, '0'),
+       CASE WHEN ((g + 1) / 2) %% 2 = 0 THEN 'IT-' || ((g + 1) / 2) END,
+       g %% 50, 1000 + g %% 500, 800 + g %% 400, %(empresa_id)s,
+       CASE WHEN g %% 2 = 0 THEN b.ids[1 + g %% array_length(b.ids, 1)] END,
+       CASE WHEN g %% 2 = 1 THEN t.ids[1 + g %% array_length(t.ids, 1)] END
+FROM generate_series(1, %(juguetes)s) g,
+     (SELECT array_agg(id) AS ids FROM bodegas WHERE empresa_id = %(empresa_id)s) b,
+     (SELECT array_agg(id) AS ids FROM tiendas WHERE empresa_id = %(empresa_id)s) t
+"""
+
+# Ventas de un año en orden, de 3 líneas por código de venta; el 3 % más reciente
+# sin facturar, una de cada 10 al por mayor (a un cliente, la mitad a crédito)
+_VENTAS = """
+INSERT INTO ventas (codigo_venta, juguete_codigo, empleado_id, precio_venta, cantidad, metodo_pago, empresa_id,
+                    facturada, es_por_mayor, cliente_id, abono, created_at)
+SELECT 'VENT-B' || %(empresa_id)s || '-' || (g - 1) / 3,
+       'JUG-' || lpad((1 + g %% (%(juguetes)s / 2))::text, 7, '0'),
+       e.ids[1 + g %% array_length(e.ids, 1)], 1000 + g %% 99000, 1 + g %% 3,
+       CASE WHEN g %% 10 = 0 AND g %% 20 = 0 THEN 'credito' ELSE (ARRAY['efectivo', 'transferencia', 'tarjeta'])[1 + g %% 3] END,
+       %(empresa_id)s, g <= %(ventas)s * 0.97, g %% 10 = 0,
+       CASE WHEN g %% 10 = 0 THEN c.ids[1 + (g / 10) %% array_length(c.ids, 1)] END, 0,
+       NOW() - (%(ventas)s - g) * (interval '365 days' / %(ventas)s)
+FROM generate_series(1, %(ventas)s) g,
+     (SELECT array_agg(id) AS ids FROM empleados WHERE empresa_id = %(empresa_id)s) e,
+     (SELECT array_agg(id) AS ids FROM clientes WHERE empresa_id = %(empresa_id)s) c
+"""
+
+# Dos pagos por cada venta a crédito
+_PAGOS = """
+INSERT INTO pagos (venta_id, cliente_id, monto, metodo_pago, empresa_id, created_at)
+SELECT v.id, v.cliente_id, round(v.precio_venta / 3, 2), 'efectivo', v.empresa_id, v.created_at + n * interval '7 days'
+FROM ventas v, generate_series(1, 2) n
+WHERE v.empresa_id = %(empresa_id)s AND v.metodo_pago = 'credito'
+"""
+
+
+def crear_datos(cursor, ventas, juguetes):
+    """Empresa sintética con ubicaciones, empleados, clientes, juguetes, ventas y pagos; devuelve su id"""
+    cursor.execute("INSERT INTO empresas (nombre) VALUES ('Benchmark consultas') RETURNING id")
+    empresa_id = cursor.fetchone()[0]
+    for tabla, cantidad in (('tiendas', TIENDAS), ('bodegas', BODEGAS)):
+        cursor.execute(f"INSERT INTO {tabla} (nombre, direccion, empresa_id) "
+                       f"SELECT '{tabla} ' || g, 'Benchmark', %s FROM generate_series(1, %s) g", (empresa_id, cantidad))
+    cursor.execute("INSERT INTO empleados (nombre, telefono, codigo, empresa_id) "
+                   "SELECT 'Empleado ' || g, '300', 'EMP-' || g, %s FROM generate_series(1, %s) g", (empresa_id, EMPLEADOS))
+    cursor.execute("INSERT INTO clientes (nombre, empresa_id) SELECT 'Cliente ' || g, %s FROM generate_series(1, %s) g",
+                   (empresa_id, max(100, ventas // 500)))
+    datos = {'empresa_id': empresa_id, 'ventas': ventas, 'juguetes': juguetes, 'tipos': TIPOS, 'colores': COLORES}
+    for sentencia in (_JUGUETES, _VENTAS, _PAGOS):
+        cursor.execute(sentencia, datos)
+    return empresa_id
+
+
+def leer_indices(archivo=INDICES):
+    """(extensiones, [(nombre, sentencia)]) de los CREATE EXTENSION / CREATE INDEX del archivo"""
+    with open(archivo, encoding='utf-8') as f:
+        texto = '\n'.join(linea for linea in f if not linea.lstrip().startswith('--'))
+    sentencias = [s.strip() for s in texto.split(';') if s.strip()]
+    extensiones = [s for s in sentencias if s.upper().startswith('CREATE EXTENSION')]
+    indices = [(re.search(r'CREATE INDEX IF NOT EXISTS (\w+)', s).group(1), s)
+               for s in sentencias if s.upper().startswith('CREATE INDEX')]
+    return extensiones, indices
+
+
+def muestras(cursor, empresa_id, tamano=1000):
+    """Valores reales para los parámetros: códigos, items, nombres, ventas sin facturar, clientes y ventas con pagos"""
+    consultas = {
+        'juguetes': "SELECT codigo, item, nombre FROM juguetes WHERE empresa_id = %s ORDER BY random() LIMIT %s",
+        'codigo_venta': "SELECT codigo_venta FROM ventas WHERE empresa_id = %s AND facturada = FALSE ORDER BY random() LIMIT %s",
+        'cliente_id': "SELECT id FROM clientes WHERE empresa_id = %s ORDER BY random() LIMIT %s",
+        'venta_id': "SELECT venta_id FROM pagos WHERE empresa_id = %s ORDER BY random() LIMIT %s",
+    }
+    resultado = {}
+    for nombre, consulta in consultas.items():
+        cursor.execute(consulta, (empresa_id, tamano))
+        resultado[nombre] = cursor.fetchall()
+    return resultado
+
+
+def parametros(valores, empresa_id, rng):
+    """Un juego de parámetros al azar para todas las consultas"""
+    codigo, item, nombre = rng.choice(valores['juguetes'])
+    if rng.random() < 0.5:
+        # Mientras se escribe: el nombre a medias, que casi nunca coincide
+        nombre_ilike = nombre[:rng.randint(3, max(3, len(nombre) - 1))].lower()
+    else:
+        nombre_ilike = nombre.upper()
+    return {
+        'empresa_id': empresa_id,
+        'codigo': codigo,
+        'item': item or f'IT-{rng.randint(1, 10**6)}',
+        'codigo_ilike': codigo.lower(),
+        'nombre_ilike': nombre_ilike,
+        'codigo_venta': rng.choice(valores['codigo_venta'])[0],
+        'cliente_id': rng.choice(valores['cliente_id'])[0],
+        'venta_id': rng.choice(valores['venta_id'])[0],
+    }
+
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) de una lista ordenada"""
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def resumen_plan(plan):
+    """Nodo raíz y bloques (shared hit + read) del texto de EXPLAIN (ANALYZE, BUFFERS)"""
+    nodos = re.findall(r'^\s*(?:->\s*)?([A-Z][\w ]+?)(?: using \w+)?(?: on \w+(?: \w+)?)?\s+\(cost', plan, re.M)
+    hit = re.search(r'Buffers: shared(?: hit=(\d+))?(?: read=(\d+))?', plan)
+    bloques = sum(int(n) for n in hit.groups() if n) if hit else 0
+    return {'nodos': nodos, 'bloques': bloques}
+
+
+def medir_consultas(cursor, valores, empresa_id, repeticiones, semilla, carpeta_planes=None, etiqueta=''):
+    """{consulta: {p50_ms, p95_ms, p99_ms, media_ms, nodos, bloques}} con los mismos parámetros en cada fase"""
+    resultados = {}
+    for nombre, _, sql in CONSULTAS:
+        rng = random.Random(semilla)
+        for _ in range(CALENTAMIENTO):
+            cursor.execute(sql, parametros(valores, empresa_id, rng))
+            cursor.fetchall()
+        tiempos = []
+        for _ in range(repeticiones):
+            datos = parametros(valores, empresa_id, rng)
+            inicio = time.perf_counter()
+            cursor.execute(sql, datos)
+            cursor.fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, parametros(valores, empresa_id, random.Random(semilla)))
+        plan = '\n'.join(fila[0] for fila in cursor.fetchall())
+        if carpeta_planes:
+            with open(os.path.join(carpeta_planes, f"{etiqueta}_{nombre}.txt"), 'w', encoding='utf-8') as f:
+                f.write(sql + '\n\n' + plan + '\n')
+        resultados[nombre] = {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'p99_ms': round(percentil(tiempos, 99), 3),
+            'media_ms': round(sum(tiempos) / len(tiempos), 3),
+            **resumen_plan(plan),
+        }
+    return resultados
+
+
+def quitar_indices(cursor, indices):
+    for nombre, _ in indices:
+        cursor.execute(f"DROP INDEX IF EXISTS {nombre}")
+
+
+def crear_indices(cursor, extensiones, indices, con_trigramas):
+    """Crea los índices (los de trigramas solo si hay pg_trgm); devuelve {nombre: MB}"""
+    if con_trigramas:
+        for sentencia in extensiones:
+            cursor.execute(sentencia)
+    tamanos = {}
+    for nombre, sentencia in indices:
+        if 'gin_trgm_ops' in sentencia and not con_trigramas:
+            continue
+        cursor.execute(sentencia)
+        cursor.execute("SELECT pg_relation_size(%s::regclass)", (nombre,))
+        tamanos[nombre] = round(cursor.fetchone()[0] / 2**20, 2)
+    return tamanos
+
+
+def imprimir_escala(escala):
+    print(f"\n{'Consulta':<24} {'p50 antes':>10} {'p50 después':>12} {'p95 antes':>10} {'p95 después':>12} "
+          f"{'bloques':>16}  plan después")
+    for nombre, _, _ in CONSULTAS:
+        antes = escala['antes'][nombre]
+        despues = escala['despues'][nombre]
+        bloques = f"{antes['bloques']} → {despues['bloques']}"
+        print(f"{nombre:<24} {antes['p50_ms']:>8.2f}ms {despues['p50_ms']:>10.2f}ms {antes['p95_ms']:>8.2f}ms "
+              f"{despues['p95_ms']:>10.2f}ms {bloques:>16}  {' > '.join(despues['nodos'][:3])}")
+    if escala['indices']:
+        print("Índices creados: " + ', '.join(f"{nombre} ({mb} MB)" for nombre, mb in escala['indices'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latencia y planes de las consultas frecuentes del dashboard, con y sin los índices propuestos",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_consultas.py --db postgresql://postgres@localhost/toyswalls\n"
+               "  python benchmarks/bench_consultas.py --escalas 1000000:100000 --planes /tmp/planes --guardar consultas.json",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--db', metavar='URL', help="URL de PostgreSQL (por defecto la variable DATABASE_URL)")
+    parser.add_argument('--escalas', default=ESCALAS, help=f"Ventas:juguetes de cada escala (por defecto {ESCALAS})")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help=f"Ejecuciones de cada consulta por fase (por defecto {REPETICIONES})")
+    parser.add_argument('--indices', default=INDICES, help="Archivo SQL con los índices propuestos")
+    parser.add_argument('--planes', metavar='CARPETA', help="Guardar el EXPLAIN (ANALYZE, BUFFERS) de cada consulta y fase")
+    parser.add_argument('--guardar', metavar='ARCHIVO_JSON', help="Guardar los resultados en un JSON")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los parámetros (por defecto 0)")
+    args = parser.parse_args()
+    try:
+        escalas = [tuple(int(n) for n in escala.split(':')) for escala in args.escalas.split(',')]
+    except ValueError:
+        parser.error("--escalas debe tener la forma VENTAS:JUGUETES,VENTAS:JUGUETES")
+    if args.repeticiones < 1 or any(v < 3 or j < 2 for v, j in escalas):
+        parser.error("--repeticiones y las escalas deben ser mayores que 0")
+    if args.planes:
+        os.makedirs(args.planes, exist_ok=True)
+
+    extensiones, indices = leer_indices(args.indices)
+    try:
+        pool = carga_db.crear_pool(args.db, 1)
+    except Exception as e:
+        parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+
+    resultados = []
+    with carga_db.conexion(pool) as con, con.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+        con_trigramas = cursor.fetchone()[0]
+        if not con_trigramas:
+            omitidos = [nombre for nombre, sentencia in indices if 'gin_trgm_ops' in sentencia]
+            print(f"⚠ El servidor no tiene la extensión pg_trgm: se omiten {', '.join(omitidos)}")
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", ([n for n, _ in indices],))
+        existian = {fila[0] for fila in cursor.fetchall()}
+        con.commit()
+
+        for ventas, juguetes in escalas:
+            print(f"\n=== {ventas:,} ventas, {juguetes:,} juguetes ===")
+            inicio = time.perf_counter()
+            empresa_id = crear_datos(cursor, ventas, juguetes)
+            con.commit()
+            print(f"Datos cargados en {time.perf_counter() - inicio:.1f} s")
+            try:
+                valores = muestras(cursor, empresa_id)
+                escala = {'ventas': ventas, 'juguetes': juguetes}
+                for fase in ('antes', 'despues'):
+                    if fase == 'antes':
+                        quitar_indices(cursor, indices)
+                        escala['indices'] = {}
+                    else:
+                        escala['indices'] = crear_indices(cursor, extensiones, indices, con_trigramas)
+                    cursor.execute("ANALYZE juguetes; ANALYZE ventas; ANALYZE pagos; ANALYZE clientes")
+                    con.commit()
+                    escala[fase] = medir_consultas(cursor, valores, empresa_id, args.repeticiones, args.semilla,
+                                                   args.planes, f"{ventas}_{fase}")
+                    con.commit()
+                imprimir_escala(escala)
+                resultados.append(escala)
+            finally:
+                con.rollback()
+                cursor.execute("DELETE FROM empresas WHERE id = %s", (empresa_id,))
+                # Los índices quedan como estaban: los que ya existían, sí; los demás, no
+                quitar_indices(cursor, [(n, s) for n, s in indices if n not in existian])
+                for nombre, sentencia in indices:
+                    if nombre in existian:
+                        cursor.execute(sentencia)
+                con.commit()
+    pool.closeall()
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump({'repeticiones': args.repeticiones, 'pg_trgm': con_trigramas, 'escalas': resultados}, f, indent=2)
+        print(f"\n✓ Resultados guardados en: {args.guardar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark del procesamiento de excel_to_sql: modo por filas vs modo columnar
+
+Mide filas/segundo del procesamiento y la generación del SQL (sin contar
+pd.read_excel, que es igual en ambos modos) y verifica que los dos modos
+generen exactamente el mismo SQL.
+
+Uso:
+    python benchmarks/bench_excel_to_sql.py [filas] [archivo.xlsx]
+
+Ejemplo:
+    python benchmarks/bench_excel_to_sql.py 80000
+    python benchmarks/bench_excel_to_sql.py 0 inventario.xlsx
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import random
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from excel_to_sql import normalizar_columnas, parsear_filas, parsear_columnas, escribir_inserts
+from ubicaciones import Ubicaciones
+
+
+def generar_inventario(filas, semilla=0):
+    """
+    Genera un DataFrame sintético con las columnas y formatos típicos del Excel de inventario
+    """
+    rnd = random.Random(semilla)
+    ubicaciones = ['Bodega/ Santa Isabel', 'Bodega/ Principal', 'Tienda/ Centro', 'Tienda Norte', 'Bodega Sur']
+    precios = ['22.684', '22,684', '$ 15.000', 15000, 27000.0, '1.000,50']
+    return pd.DataFrame({
+        'Nombre': [f'Juguete {i}' for i in range(filas)],
+        'Codigo': [f'JUG-{i:06d}' for i in range(filas)],
+        'ITEM': [f'IT-{rnd.randint(1, 9999)}' if rnd.random() > 0.1 else None for _ in range(filas)],
+        'Numero de bultos': [rnd.randint(1, 40) for _ in range(filas)],
+        'Cantidad por bultos': [rnd.choice([6, 12, 24, 48]) for _ in range(filas)],
+        'PRECIO MINIMO': [rnd.choice(precios) for _ in range(filas)],
+        'Precio al por mayor': [rnd.choice(precios) if rnd.random() > 0.3 else None for _ in range(filas)],
+        'Foto URL': [f'https://fotos.example.com/{i}.jpg' if rnd.random() > 0.5 else None for i in range(filas)],
+        'Ubicación': [rnd.choice(ubicaciones) for _ in range(filas)],
+    })
+
+
+def medir(parsear, df, empresa_id=1):
+    """Devuelve (segundos, sql) de procesar y escribir todo el DataFrame"""
+    salida = io.StringIO()
+    inicio = time.perf_counter()
+    registros, _ = parsear(df)
+    escribir_inserts(salida, registros, Ubicaciones(empresa_id))
+    return time.perf_counter() - inicio, salida.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Procesamiento de excel_to_sql por filas contra columnar (mismo SQL en los dos modos)",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_excel_to_sql.py 80000\n"
+               "  python benchmarks/bench_excel_to_sql.py 0 inventario.xlsx",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('filas', type=int, nargs='?', default=80000,
+                        help="Filas del inventario sintético (por defecto 80000; se ignora con archivo)")
+    parser.add_argument('archivo', nargs='?', help="Excel de inventario real en lugar del sintético")
+    args = parser.parse_args()
+    if args.archivo is None and args.filas < 1:
+        parser.error("filas debe ser mayor que 0 si no se indica un archivo")
+
+    if args.archivo:
+        print(f"Leyendo archivo: {args.archivo}")
+        df = pd.read_excel(args.archivo)
+    else:
+        print(f"Generando inventario sintético de {args.filas} filas")
+        df = generar_inventario(args.filas)
+    df = normalizar_columnas(df)
+    total = len(df)
+
+    tiempo_filas, sql_filas = medir(parsear_filas, df)
+    tiempo_columnar, sql_columnar = medir(parsear_columnas, df)
+
+    print(f"\nFilas: {total}")
+    print(f"Por filas:  {tiempo_filas:8.3f} s  ({total / tiempo_filas:12,.0f} filas/s)")
+    print(f"Columnar:   {tiempo_columnar:8.3f} s  ({total / tiempo_columnar:12,.0f} filas/s)")
+    print(f"Aceleración: {tiempo_filas / tiempo_columnar:.1f}x")
+
+    if sql_filas != sql_columnar:
+        print("\n✗ ERROR: los dos modos generaron SQL distinto")
+        sys.exit(1)
+    print("\n✓ Ambos modos generaron exactamente el mismo SQL")
+
+
+if __name__ == "__main__":
+    main()
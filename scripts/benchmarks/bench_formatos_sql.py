@@ -0,0 +1,136 @@
+"""
+Benchmark de carga de los formatos de salida de excel_to_sql (inserts, multi, copy)
+
+Genera un inventario sintético, escribe el SQL en cada formato y mide cuánto
+tarda psql en cargarlo en una base de datos creada con setup_completo.sql.
+Si psycopg2 está instalado también mide la carga directa (--cargar, ver
+carga_db.py). Verifica que todos dejen exactamente las mismas filas en juguetes.
+
+El benchmark crea una empresa propia (con sus bodegas y tiendas) y la borra
+al terminar; aun así, úsalo solo contra una base de datos local de pruebas.
+
+Uso:
+    python benchmarks/bench_formatos_sql.py [filas] [base_de_datos] [tamano_lote]
+
+Ejemplo:
+    python benchmarks/bench_formatos_sql.py 50000 postgresql://postgres@localhost/toyswalls
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from excel_to_sql import normalizar_columnas, parsear_columnas, escribir_inserts, COLUMNAS_JUGUETES
+from salida_sql import crear_escritor, FORMATOS, TAMANO_LOTE
+from ubicaciones import Ubicaciones
+import carga_db
+from bench_excel_to_sql import generar_inventario
+
+
+def psql(base_de_datos, *argumentos, entrada=None):
+    """Ejecuta psql (deteniéndose en el primer error) y devuelve la salida"""
+    comando = ['psql', '-X', '-q', '-A', '-t', '-v', 'ON_ERROR_STOP=1', '-d', base_de_datos] + list(argumentos)
+    resultado = subprocess.run(comando, input=entrada, capture_output=True, text=True, check=True)
+    return resultado.stdout
+
+
+def generar_sql(registros, formato, empresa_id, tamano_lote):
+    """SQL completo de los registros en el formato dado, con la tabla de ubicaciones al inicio"""
+    salida = io.StringIO()
+    ubicaciones = Ubicaciones(empresa_id)
+    if formato == 'inserts':
+        escribir_inserts(salida, registros, ubicaciones)
+    else:
+        escritor = crear_escritor(formato, salida.write, ubicaciones, COLUMNAS_JUGUETES, tamano_lote)
+        escritor.escribir(registros)
+        escritor.cerrar()
+    return ubicaciones.sql() + salida.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Carga con psql de los formatos de salida de excel_to_sql (inserts, multi, copy)",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_formatos_sql.py 50000 postgresql://postgres@localhost/toyswalls",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('filas', type=int, nargs='?', default=20000, help="Filas del inventario sintético (por defecto 20000)")
+    parser.add_argument('base_de_datos', nargs='?', default=os.environ.get('DATABASE_URL', 'postgres'),
+                        help="Base de datos para psql (por defecto la variable DATABASE_URL o 'postgres')")
+    parser.add_argument('tamano_lote', type=int, nargs='?', default=TAMANO_LOTE,
+                        help=f"Filas por INSERT en el formato multi (por defecto {TAMANO_LOTE})")
+    args = parser.parse_args()
+    if args.filas < 1 or args.tamano_lote < 1:
+        parser.error("filas y tamano_lote deben ser mayores que 0")
+    filas, base_de_datos, tamano_lote = args.filas, args.base_de_datos, args.tamano_lote
+
+    if shutil.which('psql') is None:
+        print("✗ ERROR: no se encontró psql en el PATH")
+        sys.exit(1)
+
+    print(f"Generando inventario sintético de {filas} filas")
+    registros, _ = parsear_columnas(normalizar_columnas(generar_inventario(filas)))
+
+    empresa_id = int(psql(base_de_datos, '-c',
+                          "INSERT INTO empresas (nombre) VALUES ('Benchmark formatos SQL') RETURNING id").split()[0])
+    ubicaciones = registros[['ubicacion_tipo', 'ubicacion_nombre']].drop_duplicates()
+    for tipo, nombre in ubicaciones.itertuples(index=False):
+        tabla = 'bodegas' if tipo == 'bodega' else 'tiendas'
+        nombre = nombre.replace("'", "''")
+        psql(base_de_datos, '-c', f"INSERT INTO {tabla} (nombre, direccion, empresa_id) VALUES ('{nombre}', 'Benchmark', {empresa_id})")
+
+    consulta = (f"SELECT nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor, numero_bultos, "
+                f"cantidad_por_bulto, bodega_id, tienda_id FROM juguetes WHERE empresa_id = {empresa_id} ORDER BY id")
+    tiempos = {}
+    contenidos = {}
+    try:
+        with tempfile.TemporaryDirectory() as carpeta:
+            for formato in FORMATOS:
+                archivo = os.path.join(carpeta, f'{formato}.sql')
+                with open(archivo, 'w', encoding='utf-8') as f:
+                    f.write(generar_sql(registros, formato, empresa_id, tamano_lote))
+                tamano_mb = os.path.getsize(archivo) / (1024 * 1024)
+
+                psql(base_de_datos, '-c', f"DELETE FROM juguetes WHERE empresa_id = {empresa_id}")
+                inicio = time.perf_counter()
+                psql(base_de_datos, '-f', archivo)
+                tiempos[formato] = time.perf_counter() - inicio
+                contenidos[formato] = psql(base_de_datos, '-c', consulta)
+
+                print(f"{formato:8s} {tiempos[formato]:8.2f} s  ({filas / tiempos[formato]:10,.0f} filas/s, {tamano_mb:6.1f} MB)")
+
+        try:
+            pool = carga_db.crear_pool(base_de_datos)
+        except RuntimeError as e:
+            print(f"⚠ Se omite la carga directa: {e}")
+        else:
+            psql(base_de_datos, '-c', f"DELETE FROM juguetes WHERE empresa_id = {empresa_id}")
+            inicio = time.perf_counter()
+            with carga_db.CargaInventario(pool, Ubicaciones(empresa_id), COLUMNAS_JUGUETES) as carga:
+                carga.escribir(registros)
+                carga.cerrar()
+            tiempos['cargar'] = time.perf_counter() - inicio
+            pool.closeall()
+            contenidos['cargar'] = psql(base_de_datos, '-c', consulta)
+            print(f"{'cargar':8s} {tiempos['cargar']:8.2f} s  ({filas / tiempos['cargar']:10,.0f} filas/s, sin archivo)")
+    finally:
+        psql(base_de_datos, '-c', f"DELETE FROM empresas WHERE id = {empresa_id}")
+
+    for formato in list(tiempos)[1:]:
+        print(f"Aceleración {formato} vs inserts: {tiempos['inserts'] / tiempos[formato]:.1f}x")
+
+    if len(set(contenidos.values())) != 1:
+        print("\n✗ ERROR: los formatos cargaron filas distintas")
+        sys.exit(1)
+    print(f"\n✓ Los {len(contenidos)} formatos cargaron exactamente las mismas filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Benchmark de los cinco scripts de importación, completo y por etapas
+
+Genera libros Excel sintéticos (generar_libros.py) de 1.000, 10.000 y 100.000
+filas (y 1.000.000 con --completo) y, para cada tamaño, mide:
+
+    - total: el script completo, igual que desde la línea de comandos (sin la
+      caché de Excel leídos), escribiendo el SQL en una carpeta temporal
+    - etapas: el mismo script con las funciones de cada etapa cronometradas
+        - lectura: pd.read_excel de los libros que lee el script (o el lector
+          de CSV/Parquet con --formato)
+        - normalizar: renombrar las columnas según los alias (normalizar_columnas)
+        - parsear: limpiar los valores (parsear_columnas, procesar_precios,
+          procesar_enteros, precios_por_item)
+        - escribir: el resto, sobre todo generar y escribir el SQL
+
+Scripts medidos: excel_to_sql, procesar_excel_inventario,
+actualizar_precios_desde_excel, actualizar_precios_por_mayor_desde_excel y
+actualizar_bultos_desde_excel, cada uno con su formato por defecto.
+
+Con --formato csv o parquet los libros se exportan a ese formato
+(generar_libros.exportar_libros) y los scripts los leen con los lectores
+columnares de lectura.py en lugar de pd.read_excel.
+
+Los resultados se pueden guardar en un JSON (--guardar) y comparar con uno
+anterior (--comparar): se muestra el cambio de cada tiempo y el script termina
+con código 1 si algún total empeoró más que --tolerancia, así sirve para
+comprobar que un cambio no hace más lentos los scripts.
+
+Uso:
+    python benchmarks/bench_importacion.py [--tamanos 1000,10000] [--completo] [--casos excel_to_sql,...]
+                                           [--formato excel|csv|parquet]
+                                           [--repeticiones N] [--guardar resultados.json]
+                                           [--comparar baseline.json [--tolerancia 0.15]]
+
+Ejemplo:
+    python benchmarks/bench_importacion.py --guardar baseline.json
+    python benchmarks/bench_importacion.py --comparar baseline.json
+    python benchmarks/bench_importacion.py --tamanos 100000 --casos excel_to_sql --repeticiones 3
+    python benchmarks/bench_importacion.py --formato csv
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import excel_to_sql
+import procesar_inventario
+import actualizar_precios_desde_excel
+import actualizar_precios_por_mayor_desde_excel
+import actualizar_bultos_desde_excel
+from lectura import leer_archivo
+from generar_libros import generar_libros, exportar_libros, CARPETA, VARIANTES
+
+TAMANOS = [1000, 10000, 100000]
+TAMANO_COMPLETO = 1000000
+
+ETAPAS = ['lectura', 'normalizar', 'parsear', 'escribir']
+
+VERSION_RESULTADOS = 1
+
+EMPRESA_ID = 1
+SALIDA = 'salida.sql'
+
+# Por debajo de esta diferencia un tiempo no se considera peor (ruido de la medición)
+MINIMO_SEGUNDOS = 0.05
+
+# Script: (función que lo ejecuta completo, libros que lee)
+CASOS = {
+    'excel_to_sql': (
+        lambda libros: excel_to_sql.excel_to_sql(libros['inventario'], EMPRESA_ID, SALIDA, usar_cache=False),
+        ['inventario'],
+    ),
+    'procesar_excel_inventario': (
+        lambda libros: procesar_inventario.procesar_excel_inventario(libros['inventario'], EMPRESA_ID, usar_cache=False),
+        ['inventario'],
+    ),
+    'actualizar_precios_desde_excel': (
+        lambda libros: actualizar_precios_desde_excel.actualizar_precios_desde_excel(
+            libros['precio_final'], libros['mayorista'], EMPRESA_ID, SALIDA, usar_cache=False),
+        ['precio_final', 'mayorista'],
+    ),
+    'actualizar_precios_por_mayor_desde_excel': (
+        lambda libros: actualizar_precios_por_mayor_desde_excel.actualizar_precios_por_mayor_desde_excel(
+            libros['inventario'], EMPRESA_ID, SALIDA, usar_cache=False),
+        ['inventario'],
+    ),
+    'actualizar_bultos_desde_excel': (
+        lambda libros: actualizar_bultos_desde_excel.actualizar_bultos_desde_excel(
+            libros['inventario'], EMPRESA_ID, SALIDA, usar_cache=False),
+        ['inventario'],
+    ),
+}
+
+# Funciones cronometradas en la medición por etapas: (módulo, nombre, etapa)
+INSTRUMENTADAS = [
+    (excel_to_sql, 'normalizar_columnas', 'normalizar'),
+    (excel_to_sql, 'parsear_columnas', 'parsear'),
+    (procesar_inventario, 'parsear_columnas', 'parsear'),
+    (actualizar_precios_desde_excel, 'precios_por_item', 'parsear'),
+    (actualizar_precios_por_mayor_desde_excel, 'normalizar_columnas', 'normalizar'),
+    (actualizar_precios_por_mayor_desde_excel, 'procesar_precios', 'parsear'),
+    (actualizar_bultos_desde_excel, 'normalizar_columnas', 'normalizar'),
+    (actualizar_bultos_desde_excel, 'procesar_enteros', 'parsear'),
+]
+
+# Módulos que leen el Excel con leer_archivo (procesar_inventario lo hace a través de excel_to_sql)
+MODULOS_LECTURA = [excel_to_sql, actualizar_precios_desde_excel, actualizar_precios_por_mayor_desde_excel,
+                   actualizar_bultos_desde_excel]
+
+
+class Cronometro:
+    """
+    Acumula por etapa el tiempo de las funciones envueltas. Una llamada dentro de
+    otra función cronometrada (procesar_precios dentro de parsear_columnas) se
+    cuenta en la etapa de la externa.
+    """
+
+    def __init__(self):
+        self.segundos = defaultdict(float)
+        self.activa = None
+
+    def envolver(self, funcion, etapa):
+        @functools.wraps(funcion)
+        def cronometrada(*args, **kwargs):
+            if self.activa is not None:
+                return funcion(*args, **kwargs)
+            self.activa = etapa
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                self.segundos[etapa] += time.perf_counter() - inicio
+                self.activa = None
+        return cronometrada
+
+
+@contextlib.contextmanager
+def reemplazos(cambios):
+    """Reemplaza atributos de módulos [(módulo, nombre, valor)] y los restaura al salir"""
+    originales = [(modulo, nombre, getattr(modulo, nombre)) for modulo, nombre, _ in cambios]
+    try:
+        for modulo, nombre, valor in cambios:
+            setattr(modulo, nombre, valor)
+        yield
+    finally:
+        for modulo, nombre, valor in originales:
+            setattr(modulo, nombre, valor)
+
+
+@contextlib.contextmanager
+def en_carpeta_temporal():
+    """Ejecuta en una carpeta temporal que se borra al salir, sin la salida de los scripts"""
+    with tempfile.TemporaryDirectory() as carpeta, contextlib.chdir(carpeta), \
+            open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+
+def ejecutar(nombre, funcion, libros):
+    """Ejecuta un script y devuelve los segundos; falla si el script informó un error"""
+    with en_carpeta_temporal():
+        inicio = time.perf_counter()
+        resultado = funcion(libros)
+        segundos = time.perf_counter() - inicio
+    if resultado is False or resultado is None:
+        raise RuntimeError(f"{nombre} terminó con un error (ejecútalo sin el benchmark para ver el detalle)")
+    return segundos
+
+
+def leer_libros(libros):
+    """Lee cada libro una vez: {ruta: (DataFrame, segundos)}"""
+    leidos = {}
+    for ruta in libros.values():
+        inicio = time.perf_counter()
+        df = leer_archivo(ruta, usar_cache=False)
+        leidos[ruta] = (df, time.perf_counter() - inicio)
+    return leidos
+
+
+def medir_etapas(nombre, funcion, libros, leidos, tipos):
+    """
+    Segundos de cada etapa: la lectura es la de leer_libros y el script se
+    ejecuta con leer_archivo devolviendo una copia del DataFrame ya leído
+    """
+    cronometro = Cronometro()
+    copiar = cronometro.envolver(lambda archivo, usar_cache=True: leidos[archivo][0].copy(), 'copia')
+    cambios = [(modulo, 'leer_archivo', copiar) for modulo in MODULOS_LECTURA]
+    cambios += [(modulo, funcion_, cronometro.envolver(getattr(modulo, funcion_), etapa))
+                for modulo, funcion_, etapa in INSTRUMENTADAS]
+    with reemplazos(cambios):
+        proceso = ejecutar(nombre, funcion, libros)
+
+    etapas = {
+        'lectura': sum(leidos[libros[tipo]][1] for tipo in tipos),
+        'normalizar': cronometro.segundos['normalizar'],
+        'parsear': cronometro.segundos['parsear'],
+    }
+    # La copia del DataFrame no es parte del script
+    etapas['escribir'] = max(0.0, proceso - cronometro.segundos['copia'] - etapas['normalizar'] - etapas['parsear'])
+    return etapas
+
+
+def medir(casos, tamanos, repeticiones, carpeta, variante, formato='excel'):
+    """Resultados {caso: {filas: {'total', 'filas_por_segundo', 'etapas'}}} (el mínimo de las repeticiones)"""
+    resultados = defaultdict(dict)
+    for filas in tamanos:
+        libros = generar_libros(filas, carpeta, variante)
+        if formato != 'excel':
+            libros = exportar_libros(libros, formato)
+        print(f"\n=== {filas:,} filas ===")
+        for nombre in casos:
+            funcion, tipos = CASOS[nombre]
+            totales = [ejecutar(nombre, funcion, libros) for _ in range(repeticiones)]
+            etapas_por_repeticion = []
+            for _ in range(repeticiones):
+                leidos = leer_libros({tipo: libros[tipo] for tipo in tipos})
+                etapas_por_repeticion.append(medir_etapas(nombre, funcion, libros, leidos, tipos))
+                del leidos
+            total = min(totales)
+            etapas = {etapa: min(medida[etapa] for medida in etapas_por_repeticion) for etapa in ETAPAS}
+            resultados[nombre][str(filas)] = {
+                'total': round(total, 4),
+                'filas_por_segundo': round(filas / total),
+                'etapas': {etapa: round(segundos, 4) for etapa, segundos in etapas.items()},
+            }
+            detalle = '  '.join(f"{etapa} {segundos:7.3f}" for etapa, segundos in etapas.items())
+            print(f"{nombre:42s} {total:8.3f} s ({filas / total:10,.0f} filas/s)  {detalle}")
+    return dict(resultados)
+
+
+def entorno():
+    """Versiones y máquina, para saber si dos resultados son comparables"""
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'openpyxl': openpyxl.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar(resultados, base, tolerancia, variante, formato='excel'):
+    """
+    Muestra el cambio de cada tiempo respecto a la base y devuelve la lista de
+    (caso, filas) cuyo total empeoró más que la tolerancia
+    """
+    peores = []
+    print(f"\n=== Comparación con la base ({base.get('fecha', '?')}) ===")
+    if base.get('entorno') != entorno():
+        print("⚠ La base se midió en otro entorno (versiones o máquina): los tiempos pueden no ser comparables")
+    if base.get('variante') != variante:
+        print("⚠ La base se midió con otra variante de los libros")
+    if base.get('formato', 'excel') != formato:
+        print(f"⚠ La base se midió con libros en formato {base.get('formato', 'excel')}, no {formato}")
+    print(f"{'script':42s} {'filas':>9s} {'medida':10s} {'base':>9s} {'actual':>9s} {'cambio':>8s}")
+    for nombre, por_tamano in resultados.items():
+        for filas, medida in por_tamano.items():
+            anterior = base.get('resultados', {}).get(nombre, {}).get(filas)
+            if anterior is None:
+                print(f"{nombre:42s} {int(filas):9,d} {'(sin base)':10s}")
+                continue
+            tiempos = [('total', anterior['total'], medida['total'])]
+            tiempos += [(etapa, anterior['etapas'].get(etapa), medida['etapas'][etapa]) for etapa in ETAPAS]
+            for etiqueta, antes, ahora in tiempos:
+                if antes is None:
+                    continue
+                cambio = (ahora - antes) / antes if antes else 0.0
+                peor = cambio > tolerancia and ahora - antes > MINIMO_SEGUNDOS
+                marca = ' ⚠' if peor else ''
+                print(f"{nombre:42s} {int(filas):9,d} {etiqueta:10s} {antes:9.3f} {ahora:9.3f} {cambio:+8.1%}{marca}")
+                if peor and etiqueta == 'total':
+                    peores.append((nombre, filas))
+    return peores
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de los scripts de importación con libros Excel sintéticos",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_importacion.py --guardar baseline.json\n"
+               "  python benchmarks/bench_importacion.py --comparar baseline.json",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--tamanos', help=f"Filas de los libros, separadas por comas (por defecto "
+                                          f"{','.join(map(str, TAMANOS))})")
+    parser.add_argument('--completo', action='store_true', help=f"Agregar los libros de {TAMANO_COMPLETO:,} filas (tarda)")
+    parser.add_argument('--casos', help=f"Scripts a medir, separados por comas (por defecto todos: {', '.join(CASOS)})")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Veces que se mide cada script; se usa el mínimo")
+    parser.add_argument('--carpeta', default=CARPETA, help=f"Carpeta de los libros generados (por defecto {CARPETA})")
+    parser.add_argument('--variante', type=int, default=0, choices=range(len(VARIANTES)),
+                        help="Alias de los encabezados de los libros (ver generar_libros.py)")
+    parser.add_argument('--formato', choices=['excel', 'csv', 'parquet'], default='excel',
+                        help="Formato de los archivos que leen los scripts (por defecto excel)")
+    parser.add_argument('--guardar', metavar='ARCHIVO', help="Guardar los resultados en un JSON")
+    parser.add_argument('--comparar', metavar='ARCHIVO', help="Comparar con resultados guardados antes (la base)")
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help="Empeoramiento máximo del total antes de fallar (por defecto 0.15 = 15%%)")
+    args = parser.parse_args()
+
+    try:
+        tamanos = [int(t) for t in args.tamanos.split(',')] if args.tamanos else list(TAMANOS)
+    except ValueError:
+        parser.error("--tamanos debe ser una lista de números separados por comas")
+    if args.completo and TAMANO_COMPLETO not in tamanos:
+        tamanos.append(TAMANO_COMPLETO)
+    if any(t < 1 for t in tamanos):
+        parser.error("--tamanos debe tener números mayores que 0")
+    casos = args.casos.split(',') if args.casos else list(CASOS)
+    desconocidos = [caso for caso in casos if caso not in CASOS]
+    if desconocidos:
+        parser.error(f"Scripts desconocidos: {', '.join(desconocidos)} (opciones: {', '.join(CASOS)})")
+    if args.repeticiones < 1:
+        parser.error("--repeticiones debe ser mayor que 0")
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        if base.get('version') != VERSION_RESULTADOS:
+            parser.error(f"{args.comparar} no es un archivo de resultados de esta versión")
+
+    resultados = medir(casos, tamanos, args.repeticiones, args.carpeta, args.variante, args.formato)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': VERSION_RESULTADOS,
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'entorno': entorno(),
+                'repeticiones': args.repeticiones,
+                'variante': args.variante,
+                'formato': args.formato,
+                'resultados': resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Resultados guardados en: {args.guardar}")
+
+    if base is not None:
+        peores = comparar(resultados, base, args.tolerancia, args.variante, args.formato)
+        if peores:
+            print(f"\n✗ {len(peores)} mediciones empeoraron más de {args.tolerancia:.0%}: "
+                  + ', '.join(f"{nombre} ({int(filas):,} filas)" for nombre, filas in peores))
+            sys.exit(1)
+        print(f"\n✓ Ningún total empeoró más de {args.tolerancia:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark de kardex.py: memoria y consultas contra DataFrames de pandas
+
+Genera exportaciones sintéticas de juguetes, movimientos (con
+bench_movimientos.generar_exportaciones), ventas y empleados, y compara:
+
+    - pandas: los eventos en un DataFrame con codigo y ubicación como texto
+      (lo habitual) y el saldo en una fecha con un groupby
+    - kardex: Kardex con claves enteras, 16 bytes por evento
+
+Mide la memoria de los eventos de cada uno, el tiempo de carga y el de las
+consultas de saldos en varias fechas, y verifica que los saldos coincidan.
+
+Uso:
+    python benchmarks/bench_kardex.py [ventas] [--movimientos N] [--juguetes N] [--fechas N] [--semilla N]
+
+Ejemplo:
+    python benchmarks/bench_kardex.py 1000000
+    python benchmarks/bench_kardex.py 5000000 --movimientos 1000000 --juguetes 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kardex import cargar_kardex, COLUMNAS_JUGUETES, NUMERICAS_JUGUETES
+from lectura import leer_exportacion
+from generar_libros import CARPETA
+from bench_movimientos import generar_exportaciones, EMPRESA_ID, TIENDAS
+
+EMPLEADOS = 40
+
+
+def generar_ventas(ventas, juguetes_csv, carpeta, semilla=0):
+    """Escribe ventas.csv y empleados.csv sintéticos (códigos de juguetes_csv); devuelve sus rutas"""
+    generador = np.random.default_rng(semilla)
+    codigos = pd.read_csv(juguetes_csv, usecols=['codigo'])['codigo'].unique()
+    empleados = pd.DataFrame({
+        'id': np.arange(1, EMPLEADOS + 1),
+        'nombre': [f'Empleado {i}' for i in range(1, EMPLEADOS + 1)],
+        # Algunos sin tienda: sus ventas quedan sin ubicación
+        'tienda_id': [TIENDAS[i % len(TIENDAS)] if i % 10 else '' for i in range(EMPLEADOS)],
+        'empresa_id': EMPRESA_ID,
+    })
+    archivo_empleados = os.path.join(carpeta, 'empleados.csv')
+    empleados.to_csv(archivo_empleados, index=False)
+
+    archivo_ventas = os.path.join(carpeta, f'ventas_{ventas}_{len(codigos)}_s{semilla}.csv')
+    if not os.path.exists(archivo_ventas):
+        inicio = pd.Timestamp('2024-01-01', tz='UTC').value
+        fechas = pd.to_datetime(inicio + generador.integers(0, 365 * 86400, ventas) * 10**9, utc=True)
+        pd.DataFrame({
+            'id': np.arange(1, ventas + 1),
+            'codigo_venta': [f'V{i:08d}' for i in range(ventas)],
+            'juguete_codigo': codigos[generador.integers(0, len(codigos), ventas)],
+            'empleado_id': generador.integers(1, EMPLEADOS + 1, ventas),
+            'precio_venta': generador.integers(1, 100, ventas) * 1000,
+            'cantidad': generador.integers(1, 4, ventas),
+            'metodo_pago': 'efectivo',
+            'empresa_id': EMPRESA_ID,
+            'created_at': fechas.strftime('%Y-%m-%d %H:%M:%S+00'),
+        }).to_csv(archivo_ventas, index=False)
+    return archivo_ventas, archivo_empleados
+
+
+def eventos_pandas(ventas_csv, movimientos_csv, empleados_csv):
+    """DataFrame de eventos con codigo, tipo y ubicacion_id como texto, fecha y cantidad"""
+    tiendas = pd.read_csv(empleados_csv).set_index('id')['tienda_id']
+    ventas = pd.read_csv(ventas_csv, usecols=['juguete_codigo', 'empleado_id', 'cantidad', 'created_at'], dtype={'juguete_codigo': object})
+    tienda = ventas['empleado_id'].map(tiendas)
+    movimientos = pd.read_csv(movimientos_csv, dtype={'juguete_codigo': object, 'tipo_origen': object, 'tipo_destino': object})
+    movimientos = movimientos[movimientos['tipo_origen'].isin(['bodega', 'tienda']) & movimientos['tipo_destino'].isin(['bodega', 'tienda'])]
+    partes = [
+        pd.DataFrame({'codigo': ventas['juguete_codigo'], 'tipo': np.where(tienda.notna(), 'tienda', 'sin ubicación'),
+                      'ubicacion_id': tienda.fillna(0).astype(np.int64).astype(str), 'fecha': ventas['created_at'],
+                      'cantidad': -ventas['cantidad']}),
+        pd.DataFrame({'codigo': movimientos['juguete_codigo'], 'tipo': movimientos['tipo_origen'],
+                      'ubicacion_id': movimientos['origen_id'].astype(str), 'fecha': movimientos['created_at'],
+                      'cantidad': -movimientos['cantidad']}),
+        pd.DataFrame({'codigo': movimientos['juguete_codigo'], 'tipo': movimientos['tipo_destino'],
+                      'ubicacion_id': movimientos['destino_id'].astype(str), 'fecha': movimientos['created_at'],
+                      'cantidad': movimientos['cantidad']}),
+    ]
+    eventos = pd.concat(partes, ignore_index=True).astype({'codigo': object, 'tipo': object, 'ubicacion_id': object})
+    eventos['fecha'] = pd.to_datetime(eventos['fecha'], utc=True, format='ISO8601')
+    return eventos
+
+
+def saldos_pandas(juguetes, eventos, fecha):
+    """{(codigo, tipo, ubicacion_id): saldo} en la fecha: el actual menos los eventos posteriores"""
+    despues = eventos[eventos['fecha'] > fecha].groupby(['codigo', 'tipo', 'ubicacion_id'])['cantidad'].sum()
+    actual = juguetes.groupby(['codigo', 'tipo', 'ubicacion_id'])['cantidad'].sum()
+    saldos = actual.sub(despues, fill_value=0)
+    return {clave: int(valor) for clave, valor in saldos.items() if valor}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Kardex con claves enteras contra eventos en DataFrames de pandas",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_kardex.py 1000000\n"
+               "  python benchmarks/bench_kardex.py 5000000 --movimientos 1000000 --juguetes 200000",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('ventas', type=int, nargs='?', default=1000000, help="Ventas sintéticas (por defecto 1000000)")
+    parser.add_argument('--movimientos', type=int, default=200000, help="Movimientos sintéticos (por defecto 200000)")
+    parser.add_argument('--juguetes', type=int, default=50000, help="Filas de juguetes (por defecto 50000)")
+    parser.add_argument('--fechas', type=int, default=12, help="Fechas consultadas, una por mes (por defecto 12)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos (por defecto 0)")
+    parser.add_argument('--carpeta', default=CARPETA, help=f"Carpeta de las exportaciones generadas (por defecto {CARPETA})")
+    args = parser.parse_args()
+    if min(args.ventas, args.movimientos, args.juguetes, args.fechas) < 1:
+        parser.error("ventas, --movimientos, --juguetes y --fechas deben ser mayores que 0")
+
+    print(f"Generando {args.ventas} ventas y {args.movimientos} movimientos sobre {args.juguetes} juguetes")
+    juguetes_csv, movimientos_csv = generar_exportaciones(args.movimientos, args.juguetes, args.carpeta, args.semilla)
+    ventas_csv, empleados_csv = generar_ventas(args.ventas, juguetes_csv, args.carpeta, args.semilla)
+    fechas = [(pd.Timestamp('2024-01-01', tz='UTC') + pd.DateOffset(months=mes)) for mes in range(1, args.fechas + 1)]
+
+    inicio = time.perf_counter()
+    eventos = eventos_pandas(ventas_csv, movimientos_csv, empleados_csv)
+    tiempo_carga_pandas = time.perf_counter() - inicio
+    memoria_pandas = eventos.memory_usage(deep=True).sum()
+    juguetes = leer_exportacion(juguetes_csv, EMPRESA_ID, COLUMNAS_JUGUETES, numericas=NUMERICAS_JUGUETES, limpiar=['codigo'])
+    juguetes['tipo'] = np.where(juguetes['bodega_id'].notna(), 'bodega', 'tienda')
+    juguetes['ubicacion_id'] = juguetes['bodega_id'].fillna(juguetes['tienda_id']).astype(np.int64).astype(str)
+    inicio = time.perf_counter()
+    esperados = [saldos_pandas(juguetes, eventos, fecha) for fecha in fechas]
+    tiempo_pandas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    kardex = cargar_kardex(juguetes_csv, EMPRESA_ID, ventas_csv, movimientos_csv, empleados_csv)
+    tiempo_carga_kardex = time.perf_counter() - inicio
+    memoria = kardex.memoria()
+    inicio = time.perf_counter()
+    saldos = [kardex.saldos(fecha) for fecha in fechas]
+    tiempo_kardex = time.perf_counter() - inicio
+
+    print(f"\nEventos: {kardex.eventos} (pandas: {len(eventos)})")
+    print(f"Memoria de los eventos: pandas {memoria_pandas / 2**20:8.1f} MB ({memoria_pandas / len(eventos):5.0f} bytes/evento)")
+    print(f"                        kardex {memoria['eventos'] / 2**20:8.1f} MB ({memoria['bytes_por_evento']:5.0f} bytes/evento)"
+          f" + {(memoria['por_clave'] + memoria['por_codigo']) / 2**20:.1f} MB por clave y código")
+    print(f"Carga (lectura de los CSV):  pandas {tiempo_carga_pandas:7.3f} s   kardex {tiempo_carga_kardex:7.3f} s")
+    print(f"Saldos en {len(fechas)} fechas:        pandas {tiempo_pandas:7.3f} s   kardex {tiempo_kardex:7.3f} s"
+          f"  ({tiempo_pandas / tiempo_kardex:.0f}x)")
+
+    for fecha, esperado, calculado in zip(fechas, esperados, saldos):
+        obtenido = {(fila.codigo, fila.tipo, str(fila.ubicacion_id)): int(fila.cantidad)
+                    for fila in kardex.a_dataframe(calculado).itertuples()}
+        if obtenido != esperado:
+            print(f"\n✗ ERROR: los saldos al {fecha.date()} no coinciden")
+            sys.exit(1)
+    print("\n✓ Los saldos del kardex coinciden con los de pandas en todas las fechas")
+
+
+if __name__ == "__main__":
+    main()
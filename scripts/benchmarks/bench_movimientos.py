@@ -0,0 +1,209 @@
+"""
+Benchmark de reproducir_movimientos.py contra la reproducción movimiento a movimiento
+
+Genera exportaciones sintéticas de juguetes y movimientos (traslados entre
+bodegas y tiendas, con una parte que deja el origen en negativo, orígenes que
+no existen, destinos nuevos y movimientos inválidos) y compara:
+
+    - secuencial: un recorrido en Python con un diccionario de saldos, en el
+      mismo orden y con las mismas reglas que procesar_movimientos_historicos.sql
+      (sin las consultas: es una cota inferior de lo que tarda el script SQL)
+    - por conjuntos: reproducir_movimientos.reproducir sobre claves enteras
+
+Verifica que las dos den los mismos saldos finales y los mismos movimientos
+rechazados, y mide además el script completo (lectura de los CSV y SQL).
+
+Uso:
+    python benchmarks/bench_movimientos.py [movimientos] [--juguetes N] [--invalidos P] [--semilla N]
+                                           [--carpeta CARPETA]
+
+Ejemplo:
+    python benchmarks/bench_movimientos.py 100000
+    python benchmarks/bench_movimientos.py 1000000 --juguetes 200000
+    python benchmarks/bench_movimientos.py 100000 --invalidos 0
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reproducir_movimientos import leer_juguetes, leer_movimientos, asignar_claves, reproducir, reproducir_movimientos
+from generar_libros import CARPETA
+
+EMPRESA_ID = 1
+BODEGAS = [1, 2, 3]
+TIENDAS = [1, 2, 3, 4]
+
+
+def generar_exportaciones(movimientos, juguetes, carpeta, semilla=0, proporcion_invalidos=0.02):
+    """
+    Escribe juguetes.csv y movimientos.csv sintéticos; devuelve sus rutas.
+    proporcion_invalidos es la parte de los movimientos con un origen cualquiera
+    (donde puede no estar el código) o con una cantidad grande o inválida
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    generador = np.random.default_rng(semilla)
+    ubicaciones = [('bodega', b) for b in BODEGAS] + [('tienda', t) for t in TIENDAS]
+    codigos = np.array([f'JUG-{i:06d}' for i in range(max(juguetes // 2, 1))])
+
+    # Juguetes: cada código en una o dos ubicaciones (sin repetir la ubicación)
+    filas = []
+    usados = set()
+    for i in range(juguetes):
+        codigo = codigos[generador.integers(len(codigos))]
+        tipo, ubicacion = ubicaciones[generador.integers(len(ubicaciones))]
+        if (codigo, tipo, ubicacion) in usados:
+            continue
+        usados.add((codigo, tipo, ubicacion))
+        filas.append({
+            'id': i + 1, 'nombre': f'Juguete {codigo}', 'codigo': codigo,
+            'item': f'IT-{generador.integers(1, 9999)}' if generador.random() > 0.2 else '',
+            'cantidad': int(generador.integers(0, 200)),
+            'foto_url': f'https://fotos.example.com/{codigo}.jpg' if generador.random() > 0.5 else '',
+            'precio_min': int(generador.integers(1, 100)) * 1000 if generador.random() > 0.3 else '',
+            'precio_por_mayor': '', 'numero_bultos': '', 'cantidad_por_bulto': '',
+            'empresa_id': EMPRESA_ID,
+            'bodega_id': ubicacion if tipo == 'bodega' else '',
+            'tienda_id': ubicacion if tipo == 'tienda' else '',
+        })
+    archivo_juguetes = os.path.join(carpeta, f'juguetes_{juguetes}_s{semilla}.csv')
+    pd.DataFrame(filas).to_csv(archivo_juguetes, index=False)
+
+    # Movimientos: la mayoría desde una ubicación donde está el código
+    existentes = [(f['codigo'], 'bodega' if f['bodega_id'] != '' else 'tienda', f['bodega_id'] or f['tienda_id'])
+                  for f in filas]
+    inicio = pd.Timestamp('2024-01-01', tz='UTC')
+    datos = []
+    for i in range(movimientos):
+        if generador.random() > proporcion_invalidos:
+            codigo, tipo_origen, origen_id = existentes[generador.integers(len(existentes))]
+        else:
+            codigo = codigos[generador.integers(len(codigos))]
+            tipo_origen, origen_id = ubicaciones[generador.integers(len(ubicaciones))]
+        # Otra ubicación (salvo entre los inválidos)
+        tipo_destino, destino_id = ubicaciones[generador.integers(len(ubicaciones))]
+        while (tipo_destino, destino_id) == (tipo_origen, origen_id) and generador.random() > proporcion_invalidos:
+            tipo_destino, destino_id = ubicaciones[generador.integers(len(ubicaciones))]
+        if generador.random() < proporcion_invalidos / 10:
+            tipo_destino = 'cliente'
+        datos.append({
+            'id': i + 1, 'tipo_origen': tipo_origen, 'origen_id': origen_id,
+            'tipo_destino': tipo_destino, 'destino_id': destino_id, 'juguete_codigo': codigo,
+            # Casi siempre pocas unidades; unas pocas cantidades grandes o inválidas
+            'cantidad': int(generador.integers(1, 6)) if generador.random() > proporcion_invalidos
+            else int(generador.integers(-1, 500)),
+            'empresa_id': EMPRESA_ID,
+            # Algunas fechas repetidas, para que el desempate sea por id
+            'created_at': (inicio + pd.Timedelta(minutes=int(generador.integers(0, movimientos)))).isoformat(),
+        })
+    archivo_movimientos = os.path.join(carpeta, f'movimientos_{movimientos}_{juguetes}_p{proporcion_invalidos}_s{semilla}.csv')
+    pd.DataFrame(datos).to_csv(archivo_movimientos, index=False)
+    return archivo_juguetes, archivo_movimientos
+
+
+def reproducir_secuencial(juguetes, movimientos):
+    """
+    Recorre los movimientos uno por uno como el script SQL; devuelve
+    ({(codigo, tipo, ubicacion_id): saldo}, ids rechazados)
+    """
+    saldos = {(f.codigo, f.tipo, f.ubicacion_id): f.cantidad for f in juguetes.itertuples()}
+    rechazados = set()
+    for mov in movimientos.itertuples():
+        if (mov.tipo_origen not in ('bodega', 'tienda') or mov.tipo_destino not in ('bodega', 'tienda')
+                or pd.isna(mov.origen_id) or pd.isna(mov.destino_id)
+                or pd.isna(mov.cantidad) or mov.cantidad <= 0):
+            rechazados.add(mov.id)
+            continue
+        origen = (mov.codigo, mov.tipo_origen, mov.origen_id)
+        destino = (mov.codigo, mov.tipo_destino, mov.destino_id)
+        if origen == destino or saldos.get(origen, 0) - mov.cantidad < 0:
+            rechazados.add(mov.id)
+            continue
+        saldos[origen] -= mov.cantidad
+        saldos[destino] = saldos.get(destino, 0) + mov.cantidad
+    return saldos, rechazados
+
+
+def reproducir_por_conjuntos(juguetes, movimientos):
+    """Lo mismo con reproducir_movimientos.reproducir"""
+    origen, destino, claves = asignar_claves(juguetes, movimientos)
+    saldo_inicial = np.zeros(len(claves), dtype=np.int64)
+    saldo_inicial[:len(juguetes)] = juguetes['cantidad'].to_numpy(dtype=np.int64)
+    existe = np.zeros(len(claves), dtype=bool)
+    existe[:len(juguetes)] = True
+    cantidad = movimientos['cantidad'].fillna(0).to_numpy(dtype=np.int64)
+    validos = (movimientos['tipo_origen'].isin(['bodega', 'tienda']) & movimientos['tipo_destino'].isin(['bodega', 'tienda'])
+               & movimientos['origen_id'].notna() & movimientos['destino_id'].notna()).to_numpy()
+    validos = validos & (cantidad > 0) & (origen != destino)
+    aplicado, _, _ = reproducir(saldo_inicial, existe, origen, destino, cantidad, validos)
+    aplicados = np.where(aplicado, cantidad, 0)
+    saldo = saldo_inicial + (np.bincount(destino, weights=aplicados, minlength=len(claves))
+                             - np.bincount(origen, weights=aplicados, minlength=len(claves))).astype(np.int64)
+    return claves, saldo, set(movimientos['id'][~aplicado].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reproducción de movimientos: secuencial contra por conjuntos",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_movimientos.py 100000\n"
+               "  python benchmarks/bench_movimientos.py 1000000 --juguetes 200000",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('movimientos', type=int, nargs='?', default=100000, help="Movimientos sintéticos (por defecto 100000)")
+    parser.add_argument('--juguetes', type=int, default=20000, help="Filas de juguetes (por defecto 20000)")
+    parser.add_argument('--invalidos', type=float, default=0.02,
+                        help="Proporción de movimientos con origen o cantidad que pueden no aplicarse (por defecto 0.02)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos (por defecto 0)")
+    parser.add_argument('--carpeta', default=CARPETA, help=f"Carpeta de las exportaciones generadas (por defecto {CARPETA})")
+    args = parser.parse_args()
+    if args.movimientos < 1 or args.juguetes < 1:
+        parser.error("movimientos y --juguetes deben ser mayores que 0")
+
+    print(f"Generando {args.movimientos} movimientos sobre {args.juguetes} juguetes")
+    archivo_juguetes, archivo_movimientos = generar_exportaciones(args.movimientos, args.juguetes, args.carpeta, args.semilla,
+                                                                  args.invalidos)
+    juguetes, _ = leer_juguetes(archivo_juguetes, EMPRESA_ID)
+    movimientos = leer_movimientos(archivo_movimientos, EMPRESA_ID)
+
+    inicio = time.perf_counter()
+    saldos, rechazados = reproducir_secuencial(juguetes, movimientos)
+    tiempo_secuencial = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    claves, saldo, rechazados_conjuntos = reproducir_por_conjuntos(juguetes, movimientos)
+    tiempo_conjuntos = time.perf_counter() - inicio
+
+    salida = os.path.join(args.carpeta, 'reproducir_movimientos.sql')
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = reproducir_movimientos(archivo_juguetes, archivo_movimientos, EMPRESA_ID, salida)
+    tiempo_script = time.perf_counter() - inicio
+
+    total = len(movimientos)
+    print(f"\nMovimientos: {total} ({len(rechazados)} rechazados)")
+    print(f"Secuencial:      {tiempo_secuencial:8.3f} s  ({total / tiempo_secuencial:12,.0f} movimientos/s)")
+    print(f"Por conjuntos:   {tiempo_conjuntos:8.3f} s  ({total / tiempo_conjuntos:12,.0f} movimientos/s)")
+    print(f"Aceleración: {tiempo_secuencial / tiempo_conjuntos:.1f}x")
+    if resultado:
+        print(f"Script completo: {tiempo_script:8.3f} s (lectura de los CSV y SQL en {salida})")
+
+    saldos_conjuntos = {(codigo, tipo, ubicacion): int(s) for (codigo, tipo, ubicacion), s
+                        in zip(claves.itertuples(index=False), saldo) if (codigo, tipo, ubicacion) in saldos or s}
+    saldos_secuencial = {clave: int(s) for clave, s in saldos.items()}
+    if not resultado or saldos_conjuntos != saldos_secuencial or rechazados_conjuntos != rechazados:
+        print("\n✗ ERROR: las dos reproducciones no coinciden")
+        sys.exit(1)
+    print("\n✓ Ambas reproducciones dan los mismos saldos y los mismos rechazos")
+
+
+if __name__ == "__main__":
+    main()
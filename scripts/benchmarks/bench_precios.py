@@ -0,0 +1,142 @@
+"""
+Micro-benchmark del procesamiento de precios (precios.py)
+
+Compara procesar_precio (un valor a la vez) con procesar_precios (por lotes)
+sobre precios sintéticos con los formatos que llegan en los Excel: floats de
+openpyxl y textos como "$ 1.000", "22.684", "1.000,50" o "1,000.50".
+También verifica que ambas versiones den exactamente el mismo resultado y que
+una celda numérica negativa dé lo mismo que su texto (-3000 y '-3000' -> 3000),
+en precios y en cantidades.
+
+Uso:
+    python benchmarks/bench_precios.py [cantidad_precios] [proporcion_texto]
+
+Ejemplo:
+    python benchmarks/bench_precios.py 1000000
+    python benchmarks/bench_precios.py 1000000 1.0
+"""
+
+import argparse
+import os
+import sys
+import time
+import random
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from precios import procesar_precio, procesar_precios, procesar_entero, procesar_enteros
+
+# Celdas numéricas negativas de cantidad, precio_min, precio_por_mayor, numero_bultos y cantidad_por_bulto
+NEGATIVOS = [-5, -3000, -2500, -2, -3, -0.5, -1234.5]
+
+
+def generar_precios(cantidad, proporcion_texto=0.5, semilla=0):
+    """
+    Genera precios sintéticos: una parte como float (lo que entrega openpyxl)
+    y el resto como texto en formato colombiano o estadounidense
+    """
+    rnd = random.Random(semilla)
+    formatos = [
+        lambda p: f"{p:,}".replace(',', '.'),              # 22.684
+        lambda p: f"$ {p:,}".replace(',', '.'),            # $ 22.684
+        lambda p: f"{p:,}",                                # 22,684
+        lambda p: f"{p:,}.50",                             # 22,684.50
+        lambda p: f"{p:,},50".replace(',', '.', 1) if p >= 1000 else f"{p},50",  # 22.684,50
+        lambda p: str(p),                                  # 22684
+    ]
+    precios = []
+    for _ in range(cantidad):
+        # Los precios en pesos van redondeados a centenas
+        precio = rnd.randint(5, 5000) * 100
+        if rnd.random() < proporcion_texto:
+            precios.append(rnd.choice(formatos)(precio))
+        elif rnd.random() < 0.02:
+            precios.append(None)
+        elif rnd.random() < 0.01:
+            precios.append(-float(precio))
+        else:
+            precios.append(float(precio))
+    return precios
+
+
+def signos_iguales():
+    """
+    Lista de los valores de NEGATIVOS en que la celda numérica, su texto y las
+    versiones por lotes (columna float, int u object) no dan lo mismo
+    """
+    distintos = []
+    for valor in NEGATIVOS:
+        texto = str(valor)
+        precio = procesar_precio(texto)
+        entero = procesar_entero(str(int(valor)))
+        columnas = [np.array([valor], dtype=object), np.array([valor], dtype=np.float64)]
+        if valor == int(valor):
+            columnas.append(np.array([valor], dtype=np.int64))
+        resultados_precio = [procesar_precio(valor)] + [
+            procesar_precios(columna)[0][0] if procesar_precios(columna)[1][0] else None for columna in columnas]
+        resultados_entero = [procesar_entero(valor)] + [
+            int(procesar_enteros(columna)[0][0]) if procesar_enteros(columna)[1][0] else None for columna in columnas]
+        if any(r != precio for r in resultados_precio) or any(r != entero for r in resultados_entero):
+            distintos.append(valor)
+    return distintos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="procesar_precio (uno a uno) contra procesar_precios (por lotes)",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_precios.py 1000000\n"
+               "  python benchmarks/bench_precios.py 1000000 1.0",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('cantidad', type=int, nargs='?', default=1000000, help="Precios sintéticos (por defecto 1000000)")
+    parser.add_argument('proporcion_texto', type=float, nargs='?', default=0.5,
+                        help="Proporción de precios como texto, de 0 a 1 (por defecto 0.5)")
+    args = parser.parse_args()
+    if args.cantidad < 1 or not 0 <= args.proporcion_texto <= 1:
+        parser.error("cantidad debe ser mayor que 0 y proporcion_texto estar entre 0 y 1")
+    cantidad, proporcion_texto = args.cantidad, args.proporcion_texto
+
+    print(f"Generando {cantidad:,} precios sintéticos ({proporcion_texto:.0%} como texto)")
+    valores = generar_precios(cantidad, proporcion_texto)
+    columna = np.array(valores, dtype=object)
+
+    inicio = time.perf_counter()
+    uno_a_uno = [procesar_precio(v) for v in valores]
+    tiempo_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    precios, validos = procesar_precios(columna)
+    tiempo_lotes = time.perf_counter() - inicio
+
+    # Columna 100% numérica (caso típico de openpyxl)
+    numericos = np.array([float(v) for v in range(cantidad)])
+    inicio = time.perf_counter()
+    procesar_precios(numericos)
+    tiempo_numerico = time.perf_counter() - inicio
+
+    print(f"\nUno a uno:          {tiempo_escalar:8.3f} s  ({tiempo_escalar / cantidad * 1e9:8.0f} ns/precio)")
+    print(f"Por lotes:          {tiempo_lotes:8.3f} s  ({tiempo_lotes / cantidad * 1e9:8.0f} ns/precio)")
+    print(f"Por lotes numérico: {tiempo_numerico:8.3f} s  ({tiempo_numerico / cantidad * 1e9:8.0f} ns/precio)")
+    print(f"Aceleración: {tiempo_escalar / tiempo_lotes:.1f}x")
+    print(f"Precios válidos: {int(validos.sum()):,} de {cantidad:,}")
+
+    iguales = all(
+        (esperado is None and not valido) or (valido and esperado == precio)
+        for esperado, precio, valido in zip(uno_a_uno, precios.tolist(), validos)
+    )
+    if not iguales:
+        print("\n✗ ERROR: procesar_precio y procesar_precios dieron resultados distintos")
+        sys.exit(1)
+    distintos = signos_iguales()
+    if distintos:
+        print(f"\n✗ ERROR: estas celdas negativas no dan lo mismo que su texto: {distintos}")
+        sys.exit(1)
+    print("\n✓ Ambas versiones dieron exactamente los mismos precios")
+    print("✓ Las celdas numéricas negativas dan lo mismo que su texto (sin signo)")
+
+
+if __name__ == "__main__":
+    main()
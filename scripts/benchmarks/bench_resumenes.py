@@ -0,0 +1,251 @@
+"""
+Benchmark de actualizar_resumenes.py en una base de datos creada con setup_completo.sql
+(más migrations/crear_tablas_resumen_kpi.sql)
+
+Crea una empresa con tiendas, bodegas, empleados, juguetes y un año de ventas y
+pagos sintéticos (generados en el servidor con generate_series) y mide:
+
+    - lo que hacía el dashboard: traer precio_venta de todas las ventas y
+      contar tiendas, bodegas y usuarios
+    - resumen_dashboard() sobre las tablas de resumen
+    - la primera actualización (toda la historia) y una incremental con
+      --nuevas ventas, sus pagos, unas ventas deshechas y unas devoluciones
+      de ventas de días anteriores (filas borradas o modificadas sin log)
+
+Verifica que resumen_ventas_dia y resumen_pagos_dia sean iguales a agrupar
+desde cero y que las ganancias de resumen_dashboard() sean la suma de las
+ventas, también con días pendientes antes de la actualización incremental. La empresa se borra al terminar; aun así, úsalo solo contra una base
+de datos local de pruebas.
+
+Uso:
+    python benchmarks/bench_resumenes.py [ventas] [--db URL] [--nuevas N] [--deshechas N] [--devueltas N]
+
+Ejemplo:
+    python benchmarks/bench_resumenes.py 1000000 --db postgresql://postgres@localhost/toyswalls
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carga_db
+from actualizar_resumenes import actualizar_empresa, ZONA
+
+TIENDAS = 8
+BODEGAS = 3
+EMPLEADOS = 40
+JUGUETES = 20000
+METODOS = ['efectivo', 'transferencia', 'tarjeta', 'credito']
+
+# Ventas de los últimos 365 días (hasta hace 10 minutos, fuera del margen)
+_VENTAS = """
+INSERT INTO ventas (codigo_venta, juguete_codigo, empleado_id, precio_venta, cantidad, metodo_pago, empresa_id,
+                    es_por_mayor, abono, created_at)
+SELECT 'VENT-BENCH-' || g, 'JUG-' || (g %% {juguetes}), e.ids[1 + g %% array_length(e.ids, 1)],
+       round((1000 + random() * 99000)::numeric, 2), 1 + (g %% 3), (%(metodos)s::text[])[1 + g %% 4],
+       %(empresa_id)s, g %% 10 = 0, 0, NOW() - interval '10 minutes' - random() * %(dias)s * interval '1 day'
+FROM generate_series(1, %(ventas)s) g,
+     (SELECT array_agg(id) AS ids FROM empleados WHERE empresa_id = %(empresa_id)s) e
+"""
+
+_PAGOS = """
+INSERT INTO pagos (venta_id, monto, metodo_pago, empresa_id, created_at)
+SELECT id, round(precio_venta / 2, 2), (%(metodos)s::text[])[1 + id %% 3], empresa_id, created_at + interval '1 minute'
+FROM ventas
+WHERE empresa_id = %(empresa_id)s AND metodo_pago = 'credito' AND id > %(desde)s
+"""
+
+# Lo mismo que resumen_*_dia, agrupando todo desde cero
+_ESPERADO_VENTAS = """
+SELECT (v.created_at AT TIME ZONE %(zona)s)::date, COALESCE(e.tienda_id, 0), COALESCE(v.empleado_id, 0),
+       v.metodo_pago, COALESCE(v.es_por_mayor, FALSE), COUNT(*), SUM(COALESCE(NULLIF(v.cantidad, 0), 1)),
+       SUM(v.precio_venta), SUM(COALESCE(v.abono, 0))
+FROM ventas v LEFT JOIN empleados e ON e.id = v.empleado_id
+WHERE v.empresa_id = %(empresa_id)s
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+_ESPERADO_PAGOS = """
+SELECT (created_at AT TIME ZONE %(zona)s)::date, metodo_pago, COUNT(*), SUM(monto)
+FROM pagos WHERE empresa_id = %(empresa_id)s GROUP BY 1, 2
+"""
+
+
+def crear_empresa(cursor, ventas, dias=365):
+    """Empresa sintética con ubicaciones, empleados, juguetes, ventas y pagos; devuelve su id"""
+    cursor.execute("INSERT INTO empresas (nombre) VALUES ('Benchmark resúmenes') RETURNING id")
+    empresa_id = cursor.fetchone()[0]
+    for tabla, cantidad in (('tiendas', TIENDAS), ('bodegas', BODEGAS)):
+        cursor.execute(f"INSERT INTO {tabla} (nombre, direccion, empresa_id) "
+                       f"SELECT '{tabla} ' || g, 'Benchmark', %s FROM generate_series(1, %s) g", (empresa_id, cantidad))
+    cursor.execute("INSERT INTO empleados (nombre, telefono, codigo, tienda_id, empresa_id) "
+                   "SELECT 'Empleado ' || g, '300', 'EMP-' || g, t.ids[1 + g %% array_length(t.ids, 1)], %(e)s "
+                   "FROM generate_series(1, %(n)s) g, (SELECT array_agg(id) AS ids FROM tiendas WHERE empresa_id = %(e)s) t",
+                   {'e': empresa_id, 'n': EMPLEADOS})
+    cursor.execute("INSERT INTO juguetes (nombre, codigo, cantidad, precio_min, precio_por_mayor, empresa_id, bodega_id, tienda_id) "
+                   "SELECT 'Juguete ' || g, 'JUG-' || g, g %% 50, 1000 + g %% 500, 800 + g %% 400, %(e)s, "
+                   "CASE WHEN g %% 2 = 0 THEN b.ids[1 + g %% array_length(b.ids, 1)] END, "
+                   "CASE WHEN g %% 2 = 1 THEN t.ids[1 + g %% array_length(t.ids, 1)] END "
+                   "FROM generate_series(1, %(n)s) g, (SELECT array_agg(id) AS ids FROM bodegas WHERE empresa_id = %(e)s) b, "
+                   "(SELECT array_agg(id) AS ids FROM tiendas WHERE empresa_id = %(e)s) t",
+                   {'e': empresa_id, 'n': JUGUETES})
+    agregar_ventas(cursor, empresa_id, ventas, dias)
+    return empresa_id
+
+
+def agregar_ventas(cursor, empresa_id, ventas, dias):
+    """ventas nuevas en los últimos dias y un pago por cada venta a crédito"""
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ventas")
+    desde = cursor.fetchone()[0]
+    cursor.execute(_VENTAS.format(juguetes=JUGUETES),
+                   {'empresa_id': empresa_id, 'ventas': ventas, 'dias': dias, 'metodos': METODOS})
+    cursor.execute(_PAGOS, {'empresa_id': empresa_id, 'desde': desde, 'metodos': METODOS})
+
+
+def deshacer_ventas(cursor, empresa_id, cantidad):
+    """Como deshacerUltimaVenta: log en logs_deshacer_ventas y se borra la venta (y sus pagos)"""
+    cursor.execute("SELECT id, codigo_venta, juguete_codigo, empleado_id, precio_venta, cantidad "
+                   "FROM ventas WHERE empresa_id = %s ORDER BY id DESC LIMIT %s", (empresa_id, cantidad))
+    for venta_id, codigo_venta, juguete_codigo, empleado_id, precio, unidades in cursor.fetchall():
+        cursor.execute("INSERT INTO logs_deshacer_ventas (empresa_id, codigo_venta, empleado_id, juguete_codigo, "
+                       "precio_venta, cantidad) VALUES (%s, %s, %s, %s, %s, %s)",
+                       (empresa_id, codigo_venta, empleado_id, juguete_codigo, precio, unidades))
+        cursor.execute("DELETE FROM ventas WHERE id = %s", (venta_id,))
+
+
+def devolver_ventas(cursor, empresa_id, cantidad):
+    """
+    Como procesarDevolucion y deshacerUltimaVentaPorMayor, sin log: de ventas
+    al azar de días anteriores, la mitad se borra (con sus pagos) y a la otra
+    mitad se le devuelve una unidad (cantidad y precio_venta en su lugar)
+    """
+    cursor.execute("SELECT id FROM ventas WHERE empresa_id = %s AND created_at < NOW() - interval '1 day' "
+                   "ORDER BY random() LIMIT %s", (empresa_id, cantidad))
+    ids = [fila[0] for fila in cursor.fetchall()]
+    borradas, devueltas = ids[::2], ids[1::2]
+    cursor.execute("DELETE FROM pagos WHERE venta_id = ANY(%s)", (borradas,))
+    cursor.execute("DELETE FROM ventas WHERE id = ANY(%s)", (borradas,))
+    cursor.execute("UPDATE ventas SET cantidad = cantidad + 1, precio_venta = precio_venta * 2 WHERE id = ANY(%s)",
+                   (devueltas,))
+    # Marcar como facturadas no cambia los resúmenes (el trigger no anota días)
+    cursor.execute("UPDATE ventas SET facturada = TRUE WHERE empresa_id = %s AND id %% 100 = 0", (empresa_id,))
+
+
+def diferencias(cursor, empresa_id):
+    """Filas distintas entre los resúmenes y agruparlo todo desde cero (0 si coinciden)"""
+    datos = {'empresa_id': empresa_id, 'zona': ZONA}
+    total = 0
+    for esperado, resumen in (
+            (_ESPERADO_VENTAS, "SELECT fecha, tienda_id, empleado_id, metodo_pago, es_por_mayor, ventas, cantidad, "
+                               "total, abono FROM resumen_ventas_dia WHERE empresa_id = %(empresa_id)s"),
+            (_ESPERADO_PAGOS, "SELECT fecha, metodo_pago, pagos, monto FROM resumen_pagos_dia "
+                              "WHERE empresa_id = %(empresa_id)s")):
+        cursor.execute(f"SELECT COUNT(*) FROM (({esperado} EXCEPT {resumen}) UNION ALL ({resumen} EXCEPT {esperado})) d",
+                       datos)
+        total += cursor.fetchone()[0]
+    return total
+
+
+def consulta_anterior(cursor, empresa_id):
+    """Lo que hacía loadDashboardSummary: los conteos y precio_venta de todas las ventas, sumado en el cliente"""
+    conteos = []
+    for tabla in ('tiendas', 'bodegas', 'usuarios'):
+        cursor.execute(f"SELECT COUNT(*) FROM {tabla} WHERE empresa_id = %s", (empresa_id,))
+        conteos.append(cursor.fetchone()[0])
+    cursor.execute("SELECT precio_venta FROM ventas WHERE empresa_id = %s", (empresa_id,))
+    return conteos, sum(float(precio) for (precio,) in cursor.fetchall())
+
+
+def medir(funcion, *argumentos, repeticiones=3):
+    """Mejor tiempo de varias ejecuciones y el último resultado"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos)
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Actualización incremental de los resúmenes del dashboard contra la consulta de siempre",
+        epilog="Ejemplo:\n"
+               "  python benchmarks/bench_resumenes.py 1000000 --db postgresql://postgres@localhost/toyswalls",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('ventas', type=int, nargs='?', default=1000000, help="Ventas sintéticas del año (por defecto 1000000)")
+    parser.add_argument('--db', metavar='URL', help="URL de PostgreSQL (por defecto la variable DATABASE_URL)")
+    parser.add_argument('--nuevas', type=int, default=1000, help="Ventas nuevas de la actualización incremental (por defecto 1000)")
+    parser.add_argument('--deshechas', type=int, default=5, help="Ventas deshechas antes de la incremental (por defecto 5)")
+    parser.add_argument('--devueltas', type=int, default=20,
+                        help="Ventas de días anteriores borradas o modificadas sin log (por defecto 20)")
+    args = parser.parse_args()
+    if args.ventas < 1 or args.nuevas < 1 or args.deshechas < 0 or args.devueltas < 0:
+        parser.error("ventas y --nuevas deben ser mayores que 0 y --deshechas y --devueltas no pueden ser negativos")
+
+    try:
+        pool = carga_db.crear_pool(args.db, 1)
+    except Exception as e:
+        parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+
+    with carga_db.conexion(pool) as con, con.cursor() as cursor:
+        print(f"Generando {args.ventas:,} ventas en una empresa nueva")
+        empresa_id = crear_empresa(cursor, args.ventas)
+        con.commit()
+        try:
+            cursor.execute("ANALYZE ventas; ANALYZE pagos")
+            con.commit()
+            tiempo_anterior, (_, ganancias) = medir(consulta_anterior, cursor, empresa_id)
+
+            inicio = time.perf_counter()
+            actualizar_empresa(con, empresa_id, margen=0)
+            tiempo_completo = time.perf_counter() - inicio
+
+            def resumen_dashboard():
+                cursor.execute("SELECT resumen_dashboard(%s)", (empresa_id,))
+                return cursor.fetchone()[0]
+
+            agregar_ventas(cursor, empresa_id, args.nuevas, 1)
+            deshacer_ventas(cursor, empresa_id, args.deshechas)
+            devolver_ventas(cursor, empresa_id, args.devueltas)
+            con.commit()
+            # Antes de actualizar, los días pendientes ya no deben contar lo que se deshizo
+            _, (_, ganancias) = medir(consulta_anterior, cursor, empresa_id, repeticiones=1)
+            ganancias_pendientes = float(resumen_dashboard()['ganancias'])
+            inicio = time.perf_counter()
+            resultado = actualizar_empresa(con, empresa_id, margen=0)
+            tiempo_incremental = time.perf_counter() - inicio
+
+            tiempo_resumen, resumen = medir(resumen_dashboard)
+            _, (_, ganancias) = medir(consulta_anterior, cursor, empresa_id, repeticiones=1)
+
+            print(f"\nDashboard, consulta de siempre (todas las ventas): {tiempo_anterior * 1000:9.1f} ms")
+            print(f"Dashboard, resumen_dashboard():                     {tiempo_resumen * 1000:9.1f} ms "
+                  f"({tiempo_anterior / tiempo_resumen:.0f}x)")
+            print(f"Primera actualización ({args.ventas:,} ventas):      {tiempo_completo:9.3f} s")
+            print(f"Incremental ({resultado['ventas']:,} ventas, {resultado['pagos']:,} pagos, "
+                  f"{resultado['dias_rehechos']} días rehechos): {tiempo_incremental:9.3f} s "
+                  f"({tiempo_completo / tiempo_incremental:.0f}x menos)")
+
+            if abs(ganancias_pendientes - ganancias) > 0.01:
+                print(f"\n✗ ERROR: antes de actualizar, resumen_dashboard() da {ganancias_pendientes:,.2f} "
+                      f"de ganancias y las ventas suman {ganancias:,.2f}")
+                sys.exit(1)
+            errores = diferencias(cursor, empresa_id)
+            if errores or abs(float(resumen['ganancias']) - ganancias) > 0.01:
+                print(f"\n✗ ERROR: los resúmenes no coinciden con las ventas ({errores} filas distintas)")
+                sys.exit(1)
+            print("\n✓ Los resúmenes coinciden con agrupar todas las ventas y pagos desde cero")
+        finally:
+            con.rollback()
+            cursor.execute("DELETE FROM empresas WHERE id = %s", (empresa_id,))
+            con.commit()
+    pool.closeall()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Generador de libros Excel sintéticos para los benchmarks de importación
+
+Genera los tres tipos de archivo que leen los scripts, con los encabezados y
+los formatos de valores que llegan en los Excel reales:
+
+    - inventario: Nombre, Codigo, ITEM, Numero de bultos, Cantidad por bultos,
+      Cantidad TOTAL, PRECIO MINIMO, Precio al por mayor, Foto URL y Ubicación
+      (excel_to_sql.py, procesar_inventario.py, actualizar_bultos_desde_excel.py
+      y actualizar_precios_por_mayor_desde_excel.py)
+    - precio final: ITEM NO.: y PRECIO MINIMO (actualizar_precios_desde_excel.py)
+    - precios mayoristas: Item y Precio mayorista (actualizar_precios_desde_excel.py)
+
+Los valores mezclan lo que entrega openpyxl (floats y enteros) con textos en
+formato colombiano ("$ 22.684", "22.684", "1.000,50", "22,684") y
+estadounidense ("1,000.50"), cantidades como "1.200" o "12 und", ubicaciones
+"Bodega/ nombre" y "Tienda nombre", códigos repetidos en varias ubicaciones y
+una pequeña proporción de filas inválidas (código vacío, ubicación sin tipo,
+precio ilegible), así que también se ejercitan los avisos.
+
+Con variante se eligen otros alias de los encabezados (VARIANTES): la 0 es la
+del Excel real; las demás usan los demás nombres que aceptan los mapeos de
+columnas de los scripts.
+
+Los archivos se guardan en una carpeta (por defecto la temporal del sistema)
+con el número de filas, la variante y la semilla en el nombre; si ya existen no
+se vuelven a generar.
+
+Con --formato csv o parquet cada libro se exporta además a ese formato
+(exportar_libros), con los mismos valores, para medir los lectores de CSV y
+Parquet de lectura.py.
+
+Uso:
+    python benchmarks/generar_libros.py filas [carpeta] [--variante N] [--semilla N] [--formato csv|parquet]
+
+Ejemplo:
+    python benchmarks/generar_libros.py 100000
+    python benchmarks/generar_libros.py 1000000 /tmp/libros --variante 1
+    python benchmarks/generar_libros.py 100000 --formato csv
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from openpyxl import Workbook
+
+# Cambiar al modificar los datos generados, para no usar archivos viejos
+VERSION = 1
+
+CARPETA = os.path.join(tempfile.gettempdir(), 'toyswalls_bench')
+
+# Encabezados de cada archivo: la variante 0 es la del Excel real
+VARIANTES = [
+    {
+        'inventario': ['Nombre', 'Codigo', 'ITEM', 'Numero de bultos', 'Cantidad por bultos', 'Cantidad TOTAL',
+                       'PRECIO MINIMO', 'Precio al por mayor', 'Foto URL', 'Ubicación'],
+        'precio_final': ['ITEM NO.:', 'PRECIO MINIMO'],
+        'mayorista': ['Item ', 'Precio mayorista'],
+    },
+    {
+        'inventario': ['NOMBRE', 'Código', 'Item', 'Número de bultos', 'Cantidad por bulto', 'Total',
+                       'Precio mínimo', 'Precio por mayor', 'URL Foto', 'Ubicacion'],
+        'precio_final': ['Item no', 'Precio mínimo'],
+        'mayorista': ['ITEM NO.:', 'Precio x mayor'],
+    },
+    {
+        'inventario': [' Name ', 'Code', 'Item Code', 'Bultos', 'cantidad_por_bulto', 'cantidad_total',
+                       'precio_min', 'precio_por_mayor', 'foto_url', 'Location'],
+        'precio_final': ['item_no', 'minimo'],
+        'mayorista': ['codigo', 'precio_por_mayor'],
+    },
+]
+
+UBICACIONES = [
+    'Bodega/ Santa Isabel', 'Bodega/ Norte', 'BODEGA/ santa isabel', 'Tienda/ Centro', "Tienda/ O'Hara",
+    'Tienda Plaza', 'Tienda Norte Sur', 'Bodega Norte',
+]
+
+# Formatos de texto de un precio p (entero, en pesos)
+FORMATOS_PRECIO = [
+    lambda p: f"{p:,}".replace(',', '.'),                    # 22.684
+    lambda p: f"$ {p:,}".replace(',', '.'),                  # $ 22.684
+    lambda p: f"${p:,}".replace(',', '.'),                   # $22.684
+    lambda p: f"{p:,}",                                      # 22,684
+    lambda p: f"{p:,}".replace(',', '.') + ',50',            # 22.684,50
+    lambda p: f"{p:,}.50",                                   # 22,684.50
+    lambda p: str(p),                                        # 22684
+]
+
+# Formatos de texto de una cantidad entera
+FORMATOS_CANTIDAD = [
+    lambda c: f"{c:,}".replace(',', '.'),                    # 1.200
+    lambda c: f"{c} und",                                    # 12 und
+    lambda c: str(c),                                        # 12
+]
+
+
+def _mezclar(valores, generador, proporcion_texto, formatos, proporcion_vacios=0.0, invalido=None,
+             proporcion_invalidos=0.0):
+    """
+    Lista de celdas a partir de valores enteros: una parte como texto con uno de
+    los formatos, otra como número (float o int, como openpyxl) y otra vacía
+    """
+    n = len(valores)
+    azar = generador.random(n)
+    formato = generador.integers(0, len(formatos), n)
+    como_float = generador.random(n) < 0.5
+    celdas = []
+    for valor, a, f, es_float in zip(valores.tolist(), azar.tolist(), formato.tolist(), como_float.tolist()):
+        if a < proporcion_vacios:
+            celdas.append(None)
+        elif a < proporcion_vacios + proporcion_invalidos:
+            celdas.append(invalido)
+        elif a < proporcion_vacios + proporcion_invalidos + proporcion_texto:
+            celdas.append(formatos[f](valor))
+        else:
+            celdas.append(float(valor) if es_float else valor)
+    return celdas
+
+
+def columnas_inventario(filas, semilla=0):
+    """
+    Columnas del inventario en el orden de VARIANTES[...]['inventario'] (listas de celdas).
+    Cada código aparece en una o más ubicaciones, como en el inventario real.
+    """
+    generador = np.random.default_rng(semilla)
+    # Alrededor de 1,5 ubicaciones por código
+    codigos = np.sort(generador.integers(0, max(1, int(filas / 1.5)), filas))
+    texto_codigo = [f'JW-{c:06d}' if c % 7 else c + 100000 for c in codigos.tolist()]
+    vacio = generador.random(filas) < 0.002
+    codigo = [None if v else c for c, v in zip(texto_codigo, vacio.tolist())]
+    nombre = [f'Juguete {c} {"ÁÉÑ" if c % 11 == 0 else "modelo"} "{c % 97}"' for c in codigos.tolist()]
+
+    # El ITEM es el mismo para todas las filas del código; falta en el 10 %
+    item_por_codigo = codigos * 3 + 70000
+    con_item = (generador.random(filas) >= 0.1).tolist()
+    item = [(f'YJ{i}' if i % 4 else i) if ok else None for i, ok in zip(item_por_codigo.tolist(), con_item)]
+
+    numero_bultos = generador.integers(1, 80, filas)
+    cantidad_por_bulto = generador.choice([6, 12, 24, 36, 48, 72, 144], filas)
+    total = numero_bultos * cantidad_por_bulto
+    usa_total = generador.random(filas) < 0.4
+    cantidad_total = [int(t) if u else None for t, u in zip(total.tolist(), usa_total.tolist())]
+
+    precio_min = generador.integers(5, 6000, filas) * 100
+    precio_por_mayor = (precio_min * 0.85).astype(np.int64) // 100 * 100
+    foto = generador.random(filas)
+    ubicacion = generador.choice(len(UBICACIONES) + 1, filas, p=[0.998 / len(UBICACIONES)] * len(UBICACIONES) + [0.002])
+    return [
+        nombre,
+        codigo,
+        item,
+        _mezclar(numero_bultos, generador, 0.3, FORMATOS_CANTIDAD, proporcion_vacios=0.02),
+        _mezclar(cantidad_por_bulto, generador, 0.2, FORMATOS_CANTIDAD, proporcion_vacios=0.02),
+        cantidad_total,
+        _mezclar(precio_min, generador, 0.5, FORMATOS_PRECIO, invalido='consultar', proporcion_invalidos=0.003),
+        _mezclar(precio_por_mayor, generador, 0.5, FORMATOS_PRECIO, proporcion_vacios=0.3),
+        [f'https://fotos.toyswalls.com/{c}.jpg' if f < 0.4 else ('sin foto' if f < 0.45 else None)
+         for c, f in zip(texto_codigo, foto.tolist())],
+        [UBICACIONES[u] if u < len(UBICACIONES) else 'Vitrina' for u in ubicacion.tolist()],
+    ]
+
+
+def columnas_precios(filas, semilla=0, mayorista=False):
+    """Columnas (item, precio) del archivo de precio final o del de precios mayoristas"""
+    generador = np.random.default_rng(semilla + (2 if mayorista else 1))
+    # Los mismos items del inventario, con algunos repetidos (gana la última fila)
+    items = generador.integers(0, max(1, int(filas / 1.5)), filas) * 3 + 70000
+    item = [f'YJ{i}' if i % 4 else i for i in items.tolist()]
+    precios = generador.integers(5, 6000, filas) * (85 if mayorista else 100)
+    return [item, _mezclar(precios, generador, 0.6, FORMATOS_PRECIO, proporcion_vacios=0.02, invalido='N/D',
+                           proporcion_invalidos=0.003)]
+
+
+def escribir_libro(archivo, encabezados, columnas):
+    """Escribe una hoja con los encabezados y las columnas (openpyxl en modo write_only)"""
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Hoja1')
+    hoja.append(encabezados)
+    for fila in zip(*columnas):
+        hoja.append(fila)
+    # Se escribe con otro nombre y se renombra: nunca queda un libro a medias
+    temporal = archivo + '.tmp'
+    libro.save(temporal)
+    os.replace(temporal, archivo)
+
+
+def generar_libros(filas, carpeta=CARPETA, variante=0, semilla=0):
+    """
+    Genera (si no existen) los tres libros de filas filas y devuelve
+    {'inventario': ruta, 'precio_final': ruta, 'mayorista': ruta}
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    encabezados = VARIANTES[variante]
+    generadores = {
+        'inventario': lambda: columnas_inventario(filas, semilla),
+        'precio_final': lambda: columnas_precios(filas, semilla),
+        'mayorista': lambda: columnas_precios(filas, semilla, mayorista=True),
+    }
+    rutas = {}
+    for tipo, generar in generadores.items():
+        ruta = os.path.join(carpeta, f'{tipo}_{filas}_v{variante}_s{semilla}_g{VERSION}.xlsx')
+        if not os.path.exists(ruta):
+            inicio = time.perf_counter()
+            escribir_libro(ruta, encabezados[tipo], generar())
+            print(f"✓ Generado {os.path.basename(ruta)} en {time.perf_counter() - inicio:.1f} s")
+        rutas[tipo] = ruta
+    return rutas
+
+
+def exportar_libros(rutas, formato):
+    """
+    Exporta (si no existen) los libros {tipo: ruta} a CSV (separado por ';',
+    como los exporta Excel en español) o Parquet y devuelve {tipo: ruta nueva}.
+    En Parquet las columnas con números y textos mezclados se guardan como
+    texto (Parquet no admite tipos mezclados en una columna).
+    """
+    import pandas as pd
+
+    exportadas = {}
+    for tipo, ruta in rutas.items():
+        destino = os.path.splitext(ruta)[0] + ('.csv' if formato == 'csv' else '.parquet')
+        if not os.path.exists(destino):
+            inicio = time.perf_counter()
+            df = pd.read_excel(ruta)
+            temporal = destino + '.tmp'
+            if formato == 'csv':
+                df.to_csv(temporal, sep=';', index=False)
+            else:
+                for columna in df.columns[df.dtypes == object]:
+                    df[columna] = df[columna].map(lambda v: v if pd.isna(v) else str(v))
+                df.to_parquet(temporal, index=False)
+            os.replace(temporal, destino)
+            print(f"✓ Exportado {os.path.basename(destino)} en {time.perf_counter() - inicio:.1f} s")
+        exportadas[tipo] = destino
+    return exportadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera libros Excel sintéticos de inventario y precios")
+    parser.add_argument('filas', type=int, help="Filas de cada libro")
+    parser.add_argument('carpeta', nargs='?', default=CARPETA, help=f"Carpeta de salida (por defecto {CARPETA})")
+    parser.add_argument('--variante', type=int, default=0, choices=range(len(VARIANTES)),
+                        help="Alias de los encabezados (0: los del Excel real)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos aleatorios")
+    parser.add_argument('--formato', choices=['csv', 'parquet'], help="Exportar además los libros a CSV o Parquet")
+    args = parser.parse_args()
+    if args.filas < 1:
+        parser.error("filas debe ser mayor que 0")
+
+    rutas = generar_libros(args.filas, args.carpeta, args.variante, args.semilla)
+    if args.formato:
+        rutas = exportar_libros(rutas, args.formato)
+    for tipo, ruta in rutas.items():
+        print(f"{tipo:13s} {ruta} ({os.path.getsize(ruta) / (1024 * 1024):.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Caché en disco de los archivos Excel ya leídos.
+
+Leer un .xlsx con openpyxl tarda varios segundos; cuando se vuelve a ejecutar un
+script con el mismo archivo (por ejemplo PRECIO FINAL.xlsx mientras se ajustan
+los mapeos de columnas) el DataFrame se toma de la caché sin abrir el Excel.
+
+    - La clave es el hash (SHA-256) del contenido del archivo, la versión del
+      lector (VERSION_LECTOR) y la versión de pandas: si el archivo cambia o
+      cambia la forma de leerlo, la entrada anterior deja de usarse
+    - Se guarda el DataFrame tal como lo entrega pd.read_excel, antes de
+      normalizar columnas, así la misma entrada sirve para los cinco scripts
+    - El formato es el pickle de pandas: guarda cada bloque de columnas como un
+      arreglo y conserva exactamente las columnas con tipos mezclados (números y
+      textos en la misma columna), que Parquet/Feather no admiten
+    - Tamaño máximo TAMANO_CACHE_MB; al superarlo se borran las entradas usadas
+      hace más tiempo (LRU, según la fecha de modificación que se actualiza en
+      cada uso)
+
+La carpeta es ~/.cache/toyswalls/excel (o TOYSWALLS_CACHE_DIR) y el tamaño
+máximo se puede cambiar con TOYSWALLS_CACHE_MB. Solo debe contener archivos
+generados por estos scripts: cargar un pickle ejecuta código.
+"""
+
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+# Cambiar al modificar cómo se lee el Excel, para no usar entradas viejas
+VERSION_LECTOR = 1
+
+# Tamaño máximo de la caché en MB
+TAMANO_CACHE_MB = 500
+
+EXTENSION = '.pkl'
+
+
+def carpeta_cache():
+    """Carpeta de la caché (TOYSWALLS_CACHE_DIR o ~/.cache/toyswalls/excel)"""
+    carpeta = os.environ.get('TOYSWALLS_CACHE_DIR')
+    if not carpeta:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        carpeta = os.path.join(base, 'toyswalls', 'excel')
+    return carpeta
+
+
+def tamano_maximo():
+    """Tamaño máximo en bytes (TOYSWALLS_CACHE_MB o TAMANO_CACHE_MB)"""
+    try:
+        megas = float(os.environ.get('TOYSWALLS_CACHE_MB', TAMANO_CACHE_MB))
+    except ValueError:
+        megas = TAMANO_CACHE_MB
+    return int(megas * 1024 * 1024)
+
+
+def clave_archivo(archivo):
+    """Hash del contenido del archivo junto con las versiones del lector y de pandas"""
+    h = hashlib.sha256()
+    with open(archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    h.update(f'|lector={VERSION_LECTOR}|pandas={pd.__version__}'.encode())
+    return h.hexdigest()
+
+
+def _entradas(carpeta):
+    """Lista de (fecha de uso, tamaño, ruta) de las entradas de la caché"""
+    entradas = []
+    for nombre in os.listdir(carpeta):
+        if not nombre.endswith(EXTENSION):
+            continue
+        ruta = os.path.join(carpeta, nombre)
+        try:
+            datos = os.stat(ruta)
+        except OSError:
+            continue
+        entradas.append((datos.st_mtime, datos.st_size, ruta))
+    return entradas
+
+
+def recortar(carpeta=None, maximo=None):
+    """Borra las entradas usadas hace más tiempo hasta quedar bajo el tamaño máximo"""
+    carpeta = carpeta or carpeta_cache()
+    maximo = tamano_maximo() if maximo is None else maximo
+    if not os.path.isdir(carpeta):
+        return
+    entradas = sorted(_entradas(carpeta))
+    total = sum(tamano for _, tamano, _ in entradas)
+    for _, tamano, ruta in entradas:
+        if total <= maximo:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tamano
+
+
+def leer_con_cache(archivo, leer):
+    """
+    Devuelve leer(archivo) usando la caché: si el contenido ya se leyó antes se
+    carga el DataFrame guardado sin llamar a leer. Si la caché no se puede usar
+    (permisos, disco lleno, entrada dañada) se lee el archivo normalmente.
+    """
+    try:
+        carpeta = carpeta_cache()
+        ruta = os.path.join(carpeta, clave_archivo(archivo) + EXTENSION)
+    except OSError:
+        return leer(archivo)
+
+    if os.path.exists(ruta):
+        try:
+            df = pd.read_pickle(ruta)
+            # Marcar como usada recientemente para el LRU
+            os.utime(ruta)
+            print(f"✓ {os.path.basename(archivo)} leído desde la caché")
+            return df
+        except Exception:
+            # Entrada dañada o de otra versión: se vuelve a leer el Excel
+            pass
+
+    df = leer(archivo)
+    temporal = None
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        # Escritura atómica: otro proceso nunca ve una entrada a medias
+        fd, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            df.to_pickle(f, compression=None)
+        os.replace(temporal, ruta)
+        recortar(carpeta)
+    except OSError:
+        if temporal and os.path.exists(temporal):
+            os.remove(temporal)
+    return df
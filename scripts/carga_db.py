@@ -0,0 +1,258 @@
+"""
+Carga directa en la base de datos (--cargar / --load).
+
+En lugar de escribir un archivo .sql para pegarlo en el SQL Editor de Supabase,
+excel_to_sql.py y los scripts actualizar_*_desde_excel.py pueden conectarse a
+PostgreSQL y cargar ellos mismos lo que procesaron:
+
+    - Las filas se copian con COPY a una tabla temporal (staging)
+    - Desde esa tabla pasan a juguetes con el mismo INSERT ... SELECT del
+      formato copy (excel_to_sql) o el mismo UPDATE ... FROM del formato lotes
+      (actualizar_*), todo en una sola transacción: si algo falla no cambia nada
+    - Con commit_cada el paso a juguetes se divide en transacciones de ese
+      número de filas, para archivos muy grandes; si falla, las transacciones
+      anteriores ya quedaron confirmadas
+
+Las conexiones salen de un pool pequeño (crear_pool) que se puede compartir
+entre varias cargas (importar_inventario.py). La URL de la base de datos se
+toma de --db o de la variable DATABASE_URL. Requiere psycopg2
+(pip install psycopg2-binary); los scripts no lo importan si no se usa --cargar.
+
+Al terminar se informan las filas cargadas, las filas por segundo y el tiempo.
+"""
+
+import io
+import os
+import time
+from contextlib import contextmanager
+
+from salida_sql import (csv_numero, csv_texto, definicion_columnas, insert_desde_tabla, lineas_copy,
+                        update_desde_tabla, TIPOS_COLUMNAS)
+
+# Conexiones máximas del pool
+TAMANO_POOL = 4
+
+# Filas por cada COPY (el texto CSV de cada una se arma en memoria)
+TAMANO_COPY = 20000
+
+TABLA_CARGA = 'juguetes_carga'
+
+
+def crear_pool(dsn=None, maximo=TAMANO_POOL):
+    """Pool de conexiones a la base de datos (dsn o la variable DATABASE_URL)"""
+    dsn = dsn or os.environ.get('DATABASE_URL')
+    if not dsn:
+        raise ValueError("Falta la URL de la base de datos: usa --db o la variable DATABASE_URL")
+    try:
+        from psycopg2.pool import ThreadedConnectionPool
+    except ImportError:
+        raise RuntimeError("La carga directa requiere psycopg2: pip install psycopg2-binary") from None
+    # Igual que el formato copy: los textos del Excel se envían en UTF-8
+    return ThreadedConnectionPool(1, maximo, dsn, client_encoding='UTF8')
+
+
+@contextmanager
+def conexion(pool):
+    """Toma una conexión del pool y la devuelve al terminar (con rollback si hubo un error)"""
+    con = pool.getconn()
+    try:
+        yield con
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        pool.putconn(con)
+
+
+def agregar_opciones(parser):
+    """Opciones --cargar, --db y --commit-cada de los scripts"""
+    parser.add_argument('--cargar', '--load', action='store_true',
+                        help="Cargar directamente en la base de datos (COPY a una tabla temporal) en lugar de escribir el SQL")
+    parser.add_argument('--db', metavar='URL', help="Con --cargar, URL de PostgreSQL (por defecto la variable DATABASE_URL)")
+    parser.add_argument('--commit-cada', type=int, metavar='N',
+                        help="Confirmar cada N filas (archivos muy grandes): con --cargar, transacciones de N filas; "
+                             "sin --cargar, el SQL se divide en bloques numerados para ejecutar_sql.py")
+
+
+def pool_de_argumentos(parser, args):
+    """Pool para --cargar (None sin --cargar); termina con un error si las opciones no son válidas"""
+    if args.commit_cada is not None and args.commit_cada < 1:
+        parser.error("--commit-cada debe ser mayor que 0")
+    if not args.cargar:
+        if args.db:
+            parser.error("--db requiere --cargar")
+        return None
+    if getattr(args, 'output_file', None):
+        parser.error("--cargar no escribe un archivo SQL: quita el archivo de salida")
+    try:
+        return crear_pool(args.db)
+    except Exception as e:
+        parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+
+
+def _copiar(cursor, tabla, columnas, lineas):
+    """COPY de filas CSV ya formateadas a la tabla, en trozos de TAMANO_COPY"""
+    comando = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)"
+    for inicio in range(0, len(lineas), TAMANO_COPY):
+        cursor.copy_expert(comando, io.StringIO(''.join(linea + '\n' for linea in lineas[inicio:inicio + TAMANO_COPY])))
+
+
+def _rango(alias, rango):
+    """Condición sobre la columna orden para un rango (desde, hasta], o None para todas las filas"""
+    return f"{alias}.orden > {rango[0]} AND {alias}.orden <= {rango[1]}" if rango else None
+
+
+def _pasar_a_juguetes(con, cursor, sentencia, total, commit_cada):
+    """
+    Ejecuta sentencia(rango) sobre las filas de la tabla de carga: todas de una
+    vez (rango None), o por rangos de orden de commit_cada filas con un commit
+    por rango. Devuelve (filas afectadas, transacciones).
+    """
+    cursor.execute(f"ANALYZE {TABLA_CARGA}")
+    if not commit_cada or commit_cada >= total:
+        cursor.execute(sentencia(None))
+        afectadas = cursor.rowcount
+        con.commit()
+        return afectadas, 1
+
+    cursor.execute(f"CREATE INDEX ON {TABLA_CARGA} (orden)")
+    con.commit()
+    afectadas = 0
+    transacciones = 0
+    for inicio in range(0, total, commit_cada):
+        cursor.execute(sentencia((inicio, inicio + commit_cada)))
+        afectadas += cursor.rowcount
+        con.commit()
+        transacciones += 1
+    return afectadas, transacciones
+
+
+def cargar_updates(pool, empresa_id, clave, columnas, filas, omitir_nulos=False, commit_cada=None):
+    """
+    Actualiza juguetes desde filas (clave, valor, ...) igual que
+    escribir_updates_por_lotes, pero con COPY a una tabla temporal y un solo
+    UPDATE ... FROM desde ella.
+
+    Args:
+        clave: columna de juguetes que identifica el juguete ('item' o 'codigo')
+        columnas: {columna: tipo SQL} de los valores a actualizar
+        filas: lista de tuplas (clave, valor, ...) sin claves repetidas; None = NULL
+        omitir_nulos: con True un None deja el valor actual (COALESCE) en lugar de NULL
+        commit_cada: filas por transacción (None: una sola transacción)
+
+    Devuelve el resumen de la carga (ver imprimir_carga).
+    """
+    inicio = time.perf_counter()
+    nombres = ['orden', clave] + list(columnas)
+    tipos = dict(columnas, orden='INTEGER', **{clave: 'TEXT'})
+    formatos = [csv_texto] + [csv_numero] * len(columnas)
+    lineas = [f"{orden}," + ','.join(formato(valor) for formato, valor in zip(formatos, fila))
+              for orden, fila in enumerate(filas, start=1)]
+
+    with conexion(pool) as con, con.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA_CARGA}")
+        cursor.execute(f"CREATE TEMP TABLE {TABLA_CARGA} (\n{definicion_columnas(tipos, nombres)}\n)")
+        _copiar(cursor, TABLA_CARGA, nombres, lineas)
+
+        def sentencia(rango):
+            return update_desde_tabla(TABLA_CARGA, empresa_id, clave, columnas, omitir_nulos, _rango('v', rango))
+
+        afectadas, transacciones = _pasar_a_juguetes(con, cursor, sentencia, len(lineas), commit_cada)
+        cursor.execute(f"DROP TABLE {TABLA_CARGA}")
+        con.commit()
+
+    return {'filas': len(lineas), 'afectadas': afectadas, 'transacciones': transacciones,
+            'segundos': time.perf_counter() - inicio}
+
+
+class CargaInventario:
+    """
+    Carga de los INSERT de excel_to_sql con la misma interfaz que los escritores
+    de salida_sql: escribir(registros) copia cada bloque a la tabla temporal a
+    medida que se procesa (memoria constante en modo streaming) y cerrar()
+    resuelve las ubicaciones, ejecuta las sentencias pendientes (UPDATE del modo
+    incremental) y pasa las filas a juguetes (con upsert, ON CONFLICT DO UPDATE).
+
+    Se usa con with: si no se llega a cerrar(), la transacción se descarta.
+    """
+
+    def __init__(self, pool, ubicaciones, columnas, commit_cada=None, upsert=False):
+        self.pool = pool
+        self.ubicaciones = ubicaciones
+        self.columnas = list(columnas)
+        self.commit_cada = commit_cada
+        self.upsert = upsert
+        self.nombres = ['orden', 'fila'] + self.columnas + ['ubicacion']
+        self.sentencias = []
+        self.total = 0
+        # Solo el tiempo en la base de datos, sin el de leer y procesar el Excel
+        self.segundos = 0.0
+        self.con = None
+
+    def __enter__(self):
+        self.con = self.pool.getconn()
+        with self.con.cursor() as cursor:
+            tipos = dict(TIPOS_COLUMNAS, orden='INTEGER', fila='INTEGER', ubicacion='INTEGER')
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLA_CARGA}")
+            cursor.execute(f"CREATE TEMP TABLE {TABLA_CARGA} (\n{definicion_columnas(tipos, self.nombres)}\n)")
+        return self
+
+    def __exit__(self, *error):
+        if self.con is not None:
+            self.con.rollback()
+            self.pool.putconn(self.con)
+            self.con = None
+        return False
+
+    def escribir(self, registros):
+        """Copia los registros (DataFrame de parsear_columnas) y devuelve cuántos se copiaron"""
+        inicio = time.perf_counter()
+        lineas = lineas_copy(registros, self.ubicaciones, self.columnas)
+        lineas = [f"{orden},{linea}" for orden, linea in enumerate(lineas, start=self.total + 1)]
+        with self.con.cursor() as cursor:
+            _copiar(cursor, TABLA_CARGA, self.nombres, lineas)
+        self.total += len(lineas)
+        self.segundos += time.perf_counter() - inicio
+        return len(registros)
+
+    def sentencia(self, sql):
+        """Sentencia que se ejecuta después de resolver las ubicaciones y antes de los INSERT"""
+        self.sentencias.append(sql)
+
+    def cerrar(self):
+        """Pasa las filas a juguetes y confirma; devuelve el resumen de la carga (ver imprimir_carga)"""
+        inicio = time.perf_counter()
+        con = self.con
+        with con.cursor() as cursor:
+            # Falla (y no se carga nada) si alguna ubicación no existe en la empresa
+            cursor.execute(self.ubicaciones.sql())
+            actualizadas = 0
+            for sql in self.sentencias:
+                cursor.execute(sql)
+                actualizadas += cursor.rowcount
+
+            def sentencia(rango):
+                return insert_desde_tabla(TABLA_CARGA, self.columnas, self.ubicaciones.empresa_id, _rango('i', rango),
+                                          self.upsert)
+
+            afectadas, transacciones = _pasar_a_juguetes(con, cursor, sentencia, self.total, self.commit_cada)
+            cursor.execute(f"DROP TABLE {TABLA_CARGA}")
+            con.commit()
+        self.pool.putconn(con)
+        self.con = None
+        return {'filas': self.total, 'afectadas': afectadas, 'actualizadas': actualizadas,
+                'transacciones': transacciones, 'segundos': self.segundos + time.perf_counter() - inicio}
+
+
+def imprimir_carga(carga, segundos_total):
+    """Resumen de una carga directa: filas, filas por segundo y tiempo total"""
+    if carga is None:
+        print("✓ Nada que cargar en la base de datos")
+    else:
+        velocidad = carga['filas'] / carga['segundos'] if carga['segundos'] else 0
+        print(f"✓ Cargadas {carga['filas']} filas en {carga['segundos']:.2f} s ({velocidad:,.0f} filas/s, "
+              f"{carga['transacciones']} transacciones)")
+        print(f"✓ Filas afectadas en juguetes: {carga['afectadas']}")
+        if carga.get('actualizadas'):
+            print(f"✓ Filas actualizadas por cambios (incremental): {carga['actualizadas']}")
+    print(f"✓ Tiempo total: {segundos_total:.2f} s")
@@ -0,0 +1,113 @@
+"""
+Nombres de columnas que acepta cada script de importación.
+
+Cada mapeo es {nombre estándar: [nombres posibles en el Excel]}: sin distinguir
+mayúsculas, para cada nombre estándar se usa la primera columna del Excel que
+coincida con alguno de sus nombres posibles (mapear_columnas).
+
+No importa pandas, así que toyswall_import.py puede mostrar cómo se mapean los
+encabezados de un archivo sin cargar pandas ni leer el Excel completo.
+
+CAMPOS_TEXTO son los campos que siempre se leen como texto de un CSV (códigos
+como 00123 no se convierten en números, ver lectura.leer_csv).
+"""
+
+# Excel de inventario (excel_to_sql.py)
+COLUMNAS_INVENTARIO = {
+    'nombre': ['nombre', 'name'],
+    'codigo': ['codigo', 'código', 'code'],
+    'item': ['item', 'item code'],
+    'numero_bultos': ['numero de bultos', 'número de bultos', 'numero_bultos', 'bultos', 'numero bultos', 'nro de bultos', 'nro bultos', 'cantidad de bultos'],
+    'cantidad_por_bulto': ['cantidad por bultos', 'cantidad por bulto', 'cantidad_por_bulto', 'cantidad/bulto', 'unidades por bulto', 'unidades/bulto', 'cantidad x bulto'],
+    'cantidad_total': ['cantidad total', 'cantidad_total', 'total', 'cantidad total'],
+    'precio_min': ['precio minimo', 'precio mínimo', 'precio_min', 'precio_minimo', 'precio min', 'precio minimo'],
+    'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor', 'precio al por mayor'],
+    'foto_url': ['foto url', 'foto_url', 'url foto', 'url', 'foto url'],
+    'ubicacion': ['ubicación', 'ubicacion', 'location', 'ubicación']
+}
+
+REQUERIDAS_INVENTARIO = ['nombre', 'codigo', 'precio_min', 'ubicacion']
+
+# Excel de inventario (procesar_inventario.py)
+COLUMNAS_PROCESAR = {
+    'nombre': ['nombre', 'name'],
+    'codigo': ['codigo', 'código', 'code'],
+    'item': ['item', 'item code'],
+    'numero_bultos': ['numero de bultos', 'número de bultos', 'numero_bultos', 'bultos', 'numero bultos'],
+    'cantidad_por_bulto': ['cantidad por bultos', 'cantidad por bulto', 'cantidad_por_bulto', 'cantidad por bultos'],
+    'cantidad_total': ['cantidad total', 'cantidad_total', 'total', 'cantidad total'],
+    'precio_min': ['precio minimo', 'precio mínimo', 'precio_min', 'precio_minimo', 'precio min', 'precio minimo'],
+    'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor', 'precio al por mayor'],
+    'foto_url': ['foto url', 'foto_url', 'url foto', 'url', 'foto url'],
+    'ubicacion': ['ubicación', 'ubicacion', 'location', 'ubicación']
+}
+
+REQUERIDAS_PROCESAR = ['nombre', 'codigo', 'precio_min', 'ubicacion']
+
+# Bultos del Excel de inventario (actualizar_bultos_desde_excel.py)
+COLUMNAS_BULTOS = {
+    'codigo': ['codigo', 'código', 'code'],
+    'numero_bultos': ['numero de bultos', 'número de bultos', 'numero_bultos', 'bultos', 'numero bultos', 'nro de bultos', 'nro bultos', 'cantidad de bultos'],
+    'cantidad_por_bulto': ['cantidad por bultos', 'cantidad por bulto', 'cantidad_por_bulto', 'cantidad por bultos', 'cantidad/bulto', 'unidades por bulto', 'unidades/bulto', 'cantidad x bulto']
+}
+
+REQUERIDAS_BULTOS = ['codigo']
+
+# Precio al por mayor del Excel de inventario (actualizar_precios_por_mayor_desde_excel.py)
+COLUMNAS_PRECIOS_MAYOR = {
+    'codigo': ['codigo', 'código', 'code'],
+    'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor',
+                        'precio al por mayor', 'precio por mayor', 'precio mayor',
+                        'precio mayorista', 'precio mayor', 'precio x mayor']
+}
+
+REQUERIDAS_PRECIOS_MAYOR = ['codigo', 'precio_por_mayor']
+
+# Archivo de precios finales (actualizar_precios_desde_excel.py)
+COLUMNAS_PRECIO_FINAL = {
+    'item': ['item no.:', 'item', 'item no', 'item_no', 'codigo', 'código'],
+    'precio_minimo': ['precio minimo', 'precio_minimo', 'precio mínimo', 'precio minimo', 'minimo']
+}
+
+REQUERIDAS_PRECIO_FINAL = ['item', 'precio_minimo']
+
+# Archivo de precios mayoristas (actualizar_precios_desde_excel.py)
+COLUMNAS_MAYORISTA = {
+    'item': ['item', 'item ', 'item no.:', 'item no', 'item_no', 'codigo', 'código'],
+    'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor',
+                        'precio mayorista', 'precio mayor', 'precio x mayor']
+}
+
+REQUERIDAS_MAYORISTA = ['item', 'precio_por_mayor']
+
+# Campos de texto (en todos los mapeos); los demás son precios o cantidades
+CAMPOS_TEXTO = ['nombre', 'codigo', 'item', 'foto_url', 'ubicacion']
+
+MAPEOS = [COLUMNAS_INVENTARIO, COLUMNAS_PROCESAR, COLUMNAS_BULTOS, COLUMNAS_PRECIOS_MAYOR,
+          COLUMNAS_PRECIO_FINAL, COLUMNAS_MAYORISTA]
+
+
+def mapear_columnas(columnas, column_mapping):
+    """
+    {columna del Excel: nombre estándar} de las columnas que coinciden con el
+    mapeo. Las columnas ya deben venir sin espacios al principio y al final.
+    """
+    columnas = list(columnas)
+    columnas_minusculas = [col.lower() for col in columnas]
+    normalizadas = {}
+    for standard_name, possible_names in column_mapping.items():
+        posibles = {name.lower() for name in possible_names}
+        for col, col_minuscula in zip(columnas, columnas_minusculas):
+            if col_minuscula in posibles:
+                normalizadas[col] = standard_name
+                break
+    return normalizadas
+
+
+def columnas_texto(columnas):
+    """
+    Columnas que corresponden a un campo de texto en alguno de los mapeos
+    (sin distinguir mayúsculas ni espacios al principio y al final)
+    """
+    posibles = {name.lower() for mapeo in MAPEOS for campo in CAMPOS_TEXTO for name in mapeo.get(campo, [])}
+    return [col for col in columnas if str(col).strip().lower() in posibles]
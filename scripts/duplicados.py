@@ -0,0 +1,305 @@
+"""
+Revisión de duplicados antes de generar el SQL de juguetes.
+
+excel_to_sql.py escribe un INSERT por fila: si el Excel repite un código en la
+misma ubicación salen dos INSERT (o, con el índice único de
+agregar_indice_unico_juguetes.sql, un error a mitad de la carga). La única
+revisión era verificar_registros_duplicados.sql, que recorre la tabla completa
+después de insertar.
+
+Con --duplicados los registros ya limpios (parsear_columnas) se revisan antes
+de escribir nada, con índices hash (pd.factorize) en lugar de comparar fila
+contra fila:
+
+    - Clave (codigo, ubicación), sin distinguir mayúsculas en el nombre de la
+      ubicación como la base de datos. Las filas repetidas se resuelven según
+      la política:
+        sumar     una fila por clave con la suma de las cantidades; el resto de
+                  los campos de la última fila y los opcionales vacíos de la
+                  anterior más reciente que los tenga (como la consolidación de
+                  agregar_indice_unico_juguetes.sql)
+        ultimo    queda la última fila de la clave (lo mismo que --upsert)
+        rechazar  no se escribe ninguna fila de la clave
+    - Item: el mismo item en la misma ubicación con otro código. No se puede
+      unir (son códigos distintos): se reporta y con rechazar no se escribe
+    - Precios: filas de una misma clave con precio mínimo o al por mayor
+      distintos; se reportan (la política decide cuál queda)
+
+Con la exportación CSV de la tabla juguetes (--juguetes-csv) se revisa además
+que ninguna fila cree un duplicado en la tabla: la ubicación se resuelve con
+--bodegas-csv/--tiendas-csv y las claves que ya existen no se insertan (con
+--upsert se escriben igual: el ON CONFLICT las actualiza). Los items que ya
+están en la ubicación con otro código se reportan.
+
+Todas las filas afectadas se pueden guardar en un CSV (--reporte-duplicados)
+con el motivo y lo que se hizo con cada una.
+
+Uso (desde excel_to_sql.py o procesar_inventario.py):
+    python excel_to_sql.py inventario.xlsx 1 --duplicados sumar
+    python excel_to_sql.py inventario.xlsx 1 --duplicados rechazar --reporte-duplicados duplicados.csv
+    python excel_to_sql.py inventario.xlsx 1 --duplicados ultimo --juguetes-csv juguetes.csv \\
+        --bodegas-csv bodegas.csv --tiendas-csv tiendas.csv
+"""
+
+import csv
+
+# El módulo no importa pandas al cargarse (lo importa opciones.py)
+POLITICAS = ['sumar', 'ultimo', 'rechazar']
+
+# Motivos de las filas reportadas
+MOTIVOS = {
+    'clave_repetida': "el código se repite en la misma ubicación",
+    'item_repetido': "el item está en la misma ubicación con otro código",
+    'precio_distinto': "la misma clave tiene precios distintos",
+    'existe_en_tabla': "el código ya está en esa ubicación en la tabla juguetes",
+    'item_en_tabla': "el item ya está en esa ubicación con otro código en la tabla juguetes",
+}
+
+# Opcionales que la política sumar completa con la fila anterior más reciente
+CAMPOS_OPCIONALES = ['item', 'foto_url', 'precio_por_mayor', 'numero_bultos', 'cantidad_por_bulto']
+
+COLUMNAS_REPORTE = ['fila', 'codigo', 'item', 'ubicacion_tipo', 'ubicacion_nombre', 'cantidad',
+                    'precio_min', 'precio_por_mayor', 'motivo', 'accion']
+
+
+def leer_existentes(juguetes_csv, empresa_id):
+    """
+    Claves de la tabla juguetes desde su exportación CSV: DataFrame con codigo,
+    tipo, ubicacion_id e item de las filas de la empresa con ubicación
+    """
+    import numpy as np
+    from lectura import leer_exportacion
+
+    df = leer_exportacion(juguetes_csv, empresa_id, ['codigo', 'bodega_id', 'tienda_id'],
+                          numericas=['bodega_id', 'tienda_id'], opcionales=['item'], limpiar=['codigo'])
+    bodega = df['bodega_id']
+    df['tipo'] = np.where(bodega.notna(), 'bodega', np.where(df['tienda_id'].notna(), 'tienda', None))
+    df['ubicacion_id'] = bodega.fillna(df['tienda_id'])
+    df['item'] = df['item'].astype(object).where(df['item'].notna(), None) if 'item' in df.columns else None
+    df = df[df['tipo'].notna()]
+    return df[['codigo', 'tipo', 'ubicacion_id', 'item']].reset_index(drop=True)
+
+
+def _grupos(*columnas):
+    """
+    Grupo de cada fila según los valores de las columnas (arreglos de igual
+    largo): cada columna se factoriza una vez y se combina con el grupo de las
+    anteriores como un entero, que se vuelve a factorizar. Devuelve (grupo por fila, filas por grupo)
+    """
+    import numpy as np
+    import pandas as pd
+
+    grupo = np.zeros(len(columnas[0]), dtype=np.int64)
+    grupos = 1
+    for valores in columnas:
+        codigos, unicos = pd.factorize(valores)
+        grupo, unicos = pd.factorize(grupo * (len(unicos) + 1) + codigos + 1)
+        grupos = len(unicos)
+    return grupo, np.bincount(grupo, minlength=grupos)
+
+
+class RevisionDuplicados:
+    """
+    Revisión de duplicados de una importación con la política elegida.
+    existentes: claves de la tabla juguetes (leer_existentes) o None.
+    Después de aplicar():
+
+        repetidas: filas descartadas o unidas por repetir (codigo, ubicación)
+        claves_repetidas: claves con más de una fila
+        items_repetidos: filas cuyo item está en la ubicación con otro código
+        precios_distintos: claves con precios distintos
+        existentes: filas cuya clave ya está en la tabla
+        items_en_tabla: filas cuyo item está en la ubicación con otro código en la tabla
+        sin_verificar: filas que no se compararon con la tabla (ubicación sin exportación CSV)
+        reportadas: filas del reporte (escribir_reporte), una por fila y motivo
+    """
+
+    def __init__(self, politica, existentes=None, upsert=False, metricas=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de duplicados desconocida: {politica}")
+        self.politica = politica
+        self.tabla = existentes
+        self.upsert = upsert
+        self.metricas = metricas
+        self.repetidas = 0
+        self.claves_repetidas = 0
+        self.items_repetidos = 0
+        self.precios_distintos = 0
+        self.existentes = 0
+        self.items_en_tabla = 0
+        self.sin_verificar = 0
+        self._reporte = []
+
+    def _reportar(self, registros, posiciones, motivo, accion):
+        if len(posiciones):
+            filas = registros.iloc[posiciones][COLUMNAS_REPORTE[:-2]].copy()
+            filas['motivo'] = motivo
+            filas['accion'] = accion
+            self._reporte.append(filas)
+
+    def _rechazar(self, motivo, cantidad):
+        if self.metricas is not None and cantidad:
+            self.metricas.rechazar(motivo, cantidad)
+
+    def aplicar(self, registros, ubicaciones=None):
+        """
+        Registros sin duplicados según la política, en el orden del archivo (la
+        fila que queda de cada clave está en la posición de su última aparición).
+        ubicaciones (ver ubicaciones.py) resuelve los IDs para comparar con la tabla
+        """
+        import numpy as np
+        import pandas as pd
+
+        registros = registros.reset_index(drop=True)
+        n = len(registros)
+        if n == 0:
+            return registros
+        codigo = registros['codigo'].to_numpy(dtype=object)
+        tipo = registros['ubicacion_tipo'].to_numpy(dtype=object)
+        ubicacion = registros['ubicacion_nombre'].str.lower().to_numpy(dtype=object)
+        conservar = np.ones(n, dtype=bool)
+
+        # Clave (codigo, ubicación)
+        grupo, filas_por_grupo = _grupos(codigo, tipo, ubicacion)
+        en_repetida = filas_por_grupo[grupo] > 1
+        repetidas = np.flatnonzero(en_repetida)
+        self.claves_repetidas = int((filas_por_grupo > 1).sum())
+        if len(repetidas):
+            sub = pd.DataFrame({'grupo': grupo[repetidas],
+                                'precio_min': registros['precio_min'].to_numpy(dtype=object)[repetidas],
+                                'precio_por_mayor': registros['precio_por_mayor'].to_numpy(dtype=object)[repetidas]})
+            distintos = sub.groupby('grupo')[['precio_min', 'precio_por_mayor']].nunique().max(axis=1) > 1
+            self.precios_distintos = int(distintos.sum())
+            con_precios = repetidas[distintos.reindex(grupo[repetidas]).to_numpy()]
+            self._reportar(registros, con_precios, 'precio_distinto', 'reportada')
+
+            ultima = np.zeros(len(filas_por_grupo), dtype=np.int64)
+            np.maximum.at(ultima, grupo[repetidas], repetidas)
+            es_ultima = np.zeros(n, dtype=bool)
+            es_ultima[ultima[grupo[repetidas]]] = True
+            if self.politica == 'rechazar':
+                conservar[repetidas] = False
+                self.repetidas = len(repetidas)
+                self._reportar(registros, repetidas, 'clave_repetida', 'rechazada')
+            else:
+                descartadas = repetidas[~es_ultima[repetidas]]
+                conservar[descartadas] = False
+                self.repetidas = len(descartadas)
+                accion = 'sumada' if self.politica == 'sumar' else 'descartada'
+                self._reportar(registros, descartadas, 'clave_repetida', accion)
+                if self.politica == 'sumar':
+                    registros = self._sumar(registros, sub['grupo'], repetidas, ultima)
+            self._rechazar('clave_repetida', self.repetidas)
+
+        # Item repetido en la ubicación con otro código (entre las filas que quedan)
+        item = registros['item'].to_numpy(dtype=object)
+        con_item = np.flatnonzero(conservar & pd.notna(item))
+        if len(con_item):
+            grupo_item, _ = _grupos(item[con_item], tipo[con_item], ubicacion[con_item])
+            codigos_por_item = pd.Series(codigo[con_item]).groupby(grupo_item).nunique().to_numpy()
+            conflicto = con_item[codigos_por_item[grupo_item] > 1]
+            self.items_repetidos = len(conflicto)
+            if self.politica == 'rechazar':
+                conservar[conflicto] = False
+                self._rechazar('item_repetido', len(conflicto))
+            self._reportar(registros, conflicto, 'item_repetido',
+                           'rechazada' if self.politica == 'rechazar' else 'reportada')
+
+        if self.tabla is not None:
+            self._comparar_tabla(registros, conservar, codigo, tipo, item, ubicaciones)
+
+        return registros[conservar]
+
+    def _sumar(self, registros, grupos, repetidas, ultima):
+        """La última fila de cada clave repetida con la suma de cantidades y los opcionales completados"""
+        import numpy as np
+
+        registros = registros.copy()
+        datos = registros.iloc[repetidas][['cantidad'] + CAMPOS_OPCIONALES].copy()
+        datos['grupo'] = grupos.to_numpy()
+        agrupados = datos.groupby('grupo')
+        posiciones = ultima[agrupados.size().index.to_numpy()]
+        cantidades = agrupados['cantidad'].sum()
+        registros.loc[posiciones, 'cantidad'] = np.array([int(c) for c in cantidades], dtype=object)
+        # last() salta los vacíos: el valor de la fila más reciente que lo tiene
+        opcionales = agrupados[CAMPOS_OPCIONALES].last()
+        for campo in CAMPOS_OPCIONALES:
+            valores = opcionales[campo].to_numpy(dtype=object)
+            registros.loc[posiciones, campo] = np.array([None if v is None or v != v else v for v in valores],
+                                                        dtype=object)
+        return registros
+
+    def _comparar_tabla(self, registros, conservar, codigo, tipo, item, ubicaciones):
+        """Marca las filas que crearían un duplicado en la tabla juguetes (exportación CSV)"""
+        import numpy as np
+        import pandas as pd
+
+        ids = ubicaciones.ids_conocidos(registros) if ubicaciones is not None else np.full(len(registros), np.nan)
+        verificable = conservar & ~np.isnan(ids)
+        self.sin_verificar = int((conservar & ~verificable).sum())
+        posiciones = np.flatnonzero(verificable)
+        if not len(posiciones):
+            return
+        tabla = self.tabla
+        ubicacion_id = ids[posiciones].astype(np.int64)
+        claves_tabla = pd.MultiIndex.from_arrays([tabla['codigo'], tabla['tipo'], tabla['ubicacion_id'].astype(np.int64)])
+        claves = pd.MultiIndex.from_arrays([codigo[posiciones], tipo[posiciones], ubicacion_id])
+        existe = claves.isin(claves_tabla)
+        self.existentes = int(existe.sum())
+        if self.upsert:
+            self._reportar(registros, posiciones[existe], 'existe_en_tabla', 'actualiza')
+        else:
+            conservar[posiciones[existe]] = False
+            self._rechazar('existe_en_tabla', self.existentes)
+            self._reportar(registros, posiciones[existe], 'existe_en_tabla', 'rechazada')
+
+        # Item en la ubicación con otro código
+        con_item = tabla[tabla['item'].notna()]
+        codigo_de_item = pd.Series(con_item['codigo'].to_numpy(dtype=object), index=pd.MultiIndex.from_arrays(
+            [con_item['item'].astype(str), con_item['tipo'], con_item['ubicacion_id'].astype(np.int64)]))
+        codigo_de_item = codigo_de_item[~codigo_de_item.index.duplicated()]
+        items = pd.MultiIndex.from_arrays([np.where(pd.notna(item[posiciones]), item[posiciones], ''),
+                                           tipo[posiciones], ubicacion_id])
+        en_tabla = codigo_de_item.reindex(items).to_numpy(dtype=object)
+        conflicto = pd.notna(en_tabla) & (en_tabla != codigo[posiciones])
+        conflicto = posiciones[conflicto]
+        self.items_en_tabla = len(conflicto)
+        if self.politica == 'rechazar':
+            conservar[conflicto] = False
+            self._rechazar('item_en_tabla', len(conflicto))
+        self._reportar(registros, conflicto, 'item_en_tabla', 'rechazada' if self.politica == 'rechazar' else 'reportada')
+
+    def resumen(self):
+        """Líneas de resumen para imprimir al final"""
+        lineas = []
+        if self.claves_repetidas:
+            que = {'sumar': "se suman las cantidades", 'ultimo': "queda la última fila",
+                   'rechazar': "no se escribe ninguna"}[self.politica]
+            lineas.append(f"⚠ {self.claves_repetidas} claves (codigo, ubicación) repetidas en el archivo: {que}")
+        if self.precios_distintos:
+            lineas.append(f"⚠ {self.precios_distintos} claves repetidas con precios distintos")
+        if self.items_repetidos:
+            lineas.append(f"⚠ {self.items_repetidos} filas con un item que está en la misma ubicación con otro código")
+        if self.existentes:
+            que = "se actualizan (--upsert)" if self.upsert else "no se insertan"
+            lineas.append(f"⚠ {self.existentes} filas ya están en la tabla juguetes: {que}")
+        if self.items_en_tabla:
+            lineas.append(f"⚠ {self.items_en_tabla} filas con un item que ya está en la ubicación con otro código en la tabla")
+        if self.sin_verificar:
+            lineas.append(f"⚠ {self.sin_verificar} filas no se compararon con la tabla: su ubicación no está en "
+                          "--bodegas-csv/--tiendas-csv")
+        if not lineas:
+            lineas.append("✓ Sin duplicados")
+        return '\n'.join(lineas)
+
+    def escribir_reporte(self, archivo_csv):
+        """Escribe las filas reportadas (una por fila y motivo) como CSV"""
+        with open(archivo_csv, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(COLUMNAS_REPORTE)
+            for filas in self._reporte:
+                escritor.writerows(filas.itertuples(index=False, name=None))
+
+    @property
+    def reportadas(self):
+        return sum(len(filas) for filas in self._reporte)
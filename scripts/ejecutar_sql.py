@@ -0,0 +1,243 @@
+"""
+Ejecuta por bloques un archivo SQL generado por los scripts, con un checkpoint
+para continuar desde donde quedó si algo falla.
+
+Con --commit-cada N (sin --cargar) excel_to_sql.py, importar_inventario.py y
+los scripts actualizar_*_desde_excel.py dividen el SQL en transacciones
+numeradas de unas N filas (líneas "-- BLOQUE n", ver salida_sql.py). Este
+script, en una base de datos PostgreSQL local o remota:
+
+    - Ejecuta el preámbulo (lo que va antes del primer bloque: la tabla de
+      ubicaciones y su verificación) al conectarse
+    - Ejecuta cada bloque en su propia transacción y, al confirmarlo, lo anota
+      en el checkpoint (por defecto archivo.sql.checkpoint)
+    - Si un bloque falla (un error, un statement timeout o la conexión perdida)
+      se detiene; al volver a ejecutarlo continúa desde el primer bloque que no
+      terminó, sin repetir los anteriores
+
+El checkpoint guarda el hash del archivo: si el SQL se volvió a generar no se
+usa un checkpoint viejo por error (--reiniciar lo descarta). Un archivo sin
+bloques se ejecuta como un solo bloque.
+
+Los COPY ... FROM STDIN del formato copy se envían con COPY del driver, así que
+también sirve para esos archivos (que en otro caso requieren psql).
+
+Si el proceso se corta justo después de confirmar un bloque y antes de anotarlo,
+ese bloque se vuelve a ejecutar: los UPDATE y los INSERT con --upsert se pueden
+repetir sin cambiar el resultado.
+
+Uso:
+    python ejecutar_sql.py archivo.sql [--db URL] [--checkpoint ARCHIVO] [--reiniciar]
+                           [--timeout SEGUNDOS]
+
+La URL se toma de --db o de la variable DATABASE_URL. Requiere psycopg2
+(pip install psycopg2-binary), igual que --cargar.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import carga_db
+from salida_sql import MARCA_BLOQUE
+
+# Línea "-- BLOQUE n" que abre cada bloque
+PATRON_BLOQUE = re.compile(rf'^{re.escape(MARCA_BLOQUE)}(\d+)$', re.MULTILINE)
+
+# COPY ... FROM STDIN seguido de sus datos hasta la línea "\."
+PATRON_COPY = re.compile(r'^(COPY [^\n]* FROM STDIN[^\n]*;)\n(.*?)^\\\.$\n?', re.MULTILINE | re.DOTALL)
+
+VERSION_CHECKPOINT = 1
+
+
+def dividir_bloques(texto):
+    """
+    Separa el SQL en (preámbulo, [(número, sql del bloque), ...]). Sin líneas
+    "-- BLOQUE n" todo el archivo es un solo bloque sin preámbulo.
+    """
+    marcas = list(PATRON_BLOQUE.finditer(texto))
+    if not marcas:
+        return '', [(1, texto)]
+    numeros = [int(marca.group(1)) for marca in marcas]
+    if numeros != list(range(1, len(marcas) + 1)):
+        raise ValueError("Los bloques del archivo no están numerados en orden desde 1")
+    finales = [marca.start() for marca in marcas[1:]] + [len(texto)]
+    return texto[:marcas[0].start()], [(numero, texto[marca.start():final])
+                                       for numero, marca, final in zip(numeros, marcas, finales)]
+
+
+def ejecutar(cursor, sql):
+    """Ejecuta SQL con varias sentencias, enviando los datos de cada COPY ... FROM STDIN"""
+    inicio = 0
+    for copia in PATRON_COPY.finditer(sql):
+        _ejecutar_sentencias(cursor, sql[inicio:copia.start()])
+        cursor.copy_expert(copia.group(1), io.StringIO(copia.group(2)))
+        inicio = copia.end()
+    _ejecutar_sentencias(cursor, sql[inicio:])
+
+
+def _ejecutar_sentencias(cursor, sql):
+    # Un trozo con solo comentarios o líneas en blanco no se envía
+    if any(linea.strip() and not linea.lstrip().startswith('--') for linea in sql.splitlines()):
+        cursor.execute(sql)
+
+
+def huella(texto):
+    """Hash del contenido del archivo SQL"""
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def leer_checkpoint(ruta, huella_archivo):
+    """
+    Números de los bloques ya ejecutados (vacío si el checkpoint no existe).
+    Falla si el checkpoint es de otro archivo o de otra versión del mismo.
+    """
+    if not os.path.exists(ruta):
+        return set()
+    with open(ruta, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('version') != VERSION_CHECKPOINT:
+        raise ValueError(f"{ruta}: no es un checkpoint válido de esta versión")
+    if checkpoint['huella'] != huella_archivo:
+        raise ValueError(f"{ruta}: es el checkpoint de otro archivo SQL (o el archivo cambió); "
+                         "usa --reiniciar para empezar de nuevo")
+    return set(checkpoint['completados'])
+
+
+def guardar_checkpoint(ruta, archivo, huella_archivo, total, completados):
+    """Guarda el checkpoint de forma atómica (nunca queda un archivo a medias)"""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION_CHECKPOINT, 'archivo': os.path.basename(archivo), 'huella': huella_archivo,
+                       'bloques': total, 'completados': sorted(completados)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def ejecutar_archivo(archivo, pool, checkpoint=None, reiniciar=False, timeout=None):
+    """
+    Ejecuta los bloques del archivo que todavía no están en el checkpoint
+
+    Args:
+        archivo: Archivo SQL (con o sin bloques)
+        pool: Pool de conexiones (carga_db.crear_pool)
+        checkpoint: Archivo del checkpoint (por defecto archivo + '.checkpoint')
+        reiniciar: Descartar el checkpoint y ejecutar todos los bloques
+        timeout: statement_timeout de la sesión, en segundos (None: el del servidor)
+
+    Devuelve un diccionario con el resumen, o False si un bloque falló (los
+    bloques anteriores quedan confirmados y anotados en el checkpoint).
+    """
+    inicio = time.perf_counter()
+    checkpoint = checkpoint or archivo + '.checkpoint'
+    with open(archivo, encoding='utf-8') as f:
+        texto = f.read()
+    huella_archivo = huella(texto)
+    preambulo, bloques = dividir_bloques(texto)
+
+    if reiniciar and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    completados = leer_checkpoint(checkpoint, huella_archivo)
+    pendientes = [(numero, sql) for numero, sql in bloques if numero not in completados]
+    print(f"Archivo: {archivo} ({len(bloques)} bloques)")
+    if not pendientes:
+        print("✓ Todos los bloques ya estaban ejecutados (usa --reiniciar para volver a ejecutarlos)")
+        return {'bloques': len(bloques), 'ejecutados': 0, 'omitidos': len(completados),
+                'segundos': time.perf_counter() - inicio}
+
+    if completados:
+        print(f"✓ Checkpoint: {len(completados)} bloques ya ejecutados, se continúa desde el bloque {pendientes[0][0]}")
+
+    ejecutados = 0
+    numero = None
+    try:
+        with carga_db.conexion(pool) as con, con.cursor() as cursor:
+            # Cada bloque trae su BEGIN/COMMIT; el preámbulo crea tablas temporales de la sesión
+            con.autocommit = True
+            if timeout:
+                cursor.execute(f"SET statement_timeout = {int(timeout * 1000)}")
+            ejecutar(cursor, preambulo)
+            for numero, sql in pendientes:
+                inicio_bloque = time.perf_counter()
+                try:
+                    ejecutar(cursor, sql)
+                except BaseException:
+                    # Descarta la transacción abierta del bloque (si la conexión sigue viva)
+                    if not con.closed:
+                        try:
+                            cursor.execute("ROLLBACK")
+                        except Exception:
+                            pass
+                    raise
+                completados.add(numero)
+                guardar_checkpoint(checkpoint, archivo, huella_archivo, len(bloques), completados)
+                ejecutados += 1
+                print(f"✓ Bloque {numero}/{len(bloques)} en {time.perf_counter() - inicio_bloque:.2f} s")
+            con.autocommit = False
+    except Exception as e:
+        donde = f"el bloque {numero}" if numero is not None else "el preámbulo"
+        print(f"✗ ERROR en {donde}: {str(e).strip()}")
+        print(f"✓ Bloques confirmados: {len(completados)} de {len(bloques)} (checkpoint: {checkpoint})")
+        print("  Vuelve a ejecutar el mismo comando para continuar desde el primer bloque incompleto")
+        return False
+
+    segundos = time.perf_counter() - inicio
+    print(f"✓ Bloques ejecutados: {ejecutados} ({len(bloques) - ejecutados} ya estaban en el checkpoint)")
+    print(f"✓ Tiempo total: {segundos:.2f} s")
+    return {'bloques': len(bloques), 'ejecutados': ejecutados, 'omitidos': len(bloques) - ejecutados,
+            'segundos': segundos}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ejecuta un SQL generado por bloques, continuando desde el último bloque confirmado si algo falla",
+        epilog="Ejemplo:\n"
+               "  python excel_to_sql.py inventario.xlsx 1 inventario.sql --formato multi --commit-cada 20000\n"
+               "  python ejecutar_sql.py inventario.sql --db postgresql://postgres@localhost/toyswalls\n"
+               "  python ejecutar_sql.py update_precios.sql --timeout 60",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('archivo', help="Archivo SQL generado (con o sin bloques)")
+    parser.add_argument('--db', metavar='URL', help="URL de PostgreSQL (por defecto la variable DATABASE_URL)")
+    parser.add_argument('--checkpoint', metavar='ARCHIVO', help="Archivo del checkpoint (por defecto archivo.sql.checkpoint)")
+    parser.add_argument('--reiniciar', action='store_true', help="Descartar el checkpoint y ejecutar todos los bloques")
+    parser.add_argument('--timeout', type=float, metavar='SEGUNDOS',
+                        help="statement_timeout de la sesión (por defecto el del servidor)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archivo):
+        print(f"Error: El archivo {args.archivo} no existe")
+        sys.exit(1)
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeout debe ser mayor que 0")
+
+    try:
+        pool = carga_db.crear_pool(args.db, maximo=1)
+    except Exception as e:
+        parser.exit(1, f"✗ ERROR: no se pudo conectar a la base de datos: {e}\n")
+    try:
+        resultado = ejecutar_archivo(args.archivo, pool, args.checkpoint, args.reiniciar, args.timeout)
+    except ValueError as e:
+        print(f"✗ ERROR: {e}")
+        resultado = False
+    finally:
+        pool.closeall()
+    if not resultado:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
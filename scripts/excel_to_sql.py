@@ -3,7 +3,14 @@ Script para convertir archivo Excel a SQL INSERT statements
 Para llenar el inventario de juguetes en ToysWalls
 
 Uso:
-    python excel_to_sql.py archivo.xlsx empresa_id
+    python excel_to_sql.py archivo.xlsx empresa_id [archivo_salida.sql] [--por-filas] [--streaming] [--no-cache]
+                           [--incremental snapshot.pkl [--eliminados eliminados.csv]]
+                           [--formato inserts|multi|copy] [--tamano-lote N]
+                           [--bodegas-csv bodegas.csv] [--tiendas-csv tiendas.csv]
+                           [--upsert] [--commit-cada N] [--cargar [--db URL]]
+                           [--duplicados sumar|ultimo|rechazar [--juguetes-csv juguetes.csv]
+                            [--reporte-duplicados duplicados.csv]]
+                           [--metricas metricas.json] [--perfil parseo.prof]
 
 El archivo Excel debe tener las siguientes columnas (en español):
     - Nombre: Nombre del juguete
@@ -16,59 +23,447 @@ El archivo Excel debe tener las siguientes columnas (en español):
     - Precio al por mayor: Precio al por mayor (opcional)
     - Foto URL: URL de la foto (opcional)
     - Ubicación: Formato "Bodega/ nombre" o "Tienda/ nombre"
+
+Por defecto cada campo se procesa columna a columna (modo columnar). Con
+--por-filas se usa el recorrido fila a fila original; ambos modos generan
+exactamente el mismo SQL.
+
+Con --streaming el archivo se lee y se procesa por bloques de filas
+(--tamano-bloque), así la memoria no crece con el tamaño del archivo.
+
+El archivo también puede ser un CSV o un Parquet (ver lectura.py): el
+formato se detecta solo y las columnas se normalizan y parsean igual.
+
+El Excel leído se guarda en una caché en disco (ver cache_excel.py): si el
+mismo archivo se vuelve a procesar no se abre el Excel. --no-cache la desactiva;
+el modo streaming no la usa.
+
+Con --incremental snapshot.pkl solo se generan los cambios respecto a la
+última importación (ver incremental.py): INSERT para las claves (codigo,
+ubicación) nuevas y UPDATE de los campos que cambiaron. --eliminados guarda
+en un CSV las filas que ya no están en el Excel.
+
+Con --formato se elige cómo se escribe el SQL (ver salida_sql.py): un INSERT
+por registro (inserts, por defecto), INSERT de --tamano-lote filas (multi) o
+un script para psql con COPY (copy), mucho más rápido de cargar.
+
+Con --upsert los INSERT llevan ON CONFLICT DO UPDATE sobre el índice único
+(empresa_id, codigo, bodega_id, tienda_id) (migración
+agregar_indice_unico_juguetes.sql): volver a importar el archivo actualiza los
+juguetes existentes en lugar de duplicarlos, y no toca los que no cambiaron.
+
+Con --duplicados las filas que repiten (codigo, ubicación) o un item en la
+misma ubicación se revisan antes de escribir el SQL (ver duplicados.py): se
+suman sus cantidades, queda la última o se rechazan, y se reportan las claves
+con precios distintos. Con --juguetes-csv (exportación de la tabla) tampoco se
+insertan filas que ya existen en la tabla.
+
+Con --cargar (o --load) no se escribe SQL: los registros se cargan directamente
+en la base de datos con COPY a una tabla temporal y un solo INSERT ... SELECT
+(ver carga_db.py). --db indica la URL (por defecto DATABASE_URL) y --commit-cada
+divide la carga en transacciones para archivos muy grandes.
+
+Sin --cargar, --commit-cada N divide el SQL generado en transacciones
+numeradas de unas N filas ("-- BLOQUE n") que se ejecutan con
+ejecutar_sql.py: si algo falla a mitad de camino (por ejemplo un statement
+timeout), al volver a ejecutarlo continúa desde el primer bloque incompleto.
+
+Las bodegas y tiendas se resuelven una sola vez por archivo (ver ubicaciones.py):
+el SQL empieza con una tabla temporal con las ubicaciones distintas y cada fila
+se une a ella. Con --bodegas-csv/--tiendas-csv (exportaciones de esas tablas)
+los IDs se resuelven al generar el SQL y las ubicaciones que no existen se
+reportan sin generar el archivo.
+
+Con --metricas archivo.json se guardan el tiempo, las filas, las filas por
+segundo y la memoria de cada etapa (lectura, normalizar, parsear, emitir) y las
+filas rechazadas por motivo; --perfil guarda un perfil de cProfile del parseo
+(ver metricas.py).
 """
 
 import pandas as pd
+import numpy as np
+import argparse
+import itertools
 import sys
 import os
-import re
+import shutil
+import tempfile
+import time
+from contextlib import nullcontext
 from datetime import datetime
 
-def excel_to_sql(excel_file, empresa_id, output_file=None):
+from lectura import leer_archivo, leer_archivo_por_bloques, memoria_pico_mb, TAMANO_BLOQUE
+from precios import procesar_precio, procesar_precios, procesar_entero, procesar_enteros
+from salida_sql import (sql_texto, sql_numero, desde_ubicacion, on_conflict, crear_escritor, escribir_updates_por_ubicacion,
+                        SalidaPorBloques, TAMANO_LOTE)
+from incremental import leer_snapshot, guardar_snapshot, ultimos_por_clave, DiferenciasInventario
+from duplicados import RevisionDuplicados, leer_existentes
+from ubicaciones import cargar_ubicaciones
+from columnas import COLUMNAS_INVENTARIO, REQUERIDAS_INVENTARIO, mapear_columnas
+from metricas import Metricas, metricas_de_argumentos, guardar_metricas
+import carga_db
+import opciones
+
+# Mapeo de nombres de columnas posibles
+COLUMN_MAPPING = COLUMNAS_INVENTARIO
+
+REQUIRED_COLUMNS = REQUERIDAS_INVENTARIO
+
+# Columnas de los registros ya limpios (valores sin escapar, None = NULL)
+CAMPOS_REGISTRO = [
+    'nombre', 'codigo', 'item', 'cantidad', 'foto_url', 'precio_min', 'precio_por_mayor',
+    'numero_bultos', 'cantidad_por_bulto', 'ubicacion_tipo', 'ubicacion_nombre'
+]
+
+# Columnas de juguetes que se llenan desde el Excel
+COLUMNAS_JUGUETES = CAMPOS_REGISTRO[:-2]
+
+def normalizar_columnas(df, column_mapping=COLUMN_MAPPING):
+    """
+    Elimina espacios de los nombres de columnas y los renombra a los nombres estándar
+    """
+    df.columns = df.columns.str.strip()
+
+    # Para cada nombre estándar, la primera columna del Excel que coincida con
+    # alguno de sus nombres posibles (ver columnas.py)
+    return df.rename(columns=mapear_columnas(df.columns, column_mapping))
+
+
+def parsear_ubicacion(ubicacion_str):
+    """
+    Separa una ubicación en (tipo, nombre) sin escapar.
+    Formatos: "Bodega/ nombre", "Bodega nombre", "Tienda/ nombre", "Tienda nombre"
+    Devuelve (None, None) si el formato no se reconoce.
+    """
+    ubicacion_tipo = None
+    ubicacion_nombre = None
+
+    if '/' in ubicacion_str:
+        # Formato: "Bodega/ nombre" o "Tienda/ nombre"
+        partes = ubicacion_str.split('/', 1)
+        ubicacion_tipo = partes[0].strip().lower()
+        ubicacion_nombre = partes[1].strip()
+    else:
+        # Formato: "Bodega nombre" o "Tienda nombre" (sin "/")
+        palabras = ubicacion_str.split()
+        if len(palabras) >= 2:
+            primera_palabra = palabras[0].lower()
+            if primera_palabra in ['bodega', 'tienda']:
+                ubicacion_tipo = primera_palabra
+                ubicacion_nombre = ' '.join(palabras[1:]).strip()
+
+    return ubicacion_tipo, ubicacion_nombre
+
+
+def parsear_filas(df):
+    """
+    Recorre el DataFrame fila a fila y devuelve (registros, avisos): un
+    DataFrame con los registros válidos y la lista de advertencias/errores
+    en orden de fila.
+    """
+    registros = {campo: [] for campo in ['fila'] + CAMPOS_REGISTRO}
+    avisos = []
+
+    for index, row in df.iterrows():
+        try:
+            nombre = str(row['nombre']).strip()
+            codigo = str(row['codigo']).strip()
+
+            # Calcular cantidad: usar Cantidad TOTAL si existe, sino calcular desde bultos
+            cantidad = 0
+            if 'cantidad_total' in df.columns and pd.notna(row.get('cantidad_total')):
+                cantidad = procesar_entero(row['cantidad_total']) or 0
+            elif 'numero_bultos' in df.columns and 'cantidad_por_bulto' in df.columns:
+                numero_bultos = procesar_entero(row.get('numero_bultos')) or 0
+                cantidad_por_bulto = procesar_entero(row.get('cantidad_por_bulto')) or 0
+                cantidad = numero_bultos * cantidad_por_bulto
+
+            if cantidad == 0:
+                avisos.append(f"Advertencia: Fila {index + 2}: Cantidad es 0. Se continuará con 0.")
+
+            # Procesar precio mínimo (formato colombiano o con separadores de miles)
+            precio_min = procesar_precio(row['precio_min'], positivo=False)
+            if precio_min is None:
+                precio_min = 0
+
+            # Procesar ubicación
+            ubicacion_str = str(row['ubicacion']).strip()
+            ubicacion_tipo, ubicacion_nombre = parsear_ubicacion(ubicacion_str)
+
+            if not ubicacion_tipo or not ubicacion_nombre:
+                avisos.append(f"Advertencia: Fila {index + 2}: Formato de ubicación incorrecto: '{ubicacion_str}'. Se omite.")
+                continue
+
+            # Validar ubicacion_tipo
+            if ubicacion_tipo not in ['bodega', 'tienda']:
+                avisos.append(f"Advertencia: Fila {index + 2}: Tipo de ubicación debe ser 'Bodega' o 'Tienda'. Se omite.")
+                continue
+
+            # Campos opcionales
+            item = None
+            if 'item' in df.columns and pd.notna(row.get('item')):
+                item_val = str(row['item']).strip()
+                if item_val and item_val.lower() != 'nan' and item_val != '':
+                    item = item_val
+
+            # Procesar campos de bultos
+            numero_bultos = procesar_entero(row.get('numero_bultos'))
+            cantidad_por_bulto = procesar_entero(row.get('cantidad_por_bulto'))
+            precio_por_mayor = procesar_precio(row.get('precio_por_mayor'), positivo=False)
+
+            foto_url = None
+            if 'foto_url' in df.columns and pd.notna(row.get('foto_url')):
+                foto_url_val = str(row['foto_url']).strip()
+                if foto_url_val and foto_url_val.lower() != 'nan' and foto_url_val.startswith('http'):
+                    foto_url = foto_url_val
+
+            valores = [nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor,
+                       numero_bultos, cantidad_por_bulto, ubicacion_tipo, ubicacion_nombre]
+            registros['fila'].append(index + 2)
+            for campo, valor in zip(CAMPOS_REGISTRO, valores):
+                registros[campo].append(valor)
+
+        except Exception as e:
+            avisos.append(f"Error procesando fila {index + 2}: {str(e)}")
+            continue
+
+    return pd.DataFrame(registros, dtype=object), avisos
+
+
+def _como_texto(serie):
+    """Equivalente columnar de str(valor).strip() para cada celda."""
+    return pd.Series([str(v) for v in serie.tolist()], index=serie.index, dtype=object).str.strip()
+
+
+def _opcional(valores, validos):
+    """Arreglo de objetos con los valores válidos como tipos de Python y None en el resto"""
+    resultado = np.full(len(valores), None, dtype=object)
+    resultado[validos] = valores[validos].tolist()
+    return resultado
+
+
+def parsear_columnas(df):
+    """
+    Versión columnar de parsear_filas: cada campo se normaliza una sola vez
+    para toda la columna y las filas inválidas se marcan con una máscara.
+    Devuelve exactamente los mismos (registros, avisos) que parsear_filas.
+    """
+    n = len(df)
+    filas = np.asarray(df.index) + 2
+    columnas = df.columns
+    # Avisos por fila: (posición, orden dentro de la fila, mensaje)
+    avisos = []
+    valida = np.ones(n, dtype=bool)
+
+    def registrar(mascara, orden, mensaje):
+        for pos in np.flatnonzero(mascara):
+            avisos.append((pos, orden, mensaje(pos)))
+
+    def columna(campo):
+        return df[campo] if campo in columnas else pd.Series(None, index=df.index, dtype=object)
+
+    nombre = _como_texto(df['nombre']).to_numpy(dtype=object)
+    codigo = _como_texto(df['codigo']).to_numpy(dtype=object)
+
+    # Cantidad: Cantidad TOTAL si existe, sino Numero de bultos * Cantidad por bultos
+    numero_bultos, numero_bultos_ok = procesar_enteros(columna('numero_bultos'))
+    cantidad_por_bulto, cantidad_por_bulto_ok = procesar_enteros(columna('cantidad_por_bulto'))
+    cantidad = np.zeros(n, dtype=np.int64)
+    usa_total = np.zeros(n, dtype=bool)
+    if 'cantidad_total' in columnas:
+        usa_total = df['cantidad_total'].notna().to_numpy()
+        total, _ = procesar_enteros(df['cantidad_total'])
+        cantidad = np.where(usa_total, total, cantidad)
+    if 'numero_bultos' in columnas and 'cantidad_por_bulto' in columnas:
+        cantidad = np.where(usa_total, cantidad, numero_bultos * cantidad_por_bulto)
+
+    registrar(cantidad == 0, 1, lambda pos: f"Advertencia: Fila {filas[pos]}: Cantidad es 0. Se continuará con 0.")
+    cantidad = cantidad.astype(object)
+
+    # Precio mínimo (0 si no es válido)
+    precio_min, precio_min_ok = procesar_precios(df['precio_min'], positivos=False)
+    precio_min = _opcional(precio_min, precio_min_ok)
+    precio_min[~precio_min_ok] = 0
+
+    # Ubicación: hay pocas ubicaciones distintas, se procesa cada valor único una vez
+    ubicacion_str = _como_texto(df['ubicacion'])
+    codigos, unicos = pd.factorize(ubicacion_str.to_numpy(dtype=object))
+    partes = [parsear_ubicacion(u) for u in unicos]
+    tipos_unicos = np.array([tipo for tipo, _ in partes] + [None], dtype=object)
+    nombres_unicos = np.array([nombre_u for _, nombre_u in partes] + [None], dtype=object)
+    formato_unico = np.array([not tipo or not nombre_u for tipo, nombre_u in partes] + [True], dtype=bool)
+    tipo_unico = np.isin(tipos_unicos, ['bodega', 'tienda'])
+    ubicacion_tipo = tipos_unicos[codigos]
+    ubicacion_nombre = nombres_unicos[codigos]
+    ubicacion_texto = ubicacion_str.to_numpy(dtype=object)
+    formato_invalido = valida & formato_unico[codigos]
+    registrar(formato_invalido, 2, lambda pos: f"Advertencia: Fila {filas[pos]}: Formato de ubicación incorrecto: '{ubicacion_texto[pos]}'. Se omite.")
+    valida &= ~formato_invalido
+    tipo_invalido = valida & ~tipo_unico[codigos]
+    registrar(tipo_invalido, 2, lambda pos: f"Advertencia: Fila {filas[pos]}: Tipo de ubicación debe ser 'Bodega' o 'Tienda'. Se omite.")
+    valida &= ~tipo_invalido
+
+    # Campos opcionales
+    def opcional_texto(campo, condicion):
+        resultado = np.full(n, None, dtype=object)
+        if campo in columnas:
+            presente = df[campo].notna()
+            texto = _como_texto(df[campo][presente])
+            ok = condicion(texto).to_numpy()
+            posiciones = np.flatnonzero(presente.to_numpy())[ok]
+            resultado[posiciones] = texto.to_numpy(dtype=object)[ok]
+        return resultado
+
+    item = opcional_texto('item', lambda t: (t != '') & (t.str.lower() != 'nan'))
+    foto_url = opcional_texto('foto_url', lambda t: (t != '') & (t.str.lower() != 'nan') & t.str.startswith('http'))
+    numero_bultos = _opcional(numero_bultos, numero_bultos_ok)
+    cantidad_por_bulto = _opcional(cantidad_por_bulto, cantidad_por_bulto_ok)
+    precio_por_mayor = _opcional(*procesar_precios(columna('precio_por_mayor'), positivos=False))
+
+    registros = pd.DataFrame({
+        'fila': filas[valida],
+        'nombre': nombre[valida],
+        'codigo': codigo[valida],
+        'item': item[valida],
+        'cantidad': cantidad[valida],
+        'foto_url': foto_url[valida],
+        'precio_min': precio_min[valida],
+        'precio_por_mayor': precio_por_mayor[valida],
+        'numero_bultos': numero_bultos[valida],
+        'cantidad_por_bulto': cantidad_por_bulto[valida],
+        'ubicacion_tipo': ubicacion_tipo[valida],
+        'ubicacion_nombre': ubicacion_nombre[valida],
+    }, dtype=object)
+    avisos.sort(key=lambda aviso: (aviso[0], aviso[1]))
+    return registros, [mensaje for _, _, mensaje in avisos]
+
+
+def escribir_inserts(f, registros, ubicaciones, upsert=False):
+    """
+    Escribe un INSERT por registro limpio y devuelve la cantidad escrita.
+    La bodega/tienda se toma de la tabla de ubicaciones (Ubicaciones.sql).
+    Con upsert cada INSERT actualiza el juguete si ya existe en esa ubicación.
+    """
+    conflicto = f"\n{on_conflict(COLUMNAS_JUGUETES)}" if upsert else ""
+    registros_procesados = 0
+    empresa_id = ubicaciones.empresa_id
+    columnas = [registros[campo].tolist() for campo in COLUMNAS_JUGUETES]
+    claves = ubicaciones.claves(registros).tolist()
+    for (nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor,
+         numero_bultos, cantidad_por_bulto), clave in zip(zip(*columnas), claves):
+        # Generar INSERT statement (bodega_id y tienda_id de la ubicación ya resuelta)
+        sql = f"""INSERT INTO juguetes (
+    nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor, 
+    numero_bultos, cantidad_por_bulto,
+    empresa_id, bodega_id, tienda_id, created_at, updated_at
+) SELECT
+    {sql_texto(nombre)},
+    {sql_texto(codigo)},
+    {sql_texto(item)},
+    {cantidad},
+    {sql_texto(foto_url)},
+    {precio_min},
+    {sql_numero(precio_por_mayor)},
+    {sql_numero(numero_bultos)},
+    {sql_numero(cantidad_por_bulto)},
+    {empresa_id},
+    u.bodega_id,
+    u.tienda_id,
+    NOW(),
+    NOW()
+{desde_ubicacion(clave)}{conflicto};
+
+"""
+        f.write(sql)
+        registros_procesados += 1
+    return registros_procesados
+
+
+def leer_bloques(excel_file, column_mapping=COLUMN_MAPPING, streaming=False, tamano_bloque=TAMANO_BLOQUE,
+                 usar_cache=True, metricas=None):
+    """
+    Devuelve un iterador de DataFrames con las columnas ya normalizadas:
+    un solo bloque con todo el archivo, o bloques de tamano_bloque filas en modo streaming.
+    La caché solo se usa al leer el archivo completo. Con metricas (ver metricas.py)
+    se miden las etapas de lectura y normalización de cada bloque.
+    """
+    if metricas is not None:
+        if streaming:
+            leidos = leer_archivo_por_bloques(excel_file, tamano_bloque)
+        else:
+            # Se lee al pedir el primer bloque, dentro de la medición
+            leidos = (leer_archivo(excel_file, usar_cache) for _ in range(1))
+        return _medir_bloques(leidos, column_mapping, metricas)
+    if streaming:
+        return (normalizar_columnas(df, column_mapping) for df in leer_archivo_por_bloques(excel_file, tamano_bloque))
+    return iter([normalizar_columnas(leer_archivo(excel_file, usar_cache), column_mapping)])
+
+
+def _medir_bloques(leidos, column_mapping, metricas):
+    """Normaliza los bloques leídos midiendo la lectura de cada uno y su normalización"""
+    while True:
+        with metricas.etapa('lectura') as etapa:
+            df = next(leidos, None)
+            etapa.salida = 0 if df is None else len(df)
+        if df is None:
+            return
+        with metricas.etapa('normalizar', len(df)):
+            df = normalizar_columnas(df, column_mapping)
+        yield df
+
+
+def excel_to_sql(excel_file, empresa_id, output_file=None, por_filas=False, streaming=False, tamano_bloque=TAMANO_BLOQUE,
+                 formato='inserts', tamano_lote=TAMANO_LOTE, bodegas_csv=None, tiendas_csv=None, usar_cache=True,
+                 incremental=None, eliminados_csv=None, df=None, pool=None, commit_cada=None, upsert=False,
+                 duplicados=None, juguetes_csv=None, reporte_duplicados=None, metricas=None):
     """
     Convierte un archivo Excel a SQL INSERT statements
-    
+
     Args:
         excel_file: Ruta al archivo Excel
         empresa_id: ID de la empresa
         output_file: Archivo de salida (opcional, por defecto genera nombre automático)
+        por_filas: Usar el recorrido fila a fila en lugar del modo columnar
+        streaming: Leer y procesar el archivo por bloques con memoria constante
+        tamano_bloque: Filas por bloque en modo streaming
+        formato: 'inserts', 'multi' o 'copy' (ver salida_sql.py)
+        tamano_lote: Filas por INSERT en el formato multi
+        bodegas_csv, tiendas_csv: Exportaciones CSV de bodegas/tiendas para resolver las ubicaciones (opcional)
+        usar_cache: Usar la caché de archivos leídos (ver cache_excel.py)
+        incremental: Snapshot de la última importación; solo se generan INSERT para las
+            claves (codigo, ubicación) nuevas y UPDATE de los campos que cambiaron (ver incremental.py)
+        eliminados_csv: En modo incremental, CSV con las filas que ya no están en el archivo
+        df: DataFrame ya leído (lo usa importar_inventario.py); si se indica no se vuelve a leer excel_file
+        pool: Pool de conexiones (carga_db.crear_pool); si se indica los registros se cargan
+            directamente en la base de datos en lugar de escribir el SQL
+        commit_cada: Filas por transacción: con pool, de la carga; sin pool, el SQL se divide en
+            bloques numerados para ejecutar_sql.py (None: una sola transacción / sin bloques)
+        upsert: Actualizar los juguetes que ya existen en la ubicación en lugar de duplicarlos
+            (requiere el índice único de agregar_indice_unico_juguetes.sql)
+        duplicados: Política para las filas repetidas ('sumar', 'ultimo' o 'rechazar'); los
+            registros se revisan juntos al terminar de leer (ver duplicados.py)
+        juguetes_csv: Con duplicados, exportación CSV de la tabla juguetes para no insertar filas que ya existen
+        reporte_duplicados: Con duplicados, CSV con las filas repetidas o en conflicto
+        metricas: Metricas donde se registran los tiempos y filas de cada etapa (ver metricas.py)
+
+    Devuelve un diccionario con el resumen (archivo de salida, registros, filas y avisos)
+    o False si hubo un error.
     """
+    inicio = time.perf_counter()
+    metricas = metricas or Metricas('excel_to_sql')
     try:
-        # Leer el archivo Excel
-        df = pd.read_excel(excel_file)
-        
-        # Normalizar nombres de columnas (eliminar espacios, convertir a minúsculas)
-        df.columns = df.columns.str.strip()
-        
-        # Mapeo de nombres de columnas posibles
-        column_mapping = {
-            'nombre': ['nombre', 'name'],
-            'codigo': ['codigo', 'código', 'code'],
-            'item': ['item', 'item code'],
-            'numero_bultos': ['numero de bultos', 'número de bultos', 'numero_bultos', 'bultos', 'numero bultos', 'nro de bultos', 'nro bultos', 'cantidad de bultos'],
-            'cantidad_por_bulto': ['cantidad por bultos', 'cantidad por bulto', 'cantidad_por_bulto', 'cantidad/bulto', 'unidades por bulto', 'unidades/bulto', 'cantidad x bulto'],
-            'cantidad_total': ['cantidad total', 'cantidad_total', 'total', 'cantidad total'],
-            'precio_min': ['precio minimo', 'precio mínimo', 'precio_min', 'precio_minimo', 'precio min', 'precio minimo'],
-            'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor', 'precio al por mayor'],
-            'foto_url': ['foto url', 'foto_url', 'url foto', 'url', 'foto url'],
-            'ubicacion': ['ubicación', 'ubicacion', 'location', 'ubicación']
-        }
-        
-        # Buscar y renombrar columnas
-        normalized_columns = {}
-        for standard_name, possible_names in column_mapping.items():
-            for col in df.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    normalized_columns[col] = standard_name
-                    break
-        
-        # Renombrar columnas
-        df = df.rename(columns=normalized_columns)
-        
+        # Leer el archivo Excel y normalizar nombres de columnas
+        if df is not None:
+            with metricas.etapa('normalizar', len(df)):
+                bloques = iter([normalizar_columnas(df)])
+        else:
+            bloques = leer_bloques(excel_file, streaming=streaming, tamano_bloque=tamano_bloque, usar_cache=usar_cache,
+                                   metricas=metricas)
+        df = next(bloques)
+
         # Validar columnas requeridas
-        required_columns = ['nombre', 'codigo', 'precio_min', 'ubicacion']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
         if missing_columns:
             print(f"Error: Faltan las siguientes columnas requeridas: {', '.join(missing_columns)}")
             print(f"\nColumnas encontradas en el Excel: {', '.join(df.columns.tolist())}")
@@ -85,194 +480,158 @@ def excel_to_sql(excel_file, empresa_id, output_file=None):
             print("  - Precio al por mayor")
             print("  - Foto URL")
             return False
-        
+
         # Generar nombre de archivo de salida si no se proporciona
-        if not output_file:
+        if not output_file and pool is None:
             base_name = os.path.splitext(os.path.basename(excel_file))[0]
             output_file = f"sql_inserts_{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
-        
-        # Abrir archivo de salida
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # Escribir encabezado
-            f.write(f"-- ============================================\n")
-            f.write(f"-- SQL GENERADO DESDE EXCEL\n")
-            f.write(f"-- Archivo: {os.path.basename(excel_file)}\n")
-            f.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"-- Empresa ID: {empresa_id}\n")
-            f.write(f"-- ============================================\n\n")
-            
-            f.write("-- Primero, obtener los IDs de bodegas y tiendas\n")
-            f.write("-- Asegúrate de que las bodegas y tiendas existan antes de ejecutar estos INSERTs\n\n")
-            
-            # Procesar cada fila
+
+        parsear = parsear_filas if por_filas else parsear_columnas
+        ubicaciones = cargar_ubicaciones(empresa_id, bodegas_csv, tiendas_csv)
+        if incremental:
+            anterior = leer_snapshot(incremental, 'excel_to_sql', empresa_id)
+        revision = None
+        if duplicados:
+            existentes = leer_existentes(juguetes_csv, empresa_id) if juguetes_csv else None
+            revision = RevisionDuplicados(duplicados, existentes, upsert, metricas)
+        registros_archivo = []
+
+        # Los INSERTs se escriben primero en un archivo temporal: la tabla de
+        # ubicaciones va antes en el SQL y solo se conoce al terminar de leer.
+        # Con pool los registros se copian a la base de datos a medida que se procesan
+        carga = carga_db.CargaInventario(pool, ubicaciones, COLUMNAS_JUGUETES, commit_cada, upsert) if pool is not None else None
+        resultado_carga = None
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as f, carga or nullcontext():
+            por_bloques = SalidaPorBloques(f.write, commit_cada) if commit_cada and carga is None else None
+            if carga is not None:
+                escritor = carga
+                escribir = carga.escribir
+            elif formato == 'inserts':
+                escritor = None
+                escribir = lambda registros: escribir_inserts(por_bloques or f, registros, ubicaciones, upsert)
+            else:
+                escritor = crear_escritor(formato, f.write, ubicaciones, COLUMNAS_JUGUETES, tamano_lote, upsert,
+                                          por_bloques)
+                escribir = escritor.escribir
+
+            # Procesar cada bloque (todo el archivo si no es modo streaming)
             registros_procesados = 0
-            for index, row in df.iterrows():
-                try:
-                    nombre = str(row['nombre']).strip().replace("'", "''")
-                    codigo = str(row['codigo']).strip().replace("'", "''")
-                    
-                    # Calcular cantidad: usar Cantidad TOTAL si existe, sino calcular desde bultos
-                    cantidad = 0
-                    if 'cantidad_total' in df.columns and pd.notna(row.get('cantidad_total')):
-                        cantidad_val = str(row['cantidad_total']).strip()
-                        # Remover puntos y comas, convertir a entero
-                        cantidad_val = re.sub(r'[^\d]', '', cantidad_val)
-                        cantidad = int(cantidad_val) if cantidad_val else 0
-                    elif 'numero_bultos' in df.columns and 'cantidad_por_bulto' in df.columns:
-                        numero_bultos_str = str(row['numero_bultos']).strip() if pd.notna(row.get('numero_bultos')) else '0'
-                        cantidad_por_bulto_str = str(row['cantidad_por_bulto']).strip() if pd.notna(row.get('cantidad_por_bulto')) else '0'
-                        numero_bultos = int(re.sub(r'[^\d]', '', numero_bultos_str)) if numero_bultos_str else 0
-                        cantidad_por_bulto = int(re.sub(r'[^\d]', '', cantidad_por_bulto_str)) if cantidad_por_bulto_str else 0
-                        cantidad = numero_bultos * cantidad_por_bulto
-                    
-                    if cantidad == 0:
-                        print(f"Advertencia: Fila {index + 2}: Cantidad es 0. Se continuará con 0.")
-                    
-                    # Procesar precio mínimo (puede tener formato con puntos o comas como separadores de miles)
-                    precio_min_str = str(row['precio_min']).strip()
-                    # Remover símbolo de dólar y espacios
-                    precio_min_str = precio_min_str.replace('$', '').replace(' ', '')
-                    # Si tiene comas, asumir que son separadores de miles (formato colombiano)
-                    if ',' in precio_min_str and '.' not in precio_min_str:
-                        # Formato: "22,684" -> "22684"
-                        precio_min_str = precio_min_str.replace(',', '')
-                    elif ',' in precio_min_str and '.' in precio_min_str:
-                        # Formato: "22,684.50" -> "22684.50"
-                        precio_min_str = precio_min_str.replace(',', '')
-                    elif '.' in precio_min_str and ',' not in precio_min_str:
-                        # Formato: "22.684" -> "22684" (puntos como separadores de miles)
-                        precio_min_str = precio_min_str.replace('.', '')
-                    # Remover cualquier carácter no numérico excepto punto decimal
-                    precio_min_str = re.sub(r'[^\d.]', '', precio_min_str)
-                    precio_min = float(precio_min_str) if precio_min_str and precio_min_str != 'nan' else 0
-                    
-                    # Procesar ubicación (formatos: "Bodega/ nombre", "Bodega nombre", "Tienda/ nombre", "Tienda nombre")
-                    ubicacion_str = str(row['ubicacion']).strip()
-                    ubicacion_tipo = None
-                    ubicacion_nombre = None
-                    
-                    if '/' in ubicacion_str:
-                        # Formato: "Bodega/ nombre" o "Tienda/ nombre"
-                        partes = ubicacion_str.split('/', 1)
-                        ubicacion_tipo = partes[0].strip().lower()
-                        ubicacion_nombre = partes[1].strip().replace("'", "''")
-                    else:
-                        # Formato: "Bodega nombre" o "Tienda nombre" (sin "/")
-                        palabras = ubicacion_str.split()
-                        if len(palabras) >= 2:
-                            primera_palabra = palabras[0].lower()
-                            if primera_palabra in ['bodega', 'tienda']:
-                                ubicacion_tipo = primera_palabra
-                                ubicacion_nombre = ' '.join(palabras[1:]).strip().replace("'", "''")
-                    
-                    if not ubicacion_tipo or not ubicacion_nombre:
-                        print(f"Advertencia: Fila {index + 2}: Formato de ubicación incorrecto: '{ubicacion_str}'. Se omite.")
-                        continue
-                    
-                    # Validar ubicacion_tipo
-                    if ubicacion_tipo not in ['bodega', 'tienda']:
-                        print(f"Advertencia: Fila {index + 2}: Tipo de ubicación debe ser 'Bodega' o 'Tienda'. Se omite.")
-                        continue
-                    
-                    # Campos opcionales
-                    item = 'NULL'
-                    if 'item' in df.columns and pd.notna(row.get('item')):
-                        item_val = str(row['item']).strip().replace("'", "''")
-                        if item_val and item_val.lower() != 'nan' and item_val != '':
-                            item = f"'{item_val}'"
-                    
-                    # Procesar campos de bultos
-                    numero_bultos = None
-                    if 'numero_bultos' in df.columns and pd.notna(row.get('numero_bultos')):
-                        numero_bultos_str = str(row['numero_bultos']).strip()
-                        numero_bultos_str = re.sub(r'[^\d]', '', numero_bultos_str)
-                        if numero_bultos_str and numero_bultos_str.lower() != 'nan':
-                            numero_bultos = int(numero_bultos_str)
-                    
-                    cantidad_por_bulto = None
-                    if 'cantidad_por_bulto' in df.columns and pd.notna(row.get('cantidad_por_bulto')):
-                        cantidad_por_bulto_str = str(row['cantidad_por_bulto']).strip()
-                        cantidad_por_bulto_str = re.sub(r'[^\d]', '', cantidad_por_bulto_str)
-                        if cantidad_por_bulto_str and cantidad_por_bulto_str.lower() != 'nan':
-                            cantidad_por_bulto = int(cantidad_por_bulto_str)
-                    
-                    precio_por_mayor = None
-                    if 'precio_por_mayor' in df.columns and pd.notna(row.get('precio_por_mayor')):
-                        precio_por_mayor_str = str(row['precio_por_mayor']).strip()
-                        # Remover símbolo de dólar y espacios
-                        precio_por_mayor_str = precio_por_mayor_str.replace('$', '').replace(' ', '')
-                        # Si tiene comas, asumir que son separadores de miles (formato colombiano)
-                        if ',' in precio_por_mayor_str and '.' not in precio_por_mayor_str:
-                            precio_por_mayor_str = precio_por_mayor_str.replace(',', '')
-                        elif ',' in precio_por_mayor_str and '.' in precio_por_mayor_str:
-                            precio_por_mayor_str = precio_por_mayor_str.replace(',', '')
-                        elif '.' in precio_por_mayor_str and ',' not in precio_por_mayor_str:
-                            precio_por_mayor_str = precio_por_mayor_str.replace('.', '')
-                        precio_por_mayor_str = re.sub(r'[^\d.]', '', precio_por_mayor_str)
-                        if precio_por_mayor_str and precio_por_mayor_str.lower() != 'nan':
-                            precio_por_mayor = float(precio_por_mayor_str)
-                    
-                    foto_url = 'NULL'
-                    if 'foto_url' in df.columns and pd.notna(row.get('foto_url')):
-                        foto_url_val = str(row['foto_url']).strip().replace("'", "''")
-                        if foto_url_val and foto_url_val.lower() != 'nan' and foto_url_val.startswith('http'):
-                            foto_url = f"'{foto_url_val}'"
-                    
-                    # Generar SQL con subconsulta para obtener el ID de la ubicación (case-insensitive)
-                    if ubicacion_tipo == 'bodega':
-                        ubicacion_id_query = f"(SELECT id FROM bodegas WHERE LOWER(nombre) = LOWER('{ubicacion_nombre}') AND empresa_id = {empresa_id} LIMIT 1)"
-                        bodega_id = ubicacion_id_query
-                        tienda_id = 'NULL'
-                    else:
-                        ubicacion_id_query = f"(SELECT id FROM tiendas WHERE LOWER(nombre) = LOWER('{ubicacion_nombre}') AND empresa_id = {empresa_id} LIMIT 1)"
-                        bodega_id = 'NULL'
-                        tienda_id = ubicacion_id_query
-                    
-                    # Construir precio_por_mayor
-                    precio_por_mayor_sql = f"{precio_por_mayor}" if precio_por_mayor is not None else 'NULL'
-                    
-                    # Construir campos de bultos
-                    numero_bultos_sql = f"{numero_bultos}" if numero_bultos is not None else 'NULL'
-                    cantidad_por_bulto_sql = f"{cantidad_por_bulto}" if cantidad_por_bulto is not None else 'NULL'
-                    
-                    # Generar INSERT statement
-                    sql = f"""INSERT INTO juguetes (
-    nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor, 
-    numero_bultos, cantidad_por_bulto,
-    empresa_id, bodega_id, tienda_id, created_at, updated_at
-) VALUES (
-    '{nombre}',
-    '{codigo}',
-    {item},
-    {cantidad},
-    {foto_url},
-    {precio_min},
-    {precio_por_mayor_sql},
-    {numero_bultos_sql},
-    {cantidad_por_bulto_sql},
-    {empresa_id},
-    {bodega_id},
-    {tienda_id},
-    NOW(),
-    NOW()
-);
+            total_filas = 0
+            total_avisos = 0
+            total_repetidas = 0
+            for df in itertools.chain([df], bloques):
+                with metricas.etapa('parsear', len(df), perfilar=True) as etapa:
+                    registros, avisos = parsear(df)
+                    etapa.salida = len(registros)
+                metricas.contar_avisos(avisos)
+                total_avisos += len(avisos)
+                for aviso in avisos:
+                    print(aviso)
+                if incremental or revision is not None:
+                    # Se revisa y se compara contra el snapshot al terminar de leer
+                    registros_archivo.append(registros)
+                    if incremental:
+                        registros_procesados += len(registros)
+                else:
+                    if upsert:
+                        ultimos = ultimos_por_clave(registros)
+                        total_repetidas += len(registros) - len(ultimos)
+                        metricas.rechazar('clave_repetida', len(registros) - len(ultimos))
+                        registros = ultimos
+                    with metricas.etapa('emitir', len(registros)):
+                        registros_procesados += escribir(registros)
+                total_filas += len(df)
+            if revision is not None:
+                registros = pd.concat(registros_archivo, ignore_index=True)
+                with metricas.etapa('duplicados', len(registros)) as etapa:
+                    registros = revision.aplicar(registros, ubicaciones)
+                    etapa.salida = len(registros)
+                if not incremental:
+                    with metricas.etapa('emitir', len(registros)):
+                        registros_procesados += escribir(registros)
+            if incremental:
+                with metricas.etapa('incremental', registros_procesados) as etapa:
+                    revisados = registros if revision is not None else pd.concat(registros_archivo, ignore_index=True)
+                    diferencias = DiferenciasInventario(revisados, anterior)
+                    etapa.salida = len(diferencias.nuevos) + diferencias.cambiados
+                if carga is not None:
+                    escribir_updates = carga.sentencia
+                else:
+                    escribir_updates = por_bloques.escritor(tamano_lote) if por_bloques is not None else f.write
+                with metricas.etapa('emitir', len(diferencias.nuevos) + diferencias.cambiados):
+                    for campos, cambiados in diferencias.cambios:
+                        escribir_updates_por_ubicacion(escribir_updates, ubicaciones, campos, cambiados, tamano_lote)
+                    escribir(ultimos_por_clave(diferencias.nuevos) if upsert else diferencias.nuevos)
+            with metricas.etapa('emitir'):
+                if escritor is not None and carga is None:
+                    escritor.cerrar()
+                total_bloques = por_bloques.cerrar() if por_bloques is not None else None
+
+            # Las ubicaciones que no existen se reportan antes de generar el SQL
+            if not ubicaciones.reportar_desconocidas():
+                return False
+
+            with metricas.etapa('emitir'):
+                if carga is not None:
+                    resultado_carga = carga.cerrar()
+                else:
+                    f.seek(0)
+                    with open(output_file, 'w', encoding='utf-8') as salida:
+                        # Escribir encabezado
+                        salida.write(f"-- ============================================\n")
+                        salida.write(f"-- SQL GENERADO DESDE EXCEL\n")
+                        salida.write(f"-- Archivo: {os.path.basename(excel_file)}\n")
+                        salida.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                        salida.write(f"-- Empresa ID: {empresa_id}\n")
+                        salida.write(f"-- ============================================\n\n")
+
+                        salida.write("-- Primero, obtener los IDs de bodegas y tiendas\n")
+                        salida.write("-- Asegúrate de que las bodegas y tiendas existan antes de ejecutar estos INSERTs\n\n")
+                        salida.write(ubicaciones.sql())
+
+                        shutil.copyfileobj(f, salida)
+
+                        salida.write("\n-- ============================================\n")
+                        salida.write("-- FIN DE LOS INSERTS\n")
+                        salida.write("-- ============================================\n")
+
+        if carga is None:
+            print(f"✓ SQL generado exitosamente: {output_file}")
+        if total_bloques is not None:
+            print(f"✓ SQL dividido en {total_bloques} bloques de hasta {commit_cada} filas: "
+                  f"python ejecutar_sql.py {output_file}")
+        print(f"✓ Total de registros procesados: {registros_procesados} de {total_filas}")
+        print(ubicaciones.resumen())
+        if revision is not None:
+            print(revision.resumen())
+            if reporte_duplicados:
+                revision.escribir_reporte(reporte_duplicados)
+                print(f"✓ Filas repetidas o en conflicto ({revision.reportadas}) guardadas en: {reporte_duplicados}")
+        if total_repetidas:
+            print(f"⚠ {total_repetidas} filas repiten (codigo, ubicación): con --upsert queda la última")
+        if carga is not None:
+            carga_db.imprimir_carga(resultado_carga, time.perf_counter() - inicio)
+        if incremental:
+            guardar_snapshot(incremental, 'excel_to_sql', empresa_id, diferencias.snapshot)
+            print(diferencias.resumen())
+            if diferencias.repetidas:
+                print(f"⚠ {diferencias.repetidas} filas repiten (codigo, ubicación): los cambios se comparan con la última")
+            if eliminados_csv:
+                diferencias.escribir_eliminados(eliminados_csv)
+                print(f"✓ Filas eliminadas guardadas en: {eliminados_csv}")
+            print(f"✓ Snapshot actualizado: {incremental}")
+        memoria = memoria_pico_mb()
+        if memoria is not None:
+            print(f"✓ Memoria pico: {memoria:.1f} MB")
+        return {
+            'output_file': output_file,
+            'registros': registros_procesados,
+            'filas': total_filas,
+            'avisos': total_avisos,
+            'carga': resultado_carga,
+            'bloques': total_bloques,
+        }
 
-"""
-                    f.write(sql)
-                    registros_procesados += 1
-                    
-                except Exception as e:
-                    print(f"Error procesando fila {index + 2}: {str(e)}")
-                    continue
-            
-            f.write("\n-- ============================================\n")
-            f.write("-- FIN DE LOS INSERTS\n")
-            f.write("-- ============================================\n")
-        
-        print(f"✓ SQL generado exitosamente: {output_file}")
-        print(f"✓ Total de registros procesados: {registros_procesados} de {len(df)}")
-        return True
-        
     except Exception as e:
         print(f"Error al procesar el archivo: {str(e)}")
         import traceback
@@ -280,22 +639,43 @@ def excel_to_sql(excel_file, empresa_id, output_file=None):
         return False
 
 def main():
-    if len(sys.argv) < 3:
-        print("Uso: python excel_to_sql.py <archivo_excel.xlsx> <empresa_id> [archivo_salida.sql]")
-        print("\nEjemplo:")
-        print("  python excel_to_sql.py inventario.xlsx 1")
-        print("  python excel_to_sql.py inventario.xlsx 1 output.sql")
-        sys.exit(1)
-    
-    excel_file = sys.argv[1]
-    empresa_id = int(sys.argv[2])
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
-    
-    if not os.path.exists(excel_file):
-        print(f"Error: El archivo {excel_file} no existe")
+    parser = argparse.ArgumentParser(
+        description="Convierte un archivo Excel de inventario a SQL INSERT statements",
+        epilog="Ejemplo:\n"
+               "  python excel_to_sql.py inventario.xlsx 1\n"
+               "  python excel_to_sql.py inventario.xlsx 1 output.sql\n"
+               "  python excel_to_sql.py inventario.xlsx 1 output.sql --streaming\n"
+               "  python excel_to_sql.py inventario.xlsx 1 output.sql --formato copy\n"
+               "  python excel_to_sql.py inventario.xlsx 1 output.sql --formato multi --upsert\n"
+               "  python excel_to_sql.py inventario.xlsx 1 output.sql --duplicados sumar --reporte-duplicados duplicados.csv\n"
+               "  python excel_to_sql.py inventario.xlsx 1 --cargar --db postgresql://postgres@localhost/toyswalls",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    opciones.opciones_insert(parser)
+    args = parser.parse_args()
+    opciones.validar(parser, args)
+    ejecutar(parser, args)
+
+
+def ejecutar(parser, args):
+    """Ejecuta el script con los argumentos ya validados (también desde toyswall_import.py)"""
+    pool = carga_db.pool_de_argumentos(parser, args)
+    metricas = metricas_de_argumentos('excel_to_sql', args)
+    try:
+        resultado = excel_to_sql(args.excel_file, args.empresa_id, args.output_file, por_filas=args.por_filas,
+                                 streaming=args.streaming, tamano_bloque=args.tamano_bloque,
+                                 formato=args.formato, tamano_lote=args.tamano_lote,
+                                 bodegas_csv=args.bodegas_csv, tiendas_csv=args.tiendas_csv, usar_cache=not args.no_cache,
+                                 incremental=args.incremental, eliminados_csv=args.eliminados,
+                                 pool=pool, commit_cada=args.commit_cada, upsert=args.upsert,
+                                 duplicados=args.duplicados, juguetes_csv=args.juguetes_csv,
+                                 reporte_duplicados=args.reporte_duplicados, metricas=metricas)
+    finally:
+        if pool is not None:
+            pool.closeall()
+    guardar_metricas(metricas, args, archivos=[args.excel_file], ok=bool(resultado))
+    if pool is not None and not resultado:
         sys.exit(1)
-    
-    excel_to_sql(excel_file, empresa_id, output_file)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,231 @@
+"""
+Conversión en lote de archivos Excel de inventario a SQL (excel_to_sql.py en paralelo)
+
+Convierte todos los Excel de una carpeta (o de un patrón como "inventarios/*.xlsx")
+usando varios procesos a la vez. También toma los CSV y Parquet de la carpeta
+(ver lectura.formato_archivo). Cada proceso importa pandas/openpyxl una sola vez
+y convierte varios archivos.
+
+Uso:
+    python excel_to_sql_lote.py <carpeta_o_patron> <empresa_id> [--salida-dir DIR | --unir archivo.sql]
+                                [--trabajadores N] [--formato inserts|multi|copy] [--tamano-lote N]
+                                [--streaming] [--tamano-bloque N] [--no-cache]
+                                [--bodegas-csv bodegas.csv] [--tiendas-csv tiendas.csv] [--upsert]
+
+Por defecto se genera un SQL por archivo en --salida-dir (la carpeta actual si no
+se indica). Con --unir se genera un solo SQL con todos los archivos, en orden
+alfabético. Los mensajes de cada archivo (advertencias por fila, etc.) se guardan
+en un .log junto al SQL y al final se muestra un resumen por archivo.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from lectura import TAMANO_BLOQUE, EXTENSIONES_CSV, EXTENSIONES_PARQUET
+from salida_sql import FORMATOS, TAMANO_LOTE
+
+EXTENSIONES_EXCEL = ('.xlsx', '.xlsm', '.xls')
+
+# Archivos que se toman de la carpeta o del patrón: Excel, CSV y Parquet
+EXTENSIONES_ENTRADA = EXTENSIONES_EXCEL + EXTENSIONES_CSV + EXTENSIONES_PARQUET
+
+
+def buscar_archivos(entrada):
+    """
+    Lista ordenada de archivos Excel, CSV o Parquet de una carpeta o de un patrón glob.
+    Se ignoran los archivos temporales de Excel (~$archivo.xlsx).
+    """
+    if os.path.isdir(entrada):
+        candidatos = [os.path.join(entrada, nombre) for nombre in os.listdir(entrada)]
+    else:
+        candidatos = glob.glob(entrada)
+    return sorted(
+        ruta for ruta in candidatos
+        if os.path.isfile(ruta)
+        and ruta.lower().endswith(EXTENSIONES_ENTRADA)
+        and not os.path.basename(ruta).startswith('~$')
+    )
+
+
+def nombres_salida(archivos, salida_dir, marca):
+    """Archivo SQL de salida para cada Excel, sin repetir nombres"""
+    usados = set()
+    salidas = []
+    for archivo in archivos:
+        base = os.path.splitext(os.path.basename(archivo))[0]
+        nombre = f"sql_inserts_{base}_{marca}.sql"
+        n = 1
+        while nombre in usados:
+            n += 1
+            nombre = f"sql_inserts_{base}_{n}_{marca}.sql"
+        usados.add(nombre)
+        salidas.append(os.path.join(salida_dir, nombre))
+    return salidas
+
+
+def _convertir(tarea):
+    """
+    Convierte un archivo en un proceso del pool. Devuelve el resumen del
+    archivo con los mensajes que imprimió excel_to_sql.
+    """
+    from excel_to_sql import excel_to_sql
+
+    excel_file, empresa_id, output_file, opciones = tarea
+    mensajes = io.StringIO()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(mensajes), contextlib.redirect_stderr(mensajes):
+        resultado = excel_to_sql(excel_file, empresa_id, output_file, **opciones)
+    return {
+        'archivo': excel_file,
+        'output_file': output_file,
+        'ok': bool(resultado),
+        'registros': resultado['registros'] if resultado else 0,
+        'filas': resultado['filas'] if resultado else 0,
+        'avisos': resultado['avisos'] if resultado else 0,
+        'segundos': time.perf_counter() - inicio,
+        'mensajes': mensajes.getvalue(),
+    }
+
+
+def imprimir_resumen(resultados, segundos, trabajadores):
+    """Tabla con registros procesados y filas omitidas por archivo"""
+    ancho = max([len('Archivo')] + [len(os.path.basename(r['archivo'])) for r in resultados])
+    print(f"\n{'Archivo':<{ancho}}  {'Registros':>10}  {'Filas':>10}  {'Omitidas':>10}  {'Avisos':>8}  {'Tiempo':>8}")
+    for r in resultados:
+        nombre = os.path.basename(r['archivo'])
+        if r['ok']:
+            print(f"{nombre:<{ancho}}  {r['registros']:>10}  {r['filas']:>10}  {r['filas'] - r['registros']:>10}  "
+                  f"{r['avisos']:>8}  {r['segundos']:>7.1f}s")
+        else:
+            print(f"{nombre:<{ancho}}  {'ERROR':>10}  (ver {os.path.basename(r['log'])})")
+
+    correctos = [r for r in resultados if r['ok']]
+    registros = sum(r['registros'] for r in correctos)
+    filas = sum(r['filas'] for r in correctos)
+    print(f"{'TOTAL':<{ancho}}  {registros:>10}  {filas:>10}  {filas - registros:>10}  "
+          f"{sum(r['avisos'] for r in correctos):>8}  {segundos:>7.1f}s")
+
+    print(f"\n✓ Archivos convertidos: {len(correctos)} de {len(resultados)} ({trabajadores} procesos)")
+    errores = len(resultados) - len(correctos)
+    if errores:
+        print(f"⚠ Archivos con error: {errores}")
+
+
+def excel_to_sql_lote(entrada, empresa_id, salida_dir=None, unir=None, trabajadores=None, **opciones):
+    """
+    Convierte en paralelo todos los Excel, CSV y Parquet de una carpeta o patrón
+
+    Args:
+        entrada: Carpeta o patrón glob con los archivos Excel, CSV o Parquet
+        empresa_id: ID de la empresa
+        salida_dir: Carpeta para los SQL (uno por archivo); por defecto la carpeta actual
+        unir: Archivo SQL único con todos los archivos (en lugar de uno por archivo)
+        trabajadores: Procesos en paralelo (por defecto, uno por CPU)
+        opciones: Opciones de excel_to_sql (formato, tamano_lote, streaming, ...)
+
+    Devuelve la lista de resúmenes por archivo, o None si no hay archivos.
+    """
+    archivos = buscar_archivos(entrada)
+    if not archivos:
+        print(f"Error: No se encontraron archivos Excel, CSV o Parquet en {entrada}")
+        return None
+
+    trabajadores = max(1, min(trabajadores or os.cpu_count() or 1, len(archivos)))
+    marca = datetime.now().strftime('%Y%m%d_%H%M%S')
+    print(f"Convirtiendo {len(archivos)} archivos con {trabajadores} procesos")
+
+    carpeta_temporal = tempfile.mkdtemp(prefix='excel_to_sql_lote_') if unir else None
+    try:
+        destino = carpeta_temporal or salida_dir or '.'
+        os.makedirs(destino, exist_ok=True)
+        salidas = nombres_salida(archivos, destino, marca)
+        tareas = [(archivo, empresa_id, salida, opciones) for archivo, salida in zip(archivos, salidas)]
+
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+            resultados = []
+            for resultado in pool.map(_convertir, tareas):
+                estado = '✓' if resultado['ok'] else '✗'
+                print(f"{estado} {os.path.basename(resultado['archivo'])}")
+                resultados.append(resultado)
+        segundos = time.perf_counter() - inicio
+
+        if unir:
+            # Cada SQL ya trae su tabla de ubicaciones, se pueden concatenar en orden
+            with open(unir, 'w', encoding='utf-8') as f:
+                for resultado in resultados:
+                    if not resultado['ok']:
+                        continue
+                    f.write(f"-- >>> {os.path.basename(resultado['archivo'])}\n")
+                    with open(resultado['output_file'], encoding='utf-8') as parte:
+                        shutil.copyfileobj(parte, f)
+                    f.write("\n")
+            with open(f"{os.path.splitext(unir)[0]}.log", 'w', encoding='utf-8') as log:
+                for resultado in resultados:
+                    log.write(f"==> {resultado['archivo']} <==\n{resultado['mensajes']}\n")
+                    resultado['log'] = log.name
+            print(f"\n✓ SQL unido generado: {unir}")
+        else:
+            for resultado in resultados:
+                resultado['log'] = f"{os.path.splitext(resultado['output_file'])[0]}.log"
+                with open(resultado['log'], 'w', encoding='utf-8') as log:
+                    log.write(resultado['mensajes'])
+            print(f"\n✓ SQL generados en: {os.path.abspath(destino)}")
+    finally:
+        if carpeta_temporal:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+    imprimir_resumen(resultados, segundos, trabajadores)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convierte en paralelo todos los Excel, CSV y Parquet de inventario de una carpeta a SQL",
+        epilog="Ejemplo:\n"
+               "  python excel_to_sql_lote.py inventarios/ 1\n"
+               "  python excel_to_sql_lote.py \"inventarios/bodega_*.xlsx\" 1 --unir inventario_completo.sql\n"
+               "  python excel_to_sql_lote.py inventarios/ 1 --salida-dir sql/ --trabajadores 8 --formato copy",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('entrada', help="Carpeta o patrón (entre comillas) con los archivos Excel, CSV o Parquet")
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    salida = parser.add_mutually_exclusive_group()
+    salida.add_argument('--salida-dir', help="Carpeta para los SQL, uno por archivo (por defecto la carpeta actual)")
+    salida.add_argument('--unir', metavar='ARCHIVO_SQL', help="Generar un solo SQL con todos los archivos")
+    parser.add_argument('--trabajadores', type=int, default=None, help="Procesos en paralelo (por defecto uno por CPU)")
+    parser.add_argument('--por-filas', action='store_true', help="Procesar fila a fila en lugar de columna a columna")
+    parser.add_argument('--streaming', action='store_true', help="Leer cada archivo por bloques con memoria constante")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE, help=f"Filas por bloque en modo streaming (por defecto {TAMANO_BLOQUE})")
+    parser.add_argument('--formato', choices=FORMATOS, default='inserts',
+                        help="Formato del SQL: un INSERT por registro, INSERT de varias filas o COPY para psql (por defecto inserts)")
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE, help=f"Filas por INSERT en el formato multi (por defecto {TAMANO_LOTE})")
+    parser.add_argument('--bodegas-csv', help="Exportación CSV de la tabla bodegas (id, nombre, empresa_id)")
+    parser.add_argument('--tiendas-csv', help="Exportación CSV de la tabla tiendas (id, nombre, empresa_id)")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché de archivos Excel ya leídos")
+    parser.add_argument('--upsert', action='store_true',
+                        help="INSERT ... ON CONFLICT DO UPDATE: actualizar los juguetes que ya existen en lugar de duplicarlos")
+    args = parser.parse_args()
+
+    resultados = excel_to_sql_lote(
+        args.entrada, args.empresa_id, salida_dir=args.salida_dir, unir=args.unir, trabajadores=args.trabajadores,
+        por_filas=args.por_filas, streaming=args.streaming, tamano_bloque=args.tamano_bloque,
+        formato=args.formato, tamano_lote=args.tamano_lote,
+        bodegas_csv=args.bodegas_csv, tiendas_csv=args.tiendas_csv, usar_cache=not args.no_cache,
+        upsert=args.upsert,
+    )
+    if not resultados or not all(r['ok'] for r in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
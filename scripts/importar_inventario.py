@@ -0,0 +1,203 @@
+"""
+Importación del Excel maestro de inventario en una sola pasada
+
+Lee el Excel una sola vez y genera, en la misma ejecución, cualquier combinación de:
+
+    - inserts: INSERT de juguetes (excel_to_sql.py)
+    - bultos: UPDATE de numero_bultos y cantidad_por_bulto (actualizar_bultos_desde_excel.py)
+    - precios-mayor: UPDATE de precio_por_mayor (actualizar_precios_por_mayor_desde_excel.py)
+
+Cada salida genera exactamente el mismo SQL que su script por separado (cada una
+aplica su propio mapeo de columnas y sus validaciones); lo que se comparte es
+la lectura del Excel, que es lo que más tarda. Al final se muestra un resumen
+con todas las salidas.
+
+Uso:
+    python importar_inventario.py archivo.xlsx empresa_id [--inserts [ARCHIVO]] [--bultos [ARCHIVO]]
+                                  [--precios-mayor [ARCHIVO]] [--formato inserts|multi|copy]
+                                  [--formato-updates updates|lotes] [--tamano-lote N]
+                                  [--bodegas-csv bodegas.csv] [--tiendas-csv tiendas.csv]
+                                  [--incremental CARPETA] [--no-cache] [--upsert]
+                                  [--commit-cada N] [--cargar [--db URL]]
+                                  [--metricas metricas.json] [--perfil parseo.prof]
+
+Sin --inserts/--bultos/--precios-mayor se generan las tres salidas. Cada opción
+acepta el nombre del archivo SQL; si no se indica se usa el nombre automático
+de cada script.
+
+Con --cargar las salidas se cargan directamente en la base de datos (ver
+carga_db.py) con un mismo pool de conexiones, en lugar de escribir archivos SQL.
+Sin --cargar, --commit-cada divide cada archivo SQL en bloques numerados para
+ejecutar_sql.py.
+
+Con --metricas se guardan en un JSON las métricas de la lectura y las de cada
+salida por etapa (ver metricas.py).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import carga_db
+from actualizar_bultos_desde_excel import actualizar_bultos_desde_excel
+from actualizar_precios_por_mayor_desde_excel import actualizar_precios_por_mayor_desde_excel
+from excel_to_sql import excel_to_sql
+from lectura import leer_archivo, memoria_pico_mb
+from metricas import Metricas, agregar_opciones_metricas, metricas_de_argumentos, guardar_metricas
+from salida_sql import FORMATOS, FORMATOS_UPDATE, TAMANO_LOTE
+
+# Salidas disponibles, en el orden en que se generan
+SALIDAS = ['inserts', 'bultos', 'precios-mayor']
+
+
+def importar_inventario(excel_file, empresa_id, salidas, formato='inserts', formato_updates='updates',
+                        tamano_lote=TAMANO_LOTE, bodegas_csv=None, tiendas_csv=None, incremental=None,
+                        usar_cache=True, pool=None, commit_cada=None, upsert=False, metricas=None):
+    """
+    Lee el Excel una vez y genera las salidas indicadas
+
+    Args:
+        excel_file: Ruta al archivo Excel
+        empresa_id: ID de la empresa
+        salidas: {salida: archivo SQL o None para el nombre automático} con salidas de SALIDAS
+        formato: Formato de los INSERT (ver salida_sql.py)
+        formato_updates: Formato de los UPDATE de bultos y precios ('updates' o 'lotes')
+        tamano_lote: Filas por sentencia en los formatos multi y lotes
+        bodegas_csv, tiendas_csv: Exportaciones CSV de bodegas/tiendas para los INSERT (opcional)
+        incremental: Carpeta con un snapshot por salida (ver incremental.py)
+        usar_cache: Usar la caché de archivos leídos (ver cache_excel.py)
+        pool: Pool de conexiones (carga_db.crear_pool) para cargar las salidas directamente en la base de datos
+        commit_cada: Filas por transacción de cada salida, en la carga o en bloques del SQL (ver excel_to_sql.py)
+        upsert: INSERT con ON CONFLICT DO UPDATE (ver excel_to_sql.py)
+        metricas: Métricas de la lectura; las de cada salida se agregan con metricas.salida()
+
+    Devuelve la lista de (salida, resumen o False, segundos).
+    """
+    metricas = metricas or Metricas('importar_inventario')
+    print(f"Leyendo archivo: {excel_file}")
+    inicio = time.perf_counter()
+    with metricas.etapa('lectura') as etapa:
+        df = leer_archivo(excel_file, usar_cache)
+        etapa.salida = len(df)
+    segundos_lectura = time.perf_counter() - inicio
+    print(f"✓ {len(df)} filas leídas en {segundos_lectura:.1f} s")
+
+    def snapshot(nombre):
+        return os.path.join(incremental, f"{nombre}_{empresa_id}.pkl") if incremental else None
+
+    generadores = {
+        'inserts': lambda archivo: excel_to_sql(
+            excel_file, empresa_id, archivo, formato=formato, tamano_lote=tamano_lote,
+            bodegas_csv=bodegas_csv, tiendas_csv=tiendas_csv, incremental=snapshot('inserts'), df=df,
+            pool=pool, commit_cada=commit_cada, upsert=upsert,
+            metricas=metricas.salida('inserts', 'excel_to_sql')),
+        'bultos': lambda archivo: actualizar_bultos_desde_excel(
+            excel_file, empresa_id, archivo, formato=formato_updates, tamano_lote=tamano_lote,
+            incremental=snapshot('bultos'), df=df, pool=pool, commit_cada=commit_cada,
+            metricas=metricas.salida('bultos', 'actualizar_bultos')),
+        'precios-mayor': lambda archivo: actualizar_precios_por_mayor_desde_excel(
+            excel_file, empresa_id, archivo, formato=formato_updates, tamano_lote=tamano_lote,
+            incremental=snapshot('precios_mayor'), df=df, pool=pool, commit_cada=commit_cada,
+            metricas=metricas.salida('precios-mayor', 'actualizar_precios_por_mayor')),
+    }
+
+    resultados = []
+    for salida in SALIDAS:
+        if salida not in salidas:
+            continue
+        print(f"\n== {salida} ==")
+        inicio = time.perf_counter()
+        resumen = generadores[salida](salidas[salida])
+        resultados.append((salida, resumen, time.perf_counter() - inicio))
+
+    imprimir_resumen(excel_file, len(df), segundos_lectura, resultados)
+    return resultados
+
+
+def imprimir_resumen(excel_file, filas, segundos_lectura, resultados):
+    """Resumen de todas las salidas de la importación"""
+    print("\n" + "=" * 60)
+    print(f"RESUMEN: {os.path.basename(excel_file)} ({filas} filas)")
+    print("=" * 60)
+    print(f"{'Lectura del Excel':<18} {'':>10} {'':>12} {segundos_lectura:>8.1f}s")
+    print(f"{'Salida':<18} {'Registros':>10} {'Con datos':>12} {'Tiempo':>9}  Archivo")
+    for salida, resumen, segundos in resultados:
+        if not resumen:
+            print(f"{salida:<18} {'ERROR':>10} {'':>12} {segundos:>8.1f}s")
+            continue
+        con_datos = resumen.get('actualizados', resumen['registros'])
+        destino = resumen['output_file'] or 'base de datos'
+        print(f"{salida:<18} {resumen['registros']:>10} {con_datos:>12} {segundos:>8.1f}s  {destino}")
+    total = segundos_lectura + sum(segundos for _, _, segundos in resultados)
+    print(f"{'Total':<18} {'':>10} {'':>12} {total:>8.1f}s")
+    memoria = memoria_pico_mb()
+    if memoria is not None:
+        print(f"✓ Memoria pico: {memoria:.1f} MB")
+
+    errores = [salida for salida, resumen, _ in resultados if not resumen]
+    if errores:
+        print(f"✗ Salidas con error: {', '.join(errores)}")
+    else:
+        print(f"✓ Salidas generadas: {len(resultados)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lee el Excel de inventario una vez y genera INSERT, UPDATE de bultos y UPDATE de precios al por mayor",
+        epilog="Ejemplo:\n"
+               "  python importar_inventario.py inventario.xlsx 1\n"
+               "  python importar_inventario.py inventario.xlsx 1 --bultos --precios-mayor --formato-updates lotes\n"
+               "  python importar_inventario.py inventario.xlsx 1 --inserts inventario.sql --formato copy",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('excel_file', help="Archivo Excel (.xlsx), CSV o Parquet")
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('--inserts', nargs='?', const='', metavar='ARCHIVO', help="Generar los INSERT de juguetes")
+    parser.add_argument('--bultos', nargs='?', const='', metavar='ARCHIVO', help="Generar los UPDATE de bultos")
+    parser.add_argument('--precios-mayor', nargs='?', const='', metavar='ARCHIVO', help="Generar los UPDATE de precio_por_mayor")
+    parser.add_argument('--formato', choices=FORMATOS, default='inserts', help="Formato de los INSERT (por defecto inserts)")
+    parser.add_argument('--formato-updates', choices=FORMATOS_UPDATE, default='updates',
+                        help="Formato de los UPDATE de bultos y precios (por defecto updates)")
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE, help=f"Filas por sentencia en los formatos multi y lotes (por defecto {TAMANO_LOTE})")
+    parser.add_argument('--bodegas-csv', help="Exportación CSV de la tabla bodegas (id, nombre, empresa_id)")
+    parser.add_argument('--tiendas-csv', help="Exportación CSV de la tabla tiendas (id, nombre, empresa_id)")
+    parser.add_argument('--incremental', metavar='CARPETA', help="Generar solo los cambios, con un snapshot por salida en esta carpeta")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché de archivos Excel ya leídos")
+    parser.add_argument('--upsert', action='store_true',
+                        help="INSERT ... ON CONFLICT DO UPDATE: actualizar los juguetes que ya existen en lugar de duplicarlos")
+    carga_db.agregar_opciones(parser)
+    agregar_opciones_metricas(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.excel_file):
+        print(f"Error: El archivo {args.excel_file} no existe")
+        sys.exit(1)
+
+    elegidas = {'inserts': args.inserts, 'bultos': args.bultos, 'precios-mayor': args.precios_mayor}
+    salidas = {salida: archivo or None for salida, archivo in elegidas.items() if archivo is not None}
+    if not salidas:
+        salidas = {salida: None for salida in SALIDAS}
+    if args.cargar and any(salidas.values()):
+        parser.error("--cargar no escribe archivos SQL: quita los nombres de archivo")
+
+    pool = carga_db.pool_de_argumentos(parser, args)
+    metricas = metricas_de_argumentos('importar_inventario', args)
+    try:
+        resultados = importar_inventario(args.excel_file, args.empresa_id, salidas, formato=args.formato,
+                                         formato_updates=args.formato_updates, tamano_lote=args.tamano_lote,
+                                         bodegas_csv=args.bodegas_csv, tiendas_csv=args.tiendas_csv,
+                                         incremental=args.incremental, usar_cache=not args.no_cache,
+                                         pool=pool, commit_cada=args.commit_cada, upsert=args.upsert,
+                                         metricas=metricas)
+    finally:
+        if pool is not None:
+            pool.closeall()
+    guardar_metricas(metricas, args, archivos=[args.excel_file],
+                     ok=all(resumen for _, resumen, _ in resultados))
+    if not all(resumen for _, resumen, _ in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Modo incremental: generar SQL solo para lo que cambió desde la última importación.
+
+Cada script guarda un snapshot (archivo indicado con --incremental) con el
+estado que dejó su última ejecución y en la siguiente compara el Excel contra él:
+
+    - excel_to_sql.py: clave (codigo, ubicación). INSERT para las claves nuevas,
+      UPDATE solo de los campos que cambiaron y lista opcional de las claves que
+      ya no están en el archivo
+    - actualizar_*_desde_excel.py: clave item o codigo. UPDATE solo para los
+      valores nuevos o distintos
+
+Así el SQL generado (y el tiempo de ejecutarlo) depende de la cantidad de
+cambios y no del tamaño del catálogo. El snapshot se actualiza al generar el
+SQL: si ese SQL no se ejecuta, la siguiente ejecución debe usar el snapshot
+anterior (o ninguno, para generar todo otra vez).
+
+El snapshot es un pickle de pandas: solo se deben usar snapshots generados por
+estos scripts.
+"""
+
+import csv
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Cambiar si cambia el contenido del snapshot
+VERSION_SNAPSHOT = 1
+
+# Clave de un registro de inventario y campos que se comparan
+CLAVE_INVENTARIO = ['codigo', 'ubicacion_tipo', 'ubicacion_clave']
+CAMPOS_INVENTARIO = ['nombre', 'item', 'cantidad', 'foto_url', 'precio_min', 'precio_por_mayor',
+                     'numero_bultos', 'cantidad_por_bulto']
+
+
+def leer_snapshot(ruta, tipo, empresa_id):
+    """
+    Datos del snapshot de la última ejecución, o None si todavía no existe.
+    Falla si el snapshot es de otro script, de otra empresa o de otra versión.
+    """
+    if not ruta or not os.path.exists(ruta):
+        return None
+    snapshot = pd.read_pickle(ruta)
+    if not isinstance(snapshot, dict) or snapshot.get('version') != VERSION_SNAPSHOT:
+        raise ValueError(f"{ruta}: no es un snapshot válido de esta versión")
+    if snapshot['tipo'] != tipo:
+        raise ValueError(f"{ruta}: es un snapshot de {snapshot['tipo']}, no de {tipo}")
+    if snapshot['empresa_id'] != empresa_id:
+        raise ValueError(f"{ruta}: es un snapshot de la empresa {snapshot['empresa_id']}, no de la {empresa_id}")
+    return snapshot['datos']
+
+
+def guardar_snapshot(ruta, tipo, empresa_id, datos):
+    """Guarda el snapshot de forma atómica (nunca queda un archivo a medias)"""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(carpeta, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pd.to_pickle({'version': VERSION_SNAPSHOT, 'tipo': tipo, 'empresa_id': empresa_id, 'datos': datos},
+                         f, compression=None)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def cambios(actual, anterior):
+    """Entradas de {clave: valor} que son nuevas o tienen otro valor que en el snapshot"""
+    if anterior is None:
+        return dict(actual)
+    return {clave: valor for clave, valor in actual.items()
+            if clave not in anterior or anterior[clave] != valor}
+
+
+def eliminados(actual, anterior):
+    """Claves del snapshot que ya no están en el archivo"""
+    if anterior is None:
+        return []
+    return [clave for clave in anterior if clave not in actual]
+
+
+def escribir_eliminados(archivo_csv, columnas, filas):
+    """Escribe la lista de eliminados como CSV (columnas: encabezado, filas: tuplas)"""
+    with open(archivo_csv, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(columnas)
+        escritor.writerows(filas)
+
+
+def _con_clave(registros):
+    """Registros con la clave de ubicación (nombre sin distinguir mayúsculas, como en la base de datos)"""
+    registros = registros.copy()
+    registros['ubicacion_clave'] = registros['ubicacion_nombre'].str.lower()
+    return registros
+
+
+def ultimos_por_clave(registros):
+    """
+    Última fila de cada clave (codigo, ubicación), en el orden del archivo. La usa
+    el modo upsert: un archivo con claves repetidas deja la última fila, igual
+    que el snapshot.
+    """
+    repetida = _con_clave(registros).duplicated(CLAVE_INVENTARIO, keep='last').to_numpy()
+    return registros[~repetida]
+
+
+def _iguales(a, b):
+    """Comparación por elemento de dos Series de objetos donde None == None"""
+    a = a.to_numpy(dtype=object)
+    b = b.to_numpy(dtype=object)
+    nulos_a = pd.isna(a)
+    nulos_b = pd.isna(b)
+    iguales = (nulos_a & nulos_b)
+    ambos = ~nulos_a & ~nulos_b
+    iguales[ambos] = a[ambos] == b[ambos]
+    return iguales
+
+
+class DiferenciasInventario:
+    """
+    Diferencias entre los registros limpios del Excel (parsear_columnas) y el snapshot:
+
+        nuevos: registros cuya clave no está en el snapshot (todas sus filas)
+        cambios: lista de (campos que cambiaron, registros) agrupados por campos
+        eliminados: filas del snapshot cuya clave ya no está en el archivo
+        sin_cambios: claves iguales al snapshot
+        repetidas: claves que aparecen más de una vez en el archivo
+        snapshot: estado nuevo (última fila de cada clave) para guardar
+    """
+
+    def __init__(self, registros, anterior):
+        registros = _con_clave(registros)
+        ultimos = registros.drop_duplicates(CLAVE_INVENTARIO, keep='last')
+        self.repetidas = len(registros) - len(ultimos)
+        self.snapshot = ultimos[CLAVE_INVENTARIO + ['ubicacion_nombre'] + CAMPOS_INVENTARIO].reset_index(drop=True)
+
+        if anterior is None:
+            anterior = self.snapshot.iloc[0:0]
+        union = ultimos.merge(anterior, on=CLAVE_INVENTARIO, how='left', suffixes=('', '_anterior'), indicator=True)
+        existe = (union['_merge'] == 'both').to_numpy()
+
+        claves_anteriores = pd.MultiIndex.from_frame(anterior[CLAVE_INVENTARIO])
+        es_nuevo = ~pd.MultiIndex.from_frame(registros[CLAVE_INVENTARIO]).isin(claves_anteriores)
+        self.nuevos = registros[es_nuevo]
+
+        # Campos distintos de cada clave que ya existía
+        distintos = pd.DataFrame({
+            campo: ~_iguales(union[campo], union[f'{campo}_anterior']) & existe
+            for campo in CAMPOS_INVENTARIO
+        })
+        cambiado = distintos.any(axis=1).to_numpy()
+        self.sin_cambios = int((existe & ~cambiado).sum())
+        self.cambios = []
+        grupos = {}
+        for posicion, fila in zip(np.flatnonzero(cambiado), distintos.to_numpy()[cambiado]):
+            campos = tuple(campo for campo, distinto in zip(CAMPOS_INVENTARIO, fila) if distinto)
+            grupos.setdefault(campos, []).append(posicion)
+        for campos, posiciones in grupos.items():
+            self.cambios.append((campos, union.iloc[posiciones]))
+
+        claves_actuales = pd.MultiIndex.from_frame(ultimos[CLAVE_INVENTARIO])
+        self.eliminados = anterior[~claves_anteriores.isin(claves_actuales)]
+
+    @property
+    def cambiados(self):
+        return sum(len(registros) for _, registros in self.cambios)
+
+    def resumen(self):
+        """Línea de resumen para imprimir al final"""
+        return (f"✓ Incremental: {len(self.nuevos)} nuevos, {self.cambiados} con cambios, "
+                f"{self.sin_cambios} sin cambios, {len(self.eliminados)} eliminados")
+
+    def escribir_eliminados(self, archivo_csv):
+        """Escribe las filas eliminadas (codigo, ubicación y últimos valores) como CSV"""
+        columnas = ['codigo', 'ubicacion_tipo', 'ubicacion_nombre'] + CAMPOS_INVENTARIO
+        escribir_eliminados(archivo_csv, columnas, self.eliminados[columnas].itertuples(index=False, name=None))
+
+
+def resumen_cambios(cambiados, total, eliminados_):
+    """Línea de resumen del modo incremental de los scripts de actualización"""
+    return (f"✓ Incremental: {cambiados} nuevos o con cambios, {total - cambiados} sin cambios, "
+            f"{len(eliminados_)} eliminados")
@@ -0,0 +1,573 @@
+"""
+Kardex en memoria: el inventario de todas las bodegas y tiendas con su historia
+
+Carga las exportaciones CSV de juguetes, ventas y movimientos en arreglos de
+NumPy con claves enteras, para conciliar el inventario o responder cuánto había
+de cada juguete en cada ubicación en una fecha sin consultar la base de datos:
+
+    - Cada código y cada ubicación (bodega o tienda) se codifican como enteros
+      (diccionarios que crecen a medida que aparecen); un (codigo, ubicación)
+      es una clave entera. Los textos se guardan una sola vez por código.
+    - Cada venta es un evento (-cantidad en su ubicación) y cada movimiento dos
+      (-cantidad en el origen, +cantidad en el destino). Mientras se cargan, los
+      eventos se aplican al saldo de cada clave con una suma dispersa (np.add.at)
+    - Al cerrar, los eventos se ordenan por clave y fecha y se guarda solo la
+      fecha (int64) y la suma acumulada por clave (int64): 16 bytes por evento.
+      El saldo en una fecha es la suma acumulada del último evento anterior,
+      para todas las claves a la vez o para una sola con una búsqueda binaria
+    - Los precios (precio_min, precio_por_mayor) se guardan por código en
+      arreglos float64, para valorizar el inventario de cada ubicación
+
+La tabla ventas no guarda la ubicación: la venta descuenta el primer juguete
+del código que encuentra. Con la exportación de empleados (id, tienda_id) cada
+venta se asigna a la tienda de su empleado; si no, queda "sin ubicación".
+
+La exportación de juguetes es el estado actual, después de todos los eventos
+(base='actual'): el saldo en una fecha es el actual menos lo que pasó después.
+Con una exportación anterior a los eventos (base='inicial') el saldo es esa
+exportación más lo que pasó antes de la fecha, y conciliar() lo compara con la
+exportación actual.
+
+Uso:
+    python kardex.py juguetes.csv empresa_id [--ventas ventas.csv] [--movimientos movimientos.csv]
+                     [--empleados empleados.csv] [--fecha AAAA-MM-DD] [--codigo CODIGO]
+                     [--inicial juguetes_antes.csv] [--salida saldos.csv] [--metricas metricas.json]
+
+Ejemplo:
+    python kardex.py juguetes.csv 1 --ventas ventas.csv --movimientos movimientos.csv --empleados empleados.csv
+    python kardex.py juguetes.csv 1 --ventas ventas.csv --movimientos movimientos.csv --fecha 2025-01-31 --salida enero.csv
+    python kardex.py juguetes_hoy.csv 1 --inicial juguetes_enero.csv --ventas ventas.csv --movimientos movimientos.csv
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from lectura import leer_exportacion, leer_exportacion_por_bloques
+from metricas import Metricas, agregar_opciones_metricas, metricas_de_argumentos, guardar_metricas
+
+# Tipo de cada ubicación en la clave combinada; 0 = sin ubicación (ventas sin tienda)
+TIPOS_UBICACION = {'bodega': 1, 'tienda': 2}
+NOMBRES_TIPO = {0: 'sin ubicación', 1: 'bodega', 2: 'tienda'}
+
+# Columnas que se leen de las exportaciones de juguetes y movimientos
+COLUMNAS_JUGUETES = ['codigo', 'cantidad', 'bodega_id', 'tienda_id']
+NUMERICAS_JUGUETES = ['cantidad', 'bodega_id', 'tienda_id']
+PRECIOS = ['precio_min', 'precio_por_mayor']
+COLUMNAS_MOVIMIENTOS = ['juguete_codigo', 'created_at', 'tipo_origen', 'tipo_destino', 'cantidad', 'origen_id', 'destino_id']
+
+# Eventos sin fecha: después de todos, como NULLS LAST en el ORDER BY de Postgres
+SIN_FECHA = np.iinfo(np.int64).max
+
+
+def _codificar(valores, indice):
+    """
+    Enteros de valores según su posición en indice (pd.Index), agregando al
+    final los que no están. Cada valor distinto se busca una sola vez.
+    Devuelve (enteros, indice actualizado).
+    """
+    codigos, unicos = pd.factorize(valores)
+    posiciones = indice.get_indexer(unicos)
+    nuevos = posiciones < 0
+    if nuevos.any():
+        posiciones[nuevos] = len(indice) + np.arange(nuevos.sum())
+        indice = indice.append(pd.Index(unicos[nuevos]))
+    return posiciones.astype(np.int64)[codigos], indice
+
+
+def _fechas(serie):
+    """Fechas de texto a int64 (nanosegundos UTC); sin fecha = SIN_FECHA"""
+    fechas = pd.to_datetime(serie, utc=True, format='ISO8601', errors='coerce')
+    return np.where(fechas.isna(), SIN_FECHA, fechas.to_numpy(dtype='datetime64[ns]').view(np.int64))
+
+
+def fecha_a_int(fecha):
+    """'2025-01-31' (fin del día si no tiene hora), datetime o Timestamp a int64 en nanosegundos UTC"""
+    if isinstance(fecha, str) and len(fecha.strip()) == 10:
+        fecha = pd.Timestamp(fecha.strip()) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    marca = pd.Timestamp(fecha)
+    marca = marca.tz_localize('UTC') if marca.tzinfo is None else marca.tz_convert('UTC')
+    return marca.value
+
+
+class Kardex:
+    """
+    Saldos de cada (codigo, ubicación) y sus eventos en arreglos tipados.
+
+    Se llena con cargar_juguetes, agregar_ventas y agregar_movimientos (en
+    cualquier orden y por bloques) y se consulta después de cerrar().
+    """
+
+    def __init__(self, base='actual'):
+        if base not in ('actual', 'inicial'):
+            raise ValueError("base debe ser 'actual' o 'inicial'")
+        self.base = base
+        # Diccionarios: la posición en cada índice es el entero del valor
+        self.codigos = pd.Index([], dtype=object)         # códigos
+        self.ubicaciones = pd.Index([], dtype=np.int64)   # tipo << 32 | id
+        self._claves = pd.Index([], dtype=np.int64)       # código << 32 | ubicación
+        self.saldo = np.zeros(0, dtype=np.int64)            # saldo base por clave (+ eventos si base='inicial')
+        self.movido = np.zeros(0, dtype=np.int64)           # suma de los eventos por clave
+        self.precio_min = np.zeros(0, dtype=np.float64)     # por código
+        self.precio_por_mayor = np.zeros(0, dtype=np.float64)
+        self._bloques = []         # (fecha, clave, cantidad) de cada bloque de eventos
+        self.eventos = 0
+        self.rechazos = Counter()   # filas que no se registran, por motivo
+        self.avisos = Counter()     # filas que se registran con algún problema
+        self.cerrado = False
+
+    # Codificación
+
+    def _claves_de(self, codigos, tipos, ids_ubicacion):
+        """Claves enteras de arreglos alineados de códigos, tipos (0/1/2) e ids de ubicación"""
+        id_codigo, self.codigos = _codificar(codigos, self.codigos)
+        ubicacion, self.ubicaciones = _codificar((tipos.astype(np.int64) << 32) | ids_ubicacion.astype(np.int64),
+                                                 self.ubicaciones)
+        claves, self._claves = _codificar((id_codigo << 32) | ubicacion, self._claves)
+        self._crecer()
+        return claves, id_codigo
+
+    def _crecer(self):
+        """Agranda los arreglos por clave y por código a los tamaños de los diccionarios"""
+        for nombre, tamano in (('saldo', len(self._claves)), ('movido', len(self._claves))):
+            arreglo = getattr(self, nombre)
+            if len(arreglo) < tamano:
+                setattr(self, nombre, np.concatenate([arreglo, np.zeros(tamano - len(arreglo), dtype=np.int64)]))
+        for nombre in ('precio_min', 'precio_por_mayor'):
+            arreglo = getattr(self, nombre)
+            if len(arreglo) < len(self.codigos):
+                setattr(self, nombre, np.concatenate([arreglo, np.full(len(self.codigos) - len(arreglo), np.nan)]))
+
+    @staticmethod
+    def _ubicacion_de(tipo, id_ubicacion):
+        """Tipos de texto (bodega/tienda) e ids a arreglos (tipo 0/1/2, id); los inválidos quedan en tipo -1"""
+        codigo_tipo = tipo.map(TIPOS_UBICACION).fillna(-1).to_numpy(dtype=np.int64, copy=True)
+        ids = id_ubicacion.to_numpy(dtype=np.float64)
+        codigo_tipo[np.isnan(ids)] = -1
+        return codigo_tipo, np.nan_to_num(ids, nan=0).astype(np.int64)
+
+    # Carga
+
+    def cargar_juguetes(self, juguetes):
+        """
+        Saldo base de cada (codigo, ubicación) y precios de cada código desde un
+        bloque de juguetes (codigo, cantidad, bodega_id, tienda_id y los precios
+        si están). Los juguetes sin ubicación se descartan.
+        """
+        self._verificar_abierto()
+        tipo = np.where(juguetes['bodega_id'].notna(), 1, np.where(juguetes['tienda_id'].notna(), 2, -1))
+        validos = tipo >= 0
+        self.rechazos['juguete_sin_ubicacion'] += int((~validos).sum())
+        juguetes = juguetes[validos]
+        ids = juguetes['bodega_id'].fillna(juguetes['tienda_id']).to_numpy(dtype=np.int64)
+        claves, id_codigo = self._claves_de(juguetes['codigo'], tipo[validos], ids)
+        np.add.at(self.saldo, claves, juguetes['cantidad'].fillna(0).to_numpy(dtype=np.int64))
+        # El primer precio que aparece de cada código
+        for campo in ('precio_min', 'precio_por_mayor'):
+            if campo in juguetes.columns:
+                precios = getattr(self, campo)
+                valores = juguetes[campo].to_numpy(dtype=np.float64)
+                sin_precio = np.isnan(precios[id_codigo]) & ~np.isnan(valores)
+                primeros = np.unique(id_codigo[sin_precio], return_index=True)
+                precios[primeros[0]] = valores[sin_precio][primeros[1]]
+
+    def _agregar_eventos(self, fechas, claves, cantidades):
+        """Guarda un bloque de eventos y lo suma a lo movido por clave"""
+        if len(claves):
+            self._bloques.append((fechas.astype(np.int64), claves.astype(np.int32), cantidades.astype(np.int32)))
+            np.add.at(self.movido, claves, cantidades.astype(np.int64))
+            self.eventos += len(claves)
+
+    def agregar_ventas(self, ventas, tienda_de_empleado=None):
+        """
+        Un evento por venta (juguete_codigo, cantidad, created_at, empleado_id):
+        -cantidad en la tienda del empleado según tienda_de_empleado
+        {empleado_id: tienda_id}, o sin ubicación si no se conoce
+        """
+        self._verificar_abierto()
+        cantidad = ventas['cantidad'].fillna(1).to_numpy(dtype=np.int64)
+        tiendas = ventas['empleado_id'].map(tienda_de_empleado or {}).to_numpy(dtype=np.float64)
+        con_tienda = ~np.isnan(tiendas)
+        self.avisos['venta_sin_ubicacion'] += int((~con_tienda).sum())
+        claves, _ = self._claves_de(ventas['juguete_codigo'], np.where(con_tienda, 2, 0), np.nan_to_num(tiendas, nan=0))
+        self._agregar_eventos(_fechas(ventas['created_at']), claves, -cantidad)
+
+    def agregar_movimientos(self, movimientos):
+        """
+        Dos eventos por movimiento (juguete_codigo, cantidad, created_at,
+        tipo_origen, origen_id, tipo_destino, destino_id); los de ubicación
+        inválida se descartan
+        """
+        self._verificar_abierto()
+        tipo_origen, origen = self._ubicacion_de(movimientos['tipo_origen'].str.lower(), movimientos['origen_id'])
+        tipo_destino, destino = self._ubicacion_de(movimientos['tipo_destino'].str.lower(), movimientos['destino_id'])
+        validos = (tipo_origen > 0) & (tipo_destino > 0)
+        self.rechazos['movimiento_ubicacion_invalida'] += int((~validos).sum())
+        codigos = movimientos['juguete_codigo'][validos]
+        cantidad = movimientos['cantidad'].fillna(1).to_numpy(dtype=np.int64)[validos]
+        fechas = _fechas(movimientos['created_at'])[validos]
+        claves_origen, _ = self._claves_de(codigos, tipo_origen[validos], origen[validos])
+        claves_destino, _ = self._claves_de(codigos, tipo_destino[validos], destino[validos])
+        self._agregar_eventos(np.concatenate([fechas, fechas]), np.concatenate([claves_origen, claves_destino]),
+                              np.concatenate([-cantidad, cantidad]))
+
+    def _verificar_abierto(self):
+        if self.cerrado:
+            raise RuntimeError("El kardex ya está cerrado: no se pueden agregar datos")
+
+    def cerrar(self):
+        """
+        Ordena los eventos por clave y fecha y guarda para cada uno solo su fecha
+        y la suma acumulada de su clave (16 bytes por evento); libera los bloques
+        """
+        if self.cerrado:
+            return
+        if self._bloques:
+            fechas = np.concatenate([bloque[0] for bloque in self._bloques])
+            claves = np.concatenate([bloque[1] for bloque in self._bloques])
+            cantidades = np.concatenate([bloque[2] for bloque in self._bloques])
+        else:
+            fechas = np.zeros(0, dtype=np.int64)
+            claves = np.zeros(0, dtype=np.int32)
+            cantidades = np.zeros(0, dtype=np.int32)
+        self._bloques = []
+        # Estable: los eventos de la misma fecha quedan en el orden en que se agregaron
+        orden = np.lexsort((fechas, claves))
+        self.fechas = fechas[orden]
+        del fechas
+        # Límites de los eventos de cada clave: inicio[k]:inicio[k + 1]
+        self.inicio = np.searchsorted(claves[orden], np.arange(len(self._claves) + 1)).astype(np.int64)
+        del claves
+        acumulado = np.cumsum(cantidades[orden], dtype=np.int64)
+        del cantidades, orden
+        # Suma acumulada dentro de cada clave: se resta lo acumulado antes de su primer evento
+        antes = np.concatenate([[0], acumulado])[self.inicio[:-1]]
+        acumulado -= np.repeat(antes, np.diff(self.inicio))
+        self.acumulado = acumulado
+        # El diccionario de claves se reemplaza por una búsqueda binaria en las claves ordenadas
+        self.claves = self._claves.to_numpy(dtype=np.int64)
+        self._orden_claves = np.argsort(self.claves)
+        self._claves = None
+        self.cerrado = True
+
+    def _verificar_cerrado(self):
+        if not self.cerrado:
+            raise RuntimeError("Falta cerrar() el kardex antes de consultarlo")
+
+    # Consultas
+
+    def saldos(self, fecha=None):
+        """
+        Saldo de cada clave (int64) al final de los eventos o en la fecha
+        (texto AAAA-MM-DD = fin de ese día, datetime o Timestamp)
+        """
+        self._verificar_cerrado()
+        if fecha is None:
+            return self.saldo + self.movido if self.base == 'inicial' else self.saldo.copy()
+        limite = fecha_a_int(fecha)
+        # Eventos hasta la fecha de cada clave (las fechas están ordenadas dentro de cada una)
+        hasta = np.concatenate([[0], np.cumsum(self.fechas <= limite)])
+        cuantos = hasta[self.inicio[1:]] - hasta[self.inicio[:-1]]
+        ultimo = self.inicio[:-1] + cuantos - 1
+        movido_hasta = np.where(cuantos > 0, self.acumulado[np.maximum(ultimo, 0)], 0) if len(self.acumulado) \
+            else np.zeros(len(cuantos), dtype=np.int64)
+        if self.base == 'inicial':
+            return self.saldo + movido_hasta
+        return self.saldo - (self.movido - movido_hasta)
+
+    def clave(self, codigo, tipo, id_ubicacion):
+        """Clave de (codigo, tipo, id_ubicacion) o None si no aparece en los datos"""
+        id_codigo = self.codigos.get_indexer([codigo])[0]
+        ubicacion = self.ubicaciones.get_indexer([(TIPOS_UBICACION.get(tipo, 0) << 32) | int(id_ubicacion or 0)])[0]
+        if id_codigo < 0 or ubicacion < 0:
+            return None
+        combinada = (int(id_codigo) << 32) | int(ubicacion)
+        if not self.cerrado:
+            posicion = self._claves.get_indexer([combinada])[0]
+            return int(posicion) if posicion >= 0 else None
+        posicion = np.searchsorted(self.claves, combinada, sorter=self._orden_claves)
+        if posicion < len(self.claves) and self.claves[self._orden_claves[posicion]] == combinada:
+            return int(self._orden_claves[posicion])
+        return None
+
+    def saldo_de(self, clave, fecha=None):
+        """Saldo de una sola clave, con una búsqueda binaria entre sus eventos"""
+        self._verificar_cerrado()
+        inicio, fin = self.inicio[clave], self.inicio[clave + 1]
+        total = int(self.acumulado[fin - 1]) if fin > inicio else 0
+        if fecha is None:
+            movido_hasta = total
+        else:
+            cuantos = np.searchsorted(self.fechas[inicio:fin], fecha_a_int(fecha), side='right')
+            movido_hasta = int(self.acumulado[inicio + cuantos - 1]) if cuantos else 0
+        if self.base == 'inicial':
+            return int(self.saldo[clave]) + movido_hasta
+        return int(self.saldo[clave]) - (total - movido_hasta)
+
+    def historia(self, clave):
+        """DataFrame con la fecha, la cantidad y el saldo después de cada evento de una clave"""
+        self._verificar_cerrado()
+        inicio, fin = self.inicio[clave], self.inicio[clave + 1]
+        acumulado = self.acumulado[inicio:fin]
+        base = self.saldo[clave] if self.base == 'inicial' else self.saldo[clave] - (acumulado[-1] if fin > inicio else 0)
+        fechas = self.fechas[inicio:fin]
+        return pd.DataFrame({
+            'fecha': pd.to_datetime(np.where(fechas == SIN_FECHA, np.iinfo(np.int64).min, fechas), utc=True),
+            'cantidad': np.diff(acumulado, prepend=0),
+            'saldo': base + acumulado,
+        })
+
+    def a_dataframe(self, saldos, incluir_ceros=False):
+        """DataFrame codigo, tipo, ubicacion_id, cantidad, precio_min y valor de un arreglo de saldos"""
+        self._verificar_cerrado()
+        filas = np.arange(len(saldos)) if incluir_ceros else np.flatnonzero(saldos)
+        id_codigo = self.claves[filas] >> 32
+        ubicacion = self.ubicaciones.to_numpy(dtype=np.int64)[self.claves[filas] & 0xFFFFFFFF]
+        precio = self.precio_min[id_codigo]
+        return pd.DataFrame({
+            'codigo': self.codigos.to_numpy(dtype=object)[id_codigo],
+            'tipo': pd.Series(ubicacion >> 32).map(NOMBRES_TIPO).to_numpy(),
+            'ubicacion_id': np.where(ubicacion >> 32 > 0, ubicacion & 0xFFFFFFFF, 0),
+            'cantidad': saldos[filas],
+            'precio_min': precio,
+            'valor': saldos[filas] * precio,
+        })
+
+    def valor_por_ubicacion(self, saldos):
+        """DataFrame tipo, ubicacion_id, unidades y valor (a precio_min) por ubicación"""
+        self._verificar_cerrado()
+        ubicacion = self.claves & 0xFFFFFFFF
+        precios = np.nan_to_num(self.precio_min[self.claves >> 32])
+        unidades = np.bincount(ubicacion, weights=saldos, minlength=len(self.ubicaciones))
+        valor = np.bincount(ubicacion, weights=saldos * precios, minlength=len(self.ubicaciones))
+        combinadas = self.ubicaciones.to_numpy(dtype=np.int64)
+        return pd.DataFrame({
+            'tipo': pd.Series(combinadas >> 32).map(NOMBRES_TIPO).to_numpy(),
+            'ubicacion_id': combinadas & 0xFFFFFFFF,
+            'unidades': unidades.astype(np.int64),
+            'valor': valor,
+        })
+
+    def simular(self, codigos, tipos_origen, origenes, tipos_destino, destinos, cantidades, fecha=None):
+        """
+        Saldos después de aplicar movimientos hipotéticos (arreglos alineados) a
+        los saldos de la fecha, sin modificar el kardex. Devuelve (saldos, negativos)
+        con las claves que quedarían en negativo. Las claves que no existen en
+        los datos se ignoran (sus movimientos no se aplican).
+        """
+        self._verificar_cerrado()
+        saldos = self.saldos(fecha)
+        cantidades = np.asarray(cantidades, dtype=np.int64)
+        claves_origen = np.array([self.clave(*k) if self.clave(*k) is not None else -1
+                                  for k in zip(codigos, tipos_origen, origenes)], dtype=np.int64)
+        claves_destino = np.array([self.clave(*k) if self.clave(*k) is not None else -1
+                                   for k in zip(codigos, tipos_destino, destinos)], dtype=np.int64)
+        validos = (claves_origen >= 0) & (claves_destino >= 0)
+        np.add.at(saldos, claves_origen[validos], -cantidades[validos])
+        np.add.at(saldos, claves_destino[validos], cantidades[validos])
+        return saldos, np.flatnonzero(saldos < 0)
+
+    def conciliar(self, juguetes):
+        """
+        Compara los saldos finales con un DataFrame de juguetes (codigo, cantidad,
+        bodega_id, tienda_id), por ejemplo la exportación actual cuando la base es
+        una anterior. Devuelve las diferencias: codigo, tipo, ubicacion_id,
+        esperado, actual y diferencia (actual - esperado).
+        """
+        self._verificar_cerrado()
+        esperado = self.saldos()
+        tipo = np.where(juguetes['bodega_id'].notna(), 1, np.where(juguetes['tienda_id'].notna(), 2, -1))
+        juguetes = juguetes[tipo > 0]
+        tipo = tipo[tipo > 0]
+        ids = juguetes['bodega_id'].fillna(juguetes['tienda_id']).to_numpy(dtype=np.int64)
+        id_codigo = self.codigos.get_indexer(juguetes['codigo'])
+        ubicacion = self.ubicaciones.get_indexer((tipo.astype(np.int64) << 32) | ids)
+        conocida = (id_codigo >= 0) & (ubicacion >= 0)
+        combinada = (np.maximum(id_codigo, 0).astype(np.int64) << 32) | np.maximum(ubicacion, 0).astype(np.int64)
+        posicion = np.minimum(np.searchsorted(self.claves, combinada, sorter=self._orden_claves), len(self.claves) - 1)
+        clave = self._orden_claves[posicion] if len(self.claves) else np.zeros(len(combinada), dtype=np.int64)
+        conocida &= len(self.claves) > 0 and self.claves[clave] == combinada
+        actual = np.zeros(len(self.claves), dtype=np.int64)
+        np.add.at(actual, clave[conocida], juguetes['cantidad'].fillna(0).to_numpy(dtype=np.int64)[conocida])
+        diferencias = self.a_dataframe(actual - esperado)
+        diferencias.insert(3, 'esperado', esperado[np.flatnonzero(actual - esperado)])
+        diferencias = diferencias.rename(columns={'cantidad': 'diferencia'}).drop(columns=['precio_min', 'valor'])
+        diferencias.insert(4, 'actual', diferencias['esperado'] + diferencias['diferencia'])
+        # Juguetes de (codigo, ubicación) que no aparecen en los datos del kardex
+        nuevos = juguetes[~conocida]
+        if len(nuevos):
+            diferencias = pd.concat([diferencias, pd.DataFrame({
+                'codigo': nuevos['codigo'].to_numpy(),
+                'tipo': pd.Series(tipo[~conocida]).map(NOMBRES_TIPO).to_numpy(),
+                'ubicacion_id': ids[~conocida],
+                'esperado': 0,
+                'actual': nuevos['cantidad'].fillna(0).to_numpy(dtype=np.int64),
+                'diferencia': nuevos['cantidad'].fillna(0).to_numpy(dtype=np.int64),
+            })], ignore_index=True)
+        return diferencias[diferencias['diferencia'] != 0].reset_index(drop=True)
+
+    def memoria(self):
+        """Bytes de los arreglos: {'eventos', 'por_clave', 'por_codigo', 'bytes_por_evento'}"""
+        eventos = (self.fechas.nbytes + self.acumulado.nbytes) if self.cerrado else \
+            sum(f.nbytes + c.nbytes + q.nbytes for f, c, q in self._bloques)
+        por_clave = self.saldo.nbytes + self.movido.nbytes
+        if self.cerrado:
+            por_clave += self.inicio.nbytes + self.claves.nbytes + self._orden_claves.nbytes
+        textos = sum(sys.getsizeof(codigo) for codigo in self.codigos)
+        por_codigo = self.precio_min.nbytes + self.precio_por_mayor.nbytes + textos
+        return {
+            'eventos': eventos,
+            'por_clave': por_clave,
+            'por_codigo': por_codigo,
+            'bytes_por_evento': eventos / self.eventos if self.eventos else 0.0,
+        }
+
+
+def leer_empleados(archivo_csv, empresa_id):
+    """{empleado_id: tienda_id} de la exportación de empleados (los que tienen tienda)"""
+    tiendas = {}
+    for bloque in leer_exportacion_por_bloques(archivo_csv, empresa_id, ['id', 'tienda_id'], numericas=['id', 'tienda_id']):
+        bloque = bloque[bloque['tienda_id'].notna()]
+        tiendas.update(zip(bloque['id'].astype(np.int64).tolist(), bloque['tienda_id'].astype(np.int64).tolist()))
+    return tiendas
+
+
+def cargar_kardex(juguetes_csv, empresa_id, ventas_csv=None, movimientos_csv=None, empleados_csv=None,
+                  base='actual', metricas=None):
+    """Kardex cerrado con las exportaciones de la empresa (las de ventas y movimientos son opcionales)"""
+    metricas = metricas or Metricas('kardex')
+    kardex = Kardex(base)
+    with metricas.etapa('juguetes') as etapa:
+        filas = 0
+        for bloque in leer_exportacion_por_bloques(juguetes_csv, empresa_id, COLUMNAS_JUGUETES,
+                                                   numericas=NUMERICAS_JUGUETES + PRECIOS, opcionales=PRECIOS,
+                                                   limpiar=['codigo']):
+            kardex.cargar_juguetes(bloque)
+            filas += len(bloque)
+        etapa.salida = filas
+    tienda_de_empleado = leer_empleados(empleados_csv, empresa_id) if empleados_csv else None
+    if ventas_csv:
+        with metricas.etapa('ventas') as etapa:
+            antes = kardex.eventos
+            for bloque in leer_exportacion_por_bloques(ventas_csv, empresa_id, ['cantidad', 'empleado_id', 'juguete_codigo', 'created_at'],
+                                                       numericas=['cantidad', 'empleado_id'], limpiar=['juguete_codigo']):
+                kardex.agregar_ventas(bloque, tienda_de_empleado)
+            etapa.salida = kardex.eventos - antes
+    if movimientos_csv:
+        with metricas.etapa('movimientos') as etapa:
+            antes = kardex.eventos
+            for bloque in leer_exportacion_por_bloques(movimientos_csv, empresa_id, COLUMNAS_MOVIMIENTOS,
+                                                       numericas=['cantidad', 'origen_id', 'destino_id'],
+                                                       limpiar=['juguete_codigo', 'tipo_origen', 'tipo_destino']):
+                kardex.agregar_movimientos(bloque)
+            etapa.salida = kardex.eventos - antes
+    with metricas.etapa('cerrar', kardex.eventos, perfilar=True):
+        kardex.cerrar()
+    for motivo, cantidad in kardex.rechazos.items():
+        metricas.rechazar(motivo, cantidad)
+    metricas.avisos.update(kardex.avisos)
+    return kardex
+
+
+def ejecutar(parser, args):
+    metricas = metricas_de_argumentos('kardex', args)
+    # Con --inicial el kardex parte de esa exportación y la de juguetes es la actual, para conciliar
+    kardex = cargar_kardex(args.inicial or args.juguetes_csv, args.empresa_id, args.ventas, args.movimientos,
+                           args.empleados, base='inicial' if args.inicial else 'actual', metricas=metricas)
+    memoria = kardex.memoria()
+    print(f"✓ Claves (codigo, ubicación): {len(kardex.claves)} de {len(kardex.codigos)} códigos "
+          f"en {len(kardex.ubicaciones)} ubicaciones")
+    print(f"✓ Eventos: {kardex.eventos} ({memoria['eventos'] / 2**20:.1f} MB, "
+          f"{memoria['bytes_por_evento']:.0f} bytes por evento)")
+    for motivo, cantidad in (kardex.rechazos + kardex.avisos).most_common():
+        print(f"⚠ {motivo}: {cantidad}")
+
+    with metricas.etapa('consultar', len(kardex.claves)):
+        saldos = kardex.saldos(args.fecha)
+    negativos = int((saldos < 0).sum())
+    cuando = f"al {args.fecha}" if args.fecha else "al final"
+    print(f"✓ Unidades {cuando}: {int(saldos[saldos > 0].sum())} en {int((saldos > 0).sum())} claves")
+    if negativos:
+        print(f"⚠ Claves con saldo negativo {cuando}: {negativos} (eventos que faltan en las exportaciones)")
+    for fila in kardex.valor_por_ubicacion(saldos).itertuples():
+        if fila.unidades:
+            nombre = f"{fila.tipo} {fila.ubicacion_id}" if fila.ubicacion_id else fila.tipo
+            print(f"  {nombre}: {fila.unidades} unidades, valor {fila.valor:,.0f}")
+
+    if args.codigo:
+        for tipo, id_ubicacion in [(NOMBRES_TIPO[u >> 32], u & 0xFFFFFFFF) for u in kardex.ubicaciones]:
+            clave = kardex.clave(args.codigo, tipo, id_ubicacion)
+            if clave is not None:
+                print(f"\n{args.codigo} en {tipo} {id_ubicacion}: {kardex.saldo_de(clave, args.fecha)} {cuando}")
+                print(kardex.historia(clave).to_string(index=False))
+
+    if args.salida:
+        kardex.a_dataframe(saldos).to_csv(args.salida, index=False)
+        print(f"✓ Saldos guardados en: {args.salida}")
+
+    if args.inicial:
+        actual = leer_exportacion(args.juguetes_csv, args.empresa_id, COLUMNAS_JUGUETES, numericas=NUMERICAS_JUGUETES,
+                                  limpiar=['codigo'])
+        diferencias = kardex.conciliar(actual)
+        if len(diferencias):
+            print(f"⚠ Diferencias con {os.path.basename(args.juguetes_csv)}: {len(diferencias)} claves, "
+                  f"{int(diferencias['diferencia'].abs().sum())} unidades")
+        else:
+            print(f"✓ El kardex coincide con {os.path.basename(args.juguetes_csv)}")
+        if args.diferencias:
+            diferencias.to_csv(args.diferencias, index=False)
+            print(f"✓ Diferencias guardadas en: {args.diferencias}")
+    guardar_metricas(metricas, args, archivos=[archivo for archivo in (args.inicial, args.juguetes_csv, args.ventas,
+                                                                        args.movimientos) if archivo],
+                     memoria_kardex=memoria)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inventario de todas las ubicaciones en memoria: saldos en una fecha, valor por ubicación y conciliación",
+        epilog="Ejemplo:\n"
+               "  python kardex.py juguetes.csv 1 --ventas ventas.csv --movimientos movimientos.csv --empleados empleados.csv\n"
+               "  python kardex.py juguetes.csv 1 --ventas ventas.csv --movimientos movimientos.csv --fecha 2025-01-31 --salida enero.csv\n"
+               "  python kardex.py juguetes_hoy.csv 1 --inicial juguetes_enero.csv --ventas ventas.csv --movimientos movimientos.csv",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('juguetes_csv', help="Exportación CSV de la tabla juguetes (el estado actual)")
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('--ventas', metavar='ARCHIVO_CSV', help="Exportación CSV de la tabla ventas")
+    parser.add_argument('--movimientos', metavar='ARCHIVO_CSV', help="Exportación CSV de la tabla movimientos")
+    parser.add_argument('--empleados', metavar='ARCHIVO_CSV',
+                        help="Exportación CSV de la tabla empleados, para ubicar cada venta en la tienda de su empleado")
+    parser.add_argument('--fecha', help="Saldos en esta fecha (AAAA-MM-DD = al final del día, UTC) en lugar de los actuales")
+    parser.add_argument('--codigo', help="Mostrar el saldo y los eventos de este código en cada ubicación")
+    parser.add_argument('--inicial', metavar='ARCHIVO_CSV',
+                        help="Exportación de juguetes anterior a las ventas y movimientos: el kardex parte de ella "
+                             "y se concilia con juguetes_csv")
+    parser.add_argument('--diferencias', metavar='ARCHIVO_CSV', help="Con --inicial, guardar las diferencias de la conciliación")
+    parser.add_argument('--salida', metavar='ARCHIVO_CSV', help="Guardar los saldos (distintos de 0) con su valor en un CSV")
+    agregar_opciones_metricas(parser)
+    args = parser.parse_args()
+
+    if args.diferencias and not args.inicial:
+        parser.error("--diferencias requiere --inicial")
+    if args.fecha:
+        try:
+            fecha_a_int(args.fecha)
+        except ValueError:
+            parser.error(f"--fecha no es una fecha válida: {args.fecha}")
+    for archivo in (args.juguetes_csv, args.ventas, args.movimientos, args.empleados, args.inicial):
+        if archivo and not os.path.exists(archivo):
+            print(f"Error: El archivo {archivo} no existe")
+            sys.exit(1)
+    try:
+        ejecutar(parser, args)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
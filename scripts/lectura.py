@@ -0,0 +1,561 @@
+"""
+Lectura de los archivos de inventario y precios: Excel, CSV o Parquet.
+
+    - leer_archivo / leer_archivo_por_bloques: detectan el formato del archivo
+      (formato_archivo) y usan el lector que corresponde; es lo que usan los scripts
+    - leer_excel: lee el archivo completo con pd.read_excel, usando la caché en
+      disco (cache_excel.py) si el mismo contenido ya se leyó antes
+    - leer_excel_por_bloques: modo streaming, lee el archivo con openpyxl en modo
+      read_only y entrega DataFrames de tamano_bloque filas, así la memoria no crece
+      con el tamaño del archivo
+    - leer_csv / leer_parquet: lectores columnares, un orden de magnitud más
+      rápidos que pd.read_excel (no usan la caché: leerlos cuesta menos que ella)
+    - leer_encabezados: solo los nombres de las columnas, leídos directamente del
+      XML del .xlsx (sin pandas ni openpyxl), para revisar un archivo al instante
+    - leer_exportacion / leer_exportacion_por_bloques: exportaciones CSV de las
+      tablas de la base (juguetes, ventas, movimientos...), con solo las columnas
+      que se usan y las filas de una empresa
+    - memoria_pico_mb: memoria máxima usada por el proceso, para reportarla al final
+
+Los CSV y Parquet entregan un DataFrame como el de pd.read_excel, así que la
+normalización de columnas y el parseo son los mismos para los tres formatos.
+En un CSV los campos de texto (códigos, nombres, ubicaciones) quedan como
+texto; en las demás columnas los números sin ambigüedad (1200, 22684.5) se
+convierten una sola vez a números, por columna, y el resto ("$ 22.684",
+"1.000,50", "12 und") queda como texto para precios.py, igual que una celda
+de texto del Excel. Los Parquet ya traen los tipos y no pasan por texto.
+
+pandas, openpyxl y la caché se importan dentro de las funciones que los usan:
+importar este módulo (toyswall_import.py, metricas.py) no carga pandas.
+"""
+
+import codecs
+import csv
+import math
+import os
+import posixpath
+import re
+import sys
+import zipfile
+from xml.etree import ElementTree
+
+from columnas import columnas_texto
+
+# Filas por bloque en el modo streaming
+TAMANO_BLOQUE = 5000
+
+# Textos que pd.read_excel interpreta como celda vacía
+VALORES_NULOS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+# Extensiones de los formatos de entrada (los Excel y Parquet se reconocen además por su contenido)
+EXTENSIONES_CSV = ('.csv', '.tsv', '.txt')
+EXTENSIONES_PARQUET = ('.parquet', '.pq')
+
+# Firmas de los primeros bytes: Parquet, .xlsx (zip) y .xls (OLE)
+FIRMA_PARQUET = b'PAR1'
+FIRMAS_EXCEL = (b'PK\x03\x04', b'\xd0\xcf\x11\xe0')
+
+# Separadores posibles de un CSV (se usa el más frecuente en el encabezado)
+SEPARADORES_CSV = [',', ';', '\t', '|']
+
+# Números que se convierten al leer un CSV: enteros y decimales con punto y
+# hasta 2 decimales, los que precios.py interpretaría igual como texto
+# ("22.684" no: para precios.py es 22684)
+_NUMERO_CSV = re.compile(r'\d{1,18}(\.\d{1,2})?')
+
+
+def formato_archivo(archivo):
+    """
+    'excel', 'csv' o 'parquet': primero por los primeros bytes del archivo y,
+    si no son de Excel ni de Parquet, por la extensión (por defecto 'excel')
+    """
+    with open(archivo, 'rb') as f:
+        firma = f.read(4)
+    if firma == FIRMA_PARQUET:
+        return 'parquet'
+    if firma in FIRMAS_EXCEL:
+        return 'excel'
+    extension = os.path.splitext(archivo)[1].lower()
+    if extension in EXTENSIONES_CSV:
+        return 'csv'
+    if extension in EXTENSIONES_PARQUET:
+        return 'parquet'
+    return 'excel'
+
+
+def leer_archivo(archivo, usar_cache=True):
+    """Lee la primera hoja del Excel o el CSV/Parquet completo en un DataFrame"""
+    formato = formato_archivo(archivo)
+    if formato == 'csv':
+        return leer_csv(archivo)
+    if formato == 'parquet':
+        return leer_parquet(archivo)
+    return leer_excel(archivo, usar_cache)
+
+
+def leer_archivo_por_bloques(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Modo streaming para los tres formatos (ver leer_excel_por_bloques)"""
+    formato = formato_archivo(archivo)
+    if formato == 'csv':
+        return leer_csv_por_bloques(archivo, tamano_bloque)
+    if formato == 'parquet':
+        return leer_parquet_por_bloques(archivo, tamano_bloque)
+    return leer_excel_por_bloques(archivo, tamano_bloque)
+
+
+def leer_excel(excel_file, usar_cache=True):
+    """
+    Lee la primera hoja del archivo completo en un DataFrame. Con usar_cache el
+    resultado se guarda en la caché y, si el archivo no cambió, se toma de ella
+    sin abrir el Excel.
+    """
+    import pandas as pd
+    from cache_excel import leer_con_cache
+
+    if usar_cache:
+        return leer_con_cache(excel_file, pd.read_excel)
+    return pd.read_excel(excel_file)
+
+
+def _convertir_celda(valor):
+    """Convierte el valor de una celda igual que pd.read_excel"""
+    if valor is None:
+        return math.nan
+    if isinstance(valor, float):
+        if math.isfinite(valor) and valor == int(valor):
+            return int(valor)
+        return valor
+    if isinstance(valor, str) and valor in VALORES_NULOS:
+        return math.nan
+    return valor
+
+
+def _nombres_columnas(encabezado):
+    """
+    Nombres de columnas a partir de la fila de encabezado, igual que pd.read_excel:
+    celdas vacías como 'Unnamed: i' y nombres repetidos como 'nombre.1', 'nombre.2'...
+    """
+    encabezado = list(encabezado)
+    while encabezado and encabezado[-1] is None:
+        encabezado.pop()
+
+    nombres = []
+    vistos = {}
+    for i, valor in enumerate(encabezado):
+        nombre = f'Unnamed: {i}' if valor is None else str(_convertir_celda(valor))
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f'{nombre}.{vistos[nombre]}'
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+
+def leer_excel_por_bloques(excel_file, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Lee la primera hoja fila a fila con openpyxl (read_only) y entrega DataFrames
+    de a lo sumo tamano_bloque filas. El índice de cada bloque continúa el del
+    anterior, como si se hubiera leído todo el archivo (fila de Excel = índice + 2).
+
+    Siempre entrega al menos un bloque (vacío si el archivo solo tiene encabezado).
+    Las filas vacías al final de la hoja se descartan, igual que pd.read_excel.
+    """
+    import openpyxl
+    import pandas as pd
+
+    wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        filas = wb.worksheets[0].iter_rows(values_only=True)
+        columnas = _nombres_columnas(next(filas, ()))
+        ancho = len(columnas)
+
+        bloque = []
+        vacias = []
+        inicio = 0
+        entregado = False
+        for fila in filas:
+            valores = [_convertir_celda(v) for v in fila[:ancho]]
+            valores.extend([math.nan] * (ancho - len(valores)))
+            if all(isinstance(v, float) and math.isnan(v) for v in valores):
+                # Solo se conservan si después aparece una fila con datos
+                vacias.append(valores)
+                continue
+            bloque.extend(vacias)
+            vacias = []
+            bloque.append(valores)
+
+            if len(bloque) >= tamano_bloque:
+                yield pd.DataFrame(bloque[:tamano_bloque], columns=columnas, dtype=object,
+                                   index=pd.RangeIndex(inicio, inicio + tamano_bloque))
+                entregado = True
+                inicio += tamano_bloque
+                bloque = bloque[tamano_bloque:]
+
+        if bloque or not entregado:
+            yield pd.DataFrame(bloque, columns=columnas, dtype=object,
+                               index=pd.RangeIndex(inicio, inicio + len(bloque)))
+    finally:
+        wb.close()
+
+
+def dialecto_csv(archivo):
+    """
+    (codificación, separador) de un CSV: UTF-8 (con o sin BOM) o, si el
+    principio del archivo no es UTF-8 válido, Windows-1252 (exportaciones de
+    Excel en Windows); el separador es el más frecuente en el encabezado
+    """
+    with open(archivo, 'rb') as f:
+        muestra = f.read(1 << 20)
+    codificacion = 'utf-8-sig'
+    try:
+        # final=False: la muestra puede cortar un carácter de varios bytes
+        codecs.getincrementaldecoder(codificacion)().decode(muestra, final=False)
+    except UnicodeDecodeError:
+        codificacion = 'cp1252'
+    encabezado = muestra.split(b'\n', 1)[0].decode(codificacion, errors='replace')
+    return codificacion, max(SEPARADORES_CSV, key=encabezado.count)
+
+
+def _lector_csv(archivo, **opciones):
+    """pd.read_csv con todas las columnas como texto (para _tipos_csv)"""
+    import pandas as pd
+
+    codificacion, separador = dialecto_csv(archivo)
+    return pd.read_csv(archivo, sep=separador, encoding=codificacion, dtype=str, **opciones)
+
+
+def _tipos_csv(df):
+    """
+    Convierte a números las columnas del CSV que no son de texto: si todos los
+    valores son números sin ambigüedad (_NUMERO_CSV) la columna queda int64 o
+    float64, como la de pd.read_excel; si solo algunos, esos pasan a int o
+    float y los demás siguen como texto (una columna mixta, como en el Excel).
+
+    Precios y cantidades se repiten mucho: cada valor distinto se revisa una
+    sola vez (pd.factorize) y el resultado se reparte a las filas.
+    """
+    import numpy as np
+    import pandas as pd
+
+    texto = set(columnas_texto(df.columns))
+    for columna in df.columns:
+        if columna in texto:
+            continue
+        codigos, unicos = pd.factorize(df[columna])
+        unicos = unicos.tolist()
+        # La posición -1 (celda vacía) toma el último elemento
+        es_numero = np.array([_NUMERO_CSV.fullmatch(valor) is not None for valor in unicos] + [False])
+        numeros = es_numero[codigos]
+        if not numeros.any():
+            continue
+        if es_numero[:-1].all():
+            df[columna] = pd.to_numeric(df[columna])
+        else:
+            convertidos = [(int(valor) if '.' not in valor else _convertir_celda(float(valor))) if numero else valor
+                           for valor, numero in zip(unicos, es_numero)]
+            df[columna] = pd.Series(np.array(convertidos + [math.nan], dtype=object)[codigos], index=df.index, dtype=object)
+    return df
+
+
+def limpiar_texto(serie, minusculas=False):
+    """
+    Columna de texto sin espacios alrededor (y en minúsculas), con '' en las
+    vacías. Cada valor distinto se limpia una sola vez (pd.factorize): en las
+    exportaciones de tablas los códigos y los tipos se repiten mucho.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codigos, unicos = pd.factorize(serie)
+    limpios = unicos.str.strip()
+    if minusculas:
+        limpios = limpios.str.lower()
+    # La posición -1 (vacía) toma el último elemento
+    return pd.Series(np.append(limpios.to_numpy(dtype=object), '')[codigos], index=serie.index, dtype=object)
+
+
+def leer_exportacion_por_bloques(archivo_csv, empresa_id, columnas, numericas=(), opcionales=(), limpiar=(),
+                                 tamano_bloque=TAMANO_BLOQUE * 20):
+    """
+    Exportación CSV de una tabla de la base (Supabase o COPY ... CSV HEADER) en
+    bloques de DataFrames con solo las columnas que se usan y, si empresa_id no
+    es None, las filas de la empresa. Los nombres de las columnas se comparan
+    sin espacios ni mayúsculas. Falla si falta alguna de columnas; las
+    opcionales se leen si están.
+
+    Las numericas quedan como int64/float64 (vacío = NaN), el resto como texto
+    (vacío = NaN) y las de limpiar sin espacios alrededor ('' si están vacías).
+    """
+    import pandas as pd
+
+    encabezados = pd.read_csv(archivo_csv, nrows=0).columns
+    nombres = {nombre: nombre.strip().lower() for nombre in encabezados}
+    faltantes = [col for col in columnas if col not in nombres.values()]
+    if faltantes:
+        raise ValueError(f"{archivo_csv}: faltan las columnas {', '.join(faltantes)}")
+    filtrar = empresa_id is not None and 'empresa_id' in nombres.values()
+    buscadas = set(columnas) | set(opcionales) | set(numericas) | ({'empresa_id'} if filtrar else set())
+    numericas = [col for col in numericas if col in nombres.values()] + (['empresa_id'] if filtrar else [])
+    usadas = [nombre for nombre, normalizado in nombres.items() if normalizado in buscadas]
+    # Las columnas numéricas se dejan inferir al lector (mucho más rápido que convertirlas después)
+    tipos = {nombre: str for nombre in usadas if nombres[nombre] not in numericas}
+    for bloque in pd.read_csv(archivo_csv, usecols=usadas, dtype=tipos, keep_default_na=False,
+                              na_values=[''], chunksize=tamano_bloque):
+        bloque = bloque.rename(columns=nombres)
+        for columna in numericas:
+            if not pd.api.types.is_numeric_dtype(bloque[columna]):
+                bloque[columna] = pd.to_numeric(bloque[columna].str.strip(), errors='coerce')
+        if filtrar:
+            bloque = bloque[bloque['empresa_id'] == empresa_id]
+        for columna in limpiar:
+            bloque[columna] = limpiar_texto(bloque[columna])
+        yield bloque
+
+
+def leer_exportacion(archivo_csv, empresa_id, columnas, numericas=(), opcionales=(), limpiar=()):
+    """La exportación completa en un DataFrame (ver leer_exportacion_por_bloques)"""
+    import pandas as pd
+
+    return pd.concat(leer_exportacion_por_bloques(archivo_csv, empresa_id, columnas, numericas, opcionales, limpiar),
+                     ignore_index=True)
+
+
+def _sin_vacias_al_final(df):
+    """Descarta las filas vacías al final (un CSV exportado de Excel suele terminar en ';;;;')"""
+    llenas = df.notna().any(axis=1).to_numpy()
+    ultima = len(llenas) - llenas[::-1].argmax() if llenas.any() else 0
+    return df if ultima == len(df) else df.iloc[:ultima]
+
+
+def leer_csv(archivo):
+    """
+    Lee un CSV completo. Con pyarrow instalado se usa su lector (multihilo);
+    si no, el de pandas, que igual lee 100.000 filas en décimas de segundo.
+    """
+    try:
+        import pyarrow  # noqa: F401
+        motor = 'pyarrow'
+    except ImportError:
+        motor = 'c'
+    return _sin_vacias_al_final(_tipos_csv(_lector_csv(archivo, engine=motor)))
+
+
+def leer_csv_por_bloques(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Lee un CSV por bloques de tamano_bloque filas con el índice continuo, como
+    leer_excel_por_bloques (el lector de pyarrow no lee por bloques)
+    """
+    anterior = None
+    vacios = []
+    with _lector_csv(archivo, chunksize=tamano_bloque) as bloques:
+        for bloque in bloques:
+            bloque = _tipos_csv(bloque)
+            if anterior is not None and bloque.isna().all(axis=None):
+                # Solo se entregan si después aparece un bloque con datos
+                vacios.append(bloque)
+                continue
+            if anterior is not None:
+                yield anterior
+            yield from vacios
+            vacios = []
+            anterior = bloque
+    yield _sin_vacias_al_final(anterior)
+
+
+def _pyarrow_parquet():
+    """Módulo pyarrow.parquet (los Parquet requieren pyarrow)"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Leer archivos Parquet requiere pyarrow: pip install pyarrow") from None
+    return pq
+
+
+def _parquet_a_pandas(tabla):
+    """
+    DataFrame de una tabla de pyarrow. Las columnas decimales (montos del ERP)
+    pasan a float64: como Decimal llegarían a precios.py como texto.
+    """
+    import pyarrow as pa
+
+    esquema = pa.schema([
+        campo.with_type(pa.float64()) if pa.types.is_decimal(campo.type) else campo for campo in tabla.schema
+    ])
+    if esquema != tabla.schema:
+        tabla = tabla.cast(esquema)
+    return tabla.to_pandas()
+
+
+def leer_parquet(archivo):
+    """Lee un Parquet completo; el índice se descarta (la fila del archivo = índice + 2)"""
+    pq = _pyarrow_parquet()
+    return _parquet_a_pandas(pq.read_table(archivo)).reset_index(drop=True)
+
+
+def leer_parquet_por_bloques(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Lee un Parquet por lotes de tamano_bloque filas con el índice continuo"""
+    import pandas as pd
+    import pyarrow as pa
+
+    pq = _pyarrow_parquet()
+    parquet = pq.ParquetFile(archivo)
+    inicio = 0
+    entregado = False
+    for lote in parquet.iter_batches(batch_size=tamano_bloque):
+        df = _parquet_a_pandas(pa.Table.from_batches([lote]))
+        df.index = pd.RangeIndex(inicio, inicio + len(df))
+        inicio += len(df)
+        entregado = True
+        yield df
+    if not entregado:
+        yield _parquet_a_pandas(parquet.schema_arrow.empty_table()).reset_index(drop=True)
+
+
+# Espacios de nombres del formato .xlsx (Office Open XML)
+_XLSX = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELACIONES = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_ID_RELACION = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+
+def _indice_columna(referencia):
+    """Índice (desde 0) de la columna de una referencia de celda como 'AB1'"""
+    indice = 0
+    for letra in re.match(r'[A-Z]+', referencia).group():
+        indice = indice * 26 + ord(letra) - ord('A') + 1
+    return indice - 1
+
+
+def _texto_compartido(si):
+    """Texto de un <si> de sharedStrings.xml (texto simple o con formato, sin la fonética)"""
+    partes = [si.find(f'{_XLSX}t')] + [r.find(f'{_XLSX}t') for r in si.findall(f'{_XLSX}r')]
+    return ''.join(t.text or '' for t in partes if t is not None)
+
+
+def _encabezado_xlsx(libro):
+    """Valores de la primera fila de la primera hoja de un .xlsx abierto con zipfile"""
+    hoja = ElementTree.fromstring(libro.read('xl/workbook.xml')).find(f'{_XLSX}sheets')[0]
+    relaciones = ElementTree.fromstring(libro.read('xl/_rels/workbook.xml.rels'))
+    destino = next(r.get('Target') for r in relaciones.iter(f'{_RELACIONES}Relationship')
+                   if r.get('Id') == hoja.get(_ID_RELACION))
+    ruta = destino.lstrip('/') if destino.startswith('/') else posixpath.normpath(posixpath.join('xl', destino))
+
+    # Solo se recorre la hoja hasta el final de la primera fila
+    celdas = {}
+    with libro.open(ruta) as f:
+        for _, elemento in ElementTree.iterparse(f):
+            if elemento.tag == f'{_XLSX}c':
+                referencia = elemento.get('r')
+                indice = _indice_columna(referencia) if referencia else len(celdas)
+                tipo = elemento.get('t')
+                if tipo == 'inlineStr':
+                    celdas[indice] = ('texto', ''.join(t.text or '' for t in elemento.iter(f'{_XLSX}t')))
+                else:
+                    valor = elemento.find(f'{_XLSX}v')
+                    if valor is not None and valor.text is not None:
+                        celdas[indice] = ({'s': 'compartido', 'str': 'texto', 'b': 'booleano'}.get(tipo, 'numero'),
+                                          valor.text)
+            elif elemento.tag == f'{_XLSX}row':
+                break
+
+    # Los textos compartidos se leen hasta el último que usa el encabezado
+    compartidos = {int(valor) for tipo, valor in celdas.values() if tipo == 'compartido'}
+    textos = {}
+    if compartidos:
+        with libro.open('xl/sharedStrings.xml') as f:
+            for i, (_, si) in enumerate(e for e in ElementTree.iterparse(f) if e[1].tag == f'{_XLSX}si'):
+                if i in compartidos:
+                    textos[i] = _texto_compartido(si)
+                si.clear()
+                if i >= max(compartidos):
+                    break
+
+    valores = [None] * (max(celdas) + 1 if celdas else 0)
+    for indice, (tipo, valor) in celdas.items():
+        if tipo == 'compartido':
+            valores[indice] = textos[int(valor)]
+        elif tipo == 'numero':
+            valores[indice] = float(valor)
+        elif tipo == 'booleano':
+            valores[indice] = valor == '1'
+        else:
+            valores[indice] = valor
+    return valores
+
+
+def leer_encabezados(excel_file):
+    """
+    Nombres de las columnas de la primera hoja, iguales a los de pd.read_excel,
+    sin leer el resto del archivo. Los .xlsx se leen directamente del XML (unos
+    milisegundos aunque el archivo sea enorme), los CSV con el módulo csv y los
+    Parquet de su esquema; otros formatos, con pandas.
+    """
+    formato = formato_archivo(excel_file)
+    if formato == 'csv':
+        codificacion, separador = dialecto_csv(excel_file)
+        with open(excel_file, newline='', encoding=codificacion) as f:
+            encabezado = next(csv.reader(f, delimiter=separador), [])
+        return _nombres_columnas([valor or None for valor in encabezado])
+    if formato == 'parquet':
+        return [nombre for nombre in _pyarrow_parquet().read_schema(excel_file).names
+                if not nombre.startswith('__index_level_')]
+
+    if zipfile.is_zipfile(excel_file):
+        try:
+            with zipfile.ZipFile(excel_file) as libro:
+                return _nombres_columnas(_encabezado_xlsx(libro))
+        except (KeyError, IndexError, TypeError, StopIteration, ElementTree.ParseError):
+            pass  # Un .xlsx con una estructura distinta: se lee con openpyxl
+        import openpyxl
+        wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+        try:
+            return _nombres_columnas(next(wb.worksheets[0].iter_rows(values_only=True), ()))
+        finally:
+            wb.close()
+
+    import pandas as pd
+    return [str(columna) for columna in pd.read_excel(excel_file, nrows=0).columns]
+
+
+def memoria_pico_mb():
+    """
+    Memoria máxima (RSS) usada por el proceso en MB, o None si no se puede obtener
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS reporta bytes
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        contadores = PROCESS_MEMORY_COUNTERS()
+        contadores.cb = ctypes.sizeof(contadores)
+        proceso = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+            return contadores.PeakWorkingSetSize / (1024 * 1024)
+
+    return None
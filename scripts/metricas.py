@@ -0,0 +1,205 @@
+"""
+Métricas por etapa de los scripts de importación (--metricas / --metrics).
+
+Cada script divide su trabajo en etapas:
+
+    - lectura: leer el Excel (pd.read_excel, la caché o cada bloque en streaming)
+      o el CSV/Parquet
+    - normalizar: renombrar las columnas según los alias
+    - parsear: limpiar y validar los valores (precios, cantidades, ubicaciones)
+    - incremental: comparar con el snapshot (solo con --incremental)
+    - emitir: generar y escribir el SQL, o cargarlo con --cargar
+
+Por cada etapa se registran el tiempo, las filas de entrada y de salida, las
+filas por segundo y cuánto subió la memoria pico del proceso durante la etapa;
+además se cuentan las filas rechazadas por motivo y, una vez por ejecución, la
+memoria pico del proceso. En modo
+streaming cada etapa se ejecuta una vez por bloque y se acumula.
+
+Medir cuesta unas pocas llamadas a perf_counter y getrusage por etapa, así que
+siempre se mide; con --metricas archivo.json el reporte se guarda en JSON al
+terminar. Con --perfil archivo.prof el parseo (y el recorrido fila a fila de
+los scripts de actualización) se ejecuta bajo cProfile y las estadísticas se
+guardan para verlas con python -m pstats archivo.prof.
+
+La memoria es la del proceso (RSS máximo, ver lectura.memoria_pico_mb), no la
+de cada etapa por separado: el máximo al terminar una etapa incluye todo lo
+anterior, así que por etapa solo se reporta cuánto subió (la etapa en la que
+sube es la que más memoria usa).
+
+importar_inventario.py mide la lectura en sus propias métricas y cada salida en
+unas métricas hijas (salida()), que en el JSON quedan en "salidas".
+"""
+
+import cProfile
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from lectura import memoria_pico_mb
+
+VERSION_REPORTE = 2
+
+# Motivo de cada aviso de parsear_filas/parsear_columnas (por el texto del mensaje)
+MOTIVOS_AVISO = [
+    ('Formato de ubicación incorrecto', 'ubicacion_formato'),
+    ('Tipo de ubicación debe ser', 'ubicacion_tipo'),
+    ('Cantidad es 0', 'cantidad_cero'),
+    ('Error procesando', 'error'),
+]
+
+
+class Medicion:
+    """
+    Filas de entrada y de salida de una ejecución de una etapa (salida None:
+    igual a la entrada; entrada None: igual a la salida)
+    """
+
+    def __init__(self, entrada):
+        self.entrada = entrada
+        self.salida = None
+
+
+class Metricas:
+    """
+    Tiempos, filas y memoria por etapa de una ejecución de un script.
+
+    Uso:
+        with metricas.etapa('parsear', len(df), perfilar=True) as etapa:
+            registros, avisos = parsear_columnas(df)
+            etapa.salida = len(registros)
+    """
+
+    def __init__(self, script, perfilador=None):
+        self.script = script
+        self.perfilador = perfilador
+        self.fecha = datetime.now()
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.rechazos = Counter()
+        self.avisos = Counter()
+        self.salidas = {}
+
+    def salida(self, nombre, script):
+        """Métricas hijas de una salida (con el mismo perfilador), incluidas en el reporte"""
+        self.salidas[nombre] = Metricas(script, self.perfilador)
+        return self.salidas[nombre]
+
+    @contextmanager
+    def etapa(self, nombre, filas=None, perfilar=False):
+        """
+        Mide el bloque como parte de la etapa nombre. filas son las filas de
+        entrada; las de salida se indican en la medición (por defecto las mismas).
+        Con perfilar el bloque se ejecuta bajo el perfilador (--perfil).
+        """
+        medicion = Medicion(filas)
+        memoria_antes = memoria_pico_mb()
+        perfilador = self.perfilador if perfilar else None
+        if perfilador is not None:
+            perfilador.enable()
+        inicio = time.perf_counter()
+        try:
+            yield medicion
+        finally:
+            segundos = time.perf_counter() - inicio
+            if perfilador is not None:
+                perfilador.disable()
+            memoria = memoria_pico_mb()
+            acumulado = self.etapas.setdefault(nombre, {
+                'segundos': 0.0, 'filas_entrada': 0, 'filas_salida': 0,
+                'memoria_aumento_mb': None,
+            })
+            acumulado['segundos'] += segundos
+            # Sin filas de entrada (la lectura) se cuentan las de salida
+            salida = medicion.entrada if medicion.salida is None else medicion.salida
+            entrada = medicion.entrada if medicion.entrada is not None else salida
+            acumulado['filas_entrada'] += entrada or 0
+            acumulado['filas_salida'] += salida or 0
+            if memoria is not None:
+                acumulado['memoria_aumento_mb'] = (acumulado['memoria_aumento_mb'] or 0.0) + memoria - memoria_antes
+
+    def rechazar(self, motivo, cantidad=1):
+        """Cuenta filas rechazadas (que no llegan al SQL) por motivo"""
+        if cantidad:
+            self.rechazos[motivo] += cantidad
+
+    def contar_avisos(self, avisos):
+        """
+        Clasifica los avisos de parsear_filas/parsear_columnas: los de filas que
+        se omiten (o con error) son rechazos; los demás (cantidad 0) solo avisos
+        """
+        for aviso in avisos:
+            motivo = next((motivo for texto, motivo in MOTIVOS_AVISO if texto in aviso), 'otro')
+            if aviso.endswith('Se omite.') or aviso.startswith('Error'):
+                self.rechazos[motivo] += 1
+            else:
+                self.avisos[motivo] += 1
+
+    def reporte(self, **datos):
+        """Diccionario con todas las métricas (lo que se guarda en el JSON); datos se agregan al final"""
+        etapas = {}
+        for nombre, acumulado in self.etapas.items():
+            segundos = acumulado['segundos']
+            etapas[nombre] = {
+                'segundos': round(segundos, 4),
+                'filas_entrada': acumulado['filas_entrada'],
+                'filas_salida': acumulado['filas_salida'],
+                'filas_por_segundo': round(acumulado['filas_entrada'] / segundos) if segundos else None,
+                'memoria_aumento_mb': None if acumulado['memoria_aumento_mb'] is None else round(acumulado['memoria_aumento_mb'], 1),
+            }
+        memoria = memoria_pico_mb()
+        reporte = {
+            'version': VERSION_REPORTE,
+            'script': self.script,
+            'fecha': self.fecha.isoformat(timespec='seconds'),
+            'segundos_total': round(time.perf_counter() - self.inicio, 4),
+            'filas_leidas': etapas.get('lectura', {}).get('filas_salida'),
+            'filas_emitidas': etapas.get('emitir', {}).get('filas_salida'),
+            'rechazos': dict(self.rechazos.most_common()),
+            'avisos': dict(self.avisos.most_common()),
+            'memoria_pico_mb': None if memoria is None else round(memoria, 1),
+            'etapas': etapas,
+        }
+        if self.salidas:
+            reporte['salidas'] = {nombre: salida.reporte() for nombre, salida in self.salidas.items()}
+        return {**reporte, **datos}
+
+    def imprimir(self, sangria='  '):
+        """Una línea por etapa: tiempo, filas por segundo y memoria (y lo mismo por cada salida)"""
+        for nombre, etapa in self.reporte()['etapas'].items():
+            velocidad = f"{etapa['filas_por_segundo']:>12,} filas/s" if etapa['filas_por_segundo'] else ' ' * 19
+            memoria = f"  +{etapa['memoria_aumento_mb']:.1f} MB" if etapa['memoria_aumento_mb'] is not None else ''
+            print(f"{sangria}{nombre:<12} {etapa['segundos']:8.3f} s  {etapa['filas_entrada']:>10,} filas {velocidad}{memoria}")
+        if self.rechazos:
+            print(f"{sangria}Filas rechazadas: " + ', '.join(f"{motivo} {cantidad}" for motivo, cantidad in self.rechazos.most_common()))
+        for nombre, salida in self.salidas.items():
+            print(f"{sangria}{nombre}:")
+            salida.imprimir(sangria + '  ')
+
+
+def agregar_opciones_metricas(parser):
+    """Opciones --metricas y --perfil de los scripts"""
+    parser.add_argument('--metricas', '--metrics', metavar='ARCHIVO_JSON',
+                        help="Guardar las métricas por etapa (tiempo, filas, filas/s, rechazos, memoria) en un JSON")
+    parser.add_argument('--perfil', '--profile', metavar='ARCHIVO',
+                        help="Ejecutar el parseo bajo cProfile y guardar las estadísticas (python -m pstats ARCHIVO)")
+
+
+def metricas_de_argumentos(script, args):
+    """Métricas del script con el perfilador de --perfil (si se pidió)"""
+    return Metricas(script, cProfile.Profile() if args.perfil else None)
+
+
+def guardar_metricas(metricas, args, **datos):
+    """Guarda el reporte (--metricas) y el perfil (--perfil) si se pidieron"""
+    if args.metricas:
+        print("\nMétricas por etapa:")
+        metricas.imprimir()
+        with open(args.metricas, 'w', encoding='utf-8') as f:
+            json.dump(metricas.reporte(**datos), f, indent=2, ensure_ascii=False, default=str)
+        print(f"✓ Métricas guardadas en: {args.metricas}")
+    if args.perfil:
+        metricas.perfilador.dump_stats(args.perfil)
+        print(f"✓ Perfil guardado en: {args.perfil} (python -m pstats {args.perfil})")
@@ -0,0 +1,128 @@
+"""
+Opciones de línea de comandos de los scripts de importación.
+
+Cada script arma su parser con estas funciones y toyswall_import.py las usa
+para sus subcomandos, así las opciones y las validaciones son las mismas en los
+dos lugares. El módulo no importa pandas ni openpyxl: validar los argumentos o
+mostrar --help no cuesta el segundo que tarda en cargar pandas.
+"""
+
+import os
+import sys
+
+import carga_db
+from lectura import TAMANO_BLOQUE
+from duplicados import POLITICAS
+from metricas import agregar_opciones_metricas
+from salida_sql import FORMATOS, FORMATOS_UPDATE, TAMANO_LOTE
+
+# Argumentos que son archivos de entrada (se valida que existan)
+ARCHIVOS_ENTRADA = ['excel_file', 'precio_final_file', 'precios_mayorista_file', 'juguetes_csv']
+
+# Los scripts leen Excel, CSV o Parquet (ver lectura.formato_archivo)
+AYUDA_ARCHIVO = "Archivo Excel (.xlsx), CSV o Parquet"
+
+
+def _opciones_inserts(parser):
+    """Opciones comunes de excel_to_sql.py y procesar_inventario.py"""
+    parser.add_argument('--streaming', action='store_true', help="Leer el archivo por bloques con memoria constante (archivos muy grandes)")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE, help=f"Filas por bloque en modo streaming (por defecto {TAMANO_BLOQUE})")
+    parser.add_argument('--formato', choices=FORMATOS, default='inserts',
+                        help="Formato del SQL: un INSERT por registro, INSERT de varias filas o COPY para psql (por defecto inserts)")
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE, help=f"Filas por INSERT en el formato multi (por defecto {TAMANO_LOTE})")
+    parser.add_argument('--bodegas-csv', help="Exportación CSV de la tabla bodegas (id, nombre, empresa_id) para resolver las bodegas al generar el SQL")
+    parser.add_argument('--tiendas-csv', help="Exportación CSV de la tabla tiendas (id, nombre, empresa_id) para resolver las tiendas al generar el SQL")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché de archivos Excel ya leídos")
+    parser.add_argument('--duplicados', choices=POLITICAS,
+                        help="Revisar las claves (codigo, ubicación) e items repetidos antes de escribir: sumar las "
+                             "cantidades, dejar la última fila o rechazar las repetidas (ver duplicados.py)")
+    parser.add_argument('--juguetes-csv', help="Con --duplicados, exportación CSV de la tabla juguetes: no se insertan "
+                                               "filas que ya existen (las ubicaciones se resuelven con --bodegas-csv/--tiendas-csv)")
+    parser.add_argument('--reporte-duplicados', metavar='ARCHIVO_CSV',
+                        help="Con --duplicados, guardar las filas repetidas o en conflicto con el motivo y la acción")
+
+
+def _opciones_updates(parser, clave):
+    """Opciones comunes de los scripts actualizar_*_desde_excel.py (clave: 'códigos' o 'items')"""
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE, help=f"{clave.capitalize()} por UPDATE en el formato lotes (por defecto {TAMANO_LOTE})")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché de archivos Excel ya leídos")
+    parser.add_argument('--incremental', metavar='SNAPSHOT',
+                        help="Generar solo los cambios respecto al snapshot de la última ejecución (se crea si no existe)")
+    en = 'en los Excel' if clave == 'items' else 'en el Excel'
+    parser.add_argument('--eliminados', metavar='ARCHIVO_CSV', help=f"Con --incremental, guardar los {clave} que ya no están {en}")
+    carga_db.agregar_opciones(parser)
+    agregar_opciones_metricas(parser)
+
+
+def opciones_insert(parser):
+    """Argumentos de excel_to_sql.py"""
+    parser.add_argument('excel_file', help=AYUDA_ARCHIVO)
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('output_file', nargs='?', help="Archivo SQL de salida (opcional)")
+    parser.add_argument('--por-filas', action='store_true', help="Procesar fila a fila en lugar de columna a columna")
+    _opciones_inserts(parser)
+    parser.add_argument('--incremental', metavar='SNAPSHOT',
+                        help="Generar solo los cambios respecto al snapshot de la última importación (se crea si no existe)")
+    parser.add_argument('--eliminados', metavar='ARCHIVO_CSV', help="Con --incremental, guardar las filas que ya no están en el Excel")
+    parser.add_argument('--upsert', action='store_true',
+                        help="INSERT ... ON CONFLICT DO UPDATE: actualizar los juguetes que ya existen en la ubicación en lugar de duplicarlos")
+    carga_db.agregar_opciones(parser)
+    agregar_opciones_metricas(parser)
+
+
+def opciones_procesar(parser):
+    """Argumentos de procesar_inventario.py"""
+    parser.add_argument('excel_file', help=AYUDA_ARCHIVO)
+    parser.add_argument('empresa_id', type=int, nargs='?', default=1, help="ID de la empresa (por defecto 1)")
+    _opciones_inserts(parser)
+    parser.add_argument('--upsert', action='store_true',
+                        help="INSERT ... ON CONFLICT DO UPDATE: actualizar los juguetes que ya existen en la ubicación en lugar de duplicarlos")
+    agregar_opciones_metricas(parser)
+
+
+def opciones_precios(parser):
+    """Argumentos de actualizar_precios_desde_excel.py"""
+    parser.add_argument('precio_final_file', help="Archivo Excel (o CSV/Parquet) con los precios finales (precio mínimo)")
+    parser.add_argument('precios_mayorista_file', help="Archivo Excel (o CSV/Parquet) con los precios mayoristas")
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('output_file', nargs='?', help="Archivo SQL de salida (opcional)")
+    parser.add_argument('--formato', choices=FORMATOS_UPDATE, default='updates',
+                        help="Un UPDATE por item o UPDATE ... FROM (VALUES ...) por lotes (por defecto updates)")
+    _opciones_updates(parser, 'items')
+
+
+def opciones_precios_mayor(parser):
+    """Argumentos de actualizar_precios_por_mayor_desde_excel.py"""
+    parser.add_argument('excel_file', help=AYUDA_ARCHIVO)
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('output_file', nargs='?', help="Archivo SQL de salida (opcional)")
+    parser.add_argument('--formato', choices=FORMATOS_UPDATE, default='updates',
+                        help="Un UPDATE por fila o UPDATE ... FROM (VALUES ...) por lotes (por defecto updates)")
+    _opciones_updates(parser, 'códigos')
+
+
+def opciones_bultos(parser):
+    """Argumentos de actualizar_bultos_desde_excel.py (los mismos que los de precios al por mayor)"""
+    opciones_precios_mayor(parser)
+
+
+def validar(parser, args):
+    """
+    Validaciones que no necesitan leer el Excel: combinaciones de opciones,
+    tamaños mayores que 0 y que los archivos de entrada existan. Termina el
+    proceso si algo no es válido.
+    """
+    if getattr(args, 'eliminados', None) and not args.incremental:
+        parser.error("--eliminados requiere --incremental")
+    for opcion in ('juguetes_csv', 'reporte_duplicados'):
+        if getattr(args, opcion, None) and not args.duplicados:
+            parser.error(f"--{opcion.replace('_', '-')} requiere --duplicados")
+    for opcion in ('tamano_lote', 'tamano_bloque'):
+        if getattr(args, opcion, 1) < 1:
+            parser.error(f"--{opcion.replace('_', '-')} debe ser mayor que 0")
+
+    for argumento in ARCHIVOS_ENTRADA:
+        archivo = getattr(args, argumento, None)
+        if archivo is not None and not os.path.exists(archivo):
+            print(f"Error: El archivo {archivo} no existe")
+            sys.exit(1)
@@ -0,0 +1,379 @@
+"""
+Optimización en lote de las fotos de los juguetes
+
+Toma una carpeta de fotos nombradas por el código (o el item) del juguete, por
+ejemplo "JUG-001.jpg", y genera con varios procesos a la vez dos versiones
+reducidas en WebP de cada una:
+
+    miniatura   para las cuadrículas del inventario (--miniatura px de lado, 240 por defecto)
+    mediana     para ver el juguete (--mediana px de lado, 1024 por defecto)
+
+Las fotos no se agrandan y se respeta la orientación EXIF. Los archivos quedan
+en <salida>/miniatura y <salida>/mediana con un hash de la foto y las opciones
+en el nombre (JUG-001-3fa2b1c0.webp): al cambiar la foto cambia la URL y los
+navegadores no muestran la versión vieja guardada en caché.
+
+El manifiesto (<salida>/manifiesto.json) guarda por cada código el hash SHA-256
+de la foto original y sus versiones. En la siguiente ejecución solo se procesan
+las fotos nuevas o cuyo contenido cambió (con el mismo tamaño y fecha de
+modificación ni siquiera se vuelve a calcular el hash); si cambian las opciones
+(tamaños o calidad) se procesan todas otra vez.
+
+Genera además el SQL que apunta juguetes.foto_url a la versión --variante-url
+de cada foto procesada, con la URL pública donde se suben las versiones
+(--url-base, por ejemplo la carpeta del bucket 'juguetes' de Supabase Storage).
+
+Requiere Pillow (pip install Pillow), que solo se importa al procesar fotos.
+
+Uso:
+    python optimizar_fotos.py <carpeta_fotos> <empresa_id> --url-base URL [archivo_salida.sql]
+                              [--salida DIR] [--clave codigo|item] [--variante-url miniatura|mediana]
+                              [--miniatura PX] [--mediana PX] [--calidad N] [--trabajadores N] [--todas]
+
+Ejemplo:
+    python optimizar_fotos.py fotos/ 1 --url-base https://xyz.supabase.co/storage/v1/object/public/juguetes/optimizadas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+from salida_sql import escribir_updates_por_lotes, TAMANO_LOTE
+
+EXTENSIONES_FOTO = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff')
+
+# Lado mayor de cada versión, en píxeles
+TAMANOS = {'miniatura': 240, 'mediana': 1024}
+
+CALIDAD = 80
+
+EXTENSION_SALIDA = '.webp'
+
+NOMBRE_MANIFIESTO = 'manifiesto.json'
+
+# Caracteres del hash en el nombre de las versiones
+LARGO_HASH = 8
+
+
+def _pil():
+    """Módulos Image e ImageOps de Pillow (optimizar fotos requiere Pillow)"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise RuntimeError("Optimizar fotos requiere Pillow: pip install Pillow") from None
+    return Image, ImageOps
+
+
+def buscar_fotos(carpeta):
+    """
+    {nombre: ruta} de las fotos de una carpeta, con el nombre del archivo sin
+    extensión como clave. Si un nombre se repite con otra extensión
+    (JUG-001.jpg y JUG-001.png) se usa el primero en orden alfabético y se
+    devuelve la lista de los omitidos.
+    """
+    fotos = {}
+    omitidas = []
+    for archivo in sorted(os.listdir(carpeta)):
+        ruta = os.path.join(carpeta, archivo)
+        nombre, extension = os.path.splitext(archivo)
+        if not os.path.isfile(ruta) or extension.lower() not in EXTENSIONES_FOTO or not nombre.strip():
+            continue
+        nombre = nombre.strip()
+        if nombre in fotos:
+            omitidas.append(ruta)
+        else:
+            fotos[nombre] = ruta
+    return fotos, omitidas
+
+
+def hash_archivo(ruta):
+    """Hash SHA-256 (hexadecimal) del contenido de un archivo"""
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def leer_manifiesto(ruta):
+    """Manifiesto de la ejecución anterior (vacío si no existe)"""
+    if not os.path.exists(ruta):
+        return {'opciones': None, 'fotos': {}}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_manifiesto(ruta, manifiesto):
+    """Escribe el manifiesto en un archivo temporal y lo reemplaza (nunca queda a medias)"""
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(temporal, ruta)
+
+
+def pendientes(fotos, manifiesto, opciones, salida_dir):
+    """
+    Fotos que hay que procesar: [(nombre, ruta, hash, tamaño, modificado)].
+    Se omiten las que tienen el mismo hash que en el manifiesto, con las mismas
+    opciones y sus versiones en disco. El hash solo se calcula si el tamaño o
+    la fecha de modificación cambiaron.
+    """
+    anteriores = manifiesto['fotos'] if manifiesto.get('opciones') == opciones else {}
+    tareas = []
+    for nombre, ruta in fotos.items():
+        estado = os.stat(ruta)
+        anterior = anteriores.get(nombre)
+        if anterior and (anterior['bytes_original'], anterior['modificado']) == (estado.st_size, estado.st_mtime_ns):
+            contenido = anterior['hash']
+        else:
+            contenido = hash_archivo(ruta)
+        if (anterior and anterior['hash'] == contenido
+                and all(os.path.exists(os.path.join(salida_dir, v['ruta'])) for v in anterior['variantes'].values())):
+            # Sin cambios; se actualiza la fecha por si solo se tocó el archivo
+            anterior['modificado'] = estado.st_mtime_ns
+            continue
+        tareas.append((nombre, ruta, contenido, estado.st_size, estado.st_mtime_ns))
+    return tareas
+
+
+def sufijo_versiones(contenido, opciones):
+    """Hash corto de la foto y las opciones para el nombre de sus versiones"""
+    texto = contenido + json.dumps(opciones, sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:LARGO_HASH]
+
+
+def _guardar_version(imagen, ruta, calidad):
+    """Guarda una versión en WebP a través de un archivo temporal"""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    imagen.save(temporal, format='WEBP', quality=calidad, method=6)
+    os.replace(temporal, ruta)
+    return os.path.getsize(ruta)
+
+
+def _optimizar(tarea):
+    """
+    Genera las versiones de una foto en un proceso del pool. Devuelve la
+    entrada del manifiesto, o el error si la foto no se pudo leer.
+    """
+    nombre, ruta, contenido, bytes_original, modificado, salida_dir, tamanos, calidad, sufijo = tarea
+    inicio = time.perf_counter()
+    try:
+        Image, ImageOps = _pil()
+        with Image.open(ruta) as original:
+            # Los JPEG se decodifican directamente a una escala menor (más rápido y con menos memoria)
+            original.draft('RGB', (max(tamanos.values()),) * 2)
+            imagen = ImageOps.exif_transpose(original)
+            transparente = imagen.mode in ('RGBA', 'LA', 'PA') or 'transparency' in imagen.info
+            imagen = imagen.convert('RGBA' if transparente else 'RGB')
+
+        variantes = {}
+        # De la más grande a la más chica: cada una se reduce desde la anterior
+        for variante, lado in sorted(tamanos.items(), key=lambda t: -t[1]):
+            imagen.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            relativa = f"{variante}/{nombre}-{sufijo}{EXTENSION_SALIDA}"
+            tamano = _guardar_version(imagen, os.path.join(salida_dir, relativa), calidad)
+            variantes[variante] = {'ruta': relativa, 'ancho': imagen.width, 'alto': imagen.height, 'bytes': tamano}
+    except Exception as e:
+        return {'nombre': nombre, 'original': ruta, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    return {
+        'nombre': nombre,
+        'original': ruta,
+        'ok': True,
+        'entrada': {
+            'original': os.path.abspath(ruta),
+            'hash': contenido,
+            'bytes_original': bytes_original,
+            'modificado': modificado,
+            'variantes': variantes,
+        },
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def quitar_versiones_viejas(salida_dir, anterior, nueva):
+    """Borra las versiones de la entrada anterior que la nueva ya no usa"""
+    usadas = {v['ruta'] for v in nueva['variantes'].values()}
+    for version in anterior['variantes'].values():
+        if version['ruta'] not in usadas:
+            try:
+                os.remove(os.path.join(salida_dir, version['ruta']))
+            except FileNotFoundError:
+                pass
+
+
+def url_publica(url_base, relativa):
+    """URL de una versión: url_base más la ruta relativa con los caracteres especiales escapados"""
+    return f"{url_base.rstrip('/')}/{quote(relativa)}"
+
+
+def escribir_sql(output_file, empresa_id, clave, filas, carpeta, tamano_lote=TAMANO_LOTE):
+    """SQL con los UPDATE de foto_url ([(clave, url)]) por lotes; devuelve la cantidad de sentencias"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("-- ============================================\n")
+        f.write("-- ACTUALIZACIÓN DE FOTOS (foto_url) DESDE FOTOS OPTIMIZADAS\n")
+        f.write(f"-- Carpeta de fotos: {carpeta}\n")
+        f.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"-- Empresa ID: {empresa_id}\n")
+        f.write("-- ============================================\n\n")
+        f.write("-- IMPORTANTE: Sube las versiones a --url-base antes de ejecutar estos UPDATE\n\n")
+        sentencias = escribir_updates_por_lotes(f.write, empresa_id, clave, {'foto_url': 'TEXT'}, filas, tamano_lote)
+        f.write("-- ============================================\n")
+        f.write("-- FIN DE LOS UPDATES\n")
+        f.write("-- ============================================\n")
+    return sentencias
+
+
+def optimizar_fotos(carpeta, empresa_id, url_base, output_file=None, salida_dir=None, clave='codigo',
+                    variante_url='mediana', tamanos=None, calidad=CALIDAD, trabajadores=None, todas=False):
+    """
+    Genera las versiones de las fotos nuevas o cambiadas, el manifiesto y el SQL de foto_url
+
+    Args:
+        carpeta: Carpeta con las fotos, nombradas por codigo o item
+        empresa_id: ID de la empresa
+        url_base: URL pública de la carpeta de salida una vez subida
+        output_file: Archivo SQL (por defecto update_fotos_<fecha>.sql)
+        salida_dir: Carpeta de las versiones y del manifiesto (por defecto <carpeta>/optimizadas)
+        clave: Columna de juguetes que es el nombre de cada foto ('codigo' o 'item')
+        variante_url: Versión a la que apunta foto_url
+        tamanos: {versión: lado mayor en px} (por defecto TAMANOS)
+        calidad: Calidad WebP (0-100)
+        trabajadores: Procesos en paralelo (por defecto, uno por CPU)
+        todas: Incluir en el SQL todas las fotos del manifiesto, no solo las procesadas ahora
+
+    Devuelve un resumen con las fotos procesadas, sin cambios y con error, o
+    None si no hay fotos.
+    """
+    tamanos = dict(tamanos or TAMANOS)
+    if variante_url not in tamanos:
+        raise ValueError(f"La versión {variante_url!r} no está entre {', '.join(tamanos)}")
+    fotos, omitidas = buscar_fotos(carpeta)
+    if not fotos:
+        print(f"Error: No se encontraron fotos en {carpeta}")
+        return None
+    for ruta in omitidas:
+        print(f"⚠ Se omite {os.path.basename(ruta)}: ya hay otra foto con el mismo nombre")
+
+    salida_dir = salida_dir or os.path.join(carpeta, 'optimizadas')
+    os.makedirs(salida_dir, exist_ok=True)
+    ruta_manifiesto = os.path.join(salida_dir, NOMBRE_MANIFIESTO)
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    opciones = {'tamanos': tamanos, 'calidad': calidad, 'formato': EXTENSION_SALIDA.lstrip('.')}
+
+    tareas = pendientes(fotos, manifiesto, opciones, salida_dir)
+    if manifiesto.get('opciones') != opciones and manifiesto['fotos']:
+        print("⚠ Cambiaron las opciones desde la última ejecución: se procesan todas las fotos")
+    sin_cambios = len(fotos) - len(tareas)
+    trabajadores = max(1, min(trabajadores or os.cpu_count() or 1, len(tareas) or 1))
+    print(f"Fotos: {len(fotos)} ({len(tareas)} nuevas o cambiadas, {sin_cambios} sin cambios)")
+
+    resultados = []
+    inicio = time.perf_counter()
+    if tareas:
+        print(f"Optimizando {len(tareas)} fotos con {trabajadores} procesos")
+        argumentos = [tarea + (salida_dir, tamanos, calidad, sufijo_versiones(tarea[2], opciones)) for tarea in tareas]
+        with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+            for resultado in pool.map(_optimizar, argumentos, chunksize=max(1, len(tareas) // (trabajadores * 4))):
+                if not resultado['ok']:
+                    print(f"✗ {os.path.basename(resultado['original'])}: {resultado['error']}")
+                resultados.append(resultado)
+    segundos = time.perf_counter() - inicio
+
+    # Con otras opciones el manifiesto empieza de nuevo. Si no, se conservan las
+    # fotos que ya no están en la carpeta: su foto_url puede seguir en uso
+    fotos_manifiesto = manifiesto['fotos'] if manifiesto.get('opciones') == opciones else {}
+    for resultado in resultados:
+        if resultado['ok']:
+            anterior = manifiesto['fotos'].get(resultado['nombre'])
+            if anterior:
+                quitar_versiones_viejas(salida_dir, anterior, resultado['entrada'])
+            fotos_manifiesto[resultado['nombre']] = resultado['entrada']
+    guardar_manifiesto(ruta_manifiesto, {'opciones': opciones, 'fotos': fotos_manifiesto})
+
+    correctos = [r for r in resultados if r['ok']]
+    nombres_sql = sorted(fotos_manifiesto) if todas else sorted(r['nombre'] for r in correctos)
+    filas = [(nombre, url_publica(url_base, fotos_manifiesto[nombre]['variantes'][variante_url]['ruta']))
+             for nombre in nombres_sql]
+    if filas:
+        if not output_file:
+            output_file = f"update_fotos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
+        escribir_sql(output_file, empresa_id, clave, filas, carpeta)
+
+    bytes_original = sum(r['entrada']['bytes_original'] for r in correctos)
+    print()
+    if correctos:
+        print(f"✓ Fotos optimizadas: {len(correctos)} en {segundos:.1f}s ({trabajadores} procesos)")
+        for variante in tamanos:
+            total = sum(r['entrada']['variantes'][variante]['bytes'] for r in correctos)
+            print(f"  {variante}: {total / 1024 / 1024:.1f} MB ({total / bytes_original:.1%} de los originales, "
+                  f"{bytes_original / 1024 / 1024:.1f} MB)")
+    print(f"✓ Manifiesto: {ruta_manifiesto}")
+    if filas:
+        print(f"✓ SQL generado: {output_file} ({len(filas)} juguetes por {clave})")
+    else:
+        print("✓ No hay cambios de foto_url")
+    errores = len(resultados) - len(correctos)
+    if errores:
+        print(f"⚠ Fotos con error: {errores}")
+    return {'procesadas': len(correctos), 'sin_cambios': sin_cambios, 'errores': errores,
+            'segundos': segundos, 'output_file': output_file if filas else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Genera miniaturas y versiones medianas en WebP de las fotos de los juguetes, "
+                    "el manifiesto y el SQL de foto_url",
+        epilog="Ejemplo:\n"
+               "  python optimizar_fotos.py fotos/ 1 --url-base "
+               "https://xyz.supabase.co/storage/v1/object/public/juguetes/optimizadas\n"
+               "  python optimizar_fotos.py fotos/ 1 --url-base https://... --clave item --variante-url miniatura",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('carpeta', help="Carpeta con las fotos, nombradas por el código (o el item) del juguete")
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('output_file', nargs='?', help="Archivo SQL de salida (por defecto update_fotos_<fecha>.sql)")
+    parser.add_argument('--url-base', required=True, help="URL pública de la carpeta de salida una vez subida")
+    parser.add_argument('--salida', help="Carpeta de las versiones y el manifiesto (por defecto <carpeta>/optimizadas)")
+    parser.add_argument('--clave', choices=['codigo', 'item'], default='codigo',
+                        help="Columna de juguetes que es el nombre de cada foto (por defecto codigo)")
+    parser.add_argument('--variante-url', choices=list(TAMANOS), default='mediana',
+                        help="Versión a la que apunta foto_url (por defecto mediana)")
+    parser.add_argument('--miniatura', type=int, default=TAMANOS['miniatura'],
+                        help=f"Lado mayor de la miniatura en px (por defecto {TAMANOS['miniatura']})")
+    parser.add_argument('--mediana', type=int, default=TAMANOS['mediana'],
+                        help=f"Lado mayor de la versión mediana en px (por defecto {TAMANOS['mediana']})")
+    parser.add_argument('--calidad', type=int, default=CALIDAD, help=f"Calidad WebP de 1 a 100 (por defecto {CALIDAD})")
+    parser.add_argument('--trabajadores', type=int, default=None, help="Procesos en paralelo (por defecto uno por CPU)")
+    parser.add_argument('--todas', action='store_true',
+                        help="Incluir en el SQL todas las fotos del manifiesto, no solo las nuevas o cambiadas")
+    args = parser.parse_args()
+    if not os.path.isdir(args.carpeta):
+        parser.error(f"No existe la carpeta {args.carpeta}")
+    if args.miniatura < 1 or args.mediana < 1 or not 1 <= args.calidad <= 100:
+        parser.error("--miniatura y --mediana deben ser mayores que 0 y --calidad estar entre 1 y 100")
+    if args.trabajadores is not None and args.trabajadores < 1:
+        parser.error("--trabajadores debe ser mayor que 0")
+    try:
+        _pil()
+    except RuntimeError as e:
+        parser.exit(1, f"✗ ERROR: {e}\n")
+
+    resultado = optimizar_fotos(
+        args.carpeta, args.empresa_id, args.url_base, output_file=args.output_file, salida_dir=args.salida,
+        clave=args.clave, variante_url=args.variante_url,
+        tamanos={'miniatura': args.miniatura, 'mediana': args.mediana}, calidad=args.calidad,
+        trabajadores=args.trabajadores, todas=args.todas,
+    )
+    if not resultado or resultado['errores']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
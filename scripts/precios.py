@@ -0,0 +1,222 @@
+"""
+Procesamiento compartido de precios y cantidades leídos desde Excel.
+
+Todos los scripts de importación usan estas funciones para interpretar
+precios en formato colombiano ($1.000, 1.000,50, 22.684) o estadounidense
+(1,000.50) y cantidades enteras (1.200, "12 und").
+
+Cada conversión tiene dos versiones que dan exactamente el mismo resultado:
+    - procesar_precio / procesar_entero: un solo valor
+    - procesar_precios / procesar_enteros: una columna completa (Serie, arreglo o lista),
+      devuelve (valores, validos) con un arreglo NumPy y una máscara de validez
+
+Los valores que ya son numéricos (openpyxl suele entregar floats) no pasan
+por el procesamiento de texto.
+"""
+
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+# Patrones precompilados
+_NO_NUMERICO = re.compile(r'[^\d.]')
+_NO_DIGITOS = re.compile(r'[^\d]')
+
+# Máximo de dígitos para que un entero quepa en int64
+_MAX_DIGITOS_ENTERO = 18
+
+_TIPOS_NUMERICOS = (int, float, np.integer, np.floating)
+
+
+def normalizar_precio(precio_str):
+    """
+    Convierte el texto de un precio a un número con punto decimal (sin convertir a float).
+
+    Reglas:
+        - Se eliminan el símbolo '$' y los espacios
+        - Con coma y punto, el último separador es el decimal:
+          1.000,50 -> 1000.50 y 1,000.50 -> 1000.50
+        - Solo comas: son separadores de miles (1,000 -> 1000)
+        - Solo puntos: si hay más de uno o más de 2 dígitos después del punto
+          son separadores de miles (1.000 -> 1000), si no es decimal (1000.50)
+        - Se elimina cualquier carácter que no sea dígito o punto
+    """
+    precio_str = precio_str.strip().replace('$', '').replace(' ', '')
+
+    coma = precio_str.rfind(',')
+    punto = precio_str.rfind('.')
+    if coma >= 0 and punto >= 0:
+        if coma > punto:
+            # Formato: 1.000,50 (punto como miles, coma como decimal)
+            precio_str = precio_str.replace('.', '').replace(',', '.')
+        else:
+            # Formato: 1,000.50 (coma como miles, punto como decimal)
+            precio_str = precio_str.replace(',', '')
+    elif coma >= 0:
+        # Formato: 1,000 (coma como separador de miles)
+        precio_str = precio_str.replace(',', '')
+    elif punto >= 0:
+        # Formato: 1000.50 o 1.000 (punto como decimal o separador de miles)
+        if precio_str.count('.') > 1 or len(precio_str) - punto - 1 > 2:
+            precio_str = precio_str.replace('.', '')
+
+    # Remover cualquier carácter que no sea dígito o punto
+    if precio_str.replace('.', '').isdecimal():
+        return precio_str
+    return _NO_NUMERICO.sub('', precio_str)
+
+
+def _precio_desde_texto(valor):
+    """Precio (float) de un valor no numérico; NaN si no es válido"""
+    precio_str = normalizar_precio(str(valor))
+    if not precio_str:
+        return math.nan
+    try:
+        return float(precio_str)
+    except ValueError:
+        return math.nan
+
+
+def _entero_desde_texto(valor):
+    """Entero de un valor no numérico; None si no es válido"""
+    digitos = str(valor).strip()
+    if not digitos.isdecimal():
+        digitos = _NO_DIGITOS.sub('', digitos)
+    if not digitos or len(digitos) > _MAX_DIGITOS_ENTERO:
+        return None
+    return int(digitos)
+
+
+def procesar_precio(valor, positivo=True):
+    """
+    Convierte un valor de una celda de precio a float.
+
+    El signo se ignora, como en el texto ('-3000' -> 3000). Devuelve None si
+    el valor está vacío, no es un precio válido o, cuando positivo=True, si
+    no es mayor que 0.
+    """
+    if isinstance(valor, _TIPOS_NUMERICOS):
+        precio = abs(float(valor))
+    elif valor is None or pd.isna(valor):
+        return None
+    else:
+        precio = _precio_desde_texto(valor)
+
+    if not math.isfinite(precio) or (positivo and precio <= 0):
+        return None
+    return precio
+
+
+def procesar_entero(valor):
+    """
+    Convierte un valor de una celda de cantidad a int.
+
+    Los números se truncan y pierden el signo, igual que en el texto, donde se
+    ignora todo lo que no sea dígito (1.200 -> 1200, -5 -> 5). Devuelve None
+    si no hay un entero válido.
+    """
+    if isinstance(valor, _TIPOS_NUMERICOS):
+        if not math.isfinite(valor) or abs(valor) >= 2 ** 63:
+            return None
+        return abs(int(valor))
+
+    if valor is None or pd.isna(valor):
+        return None
+    return _entero_desde_texto(valor)
+
+
+def _como_arreglo(valores):
+    """Devuelve los valores como arreglo NumPy sin copiar si ya lo son"""
+    if isinstance(valores, (pd.Series, pd.Index)):
+        if valores.dtype.kind in 'iufb':
+            return valores.to_numpy()
+        return valores.to_numpy(dtype=object)
+    arreglo = np.asarray(valores)
+    if arreglo.dtype.kind not in 'iufb':
+        arreglo = np.asarray(valores, dtype=object)
+    return arreglo
+
+
+def _separar_tipos(arreglo):
+    """
+    Clasifica un arreglo de objetos en (numéricos, textos): los textos son
+    todos los valores no nulos que no son números.
+    """
+    numericos = np.fromiter((isinstance(v, _TIPOS_NUMERICOS) for v in arreglo), dtype=bool, count=len(arreglo))
+    textos = ~numericos & ~pd.isna(arreglo)
+    return numericos, textos
+
+
+def _por_valor_unico(arreglo, funcion):
+    """
+    Aplica funcion una sola vez por cada valor distinto del arreglo
+    (en un Excel los mismos precios y cantidades se repiten mucho).
+    """
+    codigos, unicos = pd.factorize(arreglo)
+    return [funcion(v) for v in unicos], codigos
+
+
+def procesar_precios(valores, positivos=True):
+    """
+    Versión por lotes de procesar_precio para una columna completa.
+
+    Devuelve (precios, validos): un arreglo float64 (NaN donde no es válido)
+    y una máscara booleana con los precios válidos.
+    """
+    arreglo = _como_arreglo(valores)
+    if arreglo.dtype.kind in 'iufb':
+        # Columna numérica: no hay texto que procesar (sin signo, como el texto)
+        precios = np.abs(arreglo.astype(np.float64))
+    else:
+        precios = np.full(len(arreglo), np.nan)
+        numericos, textos = _separar_tipos(arreglo)
+        if numericos.any():
+            precios[numericos] = np.abs(arreglo[numericos].astype(np.float64))
+        if textos.any():
+            unicos, codigos = _por_valor_unico(arreglo[textos], _precio_desde_texto)
+            precios[textos] = np.array(unicos, dtype=np.float64)[codigos]
+
+    validos = np.isfinite(precios)
+    if positivos:
+        validos &= precios > 0
+    precios[~validos] = np.nan
+    return precios, validos
+
+
+def procesar_enteros(valores):
+    """
+    Versión por lotes de procesar_entero para una columna completa.
+
+    Devuelve (enteros, validos): un arreglo int64 (0 donde no es válido)
+    y una máscara booleana con los enteros válidos.
+    """
+    arreglo = _como_arreglo(valores)
+
+    def numeros(parte):
+        parte = np.abs(parte.astype(np.float64))
+        ok = np.isfinite(parte) & (parte < 2.0 ** 63)
+        return np.trunc(np.where(ok, parte, 0)).astype(np.int64), ok
+
+    if arreglo.dtype.kind in 'iub':
+        # Sin signo, como el texto (el menor int64 no tiene valor absoluto)
+        enteros = np.abs(arreglo.astype(np.int64))
+        validos = enteros >= 0
+        enteros[~validos] = 0
+        return enteros, validos
+    if arreglo.dtype.kind == 'f':
+        return numeros(arreglo)
+
+    enteros = np.zeros(len(arreglo), dtype=np.int64)
+    validos = np.zeros(len(arreglo), dtype=bool)
+    numericos, textos = _separar_tipos(arreglo)
+    if numericos.any():
+        enteros[numericos], validos[numericos] = numeros(arreglo[numericos])
+    if textos.any():
+        unicos, codigos = _por_valor_unico(arreglo[textos], _entero_desde_texto)
+        ok = np.array([v is not None for v in unicos], dtype=bool)
+        valores_unicos = np.array([v if v is not None else 0 for v in unicos], dtype=np.int64)
+        enteros[textos] = valores_unicos[codigos]
+        validos[textos] = ok[codigos]
+    return enteros, validos
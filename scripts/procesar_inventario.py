@@ -1,53 +1,115 @@
 """
 Script mejorado para procesar el archivo Excel del inventario
 Este script procesa el archivo y genera SQL directamente
+
+Uso:
+    python procesar_inventario.py archivo.xlsx [empresa_id] [--streaming] [--tamano-bloque N] [--no-cache]
+                                  [--formato inserts|multi|copy] [--tamano-lote N]
+                                  [--bodegas-csv bodegas.csv] [--tiendas-csv tiendas.csv] [--upsert]
+                                  [--duplicados sumar|ultimo|rechazar [--juguetes-csv juguetes.csv]
+                                   [--reporte-duplicados duplicados.csv]]
+                                  [--metricas metricas.json] [--perfil parseo.prof]
 """
 
+import argparse
+import itertools
 import pandas as pd
-import re
 import os
+import shutil
+import tempfile
 from datetime import datetime
 
-def procesar_excel_inventario(excel_file, empresa_id=1):
+from excel_to_sql import leer_bloques, parsear_columnas
+from incremental import ultimos_por_clave
+from duplicados import RevisionDuplicados, leer_existentes
+from lectura import memoria_pico_mb, TAMANO_BLOQUE
+from metricas import Metricas, metricas_de_argumentos, guardar_metricas
+from salida_sql import sql_texto, sql_numero, desde_ubicacion, on_conflict, crear_escritor, TAMANO_LOTE
+from ubicaciones import cargar_ubicaciones
+from columnas import COLUMNAS_PROCESAR, REQUERIDAS_PROCESAR
+import opciones
+
+# Mapeo de columnas (ver columnas.py)
+COLUMN_MAPPING = COLUMNAS_PROCESAR
+
+# Columnas de juguetes que llena este script (sin los campos de bultos)
+COLUMNAS_JUGUETES = ['nombre', 'codigo', 'item', 'cantidad', 'foto_url', 'precio_min', 'precio_por_mayor']
+
+def generar_inserts(registros, ubicaciones, upsert=False):
+    """
+    Genera la lista de INSERT statements (y líneas en blanco) para los registros limpios.
+    La bodega/tienda se toma de la tabla de ubicaciones (Ubicaciones.sql).
+    Con upsert cada INSERT actualiza el juguete si ya existe en esa ubicación.
+    """
+    conflicto = f"\n{on_conflict(COLUMNAS_JUGUETES)}" if upsert else ""
+    sql_statements = []
+    empresa_id = ubicaciones.empresa_id
+    columnas = [registros[campo].tolist() for campo in COLUMNAS_JUGUETES]
+    claves = ubicaciones.claves(registros).tolist()
+    for (nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor), clave in zip(zip(*columnas), claves):
+        # Generar SQL
+        sql = f"""INSERT INTO juguetes (
+    nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor, 
+    empresa_id, bodega_id, tienda_id, created_at, updated_at
+) SELECT
+    {sql_texto(nombre)},
+    {sql_texto(codigo)},
+    {sql_texto(item)},
+    {cantidad},
+    {sql_texto(foto_url)},
+    {precio_min},
+    {sql_numero(precio_por_mayor)},
+    {empresa_id},
+    u.bodega_id,
+    u.tienda_id,
+    NOW(),
+    NOW()
+{desde_ubicacion(clave)}{conflicto};"""
+        
+        sql_statements.append(sql)
+        sql_statements.append("")
+    return sql_statements
+
+def procesar_excel_inventario(excel_file, empresa_id=1, streaming=False, tamano_bloque=TAMANO_BLOQUE,
+                              formato='inserts', tamano_lote=TAMANO_LOTE, bodegas_csv=None, tiendas_csv=None,
+                              usar_cache=True, upsert=False, duplicados=None, juguetes_csv=None,
+                              reporte_duplicados=None, metricas=None):
     """
     Procesa el archivo Excel y genera SQL para insertar en Supabase
+    
+    Con streaming=True el archivo se lee y se procesa por bloques de tamano_bloque filas
+    y el SQL se escribe a medida que se genera; en ese caso se devuelve el nombre del
+    archivo generado en lugar del SQL completo.
+    
+    formato elige cómo se escribe el SQL: 'inserts' (uno por registro), 'multi'
+    (INSERT de tamano_lote filas) o 'copy' (script para psql), ver salida_sql.py.
+    
+    Las ubicaciones se resuelven una sola vez (ver ubicaciones.py); con bodegas_csv/tiendas_csv
+    se resuelven al generar el SQL y si alguna no existe no se genera el archivo.
+    
+    Con usar_cache el Excel leído se toma de la caché si no cambió (ver cache_excel.py).
+    
+    Con upsert los INSERT llevan ON CONFLICT DO UPDATE: volver a procesar el archivo
+    actualiza los juguetes en lugar de duplicarlos (índice de agregar_indice_unico_juguetes.sql).
+    
+    Con duplicados ('sumar', 'ultimo' o 'rechazar') las filas repetidas se revisan juntas al
+    terminar de leer, antes de escribir los INSERT (ver duplicados.py); juguetes_csv es la
+    exportación de la tabla para no insertar filas que ya existen y reporte_duplicados un CSV
+    con las filas repetidas o en conflicto.
+    
+    Con metricas se registran los tiempos y filas de cada etapa (ver metricas.py).
     """
+    metricas = metricas or Metricas('procesar_inventario')
     try:
         print(f"Leyendo archivo: {excel_file}")
-        df = pd.read_excel(excel_file)
-        
-        # Normalizar nombres de columnas
-        df.columns = df.columns.str.strip()
-        
-        # Mapeo de columnas
-        column_mapping = {
-            'nombre': ['nombre', 'name'],
-            'codigo': ['codigo', 'código', 'code'],
-            'item': ['item', 'item code'],
-            'numero_bultos': ['numero de bultos', 'número de bultos', 'numero_bultos', 'bultos', 'numero bultos'],
-            'cantidad_por_bulto': ['cantidad por bultos', 'cantidad por bulto', 'cantidad_por_bulto', 'cantidad por bultos'],
-            'cantidad_total': ['cantidad total', 'cantidad_total', 'total', 'cantidad total'],
-            'precio_min': ['precio minimo', 'precio mínimo', 'precio_min', 'precio_minimo', 'precio min', 'precio minimo'],
-            'precio_por_mayor': ['precio al por mayor', 'precio_por_mayor', 'precio por mayor', 'precio al por mayor'],
-            'foto_url': ['foto url', 'foto_url', 'url foto', 'url', 'foto url'],
-            'ubicacion': ['ubicación', 'ubicacion', 'location', 'ubicación']
-        }
-        
-        # Renombrar columnas
-        normalized_columns = {}
-        for standard_name, possible_names in column_mapping.items():
-            for col in df.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    normalized_columns[col] = standard_name
-                    break
-        
-        df = df.rename(columns=normalized_columns)
+        bloques = leer_bloques(excel_file, COLUMN_MAPPING, streaming=streaming, tamano_bloque=tamano_bloque,
+                               usar_cache=usar_cache, metricas=metricas)
+        df = next(bloques)
         
         print(f"Columnas detectadas: {', '.join(df.columns.tolist())}")
         
         # Validar columnas requeridas
-        required_columns = ['nombre', 'codigo', 'precio_min', 'ubicacion']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in REQUERIDAS_PROCESAR if col not in df.columns]
         
         if missing_columns:
             print(f"ERROR: Faltan columnas: {', '.join(missing_columns)}")
@@ -63,149 +125,108 @@ def procesar_excel_inventario(excel_file, empresa_id=1):
         sql_statements.append("-- ============================================\n")
         sql_statements.append("-- IMPORTANTE: Asegúrate de que la bodega 'santa isabel' o 'Santa Isabel' exista en la base de datos\n\n")
         
+        encabezado = '\n'.join(sql_statements)
+        output_file = f"sql_inserts_inventario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
+        ubicaciones = cargar_ubicaciones(empresa_id, bodegas_csv, tiendas_csv)
+        revision = None
+        if duplicados:
+            existentes = leer_existentes(juguetes_csv, empresa_id) if juguetes_csv else None
+            revision = RevisionDuplicados(duplicados, existentes, upsert, metricas)
+        registros_archivo = []
+        
         registros_procesados = 0
+        total_filas = 0
         errores = []
-        
-        for index, row in df.iterrows():
-            try:
-                nombre = str(row['nombre']).strip().replace("'", "''")
-                codigo = str(row['codigo']).strip().replace("'", "''")
-                
-                # Calcular cantidad
-                cantidad = 0
-                if 'cantidad_total' in df.columns and pd.notna(row.get('cantidad_total')):
-                    cantidad_val = str(row['cantidad_total']).strip()
-                    cantidad_val = re.sub(r'[^\d]', '', cantidad_val)
-                    cantidad = int(cantidad_val) if cantidad_val else 0
-                elif 'numero_bultos' in df.columns and 'cantidad_por_bulto' in df.columns:
-                    numero_bultos_str = str(row['numero_bultos']).strip() if pd.notna(row.get('numero_bultos')) else '0'
-                    cantidad_por_bulto_str = str(row['cantidad_por_bulto']).strip() if pd.notna(row.get('cantidad_por_bulto')) else '0'
-                    numero_bultos = int(re.sub(r'[^\d]', '', numero_bultos_str)) if numero_bultos_str else 0
-                    cantidad_por_bulto = int(re.sub(r'[^\d]', '', cantidad_por_bulto_str)) if cantidad_por_bulto_str else 0
-                    cantidad = numero_bultos * cantidad_por_bulto
-                
-                # Procesar precio mínimo
-                precio_min_str = str(row['precio_min']).strip()
-                precio_min_str = precio_min_str.replace('$', '').replace(' ', '')
-                if ',' in precio_min_str and '.' not in precio_min_str:
-                    precio_min_str = precio_min_str.replace(',', '')
-                elif ',' in precio_min_str and '.' in precio_min_str:
-                    precio_min_str = precio_min_str.replace(',', '')
-                elif '.' in precio_min_str and ',' not in precio_min_str:
-                    precio_min_str = precio_min_str.replace('.', '')
-                precio_min_str = re.sub(r'[^\d.]', '', precio_min_str)
-                precio_min = float(precio_min_str) if precio_min_str and precio_min_str != 'nan' else 0
-                
-                # Procesar ubicación
-                ubicacion_str = str(row['ubicacion']).strip()
-                ubicacion_tipo = None
-                ubicacion_nombre = None
-                
-                if '/' in ubicacion_str:
-                    partes = ubicacion_str.split('/', 1)
-                    ubicacion_tipo = partes[0].strip().lower()
-                    ubicacion_nombre = partes[1].strip().replace("'", "''")
-                else:
-                    palabras = ubicacion_str.split()
-                    if len(palabras) >= 2:
-                        primera_palabra = palabras[0].lower()
-                        if primera_palabra in ['bodega', 'tienda']:
-                            ubicacion_tipo = primera_palabra
-                            ubicacion_nombre = ' '.join(palabras[1:]).strip().replace("'", "''")
-                
-                if not ubicacion_tipo or not ubicacion_nombre:
-                    errores.append(f"Fila {index + 2}: Ubicación inválida: '{ubicacion_str}'")
-                    continue
-                
-                if ubicacion_tipo not in ['bodega', 'tienda']:
-                    errores.append(f"Fila {index + 2}: Tipo de ubicación inválido: '{ubicacion_tipo}'")
-                    continue
-                
-                # Campos opcionales
-                item = 'NULL'
-                if 'item' in df.columns and pd.notna(row.get('item')):
-                    item_val = str(row['item']).strip().replace("'", "''")
-                    if item_val and item_val.lower() != 'nan' and item_val != '':
-                        item = f"'{item_val}'"
-                
-                precio_por_mayor = None
-                if 'precio_por_mayor' in df.columns and pd.notna(row.get('precio_por_mayor')):
-                    precio_por_mayor_str = str(row['precio_por_mayor']).strip()
-                    precio_por_mayor_str = precio_por_mayor_str.replace('$', '').replace(' ', '')
-                    if ',' in precio_por_mayor_str and '.' not in precio_por_mayor_str:
-                        precio_por_mayor_str = precio_por_mayor_str.replace(',', '')
-                    elif ',' in precio_por_mayor_str and '.' in precio_por_mayor_str:
-                        precio_por_mayor_str = precio_por_mayor_str.replace(',', '')
-                    elif '.' in precio_por_mayor_str and ',' not in precio_por_mayor_str:
-                        precio_por_mayor_str = precio_por_mayor_str.replace('.', '')
-                    precio_por_mayor_str = re.sub(r'[^\d.]', '', precio_por_mayor_str)
-                    if precio_por_mayor_str and precio_por_mayor_str.lower() != 'nan':
-                        precio_por_mayor = float(precio_por_mayor_str)
-                
-                foto_url = 'NULL'
-                if 'foto_url' in df.columns and pd.notna(row.get('foto_url')):
-                    foto_url_val = str(row['foto_url']).strip().replace("'", "''")
-                    if foto_url_val and foto_url_val.lower() != 'nan' and foto_url_val.startswith('http'):
-                        foto_url = f"'{foto_url_val}'"
-                
-                # Generar SQL
-                if ubicacion_tipo == 'bodega':
-                    bodega_id = f"(SELECT id FROM bodegas WHERE LOWER(nombre) = LOWER('{ubicacion_nombre}') AND empresa_id = {empresa_id} LIMIT 1)"
-                    tienda_id = 'NULL'
+        total_errores = 0
+        total_repetidas = 0
+        # Los INSERTs van primero a un archivo temporal: la tabla de ubicaciones
+        # va antes en el SQL y solo se conoce al terminar de leer
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as f:
+            escribir = f.write
+            escritor = None
+            if formato != 'inserts':
+                escritor = crear_escritor(formato, escribir, ubicaciones, COLUMNAS_JUGUETES, tamano_lote, upsert)
+            
+            def emitir(registros):
+                with metricas.etapa('emitir', len(registros)):
+                    if escritor is not None:
+                        escritor.escribir(registros)
+                    else:
+                        sql_statements = generar_inserts(registros, ubicaciones, upsert)
+                        if sql_statements:
+                            escribir('\n' + '\n'.join(sql_statements))
+                return len(registros)
+            
+            # Procesar cada bloque (todo el archivo si no es modo streaming)
+            for df in itertools.chain([df], bloques):
+                with metricas.etapa('parsear', len(df), perfilar=True) as etapa:
+                    registros, avisos = parsear_columnas(df)
+                    etapa.salida = len(registros)
+                metricas.contar_avisos(avisos)
+                if revision is not None:
+                    # Se revisa al terminar de leer
+                    registros_archivo.append(registros)
                 else:
-                    bodega_id = 'NULL'
-                    tienda_id = f"(SELECT id FROM tiendas WHERE LOWER(nombre) = LOWER('{ubicacion_nombre}') AND empresa_id = {empresa_id} LIMIT 1)"
-                
-                precio_por_mayor_sql = f"{precio_por_mayor}" if precio_por_mayor is not None else 'NULL'
-                
-                sql = f"""INSERT INTO juguetes (
-    nombre, codigo, item, cantidad, foto_url, precio_min, precio_por_mayor, 
-    empresa_id, bodega_id, tienda_id, created_at, updated_at
-) VALUES (
-    '{nombre}',
-    '{codigo}',
-    {item},
-    {cantidad},
-    {foto_url},
-    {precio_min},
-    {precio_por_mayor_sql},
-    {empresa_id},
-    {bodega_id},
-    {tienda_id},
-    NOW(),
-    NOW()
-);"""
-                
-                sql_statements.append(sql)
-                sql_statements.append("")
-                registros_procesados += 1
-                
-            except Exception as e:
-                errores.append(f"Fila {index + 2}: {str(e)}")
-                continue
-        
-        sql_statements.append("\n-- ============================================")
-        sql_statements.append("-- FIN DE LOS INSERTS")
-        sql_statements.append("-- ============================================")
-        
-        sql_final = '\n'.join(sql_statements)
-        
-        # Guardar en archivo
-        output_file = f"sql_inserts_inventario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(sql_final)
+                    if upsert:
+                        # Con claves repetidas queda la última fila
+                        ultimos = ultimos_por_clave(registros)
+                        total_repetidas += len(registros) - len(ultimos)
+                        metricas.rechazar('clave_repetida', len(registros) - len(ultimos))
+                        registros = ultimos
+                    registros_procesados += emitir(registros)
+                total_filas += len(df)
+                # Solo se guardan los primeros errores para mostrarlos al final
+                errores.extend(avisos[:10 - len(errores)])
+                total_errores += len(avisos)
+            if revision is not None:
+                registros = pd.concat(registros_archivo, ignore_index=True)
+                with metricas.etapa('duplicados', len(registros)) as etapa:
+                    registros = revision.aplicar(registros, ubicaciones)
+                    etapa.salida = len(registros)
+                registros_procesados += emitir(registros)
+            if escritor is not None:
+                with metricas.etapa('emitir'):
+                    escritor.cerrar()
+            
+            # Las ubicaciones que no existen se reportan antes de generar el SQL
+            if not ubicaciones.reportar_desconocidas():
+                return None
+            
+            f.seek(0)
+            with metricas.etapa('emitir'), open(output_file, 'w', encoding='utf-8') as salida:
+                salida.write(encabezado + '\n' + ubicaciones.sql())
+                shutil.copyfileobj(f, salida)
+                salida.write('\n' + '\n'.join([
+                    "\n-- ============================================",
+                    "-- FIN DE LOS INSERTS",
+                    "-- ============================================",
+                ]))
         
         print(f"\n✓ SQL generado exitosamente: {output_file}")
-        print(f"✓ Total de registros procesados: {registros_procesados} de {len(df)}")
+        print(f"✓ Total de registros procesados: {registros_procesados} de {total_filas}")
+        print(ubicaciones.resumen())
+        if revision is not None:
+            print(revision.resumen())
+            if reporte_duplicados:
+                revision.escribir_reporte(reporte_duplicados)
+                print(f"✓ Filas repetidas o en conflicto ({revision.reportadas}) guardadas en: {reporte_duplicados}")
+        if total_repetidas:
+            print(f"⚠ {total_repetidas} filas repiten (codigo, ubicación): con --upsert queda la última")
+        memoria = memoria_pico_mb()
+        if memoria is not None:
+            print(f"✓ Memoria pico: {memoria:.1f} MB")
         
-        if errores:
-            print(f"\n⚠ Advertencias/Errores ({len(errores)}):")
-            for error in errores[:10]:  # Mostrar solo los primeros 10
+        if total_errores:
+            print(f"\n⚠ Advertencias/Errores ({total_errores}):")
+            for error in errores:  # Mostrar solo los primeros 10
                 print(f"  - {error}")
-            if len(errores) > 10:
-                print(f"  ... y {len(errores) - 10} más")
+            if total_errores > 10:
+                print(f"  ... y {total_errores - 10} más")
         
-        return sql_final
+        if streaming:
+            return output_file
+        with open(output_file, encoding='utf-8') as f:
+            return f.read()
         
     except Exception as e:
         print(f"ERROR: {str(e)}")
@@ -213,28 +234,29 @@ def procesar_excel_inventario(excel_file, empresa_id=1):
         traceback.print_exc()
         return None
 
-if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Uso: python procesar_inventario.py <archivo_excel.xlsx> [empresa_id]")
-        print("Ejemplo: python procesar_inventario.py inventario.xlsx 1")
-        sys.exit(1)
-    
-    excel_file = sys.argv[1]
-    empresa_id = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-    
-    if not os.path.exists(excel_file):
-        print(f"ERROR: El archivo {excel_file} no existe")
-        sys.exit(1)
-    
-    procesar_excel_inventario(excel_file, empresa_id)
-
-
-
-
-
+def main():
+    parser = argparse.ArgumentParser(
+        description="Procesa el Excel del inventario y genera SQL INSERT statements",
+        epilog="Ejemplo: python procesar_inventario.py inventario.xlsx 1",
+    )
+    opciones.opciones_procesar(parser)
+    args = parser.parse_args()
+    opciones.validar(parser, args)
+    ejecutar(parser, args)
 
 
+def ejecutar(parser, args):
+    """Ejecuta el script con los argumentos ya validados (también desde toyswall_import.py)"""
+    metricas = metricas_de_argumentos('procesar_inventario', args)
+    resultado = procesar_excel_inventario(args.excel_file, args.empresa_id, streaming=args.streaming,
+                                          tamano_bloque=args.tamano_bloque, formato=args.formato,
+                                          tamano_lote=args.tamano_lote, bodegas_csv=args.bodegas_csv,
+                                          tiendas_csv=args.tiendas_csv, usar_cache=not args.no_cache,
+                                          upsert=args.upsert, duplicados=args.duplicados,
+                                          juguetes_csv=args.juguetes_csv, reporte_duplicados=args.reporte_duplicados,
+                                          metricas=metricas)
+    guardar_metricas(metricas, args, archivos=[args.excel_file], ok=resultado is not None)
 
 
+if __name__ == "__main__":
+    main()
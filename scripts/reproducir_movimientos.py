@@ -0,0 +1,529 @@
+"""
+Reproducción por conjuntos de los movimientos históricos sobre el inventario
+
+migrations/procesar_movimientos_historicos.sql y procesar_movimientos_especificos.sql
+recorren los movimientos uno por uno en PL/pgSQL: por cada uno un SELECT del
+juguete de origen, otro del destino y un UPDATE/INSERT/DELETE por fila. Con
+miles de movimientos tardan minutos y bloquean juguetes todo ese tiempo.
+
+Este script calcula lo mismo a partir de las exportaciones CSV de juguetes y
+movimientos y escribe el mínimo de SQL:
+
+    - Cada (codigo, ubicación) recibe una clave entera y cada movimiento se
+      convierte en dos eventos: -cantidad en el origen y +cantidad en el destino
+    - El saldo de cada clave después de cada evento es una suma acumulada por
+      clave en orden cronológico (created_at, id), en una sola pasada de NumPy
+    - Un movimiento cuyo origen no existe o quedaría en negativo se marca y no
+      se aplica, igual que en el script SQL. Como eso cambia los saldos
+      siguientes, desde el primero de ellos se sigue movimiento por movimiento
+      sobre listas de enteros (sin consultas; si no hay ninguno, no hace falta)
+    - Con el saldo final se escribe un UPDATE por lotes con la diferencia neta
+      de cada juguete que cambió, un INSERT por lotes de los destinos que no
+      existían y un DELETE de los juguetes que quedan en 0 (como el script SQL;
+      --conservar-ceros los deja con cantidad 0)
+
+Diferencias con el script SQL:
+    - El origen es la fila del código en la ubicación de origen; el SQL toma
+      una fila cualquiera del código en la empresa y descarta el movimiento si
+      no es la de esa ubicación
+    - El destino se busca por (codigo, ubicación); el SQL exige además el mismo nombre
+    - El UPDATE suma la diferencia (cantidad = cantidad + diferencia), así las
+      ventas registradas después de la exportación no se pisan
+    - Los datos que le faltan al destino (foto, precios, item, bultos) se
+      completan con los del origen del primer movimiento que llega; el SQL lo
+      hace con cada movimiento
+    - Si un código está repetido en la misma ubicación se usa la fila de menor id
+
+Exportaciones (por ejemplo con psql):
+    \\copy (SELECT * FROM juguetes WHERE empresa_id = 1) TO 'juguetes.csv' CSV HEADER
+    \\copy (SELECT * FROM movimientos WHERE empresa_id = 1) TO 'movimientos.csv' CSV HEADER
+
+Uso:
+    python reproducir_movimientos.py juguetes.csv movimientos.csv empresa_id [archivo_salida.sql]
+                                     [--ids 218,219,...] [--tamano-lote N] [--commit-cada N]
+                                     [--conservar-ceros] [--rechazados rechazados.csv]
+                                     [--metricas metricas.json]
+
+Ejemplo:
+    python reproducir_movimientos.py juguetes.csv movimientos.csv 1
+    python reproducir_movimientos.py juguetes.csv movimientos.csv 1 --ids 46,47,48 --rechazados rechazados.csv
+    python reproducir_movimientos.py juguetes.csv movimientos.csv 1 movimientos.sql --commit-cada 5000
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from lectura import leer_exportacion, limpiar_texto
+from metricas import Metricas, agregar_opciones_metricas, metricas_de_argumentos, guardar_metricas
+from salida_sql import sql_texto, sql_numero, SalidaPorBloques, TAMANO_LOTE, TIPOS_COLUMNAS
+
+TIPOS_UBICACION = ['bodega', 'tienda']
+
+# Datos del juguete de origen que se copian al destino (al crearlo o si le faltan)
+CAMPOS_ORIGEN = ['foto_url', 'precio_min', 'precio_por_mayor', 'item', 'cantidad_por_bulto', 'numero_bultos']
+
+COLUMNAS_JUGUETES = ['id', 'codigo', 'nombre', 'cantidad', 'bodega_id', 'tienda_id']
+COLUMNAS_MOVIMIENTOS = ['id', 'tipo_origen', 'origen_id', 'tipo_destino', 'destino_id', 'juguete_codigo', 'cantidad']
+
+# Motivos por los que un movimiento no se aplica
+MOTIVOS = {
+    'ubicacion_invalida': "tipo de origen o destino distinto de bodega/tienda",
+    'cantidad_invalida': "cantidad vacía o no mayor que 0",
+    'mismo_origen_destino': "el origen y el destino son la misma ubicación",
+    'origen_inexistente': "el juguete no está en la ubicación de origen",
+    'origen_negativo': "cantidad insuficiente en el origen",
+}
+
+
+def _leer_exportacion(archivo_csv, columnas, enteras, empresa_id):
+    """
+    Exportación de juguetes o movimientos con los CAMPOS_ORIGEN y created_at si
+    están: las columnas enteras como Int64 (vacío = NA) y el resto como texto
+    """
+    df = leer_exportacion(archivo_csv, empresa_id, columnas, numericas=enteras,
+                          opcionales=CAMPOS_ORIGEN + ['created_at'])
+    for columna in enteras:
+        df[columna] = df[columna].astype('Int64')
+    return df
+
+
+def leer_juguetes(archivo_csv, empresa_id):
+    """
+    Juguetes de la empresa con ubicación: codigo, tipo, ubicacion_id, id,
+    nombre, cantidad y CAMPOS_ORIGEN (None si están vacíos). Si un código se
+    repite en la misma ubicación queda la fila de menor id; devuelve
+    (juguetes, repetidos)
+    """
+    df = _leer_exportacion(archivo_csv, COLUMNAS_JUGUETES, ['id', 'cantidad', 'bodega_id', 'tienda_id'], empresa_id)
+    bodega = df['bodega_id']
+    tienda = df['tienda_id']
+    juguetes = pd.DataFrame({
+        'id': df['id'],
+        'codigo': limpiar_texto(df['codigo']),
+        'tipo': np.where(bodega.notna(), 'bodega', np.where(tienda.notna(), 'tienda', None)),
+        'ubicacion_id': bodega.fillna(tienda),
+        'nombre': df['nombre'],
+        'cantidad': df['cantidad'].fillna(0),
+    })
+    for campo in CAMPOS_ORIGEN:
+        valores = df[campo] if campo in df.columns else pd.Series(np.nan, index=df.index)
+        juguetes[campo] = valores.astype(object).where(valores.notna(), None)
+    juguetes = juguetes[juguetes['tipo'].notna() & juguetes['id'].notna()]
+    juguetes = juguetes.sort_values('id', kind='stable')
+    unicos = juguetes.drop_duplicates(['codigo', 'tipo', 'ubicacion_id'])
+    return unicos.reset_index(drop=True), len(juguetes) - len(unicos)
+
+
+def leer_movimientos(archivo_csv, empresa_id, ids=None):
+    """
+    Movimientos de la empresa (solo los ids indicados, si se indican) en orden
+    cronológico: created_at y luego id, sin fecha al final como en el ORDER BY del SQL
+    """
+    df = _leer_exportacion(archivo_csv, COLUMNAS_MOVIMIENTOS, ['id', 'origen_id', 'destino_id', 'cantidad'], empresa_id)
+    movimientos = pd.DataFrame({
+        'id': df['id'],
+        'tipo_origen': limpiar_texto(df['tipo_origen'], minusculas=True),
+        'origen_id': df['origen_id'],
+        'tipo_destino': limpiar_texto(df['tipo_destino'], minusculas=True),
+        'destino_id': df['destino_id'],
+        'codigo': limpiar_texto(df['juguete_codigo']),
+        'cantidad': df['cantidad'],
+        'created_at': pd.to_datetime(df['created_at'], utc=True, format='ISO8601', errors='coerce')
+        if 'created_at' in df.columns else pd.NaT,
+    })
+    if ids is not None:
+        movimientos = movimientos[movimientos['id'].isin(ids)]
+    return movimientos.sort_values(['created_at', 'id'], kind='stable', na_position='last').reset_index(drop=True)
+
+
+def asignar_claves(juguetes, movimientos):
+    """
+    Clave entera de cada (codigo, tipo, ubicacion_id): las de los juguetes
+    van primero (clave = posición en juguetes) y después las de los movimientos
+    que no están en juguetes. Devuelve (origen, destino, claves) con las claves
+    de cada movimiento y el DataFrame de todas las claves.
+    """
+    extremos = pd.concat([
+        juguetes[['codigo', 'tipo', 'ubicacion_id']],
+        movimientos[['codigo', 'tipo_origen', 'origen_id']].set_axis(['codigo', 'tipo', 'ubicacion_id'], axis=1),
+        movimientos[['codigo', 'tipo_destino', 'destino_id']].set_axis(['codigo', 'tipo', 'ubicacion_id'], axis=1),
+    ], ignore_index=True)
+    extremos['ubicacion_id'] = extremos['ubicacion_id'].fillna(-1)
+    # Las tres columnas se combinan en un solo entero, que se factoriza mucho
+    # más rápido que las tuplas (codigo, tipo, ubicacion_id)
+    codigo, _ = pd.factorize(extremos['codigo'])
+    tipo, tipos = pd.factorize(extremos['tipo'])
+    ubicacion, ubicaciones = pd.factorize(extremos['ubicacion_id'])
+    combinada = (codigo.astype(np.int64) * len(tipos) + tipo) * len(ubicaciones) + ubicacion
+    numeros, _ = pd.factorize(combinada)
+    n, m = len(juguetes), len(movimientos)
+    _, primeras = np.unique(numeros, return_index=True)
+    claves = extremos.iloc[primeras].reset_index(drop=True)
+    return numeros[n:n + m], numeros[n + m:], claves
+
+
+def reproducir(saldo_inicial, existe, origen, destino, cantidad, validos):
+    """
+    Aplica los movimientos en orden (arreglos alineados, ya ordenados por fecha)
+    sobre el saldo inicial de cada clave. Primero por conjuntos: los saldos
+    después de cada evento son una suma acumulada por clave. Si ningún origen
+    queda en negativo ese es el resultado. Si no, todo lo anterior al primer
+    origen en negativo es definitivo y desde ahí se sigue movimiento por
+    movimiento: al rechazar uno cambian los saldos siguientes de sus dos claves.
+
+    Devuelve (aplicado, motivos, disponible): máscara de los movimientos
+    aplicados, {posición: motivo} de los rechazados aquí y la cantidad que
+    había en el origen al intentar cada uno de ellos.
+    """
+    m = len(origen)
+    cantidad = cantidad.astype(np.int64)
+    aplicado = validos.copy()
+    motivos = {}
+    disponible = {}
+
+    # Eventos 2i (salida del origen) y 2i + 1 (entrada al destino), ordenados
+    # por clave y, dentro de cada clave, en orden cronológico
+    clave_evento = np.empty(2 * m, dtype=np.int64)
+    clave_evento[0::2] = origen
+    clave_evento[1::2] = destino
+    delta = np.empty(2 * m, dtype=np.int64)
+    delta[0::2] = np.where(aplicado, -cantidad, 0)
+    delta[1::2] = np.where(aplicado, cantidad, 0)
+    orden = np.argsort(clave_evento, kind='stable')
+    clave_ordenada = clave_evento[orden]
+    delta = delta[orden]
+    inicio_grupo = np.ones(2 * m, dtype=bool)
+    inicio_grupo[1:] = clave_ordenada[1:] != clave_ordenada[:-1]
+    primero_del_grupo = np.maximum.accumulate(np.where(inicio_grupo, np.arange(2 * m), 0))
+    acumulado = np.cumsum(delta)
+    # Suma acumulada dentro de cada clave: se resta lo acumulado antes de su primer evento
+    saldo = saldo_inicial[clave_ordenada] + acumulado - (acumulado - delta)[primero_del_grupo]
+    posicion = np.empty(2 * m, dtype=np.int64)
+    posicion[orden] = np.arange(2 * m)
+    violaciones = aplicado & (saldo[posicion[0::2]] < 0)
+    if not violaciones.any():
+        return aplicado, motivos, disponible
+
+    # Saldos justo antes de la primera violación y claves que ya recibieron algo
+    primera = int(np.argmax(violaciones))
+    antes = np.where(aplicado[:primera], cantidad[:primera], 0)
+    saldos = (saldo_inicial
+              + np.bincount(destino[:primera], weights=antes, minlength=len(saldo_inicial)).astype(np.int64)
+              - np.bincount(origen[:primera], weights=antes, minlength=len(saldo_inicial)).astype(np.int64)).tolist()
+    recibio = existe.copy()
+    recibio[destino[:primera][antes > 0]] = True
+    recibio = recibio.tolist()
+    for i, o, d, q, valido in zip(range(primera, m), origen[primera:].tolist(), destino[primera:].tolist(),
+                                  cantidad[primera:].tolist(), validos[primera:].tolist()):
+        if not valido:
+            continue
+        if saldos[o] < q:
+            aplicado[i] = False
+            motivos[i] = 'origen_negativo' if recibio[o] else 'origen_inexistente'
+            disponible[i] = saldos[o]
+            continue
+        saldos[o] -= q
+        saldos[d] += q
+        recibio[d] = True
+    return aplicado, motivos, disponible
+
+
+def _fuentes(n_claves, juguetes, origen, destino, aplicado):
+    """
+    Fila de juguetes de la que sale cada clave (nombre y CAMPOS_ORIGEN): la
+    propia si existía o, si se crea, la fuente del origen del primer movimiento
+    aplicado que llega a ella (-1 si no recibe ninguno). También devuelve la
+    fuente de ese primer origen para todas las claves que reciben algo.
+    """
+    fuente = np.full(n_claves, -1, dtype=np.int64)
+    fuente[:len(juguetes)] = np.arange(len(juguetes))
+    primera_llegada = np.full(n_claves, -1, dtype=np.int64)
+    posiciones = np.flatnonzero(aplicado)
+    destinos, primeras = np.unique(destino[posiciones], return_index=True)
+    primera_llegada[destinos] = posiciones[primeras]
+    # En orden de llegada: el origen de una clave nueva ya tiene su fuente
+    # (tenía saldo, así que existía o recibió algo antes)
+    for clave in destinos[np.argsort(primera_llegada[destinos], kind='stable')]:
+        if clave >= len(juguetes):
+            fuente[clave] = fuente[origen[primera_llegada[clave]]]
+    fuente_llegada = np.full(n_claves, -1, dtype=np.int64)
+    fuente_llegada[destinos] = fuente[origen[primera_llegada[destinos]]]
+    return fuente, fuente_llegada
+
+
+def _valores(fila, campos):
+    """Literales SQL de los campos de una fila (textos o números)"""
+    return [sql_texto(fila[campo]) if TIPOS_COLUMNAS[campo] == 'TEXT' else sql_numero(fila[campo]) for campo in campos]
+
+
+def escribir_updates(escribir, empresa_id, filas, tamano_lote=TAMANO_LOTE):
+    """
+    UPDATE por lotes de (id, diferencia, CAMPOS_ORIGEN): suma la diferencia a
+    la cantidad y completa los campos que el juguete tiene vacíos
+    """
+    asignaciones = ["    cantidad = j.cantidad + v.diferencia::INTEGER,"]
+    asignaciones += [f"    {campo} = COALESCE(j.{campo}, v.{campo}::{TIPOS_COLUMNAS[campo]})," for campo in CAMPOS_ORIGEN]
+    encabezado = "UPDATE juguetes j\nSET\n" + '\n'.join(asignaciones) + "\n    updated_at = NOW()\nFROM (VALUES\n"
+    final = (f"\n) AS v(id, diferencia, {', '.join(CAMPOS_ORIGEN)})\n"
+             "WHERE j.id = v.id\n"
+             f"    AND j.empresa_id = {empresa_id};\n\n")
+    for inicio in range(0, len(filas), tamano_lote):
+        valores = [f"    ({fila['id']}, {fila['diferencia']}, {', '.join(_valores(fila, CAMPOS_ORIGEN))})"
+                   for fila in filas[inicio:inicio + tamano_lote]]
+        escribir(encabezado + ',\n'.join(valores) + final)
+
+
+def escribir_inserts(escribir, empresa_id, filas, tamano_lote=TAMANO_LOTE):
+    """INSERT por lotes de los juguetes nuevos en los destinos"""
+    campos = ['nombre', 'codigo', 'cantidad'] + CAMPOS_ORIGEN
+    encabezado = (f"INSERT INTO juguetes (\n    {', '.join(campos)},\n"
+                  "    empresa_id, bodega_id, tienda_id, created_at, updated_at\n) VALUES\n")
+    for inicio in range(0, len(filas), tamano_lote):
+        valores = []
+        for fila in filas[inicio:inicio + tamano_lote]:
+            bodega_id = fila['ubicacion_id'] if fila['tipo'] == 'bodega' else None
+            tienda_id = fila['ubicacion_id'] if fila['tipo'] == 'tienda' else None
+            valores.append(f"    ({', '.join(_valores(fila, campos))}, "
+                           f"{empresa_id}, {sql_numero(bodega_id)}, {sql_numero(tienda_id)}, NOW(), NOW())")
+        escribir(encabezado + ',\n'.join(valores) + ";\n\n")
+
+
+def escribir_deletes(escribir, empresa_id, ids, tamano_lote=TAMANO_LOTE):
+    """DELETE por lotes de los juguetes que quedaron en 0 (solo si siguen en 0)"""
+    for inicio in range(0, len(ids), tamano_lote):
+        lista = ', '.join(str(id_juguete) for id_juguete in ids[inicio:inicio + tamano_lote])
+        escribir(f"DELETE FROM juguetes\nWHERE empresa_id = {empresa_id}\n    AND cantidad = 0\n"
+                 f"    AND id IN ({lista});\n\n")
+
+
+def reproducir_movimientos(juguetes_csv, movimientos_csv, empresa_id, output_file=None, ids=None,
+                           tamano_lote=TAMANO_LOTE, commit_cada=None, conservar_ceros=False,
+                           rechazados_csv=None, metricas=None):
+    """
+    Reproduce los movimientos sobre la exportación de juguetes y escribe el SQL
+    con el resultado neto.
+
+    Args:
+        juguetes_csv, movimientos_csv: exportaciones CSV de las tablas
+        empresa_id: ID de la empresa
+        output_file: Archivo SQL de salida (opcional)
+        ids: Solo estos ids de movimientos (como procesar_movimientos_especificos.sql)
+        tamano_lote: Filas por sentencia
+        commit_cada: Filas por transacción; el SQL se divide en bloques numerados
+            para ejecutar_sql.py (None: una sola transacción)
+        conservar_ceros: Dejar con cantidad 0 los juguetes que se vacían en lugar de borrarlos
+        rechazados_csv: CSV con los movimientos que no se aplicaron y el motivo
+        metricas: Métricas por etapa (metricas.Metricas) donde se registra la ejecución
+
+    Devuelve un diccionario con el resumen o False si hubo un error.
+    """
+    metricas = metricas or Metricas('reproducir_movimientos')
+    try:
+        with metricas.etapa('lectura') as etapa:
+            juguetes, repetidos = leer_juguetes(juguetes_csv, empresa_id)
+            movimientos = leer_movimientos(movimientos_csv, empresa_id, ids)
+            etapa.salida = len(movimientos)
+        if repetidos:
+            print(f"⚠ {repetidos} juguetes repetidos en la misma ubicación: se usa el de menor id "
+                  "(ver migrations/verificar_registros_duplicados.sql)")
+
+        with metricas.etapa('reproducir', len(movimientos), perfilar=True) as etapa:
+            origen, destino, claves = asignar_claves(juguetes, movimientos)
+            n_claves = len(claves)
+            saldo_inicial = np.zeros(n_claves, dtype=np.int64)
+            saldo_inicial[:len(juguetes)] = juguetes['cantidad'].to_numpy(dtype=np.int64)
+            existe = np.zeros(n_claves, dtype=bool)
+            existe[:len(juguetes)] = True
+
+            # Validaciones que no dependen del orden
+            cantidad = movimientos['cantidad'].fillna(0).to_numpy(dtype=np.int64)
+            motivos = np.full(len(movimientos), None, dtype=object)
+            ubicacion_invalida = ~(movimientos['tipo_origen'].isin(TIPOS_UBICACION)
+                                   & movimientos['tipo_destino'].isin(TIPOS_UBICACION)
+                                   & movimientos['origen_id'].notna()
+                                   & movimientos['destino_id'].notna()).to_numpy()
+            motivos[ubicacion_invalida] = 'ubicacion_invalida'
+            motivos[(motivos == None) & (cantidad <= 0)] = 'cantidad_invalida'  # noqa: E711
+            motivos[(motivos == None) & (origen == destino)] = 'mismo_origen_destino'  # noqa: E711
+
+            aplicado, rechazos, disponible = reproducir(saldo_inicial, existe, origen, destino, cantidad,
+                                                         motivos == None)  # noqa: E711
+            for posicion, motivo in rechazos.items():
+                motivos[posicion] = motivo
+
+            delta = (np.bincount(destino, weights=np.where(aplicado, cantidad, 0), minlength=n_claves)
+                     - np.bincount(origen, weights=np.where(aplicado, cantidad, 0), minlength=n_claves)).astype(np.int64)
+            tocada = np.zeros(n_claves, dtype=bool)
+            tocada[origen[aplicado]] = True
+            tocada[destino[aplicado]] = True
+            saldo_final = saldo_inicial + delta
+            fuente, fuente_llegada = _fuentes(n_claves, juguetes, origen, destino, aplicado)
+            etapa.salida = int(aplicado.sum())
+
+        for motivo, cantidad_motivo in pd.Series(motivos[motivos != None]).value_counts().items():  # noqa: E711
+            metricas.rechazar(motivo, int(cantidad_motivo))
+
+        with metricas.etapa('emitir', n_claves) as etapa:
+            registros = juguetes.to_dict('records')
+            n = len(juguetes)
+            sin_datos = dict.fromkeys(CAMPOS_ORIGEN)
+
+            # Juguetes existentes: diferencia neta y datos faltantes del primer origen que llega
+            actualizados = []
+            vaciados = []
+            for clave in np.flatnonzero(tocada[:n]):
+                id_juguete = registros[clave]['id']
+                if saldo_final[clave] == 0 and not conservar_ceros:
+                    # También reciben la diferencia, así el DELETE los encuentra en 0
+                    vaciados.append(id_juguete)
+                    actualizados.append({'id': id_juguete, 'diferencia': int(delta[clave]), **sin_datos})
+                    continue
+                llegada = fuente_llegada[clave]
+                datos = {campo: registros[llegada][campo] for campo in CAMPOS_ORIGEN} if llegada >= 0 else sin_datos
+                if delta[clave] == 0 and all(valor is None for valor in datos.values()):
+                    continue
+                actualizados.append({'id': id_juguete, 'diferencia': int(delta[clave]), **datos})
+            en_cero = int(((saldo_final == 0) & tocada & existe).sum())
+
+            # Destinos que no existían y terminan con cantidad
+            nuevos = []
+            creadas = claves.iloc[n:]
+            for clave, codigo, tipo, ubicacion_id, cantidad_final, fuente_clave in zip(
+                    range(n, n_claves), creadas['codigo'].tolist(), creadas['tipo'].tolist(),
+                    creadas['ubicacion_id'].tolist(), saldo_final[n:].tolist(), fuente[n:].tolist()):
+                if not tocada[clave] or cantidad_final <= 0:
+                    continue
+                origen_datos = registros[fuente_clave]
+                nuevos.append({
+                    'nombre': origen_datos['nombre'],
+                    'codigo': codigo,
+                    'cantidad': cantidad_final,
+                    'tipo': tipo,
+                    'ubicacion_id': int(ubicacion_id),
+                    **{campo: origen_datos[campo] for campo in CAMPOS_ORIGEN},
+                })
+
+            if not output_file:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                output_file = f'reproducir_movimientos_{timestamp}.sql'
+
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write("-- ============================================\n")
+                f.write("-- REPRODUCCIÓN DE MOVIMIENTOS HISTÓRICOS\n")
+                f.write(f"-- Juguetes: {os.path.basename(juguetes_csv)}\n")
+                f.write(f"-- Movimientos: {os.path.basename(movimientos_csv)}\n")
+                f.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"-- Empresa ID: {empresa_id}\n")
+                f.write(f"-- Movimientos aplicados: {int(aplicado.sum())} de {len(movimientos)}\n")
+                f.write("-- ============================================\n\n")
+                por_bloques = SalidaPorBloques(f.write, commit_cada) if commit_cada else None
+                if por_bloques is None:
+                    f.write("BEGIN;\n\n")
+                escribir = (lambda sql: f.write(sql)) if por_bloques is None else por_bloques.escritor(tamano_lote)
+                escribir_updates(escribir, empresa_id, actualizados, tamano_lote)
+                escribir_inserts(escribir, empresa_id, nuevos, tamano_lote)
+                escribir_deletes(escribir, empresa_id, vaciados, tamano_lote)
+                if por_bloques is None:
+                    f.write("COMMIT;\n")
+                total_bloques = por_bloques.cerrar() if por_bloques is not None else None
+            etapa.salida = len(actualizados) + len(nuevos) + len(vaciados)
+
+        if rechazados_csv:
+            with open(rechazados_csv, 'w', encoding='utf-8', newline='') as f:
+                escritor = csv.writer(f)
+                escritor.writerow(['id', 'created_at', 'juguete_codigo', 'tipo_origen', 'origen_id',
+                                   'tipo_destino', 'destino_id', 'cantidad', 'disponible', 'motivo'])
+                for posicion in np.flatnonzero(motivos != None):  # noqa: E711
+                    mov = movimientos.iloc[posicion]
+                    escritor.writerow([mov['id'], mov['created_at'], mov['codigo'], mov['tipo_origen'], mov['origen_id'],
+                                       mov['tipo_destino'], mov['destino_id'], mov['cantidad'],
+                                       disponible.get(posicion, ''), motivos[posicion]])
+
+        rechazados = int((motivos != None).sum())  # noqa: E711
+        print(f"✓ SQL generado exitosamente: {output_file}")
+        if total_bloques is not None:
+            print(f"✓ SQL dividido en {total_bloques} bloques de hasta {commit_cada} filas: "
+                  f"python ejecutar_sql.py {output_file}")
+        print(f"✓ Movimientos aplicados: {int(aplicado.sum())} de {len(movimientos)}")
+        print(f"✓ Juguetes actualizados: {len(actualizados) - len(vaciados)}, nuevos: {len(nuevos)}, "
+              f"{'en 0' if conservar_ceros else 'eliminados (quedan en 0)'}: {en_cero}")
+        if rechazados:
+            print(f"⚠ Movimientos no aplicados: {rechazados}")
+            for motivo, cantidad_motivo in metricas.rechazos.most_common():
+                print(f"  - {motivo}: {cantidad_motivo} ({MOTIVOS[motivo]})")
+            if rechazados_csv:
+                print(f"✓ Detalle guardado en: {rechazados_csv}")
+        return {
+            'output_file': output_file,
+            'movimientos': len(movimientos),
+            'aplicados': int(aplicado.sum()),
+            'rechazados': rechazados,
+            'actualizados': len(actualizados) - len(vaciados),
+            'nuevos': len(nuevos),
+            'eliminados': len(vaciados),
+            'bloques': total_bloques,
+        }
+
+    except Exception as e:
+        print(f"Error al reproducir los movimientos: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reproduce los movimientos históricos sobre la exportación de juguetes y genera el SQL neto",
+        epilog="Ejemplo:\n"
+               "  python reproducir_movimientos.py juguetes.csv movimientos.csv 1\n"
+               "  python reproducir_movimientos.py juguetes.csv movimientos.csv 1 --ids 46,47,48 --rechazados rechazados.csv\n"
+               "  python reproducir_movimientos.py juguetes.csv movimientos.csv 1 movimientos.sql --commit-cada 5000",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('juguetes_csv', help="Exportación CSV de la tabla juguetes")
+    parser.add_argument('movimientos_csv', help="Exportación CSV de la tabla movimientos")
+    parser.add_argument('empresa_id', type=int, help="ID de la empresa")
+    parser.add_argument('output_file', nargs='?', help="Archivo SQL de salida (opcional)")
+    parser.add_argument('--ids', help="Solo estos ids de movimientos, separados por comas")
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE, help=f"Filas por sentencia (por defecto {TAMANO_LOTE})")
+    parser.add_argument('--commit-cada', type=int, metavar='N',
+                        help="Dividir el SQL en transacciones numeradas de unas N filas (ejecutar con ejecutar_sql.py)")
+    parser.add_argument('--conservar-ceros', action='store_true',
+                        help="Dejar con cantidad 0 los juguetes que se vacían en lugar de eliminarlos")
+    parser.add_argument('--rechazados', metavar='ARCHIVO_CSV', help="Guardar los movimientos que no se aplicaron y el motivo")
+    agregar_opciones_metricas(parser)
+    args = parser.parse_args()
+
+    ids = None
+    if args.ids:
+        try:
+            ids = [int(valor) for valor in args.ids.split(',') if valor.strip()]
+        except ValueError:
+            parser.error("--ids debe ser una lista de números separados por comas")
+    if args.tamano_lote < 1:
+        parser.error("--tamano-lote debe ser mayor que 0")
+    if args.commit_cada is not None and args.commit_cada < 1:
+        parser.error("--commit-cada debe ser mayor que 0")
+    for archivo in (args.juguetes_csv, args.movimientos_csv):
+        if not os.path.exists(archivo):
+            print(f"Error: El archivo {archivo} no existe")
+            sys.exit(1)
+
+    metricas = metricas_de_argumentos('reproducir_movimientos', args)
+    resultado = reproducir_movimientos(args.juguetes_csv, args.movimientos_csv, args.empresa_id, args.output_file,
+                                       ids=ids, tamano_lote=args.tamano_lote, commit_cada=args.commit_cada,
+                                       conservar_ceros=args.conservar_ceros, rechazados_csv=args.rechazados,
+                                       metricas=metricas)
+    guardar_metricas(metricas, args, archivos=[args.juguetes_csv, args.movimientos_csv], ok=bool(resultado))
+    if not resultado:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
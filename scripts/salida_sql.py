@@ -0,0 +1,487 @@
+"""
+Formatos de salida del SQL de inventario (juguetes).
+
+    - inserts: un INSERT por registro (lo escribe cada script con su plantilla)
+    - multi: INSERT de varias filas, INSERT INTO juguetes (...) SELECT ... FROM (VALUES
+      (...), (...)) con tamano_lote filas por sentencia
+    - copy: script para psql que carga los registros con COPY ... FROM STDIN (CSV)
+      en una tabla temporal y luego los pasa a juguetes con un solo INSERT ... SELECT
+
+Para los scripts de actualización (actualizar_*_desde_excel.py):
+    - updates: un UPDATE por item/código (lo escribe cada script)
+    - lotes: UPDATE juguetes j SET ... FROM (VALUES ...) v(...) con tamano_lote
+      filas por sentencia (escribir_updates_por_lotes)
+
+Para el modo incremental de excel_to_sql (ver incremental.py) los cambios se
+escriben como UPDATE por (codigo, ubicación) con escribir_updates_por_ubicacion.
+
+Con upsert=True (--upsert) todos los formatos agregan ON CONFLICT DO UPDATE
+sobre el índice único (empresa_id, codigo, bodega_id, tienda_id) de la
+migración agregar_indice_unico_juguetes.sql: volver a importar el mismo
+archivo actualiza los juguetes en lugar de duplicarlos. Si una clave se repite
+en el archivo queda la última fila.
+
+Con SalidaPorBloques (--commit-cada N sin --cargar) el SQL se divide en
+transacciones numeradas de unas N filas cada una, marcadas con una línea
+"-- BLOQUE n". Todo lo que va antes del primer bloque (encabezado y tabla de
+ubicaciones) es el preámbulo. ejecutar_sql.py ejecuta los bloques uno por uno
+y, si algo falla, continúa desde el primero que no terminó.
+
+La carga directa (ver carga_db.py) usa el mismo SQL desde una tabla temporal:
+insert_desde_tabla (el INSERT ... SELECT del formato copy) y update_desde_tabla
+(el UPDATE del formato lotes).
+
+Todos los formatos generan los mismos valores: los textos se escapan igual y
+None es NULL. La bodega/tienda de cada fila sale de la tabla temporal de
+ubicaciones (ver ubicaciones.py), que debe ir antes en el mismo SQL; las filas
+se unen a ella por la clave de su ubicación.
+"""
+
+# Formatos disponibles para --formato
+FORMATOS = ['inserts', 'multi', 'copy']
+
+# Formatos disponibles para --formato en los scripts de actualización
+FORMATOS_UPDATE = ['updates', 'lotes']
+
+# Filas por sentencia en los formatos multi y lotes
+TAMANO_LOTE = 500
+
+# Línea que abre cada transacción de un SQL dividido en bloques (SalidaPorBloques)
+MARCA_BLOQUE = '-- BLOQUE '
+
+# Columnas de juguetes que vienen del Excel, con su tipo en la tabla temporal del formato copy
+TIPOS_COLUMNAS = {
+    'nombre': 'TEXT',
+    'codigo': 'TEXT',
+    'item': 'TEXT',
+    'cantidad': 'INTEGER',
+    'foto_url': 'TEXT',
+    'precio_min': 'NUMERIC',
+    'precio_por_mayor': 'NUMERIC',
+    'numero_bultos': 'INTEGER',
+    'cantidad_por_bulto': 'INTEGER',
+}
+
+COLUMNAS_TEXTO = {'nombre', 'codigo', 'item', 'foto_url'}
+
+TABLA_TEMPORAL = 'juguetes_importacion'
+
+# Tabla temporal con las ubicaciones ya resueltas (la crea Ubicaciones.sql)
+TABLA_UBICACIONES = 'ubicaciones_importacion'
+
+# Condición para no insertar filas cuya ubicación no se encontró
+UBICACION_RESUELTA = 'COALESCE(u.bodega_id, u.tienda_id) IS NOT NULL'
+
+# Índice único de juguetes que usa el modo upsert (migrations/agregar_indice_unico_juguetes.sql)
+CLAVE_UPSERT = ['empresa_id', 'codigo', 'bodega_id', 'tienda_id']
+
+# Columnas que un upsert no borra cuando el Excel no trae valor (por ejemplo la foto subida desde la app)
+COLUMNAS_OPCIONALES = {'item', 'foto_url', 'precio_por_mayor', 'numero_bultos', 'cantidad_por_bulto'}
+
+
+def sql_texto(valor):
+    """Literal SQL para un texto opcional (None -> NULL)"""
+    if valor is None:
+        return 'NULL'
+    return "'" + valor.replace("'", "''") + "'"
+
+
+def sql_numero(valor):
+    """Literal SQL para un número opcional (None -> NULL)"""
+    return f"{valor}" if valor is not None else 'NULL'
+
+
+def csv_texto(valor):
+    """Campo CSV de COPY para un texto opcional: siempre entre comillas, None -> vacío (NULL)"""
+    if valor is None:
+        return ''
+    return '"' + valor.replace('"', '""') + '"'
+
+
+def csv_numero(valor):
+    """Campo CSV de COPY para un número opcional (None -> vacío, NULL)"""
+    return f"{valor}" if valor is not None else ''
+
+
+def desde_ubicacion(clave):
+    """
+    FROM de un INSERT ... SELECT de una sola fila: toma bodega_id/tienda_id (u.bodega_id,
+    u.tienda_id) de la ubicación con esa clave y no inserta nada si no se encontró
+    """
+    return f"FROM {TABLA_UBICACIONES} u WHERE u.clave = {clave} AND {UBICACION_RESUELTA}"
+
+
+def _unir_ubicaciones(alias):
+    return f"JOIN {TABLA_UBICACIONES} u ON u.clave = {alias}.ubicacion AND {UBICACION_RESUELTA}"
+
+
+def _seleccion_campo(alias, campo):
+    """alias.campo con el tipo de la columna de juguetes (los VALUES sin tipo son texto)"""
+    tipo = TIPOS_COLUMNAS[campo]
+    return f"{alias}.{campo}::{tipo}" if tipo != 'TEXT' else f"{alias}.{campo}"
+
+
+def _seleccion(alias, columnas, empresa_id, con_tipos=False):
+    """Lista del SELECT que pasa las columnas de alias a juguetes"""
+    valores = [_seleccion_campo(alias, campo) if con_tipos else f"{alias}.{campo}" for campo in columnas]
+    return f"    {', '.join(valores)},\n    {empresa_id}, u.bodega_id, u.tienda_id, NOW(), NOW()"
+
+
+def on_conflict(columnas):
+    """
+    ON CONFLICT del modo upsert: si el juguete ya existe en esa ubicación se
+    actualizan sus columnas (las opcionales vacías dejan el valor actual); si
+    nada cambió la fila no se toca, así repetir la importación no cambia nada
+    """
+    nuevos = [f"COALESCE(EXCLUDED.{campo}, juguetes.{campo})" if campo in COLUMNAS_OPCIONALES else f"EXCLUDED.{campo}"
+              for campo in columnas]
+    asignaciones = ''.join(f"    {campo} = {nuevo},\n" for campo, nuevo in zip(columnas, nuevos))
+    actuales = ', '.join(f"juguetes.{campo}" for campo in columnas)
+    return (f"ON CONFLICT ({', '.join(CLAVE_UPSERT)}) DO UPDATE SET\n{asignaciones}    updated_at = NOW()\n"
+            f"WHERE ({actuales})\n    IS DISTINCT FROM ({', '.join(nuevos)})")
+
+
+def _orden(alias, upsert):
+    """
+    DISTINCT ON y ORDER BY de un INSERT ... SELECT de varias filas: en orden del
+    archivo o, en modo upsert, solo la última fila de cada clave (un mismo
+    INSERT no puede actualizar dos veces el mismo juguete)
+    """
+    if upsert:
+        clave = f"{alias}.codigo, u.bodega_id, u.tienda_id"
+        return f" DISTINCT ON ({clave})", f"ORDER BY {clave}, {alias}.fila DESC"
+    return "", f"ORDER BY {alias}.fila"
+
+
+def _fin_insert(columnas, upsert):
+    """Final de un INSERT: ON CONFLICT en modo upsert"""
+    return f"\n{on_conflict(columnas)};" if upsert else ";"
+
+
+def _lista_columnas(columnas):
+    """Lista de columnas del INSERT, con las de ubicación y fechas al final"""
+    return (f"    {', '.join(columnas)},\n"
+            f"    empresa_id, bodega_id, tienda_id, created_at, updated_at")
+
+
+def definicion_columnas(tipos, columnas):
+    """Definición de las columnas de una tabla temporal ({columna: tipo SQL})"""
+    return ',\n'.join(f"    {campo} {tipos[campo]}" for campo in columnas)
+
+
+def lineas_copy(registros, ubicaciones, columnas):
+    """
+    Filas CSV (sin salto de línea) de COPY con fila, las columnas y la clave de
+    ubicación de cada registro (DataFrame de parsear_columnas)
+    """
+    campos = ['fila'] + list(columnas)
+    formatos = [csv_texto if campo in COLUMNAS_TEXTO else csv_numero for campo in campos] + [csv_numero]
+    datos = [registros[campo].tolist() for campo in campos]
+    datos.append(ubicaciones.claves(registros).tolist())
+    return [','.join([formato(valor) for formato, valor in zip(formatos, valores)]) for valores in zip(*datos)]
+
+
+def insert_desde_tabla(tabla, columnas, empresa_id, condicion=None, upsert=False):
+    """
+    INSERT ... SELECT que pasa las filas de una tabla temporal (fila, columnas,
+    ubicacion) a juguetes, unidas a la tabla de ubicaciones y en el orden del archivo
+    """
+    donde = f"WHERE {condicion}\n" if condicion else ""
+    distinto, orden = _orden('i', upsert)
+    return (f"INSERT INTO juguetes (\n{_lista_columnas(columnas)}\n)\n"
+            f"SELECT{distinto}\n{_seleccion('i', columnas, empresa_id)}\n"
+            f"FROM {tabla} i\n"
+            f"{_unir_ubicaciones('i')}\n"
+            f"{donde}"
+            f"{orden}{_fin_insert(columnas, upsert)}\n")
+
+
+def _asignaciones_update(columnas, omitir_nulos):
+    """SET de un UPDATE de juguetes desde el alias v ({columna: tipo SQL})"""
+    asignaciones = []
+    for columna, tipo in columnas.items():
+        valor = f"v.{columna}::{tipo}"
+        if omitir_nulos:
+            valor = f"COALESCE({valor}, j.{columna})"
+        asignaciones.append(f"    {columna} = {valor},")
+    return "UPDATE juguetes j\nSET\n" + '\n'.join(asignaciones) + "\n    updated_at = NOW()\n"
+
+
+def update_desde_tabla(tabla, empresa_id, clave, columnas, omitir_nulos=False, condicion=None):
+    """
+    UPDATE ... FROM una tabla temporal (clave, columnas): el mismo UPDATE que
+    escribe escribir_updates_por_lotes, tomando los valores de la tabla
+    """
+    donde = f"\n    AND {condicion}" if condicion else ""
+    return (_asignaciones_update(columnas, omitir_nulos) +
+            f"FROM {tabla} v\n"
+            f"WHERE j.{clave} = v.{clave}\n"
+            f"    AND j.empresa_id = {empresa_id}{donde};\n")
+
+
+class EscritorMultiInsert:
+    """
+    Escribe los registros como INSERT ... SELECT desde un VALUES de varias filas
+    unido a la tabla de ubicaciones. Los registros se acumulan entre llamadas
+    (bloques del modo streaming) hasta completar tamano_lote filas; cerrar()
+    escribe el último lote incompleto.
+
+    Si una fila falla (por ejemplo un nombre demasiado largo) falla todo su lote.
+    """
+
+    def __init__(self, escribir, ubicaciones, columnas, tamano_lote=TAMANO_LOTE, upsert=False):
+        self.escribir_sql = escribir
+        self.ubicaciones = ubicaciones
+        self.columnas = list(columnas)
+        self.tamano_lote = max(1, tamano_lote)
+        self.pendientes = []
+        distinto, orden = _orden('v', upsert)
+        self.encabezado = (f"INSERT INTO juguetes (\n{_lista_columnas(self.columnas)}\n)\n"
+                           f"SELECT{distinto}\n{_seleccion('v', self.columnas, ubicaciones.empresa_id, con_tipos=True)}\n"
+                           "FROM (VALUES\n")
+        self.final = (f"\n) AS v(fila, {', '.join(self.columnas)}, ubicacion)\n"
+                      f"{_unir_ubicaciones('v')}\n"
+                      f"{orden}{_fin_insert(self.columnas, upsert)}\n\n")
+
+    def escribir(self, registros):
+        """Agrega los registros (DataFrame de parsear_columnas) y devuelve cuántos se agregaron"""
+        formatos = [sql_numero] + [sql_texto if campo in COLUMNAS_TEXTO else sql_numero for campo in self.columnas]
+        datos = [registros['fila'].tolist()] + [registros[campo].tolist() for campo in self.columnas]
+        datos.append(self.ubicaciones.claves(registros).tolist())
+        formatos.append(sql_numero)
+        for valores in zip(*datos):
+            literales = [formato(valor) for formato, valor in zip(formatos, valores)]
+            self.pendientes.append(f"    ({', '.join(literales)})")
+            if len(self.pendientes) >= self.tamano_lote:
+                self._vaciar()
+        return len(registros)
+
+    def _vaciar(self):
+        if self.pendientes:
+            self.escribir_sql(self.encabezado + ',\n'.join(self.pendientes) + self.final)
+            self.pendientes = []
+
+    def cerrar(self):
+        """Escribe las filas que quedaron pendientes"""
+        self._vaciar()
+
+
+class EscritorCopy:
+    """
+    Escribe un script para psql (psql -f archivo.sql) que carga los registros
+    con COPY en una tabla temporal y los inserta en juguetes en una sola
+    transacción. El INSERT ... SELECT final se une a la tabla de ubicaciones.
+
+    El SQL Editor de Supabase no acepta COPY ... FROM STDIN; para ejecutarlo
+    allí se deben usar los formatos inserts o multi.
+
+    Con filas_por_bloque (--commit-cada) cada grupo de filas es un bloque
+    independiente para ejecutar_sql.py.
+    """
+
+    def __init__(self, escribir, ubicaciones, columnas, upsert=False, filas_por_bloque=None):
+        self.escribir_sql = escribir
+        self.ubicaciones = ubicaciones
+        self.columnas = list(columnas)
+        self.upsert = upsert
+        self.iniciado = False
+        # Por bloques (SalidaPorBloques) cada grupo de filas_por_bloque filas es
+        # independiente: crea su propia tabla temporal, COPY e INSERT ... SELECT
+        self.filas_por_bloque = filas_por_bloque
+        self.pendientes = []
+
+    def _crear_y_copiar(self):
+        """CREATE TEMP TABLE y COPY ... FROM STDIN de la tabla temporal"""
+        columnas_temporal = ['fila'] + self.columnas + ['ubicacion']
+        definicion = definicion_columnas(dict(TIPOS_COLUMNAS, fila='INTEGER', ubicacion='INTEGER'), columnas_temporal)
+        return (f"CREATE TEMP TABLE {TABLA_TEMPORAL} (\n{definicion}\n) ON COMMIT DROP;\n\n"
+                f"COPY {TABLA_TEMPORAL} ({', '.join(columnas_temporal)}) FROM STDIN WITH (FORMAT csv);\n")
+
+    def _insert(self):
+        """Fin del COPY e INSERT ... SELECT hacia juguetes"""
+        return ("\\.\n\n"
+                f"{insert_desde_tabla(TABLA_TEMPORAL, self.columnas, self.ubicaciones.empresa_id, upsert=self.upsert)}\n")
+
+    def _grupo(self):
+        """Escribe las filas pendientes como un grupo independiente (modo por bloques)"""
+        if self.pendientes:
+            self.escribir_sql("SET client_encoding = 'UTF8';\n\n" + self._crear_y_copiar()
+                              + ''.join(linea + '\n' for linea in self.pendientes) + self._insert())
+            self.pendientes = []
+
+    def _iniciar(self):
+        self.escribir_sql("SET client_encoding = 'UTF8';\n\nBEGIN;\n\n" + self._crear_y_copiar())
+        self.iniciado = True
+
+    def escribir(self, registros):
+        """Escribe los registros como filas CSV del COPY y devuelve cuántos se escribieron"""
+        if self.filas_por_bloque:
+            for linea in lineas_copy(registros, self.ubicaciones, self.columnas):
+                self.pendientes.append(linea)
+                if len(self.pendientes) >= self.filas_por_bloque:
+                    self._grupo()
+            return len(registros)
+        if not self.iniciado:
+            self._iniciar()
+        lineas = lineas_copy(registros, self.ubicaciones, self.columnas)
+        self.escribir_sql(''.join(linea + '\n' for linea in lineas))
+        return len(registros)
+
+    def cerrar(self):
+        """Termina el COPY y escribe el INSERT ... SELECT hacia juguetes"""
+        if self.filas_por_bloque:
+            self._grupo()
+            return
+        if not self.iniciado:
+            self._iniciar()
+        self.escribir_sql(self._insert() + "COMMIT;\n")
+
+
+def crear_escritor(formato, escribir, ubicaciones, columnas, tamano_lote=TAMANO_LOTE, upsert=False, bloques=None):
+    """
+    Escritor para los formatos multi y copy. escribir recibe cada trozo de SQL
+    (por ejemplo archivo.write) y ubicaciones asigna la clave de ubicación de
+    cada registro. El formato inserts lo escribe cada script.
+
+    Con bloques (SalidaPorBloques) las sentencias se escriben en sus
+    transacciones numeradas en lugar de en escribir.
+    """
+    if formato == 'multi':
+        if bloques is not None:
+            escribir = bloques.escritor(tamano_lote)
+        return EscritorMultiInsert(escribir, ubicaciones, columnas, tamano_lote, upsert)
+    if formato == 'copy':
+        if bloques is not None:
+            return EscritorCopy(bloques.escritor(bloques.filas_por_bloque), ubicaciones, columnas, upsert,
+                                bloques.filas_por_bloque)
+        return EscritorCopy(escribir, ubicaciones, columnas, upsert)
+    raise ValueError(f"Formato de salida desconocido: {formato}")
+
+
+class SalidaPorBloques:
+    """
+    Divide las sentencias en transacciones numeradas de unas filas_por_bloque
+    filas, para ejecutarlas con ejecutar_sql.py y continuar desde el último
+    bloque si algo falla:
+
+        -- BLOQUE 1
+        BEGIN;
+        ...sentencias...
+        COMMIT;
+
+    Cada sentencia va entera en un bloque. write(sql) escribe una sentencia de
+    una fila (se puede pasar en lugar del archivo); escritor(filas) devuelve una
+    función para sentencias de varias filas (formatos multi y lotes).
+    """
+
+    def __init__(self, escribir, filas_por_bloque):
+        if filas_por_bloque < 1:
+            raise ValueError("filas_por_bloque debe ser mayor que 0")
+        self.escribir_sql = escribir
+        self.filas_por_bloque = filas_por_bloque
+        self.bloques = 0
+        self.filas = 0
+        self.abierto = False
+
+    def sentencia(self, sql, filas=1):
+        """Escribe una sentencia de filas filas y cierra el bloque al completarlo"""
+        if not self.abierto:
+            self.bloques += 1
+            self.escribir_sql(f"{MARCA_BLOQUE}{self.bloques}\nBEGIN;\n\n")
+            self.abierto = True
+        self.escribir_sql(sql)
+        self.filas += filas
+        if self.filas >= self.filas_por_bloque:
+            self._cerrar_bloque()
+
+    def write(self, sql):
+        self.sentencia(sql)
+
+    def escritor(self, filas):
+        """Función que escribe cada sentencia como de filas filas"""
+        return lambda sql: self.sentencia(sql, filas)
+
+    def _cerrar_bloque(self):
+        if self.abierto:
+            self.escribir_sql("COMMIT;\n\n")
+            self.abierto = False
+            self.filas = 0
+
+    def cerrar(self):
+        """Cierra el último bloque y devuelve cuántos bloques se escribieron"""
+        self._cerrar_bloque()
+        return self.bloques
+
+
+def escribir_updates_por_lotes(escribir, empresa_id, clave, columnas, filas, tamano_lote=TAMANO_LOTE,
+                               omitir_nulos=False):
+    """
+    Escribe UPDATEs de juguetes basados en conjuntos: cada sentencia actualiza
+    hasta tamano_lote juguetes desde un VALUES unido por la columna clave
+    (item o codigo) dentro de la empresa.
+
+    Args:
+        escribir: recibe cada sentencia (por ejemplo archivo.write)
+        clave: columna de juguetes que identifica el juguete ('item' o 'codigo')
+        columnas: {columna: tipo SQL} de los valores a actualizar (los TEXT van entre comillas)
+        filas: lista de tuplas (clave, valor, ...) sin claves repetidas; None = NULL
+        omitir_nulos: con True un None deja el valor actual (COALESCE) en lugar de NULL
+
+    Devuelve la cantidad de sentencias escritas.
+    """
+    nombres = list(columnas)
+    encabezado = _asignaciones_update(columnas, omitir_nulos) + "FROM (VALUES\n"
+    final = (f"\n) AS v({clave}, {', '.join(nombres)})\n"
+             f"WHERE j.{clave} = v.{clave}\n"
+             f"    AND j.empresa_id = {empresa_id};\n\n")
+
+    formatos = [sql_texto if tipo == 'TEXT' else sql_numero for tipo in columnas.values()]
+    tamano_lote = max(1, tamano_lote)
+    sentencias = 0
+    for inicio in range(0, len(filas), tamano_lote):
+        valores = [
+            f"    ({sql_texto(fila[0])}, {', '.join(f(valor) for f, valor in zip(formatos, fila[1:]))})"
+            for fila in filas[inicio:inicio + tamano_lote]
+        ]
+        escribir(encabezado + ',\n'.join(valores) + final)
+        sentencias += 1
+    return sentencias
+
+
+def escribir_updates_por_ubicacion(escribir, ubicaciones, campos, registros, tamano_lote=TAMANO_LOTE):
+    """
+    Escribe UPDATEs de juguetes por (codigo, ubicación) para el modo incremental:
+    cada sentencia actualiza los campos indicados de hasta tamano_lote registros
+    desde un VALUES unido a la tabla de ubicaciones.
+
+    Args:
+        escribir: recibe cada sentencia (por ejemplo archivo.write)
+        ubicaciones: Ubicaciones de la importación (asigna la clave de ubicación)
+        campos: columnas de juguetes a actualizar (todas con el mismo valor nuevo de registros)
+        registros: DataFrame con codigo, ubicacion_tipo, ubicacion_nombre y los campos
+
+    Devuelve la cantidad de sentencias escritas.
+    """
+    campos = list(campos)
+    asignaciones = [f"    {campo} = {_seleccion_campo('v', campo)}," for campo in campos]
+    encabezado = "UPDATE juguetes j\nSET\n" + '\n'.join(asignaciones) + "\n    updated_at = NOW()\nFROM (VALUES\n"
+    final = (f"\n) AS v(codigo, ubicacion, {', '.join(campos)})\n"
+             f"JOIN {TABLA_UBICACIONES} u ON u.clave = v.ubicacion\n"
+             "WHERE j.codigo = v.codigo\n"
+             f"    AND j.empresa_id = {ubicaciones.empresa_id}\n"
+             "    AND (j.bodega_id = u.bodega_id OR j.tienda_id = u.tienda_id);\n\n")
+
+    formatos = [sql_texto if campo in COLUMNAS_TEXTO else sql_numero for campo in campos]
+    datos = [registros['codigo'].tolist(), ubicaciones.claves(registros).tolist()]
+    datos += [registros[campo].tolist() for campo in campos]
+    valores = [
+        f"    ({sql_texto(codigo)}, {clave}, {', '.join(formato(v) for formato, v in zip(formatos, fila))})"
+        for codigo, clave, *fila in zip(*datos)
+    ]
+
+    tamano_lote = max(1, tamano_lote)
+    sentencias = 0
+    for inicio in range(0, len(valores), tamano_lote):
+        escribir(encabezado + ',\n'.join(valores[inicio:inicio + tamano_lote]) + final)
+        sentencias += 1
+    return sentencias
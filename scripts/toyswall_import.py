@@ -0,0 +1,140 @@
+"""
+toyswall-import: un solo comando para los scripts de importación
+
+Subcomandos:
+
+    insert         INSERT de juguetes desde el Excel de inventario (excel_to_sql.py)
+    procesar       INSERT de juguetes con procesar_inventario.py
+    precios        UPDATE de precio_min y precio_por_mayor desde los Excel de precios
+                   (actualizar_precios_desde_excel.py)
+    precios-mayor  UPDATE de precio_por_mayor (actualizar_precios_por_mayor_desde_excel.py)
+    bultos         UPDATE de numero_bultos y cantidad_por_bulto (actualizar_bultos_desde_excel.py)
+
+Cada subcomando acepta los mismos argumentos que su script (ver opciones.py) y
+genera exactamente lo mismo. Lo que cambia es el arranque: los scripts importan
+pandas al cargarse, así que hasta --help o un argumento mal escrito tardan cerca
+de un segundo. Aquí el módulo del script (y con él pandas y openpyxl) se importa
+solo después de validar los argumentos, cuando hay un archivo que procesar:
+--help, los errores de argumentos y --encabezados terminan en milisegundos.
+
+Los archivos pueden ser Excel, CSV o Parquet (lectura.formato_archivo).
+
+Con --encabezados no se procesa nada: se leen solo los encabezados de los Excel
+(lectura.leer_encabezados), se muestra a qué columna estándar corresponde cada
+uno y se termina con error si falta alguna columna requerida. Sirve para revisar
+un archivo nuevo antes de una importación larga o desde un cron.
+
+Uso:
+    python toyswall_import.py <subcomando> <argumentos del script> [--encabezados]
+    ./toyswall-import <subcomando> <argumentos del script> [--encabezados]
+
+Ejemplo:
+    ./toyswall-import insert inventario.xlsx 1 --formato copy
+    ./toyswall-import bultos inventario.xlsx 1 --formato lotes --commit-cada 20000
+    ./toyswall-import precios "PRECIO FINAL.xlsx" "PRECIOS MAYORISTAA (1).xlsx" 1 --encabezados
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+import columnas
+import opciones
+from lectura import leer_encabezados
+
+# Por subcomando: módulo del script (se importa al ejecutar), sus opciones y,
+# para --encabezados, el mapeo y las columnas requeridas de cada archivo
+SUBCOMANDOS = {
+    'insert': {
+        'modulo': 'excel_to_sql',
+        'opciones': opciones.opciones_insert,
+        'ayuda': "INSERT de juguetes desde el Excel de inventario (excel_to_sql.py)",
+        'archivos': [('excel_file', columnas.COLUMNAS_INVENTARIO, columnas.REQUERIDAS_INVENTARIO)],
+    },
+    'procesar': {
+        'modulo': 'procesar_inventario',
+        'opciones': opciones.opciones_procesar,
+        'ayuda': "INSERT de juguetes con procesar_inventario.py",
+        'archivos': [('excel_file', columnas.COLUMNAS_PROCESAR, columnas.REQUERIDAS_PROCESAR)],
+    },
+    'precios': {
+        'modulo': 'actualizar_precios_desde_excel',
+        'opciones': opciones.opciones_precios,
+        'ayuda': "UPDATE de precio_min y precio_por_mayor desde los Excel de precios (actualizar_precios_desde_excel.py)",
+        'archivos': [('precio_final_file', columnas.COLUMNAS_PRECIO_FINAL, columnas.REQUERIDAS_PRECIO_FINAL),
+                     ('precios_mayorista_file', columnas.COLUMNAS_MAYORISTA, columnas.REQUERIDAS_MAYORISTA)],
+    },
+    'precios-mayor': {
+        'modulo': 'actualizar_precios_por_mayor_desde_excel',
+        'opciones': opciones.opciones_precios_mayor,
+        'ayuda': "UPDATE de precio_por_mayor desde el Excel de inventario (actualizar_precios_por_mayor_desde_excel.py)",
+        'archivos': [('excel_file', columnas.COLUMNAS_PRECIOS_MAYOR, columnas.REQUERIDAS_PRECIOS_MAYOR)],
+    },
+    'bultos': {
+        'modulo': 'actualizar_bultos_desde_excel',
+        'opciones': opciones.opciones_bultos,
+        'ayuda': "UPDATE de numero_bultos y cantidad_por_bulto (actualizar_bultos_desde_excel.py)",
+        'archivos': [('excel_file', columnas.COLUMNAS_BULTOS, columnas.REQUERIDAS_BULTOS)],
+    },
+}
+
+
+def mostrar_encabezados(archivo, column_mapping, requeridas):
+    """
+    Muestra las columnas del archivo y la columna estándar de cada una;
+    devuelve las columnas requeridas que faltan
+    """
+    nombres = [nombre.strip() for nombre in leer_encabezados(archivo)]
+    mapeo = columnas.mapear_columnas(nombres, column_mapping)
+    print(f"{os.path.basename(archivo)}: {len(nombres)} columnas")
+    for nombre in nombres:
+        estandar = mapeo.get(nombre)
+        print(f"  {nombre:<30} → {estandar}" if estandar else f"  {nombre:<30}   (no se usa)")
+    faltantes = [columna for columna in requeridas if columna not in mapeo.values()]
+    if faltantes:
+        print(f"✗ Faltan columnas requeridas: {', '.join(faltantes)}")
+    else:
+        print("✓ Están todas las columnas requeridas")
+    return faltantes
+
+
+def crear_parser():
+    """Parser con un subparser por subcomando (no importa los scripts)"""
+    parser = argparse.ArgumentParser(
+        description="Importación del inventario y los precios desde Excel: un subcomando por script",
+        epilog="Ejemplo:\n"
+               "  toyswall-import insert inventario.xlsx 1 --formato copy\n"
+               "  toyswall-import bultos inventario.xlsx 1 --encabezados\n"
+               "  toyswall-import precios-mayor inventario.xlsx 1 --cargar\n"
+               "  toyswall-import <subcomando> --help",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest='subcomando', metavar='SUBCOMANDO', required=True)
+    for nombre, subcomando in SUBCOMANDOS.items():
+        subparser = subparsers.add_parser(nombre, help=subcomando['ayuda'], description=subcomando['ayuda'])
+        subcomando['opciones'](subparser)
+        subparser.add_argument('--encabezados', '--headers', action='store_true',
+                               help="Solo mostrar los encabezados del Excel y cómo se mapean, sin procesar el archivo")
+    return parser, subparsers
+
+
+def main(argv=None):
+    parser, subparsers = crear_parser()
+    args = parser.parse_args(argv)
+    subcomando = SUBCOMANDOS[args.subcomando]
+    subparser = subparsers.choices[args.subcomando]
+    opciones.validar(subparser, args)
+
+    if args.encabezados:
+        faltantes = []
+        for argumento, column_mapping, requeridas in subcomando['archivos']:
+            faltantes += mostrar_encabezados(getattr(args, argumento), column_mapping, requeridas)
+        sys.exit(1 if faltantes else 0)
+
+    # Recién aquí se importan el script, pandas y openpyxl
+    importlib.import_module(subcomando['modulo']).ejecutar(subparser, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Resolución de bodegas y tiendas una sola vez por importación.
+
+En lugar de buscar la bodega/tienda con una subconsulta en cada INSERT, cada
+ubicación distinta del archivo recibe una clave y el SQL generado empieza con
+una tabla temporal (ubicaciones_importacion) que la resuelve una sola vez:
+
+    - Sin exportación: la tabla se llena con los nombres del archivo y el mismo
+      SQL busca los IDs en bodegas/tiendas; si alguna ubicación no existe se
+      detiene con un error que las lista, antes de cualquier INSERT
+    - Con la exportación CSV de bodegas y/o tiendas (id, nombre, empresa_id): los
+      IDs se resuelven en Python y las ubicaciones que no existen se reportan
+      antes de escribir el SQL
+
+Las filas se unen a la tabla por su clave, así nunca se inserta un juguete con
+bodega_id y tienda_id en NULL por una ubicación que no se encontró.
+"""
+
+import numpy as np
+import pandas as pd
+
+from salida_sql import sql_texto, sql_numero, TABLA_UBICACIONES
+
+TABLAS = {'bodega': 'bodegas', 'tienda': 'tiendas'}
+
+
+def leer_ubicaciones_csv(archivo_csv, empresa_id):
+    """
+    Lee la exportación CSV de la tabla bodegas o tiendas y devuelve
+    {nombre en minúsculas: id} de la empresa. Si hay nombres repetidos
+    (sin distinguir mayúsculas) se usa el menor id.
+    """
+    df = pd.read_csv(archivo_csv, dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip().str.lower()
+    faltantes = [col for col in ['id', 'nombre'] if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"{archivo_csv}: faltan las columnas {', '.join(faltantes)}")
+    if 'empresa_id' in df.columns:
+        df = df[df['empresa_id'].str.strip() == str(empresa_id)]
+
+    ids = {}
+    for id_ubicacion, nombre in zip(df['id'].str.strip().astype(int), df['nombre']):
+        clave = nombre.strip().lower()
+        ids[clave] = min(ids.get(clave, id_ubicacion), id_ubicacion)
+    return ids
+
+
+class Ubicaciones:
+    """
+    Ubicaciones distintas de una importación. A cada (tipo, nombre) se le asigna
+    una clave entera la primera vez que aparece y se cuentan sus filas.
+
+    conocidas: {'bodega': {nombre en minúsculas: id}, 'tienda': {...}} con las
+    exportaciones CSV disponibles; los tipos sin exportación se resuelven en el SQL.
+    """
+
+    def __init__(self, empresa_id, conocidas=None):
+        self.empresa_id = empresa_id
+        self.conocidas = conocidas or {}
+        self.lista = []
+        self.claves_por_ubicacion = {}
+        self.filas = []
+
+    def claves(self, registros):
+        """Arreglo con la clave de la ubicación de cada registro (DataFrame de parsear_columnas)"""
+        # El tipo nunca contiene '/', así "tipo/nombre" identifica la ubicación
+        texto = registros['ubicacion_tipo'].astype(object) + '/' + registros['ubicacion_nombre'].astype(object)
+        codigos, unicos = pd.factorize(texto.to_numpy(dtype=object))
+        claves_unicas = np.array([self._clave(tuple(u.split('/', 1))) for u in unicos], dtype=np.int64)
+        cantidades = np.bincount(codigos, minlength=len(unicos))
+        for clave, cantidad in zip(claves_unicas, cantidades):
+            self.filas[clave - 1] += int(cantidad)
+        return claves_unicas[codigos]
+
+    def ids_conocidos(self, registros):
+        """
+        Arreglo con el ID de la bodega/tienda de cada registro según las
+        exportaciones CSV (NaN si el tipo no tiene exportación o no se encontró).
+        A diferencia de claves() no cuenta las filas de cada ubicación
+        """
+        texto = registros['ubicacion_tipo'].astype(object) + '/' + registros['ubicacion_nombre'].astype(object)
+        codigos, unicos = pd.factorize(texto.to_numpy(dtype=object))
+        ids = [self._id_conocido(*u.split('/', 1)) for u in unicos]
+        return np.array([np.nan if i is None else i for i in ids], dtype=float)[codigos]
+
+    def _clave(self, ubicacion):
+        clave = self.claves_por_ubicacion.get(ubicacion)
+        if clave is None:
+            self.lista.append(ubicacion)
+            self.filas.append(0)
+            clave = len(self.lista)
+            self.claves_por_ubicacion[ubicacion] = clave
+        return clave
+
+    def _id_conocido(self, tipo, nombre):
+        """ID desde la exportación CSV, o None si el tipo no tiene exportación o no se encontró"""
+        if tipo not in self.conocidas:
+            return None
+        return self.conocidas[tipo].get(nombre.strip().lower())
+
+    def desconocidas(self):
+        """Lista de (tipo, nombre, filas) que no están en las exportaciones CSV"""
+        return [
+            (tipo, nombre, filas)
+            for (tipo, nombre), filas in zip(self.lista, self.filas)
+            if tipo in self.conocidas and self._id_conocido(tipo, nombre) is None
+        ]
+
+    def reportar_desconocidas(self):
+        """
+        Imprime las ubicaciones que no existen según las exportaciones CSV.
+        Devuelve True si todas existen.
+        """
+        desconocidas = self.desconocidas()
+        if not desconocidas:
+            return True
+        print(f"\n✗ Ubicaciones que no existen en la empresa {self.empresa_id} ({len(desconocidas)}):")
+        for tipo, nombre, filas in desconocidas:
+            print(f"  - {tipo.capitalize()}/ {nombre} ({filas} filas)")
+        print("Crea estas bodegas/tiendas (o corrige el Excel) y vuelve a generar el SQL")
+        return False
+
+    def sql(self):
+        """
+        SQL que crea y llena la tabla temporal de ubicaciones; va antes de los
+        INSERT de juguetes
+        """
+        empresa_id = self.empresa_id
+        filas = []
+        for clave, (tipo, nombre) in enumerate(self.lista, start=1):
+            id_conocido = self._id_conocido(tipo, nombre)
+            bodega_id = id_conocido if tipo == 'bodega' else None
+            tienda_id = id_conocido if tipo == 'tienda' else None
+            filas.append(f"    ({clave}, {sql_texto(tipo)}, {sql_texto(nombre)}, "
+                         f"{sql_numero(bodega_id)}, {sql_numero(tienda_id)})")
+
+        partes = [
+            "-- Ubicaciones del archivo: se resuelven una sola vez",
+            f"CREATE TEMP TABLE IF NOT EXISTS {TABLA_UBICACIONES} (",
+            "    clave INTEGER PRIMARY KEY,",
+            "    tipo TEXT NOT NULL,",
+            "    nombre TEXT NOT NULL,",
+            "    bodega_id INTEGER,",
+            "    tienda_id INTEGER",
+            ");",
+            f"TRUNCATE {TABLA_UBICACIONES};",
+            "",
+        ]
+        if filas:
+            partes += [
+                f"INSERT INTO {TABLA_UBICACIONES} (clave, tipo, nombre, bodega_id, tienda_id) VALUES",
+                ',\n'.join(filas) + ';',
+                "",
+            ]
+        for tipo, tabla in TABLAS.items():
+            if tipo in self.conocidas:
+                continue
+            columna = f"{tipo}_id"
+            partes += [
+                f"UPDATE {TABLA_UBICACIONES} u",
+                f"SET {columna} = (SELECT MIN(t.id) FROM {tabla} t WHERE t.empresa_id = {empresa_id} AND LOWER(t.nombre) = LOWER(u.nombre))",
+                f"WHERE u.tipo = '{tipo}';",
+                "",
+            ]
+        partes += [
+            "DO $$",
+            "DECLARE",
+            "    faltantes TEXT;",
+            "BEGIN",
+            "    SELECT string_agg(initcap(tipo) || '/ ' || nombre, ', ' ORDER BY clave) INTO faltantes",
+            f"    FROM {TABLA_UBICACIONES}",
+            "    WHERE bodega_id IS NULL AND tienda_id IS NULL;",
+            "    IF faltantes IS NOT NULL THEN",
+            f"        RAISE EXCEPTION 'Ubicaciones que no existen en la empresa {empresa_id}: %', faltantes;",
+            "    END IF;",
+            "END $$;",
+            "",
+            "",
+        ]
+        return '\n'.join(partes)
+
+    def resumen(self):
+        """Línea de resumen para imprimir al final"""
+        resueltas = sum(1 for tipo, nombre in self.lista if self._id_conocido(tipo, nombre) is not None)
+        if resueltas:
+            return f"✓ Ubicaciones distintas: {len(self.lista)} ({resueltas} resueltas desde CSV)"
+        return f"✓ Ubicaciones distintas: {len(self.lista)} (se resuelven una sola vez al ejecutar el SQL)"
+
+
+def cargar_ubicaciones(empresa_id, bodegas_csv=None, tiendas_csv=None):
+    """Crea las Ubicaciones de una importación con las exportaciones CSV que se hayan indicado"""
+    conocidas = {}
+    if bodegas_csv:
+        conocidas['bodega'] = leer_ubicaciones_csv(bodegas_csv, empresa_id)
+    if tiendas_csv:
+        conocidas['tienda'] = leer_ubicaciones_csv(tiendas_csv, empresa_id)
+    return Ubicaciones(empresa_id, conocidas)
@@ -124,6 +124,18 @@ CREATE TABLE IF NOT EXISTS juguetes (
     )
 );
 
+-- Tabla: clientes (antes de ventas, que la referencia)
+CREATE TABLE IF NOT EXISTS clientes (
+    id SERIAL PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    telefono VARCHAR(20),
+    correo VARCHAR(255),
+    direccion TEXT,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Tabla: ventas
 CREATE TABLE IF NOT EXISTS ventas (
     id SERIAL PRIMARY KEY,
@@ -200,18 +212,6 @@ CREATE TABLE IF NOT EXISTS planes_movimiento (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
--- Tabla: clientes
-CREATE TABLE IF NOT EXISTS clientes (
-    id SERIAL PRIMARY KEY,
-    nombre VARCHAR(100) NOT NULL,
-    telefono VARCHAR(20),
-    correo VARCHAR(255),
-    direccion TEXT,
-    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
-
 -- Tabla: pagos (para pagos parciales de ventas a crédito)
 CREATE TABLE IF NOT EXISTS pagos (
     id SERIAL PRIMARY KEY,
@@ -238,6 +238,15 @@ CREATE TABLE IF NOT EXISTS logs_deshacer_ventas (
     creado_en TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Secuencia y tabla de los números de código de venta (ver generar_codigo_venta)
+CREATE SEQUENCE IF NOT EXISTS codigos_venta_seq;
+
+CREATE TABLE IF NOT EXISTS codigos_venta_dia (
+    fecha DATE PRIMARY KEY,
+    base BIGINT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Agregar cliente_id y abono a ventas si no existen (para compatibilidad con instalaciones existentes)
 DO $$
 BEGIN
@@ -765,48 +774,59 @@ CREATE POLICY "logs_deshacer_ventas_insert"
     ON logs_deshacer_ventas FOR INSERT
     WITH CHECK (true);
 
+-- Habilitar RLS para codigos_venta_dia (generar_codigo_venta corre con el rol de quien la llama)
+ALTER TABLE codigos_venta_dia ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "codigos_venta_dia_select" ON codigos_venta_dia;
+CREATE POLICY "codigos_venta_dia_select"
+    ON codigos_venta_dia FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "codigos_venta_dia_insert" ON codigos_venta_dia;
+CREATE POLICY "codigos_venta_dia_insert"
+    ON codigos_venta_dia FOR INSERT
+    WITH CHECK (true);
+
 -- ============================================
 -- 7. FUNCIONES AUXILIARES
 -- ============================================
 
+-- Continuar la numeración de los códigos ya emitidos hoy para no repetirlos
+INSERT INTO codigos_venta_dia (fecha, base)
+SELECT CURRENT_DATE, nextval('codigos_venta_seq') - MAX(SPLIT_PART(codigo_venta, '-', 3)::BIGINT)
+FROM ventas
+WHERE codigo_venta ~ ('^VENT-' || TO_CHAR(CURRENT_DATE, 'YYYYMMDD') || '-[0-9]{1,9}$')
+HAVING COUNT(*) > 0
+ON CONFLICT (fecha) DO UPDATE
+    SET base = LEAST(codigos_venta_dia.base, EXCLUDED.base);
+
 -- Función para generar código de venta único
 CREATE OR REPLACE FUNCTION generar_codigo_venta()
 RETURNS TEXT AS $$
 DECLARE
-    nuevo_codigo TEXT;
-    fecha_actual TEXT;
-    contador INTEGER;
-    ultimo_codigo TEXT;
-    partes TEXT[];
+    numero BIGINT;
+    base_dia BIGINT;
+    contador BIGINT;
 BEGIN
-    -- Obtener fecha actual en formato YYYYMMDD
-    fecha_actual := TO_CHAR(CURRENT_DATE, 'YYYYMMDD');
-    
-    -- Buscar el último código de venta del día
-    SELECT codigo_venta
-    INTO ultimo_codigo
-    FROM ventas
-    WHERE codigo_venta LIKE 'VENT-' || fecha_actual || '-%'
-    ORDER BY codigo_venta DESC
-    LIMIT 1;
-    
-    -- Si existe un código del día, extraer el contador
-    IF ultimo_codigo IS NOT NULL THEN
-        -- Dividir por guiones: VENT-YYYYMMDD-XXX
-        partes := string_to_array(ultimo_codigo, '-');
-        IF array_length(partes, 1) >= 3 THEN
-            contador := CAST(partes[3] AS INTEGER) + 1;
-        ELSE
-            contador := 1;
-        END IF;
-    ELSE
-        contador := 1;
+    numero := nextval('codigos_venta_seq');
+
+    SELECT base INTO base_dia FROM codigos_venta_dia WHERE fecha = CURRENT_DATE;
+    IF base_dia IS NULL THEN
+        -- Primera venta del día: los números de hoy cuentan desde aquí
+        INSERT INTO codigos_venta_dia (fecha, base) VALUES (CURRENT_DATE, numero - 1)
+        ON CONFLICT (fecha) DO NOTHING;
+        SELECT base INTO base_dia FROM codigos_venta_dia WHERE fecha = CURRENT_DATE;
     END IF;
-    
-    -- Generar código: VENT-YYYYMMDD-XXX
-    nuevo_codigo := 'VENT-' || fecha_actual || '-' || LPAD(contador::TEXT, 3, '0');
-    
-    RETURN nuevo_codigo;
+
+    -- Si otra caja empezó el día con un valor posterior, tomar otro
+    WHILE numero <= base_dia LOOP
+        numero := nextval('codigos_venta_seq');
+    END LOOP;
+    contador := numero - base_dia;
+
+    -- Generar código: VENT-YYYYMMDD-XXX (desde la venta 1000 del día, con más cifras)
+    RETURN 'VENT-' || TO_CHAR(CURRENT_DATE, 'YYYYMMDD') || '-'
+        || LPAD(contador::TEXT, GREATEST(3, LENGTH(contador::TEXT)), '0');
 END;
 $$ LANGUAGE plpgsql;
 
@@ -945,6 +965,24 @@ BEGIN
     END IF;
 END $$;
 
+-- Paso 2: Índice único por ubicación (agregar_indice_unico_juguetes.sql), lo usa
+-- --upsert de los scripts de importación. Si todavía hay un mismo código repetido
+-- en una ubicación (con distinto nombre o foto) ejecuta esa migración
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM juguetes
+        GROUP BY empresa_id, codigo, bodega_id, tienda_id
+        HAVING COUNT(*) > 1
+    ) THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_juguetes_empresa_codigo_ubicacion
+            ON juguetes (empresa_id, codigo, bodega_id, tienda_id) NULLS NOT DISTINCT;
+    ELSE
+        RAISE NOTICE 'Hay códigos repetidos en una misma ubicación: ejecuta migrations/agregar_indice_unico_juguetes.sql';
+    END IF;
+END $$;
+
 -- ============================================
 -- 10. VERIFICACIÓN DE DATOS
 -- ============================================
@@ -1033,5 +1071,6 @@ ORDER BY e.nombre;
 -- ✅ Cambio de juguete_id a juguete_codigo en ventas y movimientos (cambiar_juguete_id_a_codigo.sql)
 -- ✅ Tabla clientes y pagos (crear_tabla_clientes.sql)
 -- ✅ Tabla logs_deshacer_ventas (crear_tabla_logs_deshacer_ventas.sql)
+-- ✅ Índice único de juguetes por código y ubicación (agregar_indice_unico_juguetes.sql)
 -- 
 -- ============================================
\ No newline at end of file